@@ -7,11 +7,11 @@ from typing import Optional, List
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
-from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 
 from app.core.security import get_current_user
 from app.core.database import get_database, DatabaseManager
+from app.core.serialization import FastJSONResponse
 from app.services.ai_service import get_ai_service, AIService
 from app.services.mock_service import MockService
 from app.schemas.ai_schemas import (
@@ -63,47 +63,12 @@ async def generate_mock_data(
                 detail="Invalid token: missing user ID",
             )
 
-        # Fetch user plan and quota
-        plan_info = await db.get_user_plan_and_quota(UUID(user_id))
-        if not plan_info:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No plan assigned or plan not found for user.",
-            )
-        daily_quota = plan_info.get("daily_request_quota", 0)
-        monthly_quota = plan_info.get("monthly_token_quota", 0)
-
-        # Fetch current usage
-        from app.core.database import get_usage_stats_for_user
-        usage = await get_usage_stats_for_user(UUID(user_id))
-        requests_today = usage.get("requests_today", 0)
-        tokens_used_this_month = usage.get("tokens_used_this_month", 0)
-
-        # Enforce quota
-        if requests_today >= daily_quota:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail={
-                    "error": "DAILY_QUOTA_EXCEEDED",
-                    "message": f"You have reached your daily request quota ({daily_quota}).",
-                },
-            )
-        if tokens_used_this_month >= monthly_quota:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail={
-                    "error": "MONTHLY_TOKEN_QUOTA_EXCEEDED",
-                    "message": f"You have reached your monthly token quota ({monthly_quota}).",
-                },
-            )
+        # Check quota and count this request in one round trip
+        await _consume_generation_quota(UUID(user_id))
 
         # Generate mock data using AI
         result = await ai_service.generate_mock_data(request, UUID(user_id))
-
-        # Upsert usage stats for the user (production ready)
-        from app.core.database import upsert_usage_stats_for_user
-
-        await upsert_usage_stats_for_user(UUID(user_id), increment={"requests_today": 1})
+        await _record_generation_tokens(UUID(user_id), result.tokens_used)
 
         logger.info(f"AI mock generated for user {user_id}: {request.endpoint}")
         return result
@@ -159,42 +124,12 @@ async def generate_and_save_mock(
                 detail="Invalid token: missing user ID",
             )
 
-        # Fetch user plan and quota
-        plan_info = await db.get_user_plan_and_quota(UUID(user_id))
-        if not plan_info:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No plan assigned or plan not found for user.",
-            )
-        daily_quota = plan_info.get("daily_request_quota", 0)
-        monthly_quota = plan_info.get("monthly_token_quota", 0)
-
-        # Fetch current usage
-        from app.core.database import get_usage_stats_for_user
-        usage = await get_usage_stats_for_user(UUID(user_id))
-        requests_today = usage.get("requests_today", 0)
-        tokens_used_this_month = usage.get("tokens_used_this_month", 0)
-
-        # Enforce quota
-        if requests_today >= daily_quota:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail={
-                    "error": "DAILY_QUOTA_EXCEEDED",
-                    "message": f"You have reached your daily request quota ({daily_quota}).",
-                },
-            )
-        if tokens_used_this_month >= monthly_quota:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail={
-                    "error": "MONTHLY_TOKEN_QUOTA_EXCEEDED",
-                    "message": f"You have reached your monthly token quota ({monthly_quota}).",
-                },
-            )
+        # Check quota and count this request in one round trip
+        await _consume_generation_quota(UUID(user_id))
 
         # Generate mock data using AI
         ai_result = await ai_service.generate_mock_data(request, UUID(user_id))
+        await _record_generation_tokens(UUID(user_id), ai_result.tokens_used)
         # Create mock data object with proper tag handling
         final_tags = []
         if tags:
@@ -237,7 +172,7 @@ async def generate_and_save_mock(
         saved_mock = await mock_service.create_mock(UUID(user_id), mock_data)
 
         logger.info(f"AI-generated mock saved for user {user_id}: {request.endpoint}")
-        return MockResponse(**saved_mock.dict())
+        return MockResponse.from_mock(saved_mock)
 
     except ValidationError as e:
         logger.error(f"Validation error in AI generation: {e}")
@@ -265,7 +200,7 @@ async def generate_and_save_mock(
         )
 
 
-@router.get("/health")
+@router.get("/health", response_class=FastJSONResponse)
 async def ai_health_check(ai_service: AIService = Depends(get_ai_service)):
     """
     Check AI service health and availability
@@ -295,7 +230,7 @@ async def ai_health_check(ai_service: AIService = Depends(get_ai_service)):
 
     except Exception as e:
         logger.error(f"AI health check failed: {str(e)}")
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             content={
                 "status": "unhealthy",
@@ -305,7 +240,7 @@ async def ai_health_check(ai_service: AIService = Depends(get_ai_service)):
         )
 
 
-@router.get("/usage/{user_id}")
+@router.get("/usage/{user_id}", response_class=FastJSONResponse)
 async def get_ai_usage(
     user_id: UUID, 
     current_user: dict = Depends(get_current_user), 
@@ -392,6 +327,59 @@ async def get_ai_usage(
         )
 
 
+async def _consume_generation_quota(user_id: UUID) -> dict:
+    """
+    Admit one AI generation against the user's plan quota.
+
+    The plan lookup, quota check and request counter increment happen atomically
+    in the database, so concurrent generations cannot overshoot the quota. Users
+    without a plan are held to the free plan; if it does not exist they get 403.
+    """
+    from app.core.database import consume_ai_quota_for_user
+
+    quota = await consume_ai_quota_for_user(user_id, requests=1)
+
+    if not quota.get("allowed"):
+        if quota.get("reason") == "NO_PLAN":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No plan assigned or plan not found for user.",
+            )
+        if quota.get("reason") == "MONTHLY_TOKEN_QUOTA_EXCEEDED":
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail={
+                    "error": "MONTHLY_TOKEN_QUOTA_EXCEEDED",
+                    "message": f"You have reached your monthly token quota ({quota.get('monthly_token_quota')}).",
+                },
+            )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={
+                "error": "DAILY_QUOTA_EXCEEDED",
+                "message": f"You have reached your daily request quota ({quota.get('daily_request_quota')}).",
+            },
+        )
+
+    return quota
+
+
+async def _record_generation_tokens(user_id: UUID, tokens_used: Optional[int]) -> None:
+    """Add the tokens reported by the AI provider to the user's usage counters."""
+    if not tokens_used:
+        return
+
+    from app.core.database import consume_ai_quota_for_user
+
+    try:
+        await consume_ai_quota_for_user(
+            user_id, requests=0, tokens=tokens_used, enforce=False
+        )
+    except Exception as e:
+        # The generation already succeeded; don't fail the request over accounting
+        logger.error(f"Failed to record AI token usage for user {user_id}: {e}")
+
+
 async def _get_user_plan_with_fallback(db: DatabaseManager, user_id: UUID) -> dict:
     """
     Get user plan with simplified fallback logic.
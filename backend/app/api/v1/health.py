@@ -6,8 +6,9 @@ import time
 from datetime import datetime
 from fastapi import APIRouter, Depends
 from app.core.config import settings
-from app.core.database import DatabaseManager, get_database
+from app.core.serialization import FastJSONResponse
 from app.schemas.schemas import HealthResponse
+from app.services.health_monitor import HealthMonitor, get_health_monitor
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -16,13 +17,14 @@ start_time = time.time()
 
 
 @router.get("/", response_model=HealthResponse)
-async def health_check(db: DatabaseManager = Depends(get_database)):
+async def health_check(monitor: HealthMonitor = Depends(get_health_monitor)):
     """
     Health check endpoint
-    Returns application status and basic system information
+    Returns application status, basic system information and the health and
+    latency of each dependency from the latest background probe
     """
-    # Check database connectivity
-    db_healthy = await db.health_check()
+    # Latest database probe result (no live call)
+    db_healthy = monitor.is_healthy("supabase")
 
     # Calculate uptime
     uptime = time.time() - start_time
@@ -33,29 +35,63 @@ async def health_check(db: DatabaseManager = Depends(get_database)):
         timestamp=datetime.utcnow(),
         database=db_healthy,
         uptime_seconds=round(uptime, 2),
+        dependencies=monitor.summary(),
     )
 
 
-@router.get("/ready")
-async def readiness_check(db: DatabaseManager = Depends(get_database)):
+@router.get("/ready", response_class=FastJSONResponse)
+async def readiness_check(monitor: HealthMonitor = Depends(get_health_monitor)):
     """
     Readiness check for Kubernetes/Docker health checks
+    Ready when every required dependency has a fresh healthy probe result
     """
-    db_healthy = await db.health_check()
-
-    if db_healthy:
+    if monitor.is_ready():
         return {"status": "ready"}
     else:
         from fastapi import HTTPException, status
 
+        not_ready = [
+            name
+            for name, probe in monitor.probes.items()
+            if probe.required and not monitor.is_healthy(name)
+        ]
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database not ready"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Dependencies not ready: {', '.join(not_ready)}",
         )
 
 
-@router.get("/live")
+@router.get("/live", response_class=FastJSONResponse)
 async def liveness_check():
     """
     Liveness check for Kubernetes/Docker health checks
     """
     return {"status": "alive"}
+
+
+@router.get("/dependencies", response_class=FastJSONResponse)
+async def dependency_status(monitor: HealthMonitor = Depends(get_health_monitor)):
+    """
+    Probe results and recent history of every dependency (debug only)
+    """
+    if not settings.debug:
+        from fastapi import HTTPException, status
+
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    return {"dependencies": monitor.status()}
+
+
+@router.get("/queries", response_class=FastJSONResponse)
+async def query_metrics_snapshot():
+    """
+    Database query latency histograms by table and operation (debug only)
+    """
+    if not settings.debug:
+        from fastapi import HTTPException, status
+
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    from app.core.query_instrumentation import query_metrics
+
+    return {"queries": query_metrics.snapshot()}
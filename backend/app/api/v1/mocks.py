@@ -2,15 +2,33 @@
 Mock management API endpoints
 """
 
+import asyncio
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
-from fastapi.responses import JSONResponse
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    status,
+    Query,
+    Request,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
 import time
 
 from app.core.security import get_current_user, get_optional_user
 from app.core.database import get_database, DatabaseManager
+from app.core.serialization import FastJSONResponse
 from app.services.mock_service import MockService
+from app.services.export_service import (
+    EXPORT_PAGE_SIZE,
+    get_export_writer,
+    prefetch_first_page,
+    stream_export,
+)
+from app.services.import_service import ImportFormatError, import_mocks, parse_import
 from app.models.models import MockStatus, HTTPMethod, MockTemplate
 from app.schemas.schemas import (
     MockCreate,
@@ -23,11 +41,31 @@ from app.schemas.schemas import (
     ErrorResponse,
     TemplateListResponse,
     TemplateResponse,
+    MockBulkCreate,
+    MockBulkUpdate,
+    MockBulkDelete,
+    BulkOperationResponse,
+    MockChangesResponse,
+    ExportRequest,
+    ImportFormat,
+    ImportResponse,
+    BulkConflictStrategy,
 )
 
 router = APIRouter(prefix="/mocks", tags=["mocks"])
 
 
+def _get_user_token(request: Request) -> str:
+    """Extract the caller's JWT so writes run under their RLS policies"""
+    auth_header = request.headers.get("authorization", "")
+    if not auth_header.startswith("Bearer "):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="No authentication token provided",
+        )
+    return auth_header.replace("Bearer ", "")
+
+
 @router.post("/", response_model=MockResponse, status_code=status.HTTP_201_CREATED)
 async def create_mock(
     mock_data: MockCreate,
@@ -61,7 +99,7 @@ async def create_mock(
     service = MockService(db, user_token=user_token)
 
     mock = await service.create_mock(UUID(user_id), mock_data)
-    return MockResponse(**mock.dict())
+    return MockResponse.from_mock(mock)
 
 
 @router.get("/", response_model=MockListResponse)
@@ -71,7 +109,8 @@ async def list_mocks(
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
     status_filter: Optional[MockStatus] = Query(None, description="Filter by status"),
     search: Optional[str] = Query(
-        None, description="Search in name, description, endpoint"
+        None,
+        description="Full-text search in name, description, endpoint (ranked, prefix matching)",
     ),
     tags: Optional[List[str]] = Query(None, description="Filter by tags"),
     current_user: dict = Depends(get_current_user),
@@ -94,7 +133,7 @@ async def list_mocks(
         UUID(user_id), pagination, status_filter, search, tags
     )
 
-    mock_responses = [MockResponse(**mock.dict()) for mock in mocks]
+    mock_responses = [MockResponse.from_mock(mock) for mock in mocks]
 
     return MockListResponse.create(
         data=mock_responses,
@@ -105,6 +144,166 @@ async def list_mocks(
     )
 
 
+@router.post("/bulk", response_model=BulkOperationResponse)
+async def bulk_create_mocks(
+    bulk_data: MockBulkCreate,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseManager = Depends(get_database),
+):
+    """Create many mocks at once with per-item results"""
+    service = MockService(db, user_token=_get_user_token(request))
+    user_id = current_user.get("sub") or current_user.get("id")
+
+    results = await service.bulk_create_mocks(
+        UUID(user_id), bulk_data.mocks, bulk_data.on_conflict
+    )
+    return BulkOperationResponse.create(
+        results, message=f"Processed {len(results)} mocks"
+    )
+
+
+@router.patch("/bulk", response_model=BulkOperationResponse)
+async def bulk_update_mocks(
+    bulk_data: MockBulkUpdate,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseManager = Depends(get_database),
+):
+    """Update many mocks at once with per-item results"""
+    service = MockService(db, user_token=_get_user_token(request))
+    user_id = current_user.get("sub") or current_user.get("id")
+
+    results = await service.bulk_update_mocks(UUID(user_id), bulk_data.mocks)
+    return BulkOperationResponse.create(
+        results, message=f"Processed {len(results)} mocks"
+    )
+
+
+@router.delete("/bulk", response_model=BulkOperationResponse)
+async def bulk_delete_mocks(
+    bulk_data: MockBulkDelete,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseManager = Depends(get_database),
+):
+    """Delete many mocks at once with per-item results"""
+    service = MockService(db, user_token=_get_user_token(request))
+    user_id = current_user.get("sub") or current_user.get("id")
+
+    results = await service.bulk_delete_mocks(UUID(user_id), bulk_data.ids)
+    return BulkOperationResponse.create(
+        results, message=f"Processed {len(results)} mocks"
+    )
+
+
+@router.post("/import", response_model=ImportResponse)
+async def import_mocks_from_file(
+    request: Request,
+    file: UploadFile = File(
+        ..., description="MockBox export, OpenAPI 3 (JSON/YAML), Postman or HAR file"
+    ),
+    format: Optional[ImportFormat] = Query(
+        None, description="File format (detected if omitted)"
+    ),
+    on_conflict: BulkConflictStrategy = Query(
+        BulkConflictStrategy.SKIP, description="How to handle mocks that already exist"
+    ),
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseManager = Depends(get_database),
+):
+    """
+    Create mocks from an API description or capture. The file is parsed
+    incrementally and mocks are written in chunked bulk inserts; the response
+    reports the outcome of every entry by its position in the file.
+    """
+    service = MockService(db, user_token=_get_user_token(request))
+    user_id = current_user.get("sub") or current_user.get("id")
+
+    try:
+        # Format detection reads the start of the upload, which may be on disk
+        import_format, items = await asyncio.to_thread(parse_import, file.file, format)
+        results = await import_mocks(service, UUID(user_id), items, on_conflict)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    response = ImportResponse.create(
+        results, message=f"Imported {len(results)} entries from {import_format.value}"
+    )
+    response.format = import_format
+    return response
+
+
+@router.post("/export")
+async def export_mocks(
+    export_request: ExportRequest,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseManager = Depends(get_database),
+):
+    """
+    Export mocks as MockBox JSON, a Postman collection, an OpenAPI document or
+    an Insomnia export. The file is streamed while paging through the mocks,
+    optionally gzip-compressed. The first page is read before the response
+    starts, so failing to read the mocks returns an error status.
+    """
+    service = MockService(db, user_token=_get_user_token(request))
+    user_id = current_user.get("sub") or current_user.get("id")
+    writer = get_export_writer(
+        export_request.format,
+        include_headers=export_request.include_headers,
+        include_stats=export_request.include_stats,
+    )
+
+    filename = f"mockbox-export.{writer.extension}"
+    media_type = writer.media_type
+    if export_request.gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    pages = await prefetch_first_page(
+        service.iter_mocks(
+            UUID(user_id), export_request.mock_ids, page_size=EXPORT_PAGE_SIZE
+        )
+    )
+    return StreamingResponse(
+        stream_export(pages, writer, compress=export_request.gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/changes", response_model=MockChangesResponse)
+async def list_mock_changes(
+    request: Request,
+    since: int = Query(
+        0, ge=0, description="Cursor from the previous response (0 for a full sync)"
+    ),
+    limit: int = Query(500, ge=1, le=1000, description="Maximum changes to return"),
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseManager = Depends(get_database),
+):
+    """
+    Mocks created, updated or deleted since the cursor, for incremental sync.
+
+    Keep calling with the returned cursor while `has_more` is true. A 410
+    response means the cursor is too old and the client must resync from 0.
+    """
+    service = MockService(db, user_token=_get_user_token(request))
+    user_id = current_user.get("sub") or current_user.get("id")
+    changed, deleted, cursor, has_more = await service.list_mock_changes(
+        UUID(user_id), since, limit
+    )
+
+    return MockChangesResponse(
+        changed=[MockResponse.from_mock(mock) for mock in changed],
+        deleted=deleted,
+        cursor=cursor,
+        has_more=has_more,
+        message=f"{len(changed)} changed, {len(deleted)} deleted",
+    )
+
+
 @router.get("/{mock_id}", response_model=MockResponse)
 async def get_mock(
     mock_id: UUID,
@@ -121,7 +320,7 @@ async def get_mock(
             status_code=status.HTTP_404_NOT_FOUND, detail="Mock not found"
         )
 
-    return MockResponse(**mock.dict())
+    return MockResponse.from_mock(mock)
 
 
 @router.put("/{mock_id}", response_model=MockResponse)
@@ -135,7 +334,7 @@ async def update_mock(
     service = MockService(db)
     user_id = current_user.get("sub") or current_user.get("id")
     mock = await service.update_mock(mock_id, UUID(user_id), update_data)
-    return MockResponse(**mock.dict())
+    return MockResponse.from_mock(mock)
 
 
 @router.delete("/{mock_id}", response_model=BaseResponse)
@@ -183,7 +382,7 @@ async def simulate_mock(
     result = await service.simulate_mock(mock_id, request_data)
 
     # Return actual mock response with proper status code and headers
-    return JSONResponse(
+    return FastJSONResponse(
         content=result["response_data"],
         status_code=result["status_code"],
         headers=result["headers"],
@@ -214,42 +413,30 @@ async def toggle_mock_status(
     update_data = MockUpdate(status=new_status)
 
     updated_mock = await service.update_mock(mock_id, UUID(user_id), update_data)
-    return MockResponse(**updated_mock.dict())
+    return MockResponse.from_mock(updated_mock)
 
 
 @router.post("/{mock_id}/duplicate", response_model=MockResponse)
 async def duplicate_mock(
     mock_id: UUID,
+    request: Request,
     current_user: dict = Depends(get_current_user),
     db: DatabaseManager = Depends(get_database),
 ):
     """Duplicate an existing mock"""
-    service = MockService(db)
-
-    user_id = current_user.get("sub") or current_user.get("id")
-    # Get original mock
-    original_mock = await service.get_mock(mock_id, UUID(user_id))
-    if not original_mock:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Mock not found"
-        )
-
-    # Create duplicate with modified name and endpoint
-    duplicate_data = MockCreate(
-        name=f"{original_mock.name} (Copy)",
-        description=original_mock.description,
-        endpoint=f"{original_mock.endpoint}-copy",
-        method=original_mock.method,
-        response=original_mock.response,
-        headers=original_mock.headers,
-        status_code=original_mock.status_code,
-        delay_ms=original_mock.delay_ms,
-        is_public=original_mock.is_public,
-        tags=original_mock.tags,
+    # Extract JWT token from request headers so the insert passes RLS
+    auth_header = request.headers.get("authorization", "")
+    user_token = (
+        auth_header.replace("Bearer ", "")
+        if auth_header.startswith("Bearer ")
+        else None
     )
 
-    duplicate_mock = await service.create_mock(UUID(user_id), duplicate_data)
-    return MockResponse(**duplicate_mock.dict())
+    service = MockService(db, user_token=user_token)
+
+    user_id = current_user.get("sub") or current_user.get("id")
+    duplicate_mock = await service.duplicate_mock(mock_id, UUID(user_id))
+    return MockResponse.from_mock(duplicate_mock)
 
 
 @router.post(
@@ -268,13 +455,17 @@ async def create_test_mock(
     test_user_id = uuid4()  # Generate a temporary user ID for testing
 
     mock = await service.create_mock(test_user_id, mock_data)
-    return MockResponse(**mock.dict())
+    return MockResponse.from_mock(mock)
 
 
 @router.get("/public", response_model=MockListResponse)
 async def list_public_mocks(
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
+    search: Optional[str] = Query(
+        None,
+        description="Full-text search in name, description, endpoint (ranked, prefix matching)",
+    ),
     db: DatabaseManager = Depends(get_database),
 ):
     """List public mocks (no authentication required)"""
@@ -282,7 +473,7 @@ async def list_public_mocks(
     pagination = PaginationParams(page=page, limit=limit)
 
     # Get public mocks only
-    mocks, total = await service.list_public_mocks(pagination)
+    mocks, total = await service.list_public_mocks(pagination, search)
 
     return MockListResponse(
         success=True,
@@ -350,7 +541,7 @@ async def test_mock_by_id(
         result = await service.simulate_mock(mock_id, request_data)
 
         # Return the mock response
-        return JSONResponse(
+        return FastJSONResponse(
             content=result["response_data"],
             status_code=result["status_code"],
             headers=result["headers"],
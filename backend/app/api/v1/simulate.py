@@ -5,9 +5,9 @@ Public simulation API endpoints
 from typing import Dict, Any
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import JSONResponse
 
 from app.core.database import get_database, DatabaseManager
+from app.core.serialization import FastJSONResponse
 from app.services.mock_service import MockService
 from app.models.models import HTTPMethod
 
@@ -52,7 +52,7 @@ async def simulate_endpoint(
     result = await service.simulate_mock(mock.id, request_data)
 
     # Return the mock response with proper status code and headers
-    return JSONResponse(
+    return FastJSONResponse(
         content=result["response_data"],
         status_code=result["status_code"],
         headers=result["headers"],
@@ -77,7 +77,7 @@ async def simulate_by_id(
     result = await service.simulate_mock(mock_id, request_data)
 
     # Return the mock response
-    return JSONResponse(
+    return FastJSONResponse(
         content=result["response_data"],
         status_code=result["status_code"],
         headers=result["headers"],
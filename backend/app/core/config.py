@@ -32,6 +32,26 @@ class Settings(BaseSettings):
     supabase_jwt_secret: str
     supabase_service_role_key: str  # Required for admin operations
 
+    # Read replicas (comma-separated Supabase API URLs) for read-only queries
+    supabase_read_replica_urls_str: str = Field(
+        default="", alias="SUPABASE_READ_REPLICA_URLS"
+    )
+    read_your_writes_window_seconds: float = Field(
+        default=5.0, env="READ_YOUR_WRITES_WINDOW_SECONDS"
+    )  # reads go to primary for this long after a user's write
+    replica_health_check_interval_seconds: int = Field(
+        default=15, env="REPLICA_HEALTH_CHECK_INTERVAL_SECONDS"
+    )
+
+    @property
+    def supabase_read_replica_urls(self) -> List[str]:
+        """Get read replica URLs as list"""
+        return [
+            url.strip().rstrip("/")
+            for url in self.supabase_read_replica_urls_str.split(",")
+            if url.strip()
+        ]
+
     # AI Integration settings
     openai_api_key: Optional[str] = None
     anthropic_api_key: Optional[str] = None
@@ -104,6 +124,61 @@ class Settings(BaseSettings):
     simulation_rate_limit: int = Field(
         default=200, env="SIMULATION_RATE_LIMIT"
     )  # per minute
+
+    # In-memory rate limit backend (used when Redis is not configured)
+    rate_limit_memory_max_keys: int = Field(
+        default=100000, env="RATE_LIMIT_MEMORY_MAX_KEYS"
+    )  # least recently used keys are evicted past this
+    rate_limit_sweep_interval_seconds: int = Field(
+        default=60, env="RATE_LIMIT_SWEEP_INTERVAL_SECONDS"
+    )
+
+    # Local leases for GCRA limits on Redis: each worker takes this many tokens
+    # per Redis call and spends them locally (0 or 1 disables leasing)
+    rate_limit_lease_size: int = Field(default=0, env="RATE_LIMIT_LEASE_SIZE")
+    rate_limit_lease_seconds: float = Field(
+        default=1.0, env="RATE_LIMIT_LEASE_SECONDS"
+    )  # unspent leased tokens are dropped after this
+    rate_limit_lease_max_fraction: float = Field(
+        default=0.05, env="RATE_LIMIT_LEASE_MAX_FRACTION"
+    )  # a lease never exceeds this share of a limit's burst
+
+    # Per-plan rate limits (user_plans.rate_limits, reloaded without a restart)
+    rate_limit_plans_reload_seconds: int = Field(
+        default=60, env="RATE_LIMIT_PLANS_RELOAD_SECONDS"
+    )
+    rate_limit_plan_ttl_seconds: int = Field(
+        default=60, env="RATE_LIMIT_PLAN_TTL_SECONDS"
+    )  # how long a worker remembers a user's plan
+
+    # Plan/quota cache (uses Redis when REDIS_URL is set, in-process LRU otherwise)
+    plan_cache_ttl_seconds: int = Field(default=300, env="PLAN_CACHE_TTL_SECONDS")
+    plan_cache_negative_ttl_seconds: int = Field(
+        default=60, env="PLAN_CACHE_NEGATIVE_TTL_SECONDS"
+    )  # users without a profile
+    plan_cache_watch_interval_seconds: int = Field(
+        default=5, env="PLAN_CACHE_WATCH_INTERVAL_SECONDS"
+    )  # polling of plan changes made in the database (0 disables)
+    plan_cache_max_entries: int = Field(default=10000, env="PLAN_CACHE_MAX_ENTRIES")
+
+    # Health probing (dependencies are checked in the background)
+    health_check_interval_seconds: int = Field(
+        default=10, env="HEALTH_CHECK_INTERVAL_SECONDS"
+    )
+    ai_health_check_interval_seconds: int = Field(
+        default=300, env="AI_HEALTH_CHECK_INTERVAL_SECONDS"
+    )
+    health_history_size: int = Field(default=20, env="HEALTH_HISTORY_SIZE")
+
+    # Query instrumentation
+    enable_query_instrumentation: bool = Field(
+        default=True, env="ENABLE_QUERY_INSTRUMENTATION"
+    )
+    slow_query_threshold_ms: int = Field(default=500, env="SLOW_QUERY_THRESHOLD_MS")
+    enforce_query_budgets: bool = Field(
+        default=False, env="ENFORCE_QUERY_BUDGETS"
+    )  # raise instead of log when a route exceeds its round-trip budget
+
     # Security settings
     enable_security_headers: bool = Field(default=True, env="ENABLE_SECURITY_HEADERS")
     enable_authentication_middleware: bool = Field(
@@ -116,6 +191,28 @@ class Settings(BaseSettings):
         default=50, env="SUSPICIOUS_ACTIVITY_THRESHOLD"
     )  # violations per hour
 
+    # Access stats maintenance (migrations/014): rollups run every interval,
+    # partition creation hourly and retention daily. 0 disables the backend
+    # task for deployments that schedule the functions with pg_cron.
+    access_stats_rollup_interval_seconds: int = Field(
+        default=60, env="ACCESS_STATS_ROLLUP_INTERVAL_SECONDS"
+    )
+
+    # Blob storage for large mock response bodies. "local" keeps blobs on this
+    # host's filesystem and only suits single-node deployments; use "supabase"
+    # (Supabase Storage) when more than one node serves the API.
+    blob_storage_backend: str = Field(
+        default="local", env="BLOB_STORAGE_BACKEND"
+    )  # "local" or "supabase"
+    blob_storage_path: str = Field(default="./data/blobs", env="BLOB_STORAGE_PATH")
+    blob_storage_bucket: str = Field(default="mock-bodies", env="BLOB_STORAGE_BUCKET")
+    blob_inline_threshold_bytes: int = Field(
+        default=64 * 1024, env="BLOB_INLINE_THRESHOLD_BYTES"
+    )  # bodies larger than this are stored as blobs
+    blob_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024, env="BLOB_CACHE_MAX_BYTES"
+    )  # recently used blobs kept in memory per worker
+
     # Mock simulation settings
     max_response_size_mb: int = 10
     max_delay_seconds: int = 30
@@ -3,11 +3,13 @@ Database configuration and Supabase integration
 """
 
 import asyncio
+from collections import OrderedDict
 from typing import Optional, Dict, Any, List
 from supabase import create_client, Client
 from postgrest import APIResponse
 import httpx
 from app.core.config import settings
+from app.core.query_instrumentation import instrument_client
 from uuid import UUID
 import logging
 
@@ -26,7 +28,9 @@ class SupabaseClient:
     def client(self) -> Client:
         """Get Supabase client instance"""
         if self._client is None:
-            self._client = create_client(settings.supabase_url, settings.supabase_key)
+            self._client = instrument_client(
+                create_client(settings.supabase_url, settings.supabase_key)
+            )
         return self._client
 
     @property
@@ -51,6 +55,13 @@ class SupabaseClient:
             self._http_client = None
 
 
+# Shared anon/service-role clients per read replica, keyed by (url, admin)
+_replica_clients: Dict[Any, Client] = {}
+# User-authenticated replica clients, keyed by (url, token), least recently used first
+_replica_user_clients: "OrderedDict[Any, Client]" = OrderedDict()
+MAX_REPLICA_USER_CLIENTS = 256
+
+
 class DatabaseManager:
     """Database operations manager"""
 
@@ -58,9 +69,8 @@ class DatabaseManager:
         self.supabase = SupabaseClient()
         self.user_token = user_token
         # Admin client for operations that require service role
-        self.admin_client = create_client(
-            settings.supabase_url, 
-            settings.supabase_service_role_key
+        self.admin_client = instrument_client(
+            create_client(settings.supabase_url, settings.supabase_service_role_key)
         )
 
     def get_client_with_auth(self, user_token: Optional[str] = None) -> Client:
@@ -71,34 +81,79 @@ class DatabaseManager:
             client = create_client(
                 settings.supabase_url, settings.supabase_key
             )  # Create authenticated client with user JWT token
-
-            # Set authentication headers directly on the client components
-            # This is the most reliable way to ensure JWT is used for RLS
-            auth_headers = {
-                "Authorization": f"Bearer {token}",
-                "apikey": settings.supabase_key,
-                # Add these headers to ensure proper JWT processing
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-            }
-
-            # Update headers on PostgREST client (used for database operations)
-            if hasattr(client, "postgrest") and hasattr(client.postgrest, "headers"):
-                client.postgrest.headers.update(auth_headers)
-            # Update headers on REST session (used for API calls)
-            if (
-                hasattr(client, "rest")
-                and hasattr(client.rest, "session")
-                and hasattr(client.rest.session, "headers")
-            ):
-                client.rest.session.headers.update(auth_headers)
+            self._apply_auth_headers(client, token)
 
             # Authentication headers configured successfully
-            return client
+            return instrument_client(client)
         else:
             # Fall back to default client (anon key)
             return self.supabase.client
 
+    def get_read_client(
+        self,
+        user_token: Optional[str] = None,
+        sticky_key: Optional[Any] = None,
+        admin: bool = False,
+    ) -> Optional[Client]:
+        """
+        Get a client on a read replica for a read-only query.
+
+        Returns None when the read should use the primary: no replicas are
+        configured, none is healthy, or `sticky_key` (usually the user id) wrote
+        within the read-your-writes window.
+        """
+        from app.core.replica_router import get_replica_router
+
+        url = get_replica_router().select_replica(sticky_key)
+        if url is None:
+            return None
+
+        token = user_token or self.user_token
+        if token and not admin:
+            # Reuse the client of a token seen recently instead of building one per read
+            cache_key = (url, token)
+            client = _replica_user_clients.get(cache_key)
+            if client is None:
+                client = create_client(url, settings.supabase_key)
+                self._apply_auth_headers(client, token)
+                client = instrument_client(client)
+                _replica_user_clients[cache_key] = client
+                while len(_replica_user_clients) > MAX_REPLICA_USER_CLIENTS:
+                    _replica_user_clients.popitem(last=False)
+            else:
+                _replica_user_clients.move_to_end(cache_key)
+            return client
+
+        cache_key = (url, admin)
+        if cache_key not in _replica_clients:
+            key = settings.supabase_service_role_key if admin else settings.supabase_key
+            _replica_clients[cache_key] = instrument_client(create_client(url, key))
+        return _replica_clients[cache_key]
+
+    @staticmethod
+    def _apply_auth_headers(client: Client, token: str) -> None:
+        """Send the user's JWT with every request so RLS applies"""
+        # Set authentication headers directly on the client components
+        # This is the most reliable way to ensure JWT is used for RLS
+        auth_headers = {
+            "Authorization": f"Bearer {token}",
+            "apikey": settings.supabase_key,
+            # Add these headers to ensure proper JWT processing
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
+
+        # Update headers on PostgREST client (used for database operations)
+        if hasattr(client, "postgrest") and hasattr(client.postgrest, "headers"):
+            client.postgrest.headers.update(auth_headers)
+        # Update headers on REST session (used for API calls)
+        if (
+            hasattr(client, "rest")
+            and hasattr(client.rest, "session")
+            and hasattr(client.rest.session, "headers")
+        ):
+            client.rest.session.headers.update(auth_headers)
+
     async def health_check(self) -> bool:
         """Check database connectivity"""
         try:
@@ -150,49 +205,59 @@ class DatabaseManager:
     async def get_user_plan_and_quota(self, user_id: UUID) -> Dict[str, Any]:
         """
         Get user plan information and quotas.
-        
-        With database trigger in place, all users should have profiles automatically.
-        Returns default Free plan values if profile is missing (legacy users).
+
+        Served from the plan cache (app/core/plan_cache.py); the profiles/user_plans
+        join only runs on a cache miss. Returns default Free plan values if the
+        profile is missing (legacy users) or the lookup fails.
         """
+        from app.core.plan_cache import DEFAULT_PLAN, plan_cache
+
         try:
-            # Use admin client for reliable data access
-            response = self.admin_client.table("profiles")\
-                .select("plan_id, user_plans(name, daily_request_quota, monthly_token_quota)")\
-                .eq("user_id", str(user_id))\
-                .execute()
-            
-            if response.data and len(response.data) > 0:
-                profile = response.data[0]
-                plan = profile.get("user_plans")
-                
-                if plan:
-                    return {
-                        "plan_name": plan.get("name"),
-                        "daily_request_quota": plan.get("daily_request_quota"),
-                        "monthly_token_quota": plan.get("monthly_token_quota"),
-                    }
-                else:
-                    logger.warning(f"Profile exists but no plan found for user {user_id}")
-            else:
-                logger.warning(f"No profile found for user {user_id}. Trigger should handle this for new users.")
-        
-            # Return default Free plan values for legacy users or missing profiles
-            return {
-                "plan_name": "Free",
-                "daily_request_quota": 10,
-                "monthly_token_quota": 10000,
-            }
-            
+            return await plan_cache.get_or_load(
+                user_id, self._fetch_user_plan_and_quota
+            )
         except Exception as e:
             logger.error(f"Error fetching user plan for {user_id}: {e}")
-            # Return default Free plan as last resort
-            return {
-                "plan_name": "Free",
-                "daily_request_quota": 10,
-                "monthly_token_quota": 10000,
-            }
+            # Return default Free plan as last resort (not cached)
+            return dict(DEFAULT_PLAN)
 
+    async def _fetch_user_plan_and_quota(
+        self, user_id: UUID
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Load user plan information from the database.
 
+        With database trigger in place, all users should have profiles automatically.
+        Returns None if the profile or plan is missing.
+        """
+        # Use admin client for reliable data access
+        response = (
+            self.admin_client.table("profiles")
+            .select(
+                "plan_id, user_plans(name, daily_request_quota, monthly_token_quota)"
+            )
+            .eq("user_id", str(user_id))
+            .execute()
+        )
+
+        if response.data and len(response.data) > 0:
+            profile = response.data[0]
+            plan = profile.get("user_plans")
+
+            if plan:
+                return {
+                    "plan_name": plan.get("name"),
+                    "daily_request_quota": plan.get("daily_request_quota"),
+                    "monthly_token_quota": plan.get("monthly_token_quota"),
+                }
+            else:
+                logger.warning(f"Profile exists but no plan found for user {user_id}")
+        else:
+            logger.warning(
+                f"No profile found for user {user_id}. Trigger should handle this for new users."
+            )
+
+        return None
 
 
 # Global database manager instance
@@ -238,8 +303,11 @@ async def get_usage_stats_for_user(
 
     try:
         if use_service_key:
-            # Use admin client for better reliability
-            client = db_manager.admin_client
+            # Use admin client for better reliability (on a replica when available)
+            client = (
+                db_manager.get_read_client(sticky_key=user_id, admin=True)
+                or db_manager.admin_client
+            )
         else:
             db_with_auth = DatabaseManager(user_token=user_token)
             client = db_with_auth.get_client_with_auth()
@@ -337,47 +405,91 @@ async def get_usage_stats_for_user(
         }
 
 
-async def upsert_usage_stats_for_user(user_id: UUID, increment: dict = None) -> None:
+async def consume_ai_quota_for_user(
+    user_id: UUID, requests: int = 1, tokens: int = 0, enforce: bool = True
+) -> Dict[str, Any]:
     """
-    Upsert (insert or update) AI usage statistics for a user in Supabase.
-    - If the user does not have a row, create it with initial values.
-    - If the user has a row, increment the provided fields atomically.
-    - Uses the admin client (service key) to bypass RLS for writes.
-    
-    With database trigger in place, this should mainly be used for updates.
-    
+    Atomically check the user's AI quota and increment usage counters.
+
+    Runs the `consume_ai_quota` database function (migrations/012_consume_ai_quota.sql),
+    which resolves the user's plan, checks the daily request and monthly token quotas
+    and increments the counters in a single round trip.
+
     Args:
         user_id: UUID of the user
-        increment: dict of fields to increment (e.g., {"requests_today": 1, "tokens_used_today": 100})
+        requests: Number of requests to add to the request counters
+        tokens: Number of tokens to add to the token counters
+        enforce: If False, record usage without checking quotas
+
+    Returns:
+        dict with `allowed`, `reason` (None, DAILY_QUOTA_EXCEEDED,
+        MONTHLY_TOKEN_QUOTA_EXCEEDED or NO_PLAN), the plan and its quotas,
+        `plan_assigned` (False when the free plan was used as a fallback) and
+        the new counter totals
     """
-    from datetime import datetime
-    import logging
+    try:
+        response = db_manager.admin_client.rpc(
+            "consume_ai_quota",
+            {
+                "p_user_id": str(user_id),
+                "p_requests": requests,
+                "p_tokens": tokens,
+                "p_enforce": enforce,
+            },
+        ).execute()
+
+        if not response.data:
+            raise Exception("consume_ai_quota returned no rows")
+
+        result = response.data[0]
+
+        # Keep the user's usage reads on the primary until replicas catch up
+        from app.core.replica_router import get_replica_router
+
+        get_replica_router().record_write(user_id)
+
+        # The function resolved the plan anyway: refresh the plan cache with it.
+        # Users on the free plan fallback (no profile or plan) are cached as
+        # misses, like the plan lookup does.
+        from app.core.plan_cache import plan_cache
+
+        if result.get("plan_assigned"):
+            await plan_cache.set(
+                user_id,
+                {
+                    "plan_name": result["plan_name"],
+                    "daily_request_quota": result["daily_request_quota"],
+                    "monthly_token_quota": result["monthly_token_quota"],
+                },
+            )
+        else:
+            await plan_cache.set(user_id, None)
 
-    logger = logging.getLogger(__name__)
+        return result
 
-    try:
-        # Use admin client for reliable writes
-        client = db_manager.admin_client
-        now = datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
-        
-        # Prepare the upsert payload
-        payload = {"user_id": str(user_id), "updated_at": now}
-        if increment:
-            payload.update(increment)
-            
-        # Upsert: if row exists, update; else, insert
-        response = (
-            client.table("ai_usage_stats")
-            .upsert(payload, on_conflict=["user_id"])
-            .execute()
-        )
-        
-        # Check for errors (Supabase client doesn't have .error attribute)
-        if hasattr(response, 'error') and response.error:
-            raise Exception(response.error)
-            
-        logger.debug(f"Updated usage stats for user {user_id}: {increment}")
-        
     except Exception as e:
-        logger.error(f"Failed to upsert usage stats for user {user_id}: {e}")
-        raise
\ No newline at end of file
+        logger.error(f"Failed to consume AI quota for user {user_id}: {e}")
+        raise
+
+
+async def upsert_usage_stats_for_user(user_id: UUID, increment: dict = None) -> None:
+    """
+    Increment AI usage statistics for a user in Supabase.
+    - If the user does not have a row, it is created.
+    - Counters are incremented atomically server-side (no read-modify-write).
+    - Quotas are not enforced; use consume_ai_quota_for_user for admission checks.
+
+    Args:
+        user_id: UUID of the user
+        increment: dict of fields to increment (e.g., {"requests_today": 1, "tokens_used_today": 100})
+    """
+    increment = increment or {}
+    requests = increment.get("requests_today", increment.get("requests_this_month", 0))
+    tokens = increment.get(
+        "tokens_used_today", increment.get("tokens_used_this_month", 0)
+    )
+
+    await consume_ai_quota_for_user(
+        user_id, requests=requests, tokens=tokens, enforce=False
+    )
+    logger.debug(f"Updated usage stats for user {user_id}: {increment}")
@@ -0,0 +1,222 @@
+"""
+Plan and quota cache for MockBox
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Free plan values used when a user has no profile (legacy users)
+DEFAULT_PLAN = {
+    "plan_name": "Free",
+    "daily_request_quota": 10,
+    "monthly_token_quota": 10000,
+}
+
+
+class PlanCache:
+    """
+    Cache of user plan and quota lookups keyed by user_id.
+
+    Entries expire after `ttl_seconds`; users without a profile are cached as
+    misses for `negative_ttl_seconds` so they do not hit the database on every
+    request either. A TTL of 0 disables that kind of entry. Lookup errors are
+    never cached. Plan changes made in the database are applied by
+    `watch_plan_changes`. Uses Redis when configured (shared across workers)
+    and an in-process LRU otherwise or when Redis fails.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        negative_ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.redis_client = None
+        self.ttl_seconds = (
+            settings.plan_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        )
+        self.negative_ttl_seconds = (
+            settings.plan_cache_negative_ttl_seconds
+            if negative_ttl_seconds is None
+            else negative_ttl_seconds
+        )
+        self.max_entries = (
+            settings.plan_cache_max_entries if max_entries is None else max_entries
+        )
+        # user_id -> (expires_at, plan or None for a cached miss)
+        self.memory_cache: (
+            "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]"
+        ) = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if redis_url:
+            try:
+                self.redis_client = redis.from_url(
+                    redis_url,
+                    encoding="utf-8",
+                    decode_responses=True,
+                    socket_connect_timeout=5,
+                    socket_timeout=5,
+                )
+                logger.info("Redis plan cache backend initialized")
+            except Exception as e:
+                logger.warning(f"Redis connection failed, using memory plan cache: {e}")
+
+    @staticmethod
+    def _key(user_id: UUID) -> str:
+        return f"plan_cache:user:{user_id}"
+
+    async def get_or_load(
+        self,
+        user_id: UUID,
+        loader: Callable[[UUID], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> Dict[str, Any]:
+        """
+        Return the cached plan for a user, calling `loader` on a miss.
+
+        `loader` returns the plan dict, or None when the user has no profile/plan
+        (cached as a miss and answered with the Free plan defaults).
+        """
+        found, plan = await self._get(user_id)
+        if found:
+            self.hits += 1
+            return dict(plan) if plan else dict(DEFAULT_PLAN)
+
+        self.misses += 1
+        plan = await loader(user_id)
+        await self.set(user_id, plan)
+        return dict(plan) if plan else dict(DEFAULT_PLAN)
+
+    async def set(self, user_id: UUID, plan: Optional[Dict[str, Any]]) -> None:
+        """Store a plan (or a miss when plan is None) for a user"""
+        ttl = self.ttl_seconds if plan else self.negative_ttl_seconds
+        if ttl <= 0:
+            return
+
+        if self.redis_client:
+            try:
+                await self.redis_client.set(
+                    self._key(user_id), json.dumps(plan), ex=ttl
+                )
+                return
+            except Exception as e:
+                logger.error(f"Redis plan cache write error: {e}")
+
+        key = str(user_id)
+        self.memory_cache[key] = (time.time() + ttl, plan)
+        self.memory_cache.move_to_end(key)
+        while len(self.memory_cache) > self.max_entries:
+            self.memory_cache.popitem(last=False)
+
+    async def invalidate(self, user_id: UUID) -> None:
+        """Drop the cached plan for a user (call whenever their plan changes)"""
+        self.memory_cache.pop(str(user_id), None)
+
+        if self.redis_client:
+            try:
+                await self.redis_client.delete(self._key(user_id))
+            except Exception as e:
+                logger.error(f"Redis plan cache invalidation error: {e}")
+
+    async def invalidate_all(self) -> None:
+        """Drop every cached plan (e.g. after editing user_plans quotas)"""
+        self.memory_cache.clear()
+
+        if self.redis_client:
+            try:
+                keys = [
+                    key
+                    async for key in self.redis_client.scan_iter("plan_cache:user:*")
+                ]
+                if keys:
+                    await self.redis_client.delete(*keys)
+            except Exception as e:
+                logger.error(f"Redis plan cache invalidation error: {e}")
+
+    async def apply_changes(self, changes: Dict[str, Any]) -> None:
+        """Invalidate the plans in a `fetch_plan_changes` result"""
+        if changes["all_users"]:
+            await self.invalidate_all()
+        else:
+            for user_id in changes["user_ids"]:
+                await self.invalidate(user_id)
+
+    async def _get(self, user_id: UUID) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Return (found, plan); plan is None for a cached miss"""
+        if self.redis_client:
+            try:
+                value = await self.redis_client.get(self._key(user_id))
+                if value is None:
+                    return False, None
+                return True, json.loads(value)
+            except Exception as e:
+                logger.error(f"Redis plan cache read error: {e}")
+
+        key = str(user_id)
+        entry = self.memory_cache.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, plan = entry
+        if expires_at <= time.time():
+            del self.memory_cache[key]
+            return False, None
+
+        self.memory_cache.move_to_end(key)
+        return True, plan
+
+
+# Global plan cache instance
+plan_cache = PlanCache()
+
+
+async def fetch_plan_changes(cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Plan changes committed since `cursor` (migrations/019_plan_changes.sql).
+
+    Returns `cursor` (pass it back next time), `all_users` (a plan definition
+    changed) and `user_ids` (users whose plan changed). Without a cursor only
+    a starting cursor is returned.
+    """
+    from app.core.database import db_manager
+
+    response = await asyncio.to_thread(
+        lambda: db_manager.admin_client.rpc(
+            "plan_changes_since", {"p_cursor": cursor}
+        ).execute()
+    )
+    return response.data
+
+
+async def watch_plan_changes(interval_seconds: Optional[float] = None):
+    """Background task dropping cached plans that were changed in the database"""
+    from app.core.rate_limiting import rate_limit_policy
+
+    interval_seconds = interval_seconds or settings.plan_cache_watch_interval_seconds
+    cursor = None
+    while True:
+        try:
+            changes = await fetch_plan_changes(cursor)
+            if cursor is not None:
+                await plan_cache.apply_changes(changes)
+                # Plan names memoized for rate limits come from the same data
+                rate_limit_policy.forget_plans(
+                    None if changes["all_users"] else changes["user_ids"]
+                )
+            cursor = changes["cursor"]
+        except Exception as e:
+            logger.error(f"Plan change watch error: {e}")
+        await asyncio.sleep(interval_seconds)
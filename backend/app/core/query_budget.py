@@ -0,0 +1,94 @@
+"""
+Database round-trip budgets per route
+"""
+
+import logging
+from typing import Any, Dict, Mapping, Optional
+
+from app.core.config import settings
+from app.core.query_instrumentation import RequestQueryStats
+
+logger = logging.getLogger(__name__)
+
+# Maximum database round trips per request, keyed by "METHOD /path/template".
+# Routes whose cost scales with the payload (bulk, import, export) are not listed.
+ROUTE_QUERY_BUDGETS: Dict[str, int] = {
+    # Health endpoints are served from background probe results
+    "GET /health": 0,
+    "GET /api/v1/health/": 0,
+    "GET /api/v1/health/ready": 0,
+    "GET /api/v1/health/live": 0,
+    # Mocks
+    "GET /api/v1/mocks/": 1,
+    "POST /api/v1/mocks/": 1,
+    "GET /api/v1/mocks/public": 1,
+    "GET /api/v1/mocks/changes": 1,
+    "GET /api/v1/mocks/{mock_id}": 1,
+    "PUT /api/v1/mocks/{mock_id}": 1,
+    "DELETE /api/v1/mocks/{mock_id}": 1,
+    "POST /api/v1/mocks/{mock_id}/simulate": 1,
+    "POST /api/v1/mocks/{mock_id}/toggle-status": 2,
+    "POST /api/v1/mocks/{mock_id}/duplicate": 2,
+    # Simulation (access logging is buffered, only the mock lookup hits the database)
+    **{
+        f"{method} /api/v1/simulate/{{path}}": 1
+        for method in ("GET", "POST", "PUT", "PATCH", "DELETE")
+    },
+    # Templates
+    "GET /api/v1/mocks/templates": 1,
+    "GET /api/v1/mocks/templates/{template_id}": 1,
+    # AI: quota consume + token settle (+ insert when saving)
+    "POST /api/v1/ai/generate": 2,
+    "POST /api/v1/ai/generate-and-save": 3,
+    "GET /api/v1/ai/usage/{user_id}": 2,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in enforcing mode when a request exceeds its round-trip budget"""
+
+
+def route_key(scope: Mapping[str, Any]) -> str:
+    """
+    Build the budget key for a handled request from its ASGI scope: the method
+    and the matched route's path template, e.g. `GET /api/v1/mocks/{mock_id}`.
+    """
+    # Routes of included routers carry their prefixed path in the effective
+    # route context; scope["route"] is the router's own, unprefixed route
+    route = (scope.get("fastapi") or {}).get("effective_route_context") or scope.get(
+        "route"
+    )
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return f"{scope.get('method', '')} {path or scope.get('path', '')}"
+
+
+def check_query_budget(
+    key: str, stats: RequestQueryStats, enforce: Optional[bool] = None
+) -> bool:
+    """
+    Compare a request's round trips against its route budget.
+
+    Violations are logged; with `enforce` (default: ENFORCE_QUERY_BUDGETS) they
+    raise QueryBudgetExceeded instead, which is how the test suite uses it.
+    Returns True when the request is within budget or the route has none.
+    """
+    budget = ROUTE_QUERY_BUDGETS.get(key)
+    if budget is None or stats.count <= budget:
+        return True
+
+    tables = ", ".join(f"{query.operation} {query.table}" for query in stats.queries)
+    message = (
+        f"{key} made {stats.count} database round trips (budget {budget}): {tables}"
+    )
+
+    if settings.enforce_query_budgets if enforce is None else enforce:
+        raise QueryBudgetExceeded(message)
+
+    logger.warning(message)
+    return False
+
+
+def assert_query_budget(key: str, stats: RequestQueryStats) -> None:
+    """Test helper: fail if `stats` exceeds the budget declared for `key`"""
+    assert key in ROUTE_QUERY_BUDGETS, f"No query budget declared for {key}"
+    check_query_budget(key, stats, enforce=True)
@@ -0,0 +1,236 @@
+"""
+Instrumentation for Supabase/PostgREST queries
+"""
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Latency histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+
+# PostgREST operation by HTTP method
+OPERATIONS = {
+    "GET": "select",
+    "HEAD": "select",
+    "POST": "insert",
+    "PATCH": "update",
+    "PUT": "upsert",
+    "DELETE": "delete",
+}
+
+
+@dataclass
+class QueryRecord:
+    """A single completed query"""
+
+    table: str
+    operation: str
+    filters: Tuple[str, ...]
+    rows: Optional[int]
+    request_bytes: int
+    response_bytes: int
+    duration_ms: float
+    status_code: int
+
+
+@dataclass
+class RequestQueryStats:
+    """Queries issued while handling one HTTP request"""
+
+    queries: List[QueryRecord] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(query.duration_ms for query in self.queries)
+
+    def server_timing(self) -> str:
+        """Value for the `Server-Timing` response header"""
+        return f'db;dur={self.total_ms:.1f};desc="{self.count} queries"'
+
+
+# Stats for the request being handled (set by the request timing middleware)
+current_request_queries: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "current_request_queries", default=None
+)
+
+
+class QueryMetrics:
+    """Process-wide latency histograms keyed by (table, operation)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def observe(self, record: QueryRecord) -> None:
+        key = (record.table, record.operation)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "rows": 0,
+                    "response_bytes": 0,
+                    "buckets": [0] * len(LATENCY_BUCKETS_MS),
+                }
+                self.histograms[key] = histogram
+
+            histogram["count"] += 1
+            histogram["total_ms"] += record.duration_ms
+            histogram["max_ms"] = max(histogram["max_ms"], record.duration_ms)
+            histogram["rows"] += record.rows or 0
+            histogram["response_bytes"] += record.response_bytes
+            for index, upper_bound in enumerate(LATENCY_BUCKETS_MS):
+                if record.duration_ms <= upper_bound:
+                    histogram["buckets"][index] += 1
+                    break
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Histograms as a JSON-serializable dict"""
+        with self._lock:
+            return {
+                f"{table}.{operation}": {
+                    **{k: v for k, v in histogram.items() if k != "buckets"},
+                    "avg_ms": round(histogram["total_ms"] / histogram["count"], 2),
+                    "buckets": {
+                        (
+                            "+Inf" if upper_bound == float("inf") else str(upper_bound)
+                        ): count
+                        for upper_bound, count in zip(
+                            LATENCY_BUCKETS_MS, histogram["buckets"]
+                        )
+                    },
+                }
+                for (table, operation), histogram in self.histograms.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+
+
+# Global query metrics
+query_metrics = QueryMetrics()
+
+
+def describe_request(request: httpx.Request) -> Tuple[str, str, Tuple[str, ...]]:
+    """
+    Derive (table, operation, filter shape) from a PostgREST request.
+
+    The filter shape keeps column and operator but drops values, e.g.
+    `?id=eq.42&select=*` -> ("id:eq",), so it can be aggregated.
+    """
+    path = urlsplit(str(request.url)).path
+    segments = [segment for segment in path.split("/") if segment]
+
+    if "rpc" in segments and segments[-1] != "rpc":
+        table, operation = segments[-1], "rpc"
+    else:
+        table = segments[-1] if segments else ""
+        operation = OPERATIONS.get(request.method, request.method.lower())
+        prefer = request.headers.get("prefer", "")
+        if request.method == "POST" and "resolution=" in prefer:
+            operation = "upsert"
+
+    filters = []
+    for name, value in request.url.params.multi_items():
+        if name in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+            continue
+        operator = value.split(".", 1)[0] if name not in ("or", "and") else "group"
+        filters.append(f"{name}:{operator}")
+
+    return table, operation, tuple(sorted(filters))
+
+
+def _row_count(response: httpx.Response) -> Optional[int]:
+    """Rows returned, from the Content-Range header (e.g. `0-24/*`)"""
+    content_range = response.headers.get("content-range", "")
+    row_range = content_range.split("/", 1)[0]
+    if "-" not in row_range:
+        return 0 if row_range == "*" else None
+    start, end = row_range.split("-", 1)
+    try:
+        return int(end) - int(start) + 1
+    except ValueError:
+        return None
+
+
+def _on_request(request: httpx.Request) -> None:
+    request.extensions["mockbox_query_start"] = time.perf_counter()
+
+
+def _on_response(response: httpx.Response) -> None:
+    request = response.request
+    started = request.extensions.get("mockbox_query_start")
+    if started is None:
+        return
+
+    response.read()
+    duration_ms = (time.perf_counter() - started) * 1000
+    table, operation, filters = describe_request(request)
+    record = QueryRecord(
+        table=table,
+        operation=operation,
+        filters=filters,
+        rows=_row_count(response),
+        request_bytes=len(request.content or b""),
+        response_bytes=len(response.content),
+        duration_ms=duration_ms,
+        status_code=response.status_code,
+    )
+    record_query(record)
+
+
+def record_query(record: QueryRecord) -> None:
+    """Add a completed query to the histograms, slow log and request stats"""
+    query_metrics.observe(record)
+
+    stats = current_request_queries.get()
+    if stats is not None:
+        stats.queries.append(record)
+
+    if record.duration_ms >= settings.slow_query_threshold_ms:
+        logger.warning(
+            f"Slow query: {record.operation} {record.table} "
+            f"filters={list(record.filters)} rows={record.rows} "
+            f"bytes={record.response_bytes} took {record.duration_ms:.1f}ms"
+        )
+
+
+def instrument_client(client: Any) -> Any:
+    """
+    Attach query instrumentation to a Supabase client.
+
+    Hooks are installed on the PostgREST HTTP session, so every table query and
+    RPC made through the client is recorded without changing call sites.
+    """
+    if not settings.enable_query_instrumentation:
+        return client
+
+    try:
+        session = client.postgrest.session
+        hooks = session.event_hooks
+        if _on_request not in hooks["request"]:
+            hooks["request"].append(_on_request)
+            hooks["response"].append(_on_response)
+            session.event_hooks = hooks
+    except Exception as e:
+        logger.debug(f"Query instrumentation not installed: {e}")
+
+    return client
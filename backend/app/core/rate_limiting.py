@@ -5,22 +5,189 @@ Advanced rate limiting configuration for MockBox
 import redis.asyncio as redis
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-from typing import Optional, Dict, List
+from typing import Any, Optional, Dict, List, Tuple
 from fastapi import Request
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+import asyncio
 import time
 import json
 import logging
+import math
+from uuid import UUID, uuid4
 from datetime import datetime, timedelta
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
+# Sliding window log in one server-side step: drop expired entries, count,
+# record the request when it is allowed and report the window state.
+# Members are "<timestamp>:<token>" so concurrent requests never collide.
+# Floats are returned as strings, Redis truncates Lua numbers to integers.
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+local allowed = 0
+if count < limit then
+    redis.call('ZADD', key, now, ARGV[3] .. ':' .. ARGV[4])
+    count = count + 1
+    allowed = 1
+end
+redis.call('PEXPIRE', key, math.ceil(window * 1000))
+
+local reset = now + window
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+if oldest[2] then
+    reset = tonumber(oldest[2]) + window
+end
+return {allowed, count, tostring(reset)}
+"""
+
+# Generic cell rate algorithm (the token bucket as a single timestamp): the
+# key holds the theoretical arrival time (TAT) of the next request. A request
+# is allowed while TAT - burst * interval <= now, and moves TAT on by one
+# interval. State is O(1) per key and expires once the bucket is full again.
+# ARGV[4] asks for several tokens at once (worker leases); as many as are
+# available, up to that number, are granted.
+GCRA_SCRIPT = """
+local key = KEYS[1]
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local requested = tonumber(ARGV[4] or '1')
+
+local tat = tonumber(redis.call('GET', key) or now)
+if tat < now then
+    tat = now
+end
+local available = math.floor((now - tat) / interval + burst + 1e-9)
+if available < 1 then
+    return {0, 0, tostring(tat), tostring(tat + (1 - burst) * interval - now)}
+end
+
+local granted = math.min(requested, available)
+local new_tat = tat + granted * interval
+redis.call('SET', key, tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {granted, available - granted, tostring(new_tat), '0'}
+"""
+
+SLIDING_WINDOW = "sliding_window"
+GCRA = "gcra"
+ALGORITHMS = (SLIDING_WINDOW, GCRA)
+
+
+def gcra(
+    tat: Optional[float], now: float, interval: float, burst: int, requested: int = 1
+) -> Tuple[int, float, int, float, float]:
+    """
+    One GCRA step, mirroring GCRA_SCRIPT.
+
+    Returns (granted, tat, remaining, reset, retry_after) where `granted` is
+    the number of tokens taken (0 when rejected), `tat` is the state to store
+    and `reset` is when the bucket is full again.
+    """
+    tat = max(tat or now, now)
+    available = int(math.floor((now - tat) / interval + burst + 1e-9))
+    if available < 1:
+        return 0, tat, 0, tat, tat + (1 - burst) * interval - now
+    granted = min(requested, available)
+    new_tat = tat + granted * interval
+    return granted, new_tat, available - granted, new_tat, 0.0
+
+
+@dataclass
+class Lease:
+    """Quota a worker took from Redis and spends locally"""
+
+    tokens: int  # left to spend; 0 caches a rejection
+    remaining: int  # left in Redis when the lease was granted
+    reset: float
+    retry_at: float = 0.0
+
+
+class MemoryRateLimitStore:
+    """
+    Bounded in-process state for the memory backend.
+
+    Each key holds a value (a ring buffer of timestamps for sliding windows, a
+    single float for GCRA) and the time it stops mattering. Expired keys read
+    as missing and are dropped by `sweep`; past `max_keys` the least recently
+    used key is evicted, so a flood of distinct clients cannot grow the worker
+    without bound. Evicting a key only forgets that client's usage.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> (expires_at, value), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str, now: float) -> Any:
+        """Return the live value for a key, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def keys(self) -> List[str]:
+        return list(self._entries)
+
+    def sweep(self, now: float) -> int:
+        """Drop expired keys, returning how many were removed"""
+        expired = [
+            key for key, (expires_at, _) in self._entries.items() if expires_at <= now
+        ]
+        for key in expired:
+            del self._entries[key]
+        return len(expired)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._entries[key][1]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
 
 class CustomRateLimiter:
     """Advanced rate limiter with Redis backend and custom logic"""
 
-    def __init__(self, redis_url: Optional[str] = None):
+    def __init__(self, redis_url: Optional[str] = None, max_keys: Optional[int] = None):
         self.redis_client = None
-        self.memory_cache: Dict[str, List[float]] = {}
+        self.sliding_window_script = None
+        self.gcra_script = None
+        self.memory_cache = MemoryRateLimitStore(
+            max_keys or settings.rate_limit_memory_max_keys
+        )
+        # GCRA quota leased from Redis by this worker
+        self.leases = MemoryRateLimitStore(
+            max_keys or settings.rate_limit_memory_max_keys
+        )
 
         if redis_url:
             try:
@@ -31,6 +198,11 @@ class CustomRateLimiter:
                     socket_connect_timeout=5,
                     socket_timeout=5,
                 )
+                # Sent with EVALSHA, loaded on the first NOSCRIPT reply
+                self.sliding_window_script = self.redis_client.register_script(
+                    SLIDING_WINDOW_SCRIPT
+                )
+                self.gcra_script = self.redis_client.register_script(GCRA_SCRIPT)
                 logger.info("Redis rate limiting backend initialized")
             except Exception as e:
                 logger.warning(f"Redis connection failed, using memory cache: {e}")
@@ -39,99 +211,199 @@ class CustomRateLimiter:
         self, request: Request, endpoint_type: str = "default"
     ) -> str:
         """Generate rate limit key based on user context"""
-        # Check for authenticated user
-        user_id = getattr(request.state, "user_id", None)
+        return self.rate_limit_key(
+            endpoint_type,
+            getattr(request.state, "user_id", None),
+            get_remote_address(request),
+        )
+
+    @staticmethod
+    def rate_limit_key(endpoint_type: str, user_id: Optional[str], ip: str) -> str:
+        """Key authenticated users by user id, everyone else by IP"""
         if user_id:
             return f"rate_limit:{endpoint_type}:user:{user_id}"
-
-        # Fall back to IP-based limiting
-        ip = get_remote_address(request)
         return f"rate_limit:{endpoint_type}:ip:{ip}"
 
-    async def check_rate_limit(self, key: str, limit: int, window: int) -> bool:
-        """Check if request is within rate limit"""
-        current_time = time.time()
-        window_start = current_time - window
+    async def hit(
+        self,
+        key: str,
+        limit: int,
+        window: int,
+        algorithm: str = SLIDING_WINDOW,
+        burst: Optional[int] = None,
+        lease_size: Optional[int] = None,
+    ) -> Dict:
+        """
+        Count a request against a limit and report the limiter state.
+
+        Returns `allowed` plus the `limit`, `remaining`, `reset` and
+        `retry_after` values sent as rate limit headers. With Redis
+        this is a single atomic script call; only allowed requests are
+        recorded, so rejected retries do not extend the block.
+
+        `algorithm` is SLIDING_WINDOW (exact, one entry per request) or GCRA
+        (one timestamp per key, `limit` per `window` on average with bursts
+        of up to `burst`, default `limit`). GCRA limits on Redis can lease
+        `lease_size` tokens at a time (see `_lease_size`).
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
 
-        try:
-            if self.redis_client:
-                # Redis sliding window log implementation
-                async with self.redis_client.pipeline() as pipe:
-                    # Remove expired entries
-                    await pipe.zremrangebyscore(key, 0, window_start)
-                    # Count current entries
-                    await pipe.zcard(key)
-                    # Add current request
-                    await pipe.zadd(key, {str(current_time): current_time})
-                    # Set expiration
-                    await pipe.expire(key, window)
-                    results = await pipe.execute()
-
-                    current_count = results[1]
-                    return current_count < limit
-            else:
-                # Memory cache fallback
-                if key not in self.memory_cache:
-                    self.memory_cache[key] = []
-
-                # Clean old entries
-                self.memory_cache[key] = [
-                    timestamp
-                    for timestamp in self.memory_cache[key]
-                    if timestamp > window_start
-                ]
-
-                if len(self.memory_cache[key]) >= limit:
-                    return False
-
-                self.memory_cache[key].append(current_time)
-                return True
-
-        except Exception as e:
-            logger.error(f"Rate limit check error: {e}")
-            # On error, allow the request to prevent service disruption
-            return True
-
-    async def get_rate_limit_info(self, key: str, limit: int, window: int) -> Dict:
-        """Get rate limit information for response headers"""
         current_time = time.time()
-        window_start = current_time - window
 
         try:
-            if self.redis_client:
-                count = await self.redis_client.zcount(key, window_start, current_time)
-                remaining = max(0, limit - count)
-                reset_time = int(current_time + window)
+            if algorithm == GCRA:
+                allowed, remaining, reset, retry_after = await self._hit_gcra(
+                    key, limit, window, burst or limit, lease_size, current_time
+                )
             else:
-                if key in self.memory_cache:
-                    # Clean old entries
-                    self.memory_cache[key] = [
-                        timestamp
-                        for timestamp in self.memory_cache[key]
-                        if timestamp > window_start
-                    ]
-                    count = len(self.memory_cache[key])
-                else:
-                    count = 0
-
-                remaining = max(0, limit - count)
-                reset_time = int(current_time + window)
+                allowed, remaining, reset, retry_after = await self._hit_sliding_window(
+                    key, limit, window, current_time
+                )
 
             return {
+                "allowed": allowed,
                 "limit": limit,
-                "remaining": remaining,
-                "reset": reset_time,
-                "retry_after": window if remaining == 0 else 0,
+                "remaining": max(0, remaining),
+                "reset": int(math.ceil(reset)),
+                "retry_after": 0 if allowed else max(1, math.ceil(retry_after)),
             }
+
         except Exception as e:
-            logger.error(f"Rate limit info error: {e}")
+            logger.error(f"Rate limit check error: {e}")
+            # On error, allow the request to prevent service disruption
             return {
+                "allowed": True,
                 "limit": limit,
                 "remaining": limit,
                 "reset": int(current_time + window),
                 "retry_after": 0,
             }
 
+    async def _hit_sliding_window(
+        self, key: str, limit: int, window: int, current_time: float
+    ) -> Tuple[bool, int, float, float]:
+        """Sliding window log; returns (allowed, remaining, reset, retry_after)"""
+        if self.redis_client:
+            allowed, count, reset = await self.sliding_window_script(
+                keys=[key], args=[limit, window, repr(current_time), uuid4().hex]
+            )
+            allowed = bool(allowed)
+            reset = float(reset)
+        else:
+            # Ring buffer of the last `limit` allowed requests, oldest first
+            timestamps = self.memory_cache.get(key, current_time)
+            if timestamps is None or timestamps.maxlen != limit:
+                timestamps = deque(timestamps or (), maxlen=limit)
+            window_start = current_time - window
+            while timestamps and timestamps[0] <= window_start:
+                timestamps.popleft()
+
+            allowed = len(timestamps) < limit
+            if allowed:
+                timestamps.append(current_time)
+            count = len(timestamps)
+            if timestamps:
+                reset = timestamps[0] + window
+                self.memory_cache.set(key, timestamps, timestamps[-1] + window)
+            else:
+                reset = current_time + window
+
+        return allowed, limit - count, reset, reset - current_time
+
+    async def _hit_gcra(
+        self,
+        key: str,
+        limit: int,
+        window: int,
+        burst: int,
+        lease_size: Optional[int],
+        current_time: float,
+    ) -> Tuple[bool, int, float, float]:
+        """GCRA; returns (allowed, remaining, reset, retry_after)"""
+        interval = window / limit
+        # Separate key so switching a limit's algorithm never hits a key of
+        # the wrong Redis type
+        key = f"{key}:gcra"
+
+        if self.redis_client:
+            lease_size = self._lease_size(burst, lease_size)
+            if lease_size > 1:
+                return await self._hit_leased(
+                    key, interval, burst, lease_size, current_time
+                )
+
+            granted, remaining, reset, retry_after = await self._take_gcra(
+                key, interval, burst, 1, current_time
+            )
+            return granted > 0, remaining, reset, retry_after
+
+        granted, tat, remaining, reset, retry_after = gcra(
+            self.memory_cache.get(key, current_time), current_time, interval, burst
+        )
+        # Once past the arrival time the bucket is full, same as no key
+        self.memory_cache.set(key, tat, tat)
+        return granted > 0, remaining, reset, retry_after
+
+    async def _take_gcra(
+        self, key: str, interval: float, burst: int, requested: int, current_time: float
+    ) -> Tuple[int, int, float, float]:
+        """Take up to `requested` tokens in Redis; returns (granted, remaining, reset, retry_after)"""
+        granted, remaining, reset, retry_after = await self.gcra_script(
+            keys=[key], args=[repr(interval), burst, repr(current_time), requested]
+        )
+        return int(granted), int(remaining), float(reset), float(retry_after)
+
+    @staticmethod
+    def _lease_size(burst: int, lease_size: Optional[int]) -> int:
+        """
+        Tokens to lease per Redis call for a limit.
+
+        The limit's own `lease_size` or RATE_LIMIT_LEASE_SIZE, capped at
+        RATE_LIMIT_LEASE_MAX_FRACTION of the burst. Leased tokens are taken
+        from Redis before they are spent, so the global limit is never
+        exceeded; the cost is that up to a lease per worker can go unused
+        for RATE_LIMIT_LEASE_SECONDS, and headers lag by as much.
+        """
+        if lease_size is None:
+            lease_size = settings.rate_limit_lease_size
+        return min(lease_size, int(burst * settings.rate_limit_lease_max_fraction))
+
+    async def _hit_leased(
+        self,
+        key: str,
+        interval: float,
+        burst: int,
+        lease_size: int,
+        current_time: float,
+    ) -> Tuple[bool, int, float, float]:
+        """Spend a locally leased token, leasing more from Redis when needed"""
+        lease = self.leases.get(key, current_time)
+        if lease is None:
+            granted, remaining, reset, retry_after = await self._take_gcra(
+                key, interval, burst, lease_size, current_time
+            )
+            lease = Lease(tokens=granted, remaining=remaining, reset=reset)
+            lease_seconds = settings.rate_limit_lease_seconds
+            if not granted:
+                # Reject locally until a token is due rather than asking again
+                lease.retry_at = current_time + retry_after
+                lease_seconds = min(lease_seconds, retry_after)
+            self.leases.set(key, lease, current_time + lease_seconds)
+
+        if not lease.tokens:
+            return False, 0, lease.reset, lease.retry_at - current_time
+
+        lease.tokens -= 1
+        if not lease.tokens:
+            # Spent: the next request leases again
+            self.leases.delete(key)
+        return True, lease.remaining + lease.tokens, lease.reset, 0.0
+
+    async def check_rate_limit(self, key: str, limit: int, window: int) -> bool:
+        """Check if request is within rate limit"""
+        return (await self.hit(key, limit, window))["allowed"]
+
     async def invalidate_pattern(self, pattern: str) -> int:
         """Invalidate cache keys matching pattern"""
         try:
@@ -148,7 +420,7 @@ class CustomRateLimiter:
                     if self._match_pattern(key, pattern)
                 ]
                 for key in keys_to_delete:
-                    del self.memory_cache[key]
+                    self.memory_cache.delete(key)
                 return len(keys_to_delete)
         except Exception as e:
             logger.error(f"Cache invalidation error: {e}")
@@ -158,43 +430,191 @@ class CustomRateLimiter:
         """Simple pattern matching for memory cache"""
         return pattern.replace("*", "") in key
 
-    async def cleanup_expired_keys(self):
-        """Cleanup expired keys (for memory cache)"""
+    async def cleanup_expired_keys(self) -> int:
+        """Cleanup expired keys (memory cache and leases)"""
+        current_time = time.time()
+        removed = self.leases.sweep(current_time)
         if not self.redis_client:
-            current_time = time.time()
-            for key in list(self.memory_cache.keys()):
-                # Keep only entries from last 24 hours
-                self.memory_cache[key] = [
-                    timestamp
-                    for timestamp in self.memory_cache[key]
-                    if timestamp > current_time - 86400
-                ]
-                if not self.memory_cache[key]:
-                    del self.memory_cache[key]
+            removed += self.memory_cache.sweep(current_time)
+        return removed
 
 
-# Rate limiting configurations
+# Rate limiting configurations. "algorithm" defaults to SLIDING_WINDOW, which
+# is exact but stores one entry per request; GCRA stores one timestamp per key
+# and suits the high limits. GCRA entries may set "burst" (default: limit) and
+# "lease_size" (default: RATE_LIMIT_LEASE_SIZE).
 RATE_LIMITS = {
-    "ai": {"limit": 10, "window": 60},  # 10 requests per minute for AI
+    "ai": {"limit": settings.ai_rate_limit, "window": 60},  # per minute for AI
     "public_api": {
-        "limit": 100,
+        "limit": settings.public_api_rate_limit,
         "window": 60,
-    },  # 100 requests per minute for public API
+        "algorithm": GCRA,
+    },  # per minute for public API
     "authenticated": {
-        "limit": 1000,
+        "limit": settings.authenticated_rate_limit,
         "window": 60,
-    },  # 1000 requests per minute for authenticated users
+        "algorithm": GCRA,
+    },  # per minute for authenticated users
     "anonymous": {
-        "limit": 60,
+        "limit": settings.anonymous_rate_limit,
+        "window": 60,
+        "algorithm": GCRA,
+    },  # per minute for anonymous users
+    "simulation": {
+        "limit": settings.simulation_rate_limit,
         "window": 60,
-    },  # 60 requests per minute for anonymous users
-    "simulation": {"limit": 200, "window": 60},  # 200 simulations per minute
+        "algorithm": GCRA,
+    },  # simulations per minute
+    "health": {"limit": 300, "window": 60},  # 5 requests per second
 }
 
+# Fields a plan may override in a RATE_LIMITS entry
+PLAN_OVERRIDE_FIELDS = {"limit", "window", "algorithm", "burst", "lease_size"}
+
+
+class RateLimitPolicy:
+    """
+    Resolves the limits for an endpoint class and user.
+
+    Plans override RATE_LIMITS entries through `user_plans.rate_limits`
+    (migration 017). The overrides of every plan are few, so they are kept
+    merged in memory and reloaded periodically by `reload_rate_limit_plans`.
+    A user's plan comes from the plan cache and is remembered locally for
+    `plan_ttl_seconds`; it is only looked up for endpoint classes that some
+    plan overrides.
+    """
+
+    def __init__(self, base: Dict[str, Dict], plan_ttl_seconds: Optional[int] = None):
+        self.base = base
+        self.plan_ttl_seconds = plan_ttl_seconds or settings.rate_limit_plan_ttl_seconds
+        # endpoint class -> plan name -> merged config
+        self.plan_limits: Dict[str, Dict[str, Dict]] = {}
+        # user_id -> plan name
+        self.user_plans = MemoryRateLimitStore(settings.rate_limit_memory_max_keys)
+        self.loaded_at: Optional[float] = None
+
+    def load(self, plans: List[Dict[str, Any]]) -> None:
+        """Replace the plan overrides with `user_plans` rows (name, rate_limits)"""
+        plan_limits: Dict[str, Dict[str, Dict]] = {}
+        for plan in plans:
+            plan_name = (plan.get("name") or "").lower()
+            for endpoint_type, override in (plan.get("rate_limits") or {}).items():
+                config = self._merge(endpoint_type, override, plan_name)
+                if config:
+                    plan_limits.setdefault(endpoint_type, {})[plan_name] = config
+
+        self.plan_limits = plan_limits
+        self.loaded_at = time.time()
+
+    def _merge(
+        self, endpoint_type: str, override: Any, plan_name: str
+    ) -> Optional[Dict]:
+        """Merge a plan override over the default, or None when it is invalid"""
+        base = self.base.get(endpoint_type)
+        if (
+            base is None
+            or not isinstance(override, dict)
+            or not set(override) <= PLAN_OVERRIDE_FIELDS
+        ):
+            logger.warning(
+                f"Ignoring rate limit override {endpoint_type!r} of plan {plan_name!r}"
+            )
+            return None
+
+        config = {**base, **override}
+        if not self._valid(config):
+            logger.warning(
+                f"Ignoring invalid rate limit override {endpoint_type!r} of plan {plan_name!r}"
+            )
+            return None
+        return config
+
+    @staticmethod
+    def _valid(config: Dict) -> bool:
+        counts = [config.get(field, 1) for field in ("limit", "window", "burst")]
+        lease_size = config.get("lease_size", 0)
+        return (
+            config.get("algorithm", SLIDING_WINDOW) in ALGORITHMS
+            and all(type(value) is int and value > 0 for value in counts)
+            and type(lease_size) is int
+            and lease_size >= 0
+        )
+
+    async def reload(self) -> None:
+        """Load the plan overrides from `user_plans`"""
+        from app.core.database import db_manager
+
+        response = (
+            db_manager.admin_client.table("user_plans")
+            .select("name, rate_limits")
+            .execute()
+        )
+        self.load(response.data or [])
+
+    async def limits_for(
+        self, endpoint_type: str, user_id: Optional[str] = None
+    ) -> Dict:
+        """Limits for an endpoint class, with the user's plan override applied"""
+        base = self.base[endpoint_type]
+        plan_limits = self.plan_limits.get(endpoint_type)
+        if not plan_limits or not user_id:
+            return base
+
+        plan_name = await self._plan_name(user_id)
+        return plan_limits.get(plan_name, base)
+
+    def forget_plans(self, user_ids: Optional[List[str]] = None) -> None:
+        """Drop memoized plan names of some users, or of everyone"""
+        if user_ids is None:
+            self.user_plans.clear()
+        else:
+            for user_id in user_ids:
+                self.user_plans.delete(str(user_id))
+
+    async def _plan_name(self, user_id: str) -> str:
+        current_time = time.time()
+        plan_name = self.user_plans.get(user_id, current_time)
+        if plan_name is None:
+            from app.core.database import db_manager
+
+            plan = await db_manager.get_user_plan_and_quota(UUID(str(user_id)))
+            plan_name = (plan.get("plan_name") or "").lower()
+            self.user_plans.set(
+                user_id, plan_name, current_time + self.plan_ttl_seconds
+            )
+        return plan_name
+
 
 # Global rate limiter instance
 rate_limiter = CustomRateLimiter()
 
+# Global plan-aware limits
+rate_limit_policy = RateLimitPolicy(RATE_LIMITS)
+
+
+async def reload_rate_limit_plans(interval_seconds: Optional[float] = None):
+    """Background task to pick up `user_plans.rate_limits` edits without a restart"""
+    interval_seconds = interval_seconds or settings.rate_limit_plans_reload_seconds
+    while True:
+        try:
+            await rate_limit_policy.reload()
+        except Exception as e:
+            logger.error(f"Rate limit plan reload error: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+async def sweep_rate_limits(interval_seconds: Optional[float] = None):
+    """Background task to drop expired memory backend keys and leases"""
+    interval_seconds = interval_seconds or settings.rate_limit_sweep_interval_seconds
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            removed = await rate_limiter.cleanup_expired_keys()
+            if removed:
+                logger.debug(f"Swept {removed} expired rate limit keys")
+        except Exception as e:
+            logger.error(f"Rate limit sweep error: {e}")
+
 
 def ai_rate_limit(limit: str = "10/minute"):
     """Rate limiter decorator for AI endpoints"""
@@ -0,0 +1,204 @@
+"""
+Read-replica routing for read-only Supabase queries
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Where clients send back the time of their last write (Unix seconds)
+WRITE_WATERMARK_COOKIE = "mockbox_last_write"
+WRITE_WATERMARK_HEADER = "X-Last-Write"
+
+
+class WriteWatermark:
+    """
+    Time of the client's last write, for read-your-writes across workers.
+
+    The request pipeline reads it from the request's cookie or header and,
+    when the request writes, returns the new time in both. Any worker can
+    then keep the client's reads on the primary, not only the one that
+    handled the write.
+    """
+
+    __slots__ = ("written_at", "updated")
+
+    def __init__(self, written_at: Optional[float] = None):
+        self.written_at = written_at
+        self.updated = False
+
+    @classmethod
+    def parse(cls, value: Optional[str]) -> "WriteWatermark":
+        try:
+            written_at = float(value) if value else None
+        except ValueError:
+            written_at = None
+        return cls(written_at)
+
+    def record(self) -> None:
+        self.written_at = time.time()
+        self.updated = True
+
+    def header_value(self) -> str:
+        return f"{self.written_at:.3f}"
+
+
+# Watermark of the request being handled (set by the request pipeline)
+current_write_watermark: ContextVar[Optional[WriteWatermark]] = ContextVar(
+    "current_write_watermark", default=None
+)
+
+
+class ReplicaRouter:
+    """
+    Decides where read-only queries go.
+
+    `select_replica()` returns a replica URL, or None to use the primary. The
+    default implementation round-robins over healthy replicas and keeps a
+    user's reads on the primary for `sticky_window_seconds` after their own
+    writes (read-your-writes). Writes are remembered per sticky key in this
+    process and, during a request, in the client's write watermark, which
+    the client sends back to whichever worker serves its next read. Subclass and override `select_replica` for other
+    policies and install the instance with `set_replica_router()`.
+    """
+
+    def __init__(
+        self,
+        replica_urls: Optional[List[str]] = None,
+        sticky_window_seconds: Optional[float] = None,
+        max_tracked_writers: int = 10000,
+    ):
+        self.replica_urls = list(
+            replica_urls
+            if replica_urls is not None
+            else settings.supabase_read_replica_urls
+        )
+        self.sticky_window_seconds = (
+            sticky_window_seconds
+            if sticky_window_seconds is not None
+            else settings.read_your_writes_window_seconds
+        )
+        self.max_tracked_writers = max_tracked_writers
+        self.healthy: Dict[str, bool] = {url: True for url in self.replica_urls}
+        # sticky key -> time of last write, oldest first
+        self.recent_writes: "OrderedDict[str, float]" = OrderedDict()
+        self._cycle = itertools.cycle(self.replica_urls) if self.replica_urls else None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replica_urls)
+
+    def record_write(self, sticky_key: Optional[object]) -> None:
+        """Pin the key's reads to the primary for the sticky window"""
+        if not self.enabled:
+            return
+
+        watermark = current_write_watermark.get()
+        if watermark is not None:
+            watermark.record()
+        if sticky_key is None:
+            return
+
+        key = str(sticky_key)
+        self.recent_writes[key] = time.monotonic()
+        self.recent_writes.move_to_end(key)
+        while len(self.recent_writes) > self.max_tracked_writers:
+            self.recent_writes.popitem(last=False)
+
+    def is_sticky(self, sticky_key: Optional[object]) -> bool:
+        """Whether the key (or the current client) wrote recently enough to need the primary"""
+        watermark = current_write_watermark.get()
+        if (
+            watermark is not None
+            and watermark.written_at is not None
+            and time.time() - watermark.written_at <= self.sticky_window_seconds
+        ):
+            return True
+        if sticky_key is None:
+            return False
+
+        written_at = self.recent_writes.get(str(sticky_key))
+        if written_at is None:
+            return False
+        if time.monotonic() - written_at > self.sticky_window_seconds:
+            del self.recent_writes[str(sticky_key)]
+            return False
+        return True
+
+    def select_replica(self, sticky_key: Optional[object] = None) -> Optional[str]:
+        """Return the replica URL for a read, or None for the primary"""
+        if not self.enabled or self.is_sticky(sticky_key):
+            return None
+
+        # Next healthy replica; fail over to the primary if there is none
+        for _ in range(len(self.replica_urls)):
+            url = next(self._cycle)
+            if self.healthy.get(url):
+                return url
+        return None
+
+    def mark_unhealthy(self, url: str) -> None:
+        if self.healthy.get(url):
+            logger.warning(f"Read replica {url} marked unhealthy, failing over")
+        self.healthy[url] = False
+
+    def mark_healthy(self, url: str) -> None:
+        if url in self.healthy and not self.healthy[url]:
+            logger.info(f"Read replica {url} healthy again")
+        self.healthy[url] = True
+
+    async def check_health(self, http_client: httpx.AsyncClient) -> None:
+        """Probe every replica's REST endpoint and update its health"""
+        for url in self.replica_urls:
+            try:
+                response = await http_client.get(
+                    f"{url}/rest/v1/",
+                    headers={
+                        "apikey": settings.supabase_key,
+                        "Authorization": f"Bearer {settings.supabase_key}",
+                    },
+                )
+                if response.status_code == 200:
+                    self.mark_healthy(url)
+                else:
+                    self.mark_unhealthy(url)
+            except Exception as e:
+                logger.debug(f"Read replica health check failed for {url}: {e}")
+                self.mark_unhealthy(url)
+
+
+# Global replica router
+replica_router = ReplicaRouter()
+
+
+def set_replica_router(router: ReplicaRouter) -> None:
+    """Install a custom replica router"""
+    global replica_router
+    replica_router = router
+
+
+def get_replica_router() -> ReplicaRouter:
+    """Get the active replica router"""
+    return replica_router
+
+
+# Background health check task
+async def monitor_replica_health():
+    """Background task to periodically health check read replicas"""
+    async with httpx.AsyncClient(timeout=5.0) as http_client:
+        while True:
+            try:
+                await get_replica_router().check_health(http_client)
+            except Exception as e:
+                logger.error(f"Read replica health check error: {e}")
+            await asyncio.sleep(settings.replica_health_check_interval_seconds)
@@ -0,0 +1,234 @@
+"""
+Route policies: authentication, rate limit class and body size per route
+"""
+
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.security import get_current_user, get_optional_user, public_route
+
+# Authentication modes
+AUTH_PUBLIC = "public"  # never authenticated
+AUTH_REQUIRED = "required"  # 401 without a valid token
+AUTH_OPTIONAL = "optional"  # user context when a valid token is sent
+
+# Rate limit class resolved per request: "authenticated" with a user,
+# "anonymous" without one
+API_RATE_LIMIT = "api"
+
+DEFAULT_MAX_BODY_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Request body limits that differ from the default, keyed like
+# ROUTE_QUERY_BUDGETS ("METHOD /path/{param}")
+ROUTE_MAX_BODY_SIZES: Dict[str, int] = {
+    # OpenAPI specs and HAR captures are routinely larger than a mock
+    "POST /api/v1/mocks/import": 50
+    * 1024
+    * 1024,
+}
+
+PUBLIC_PATHS = {"/", "/health", "/docs", "/redoc", "/openapi.json", "/favicon.ico"}
+HEALTH_PATHS = {"/", "/health", "/docs", "/redoc"}
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    """What the request pipeline enforces for one route and method"""
+
+    auth: str
+    rate_limit: Optional[str]  # RATE_LIMITS class, API_RATE_LIMIT or None
+    max_body_size: int = DEFAULT_MAX_BODY_SIZE
+
+
+def classify(method: str, path: str) -> RoutePolicy:
+    """
+    Policy for a route path template, or a raw path no route matches.
+
+    Decisions are made on whole path segments under /api/v1, so for example
+    only routes in the `ai` area count as AI endpoints. The authentication
+    mode decided here applies unless a route declares its own through its
+    dependencies (see `route_auth`), so API routes require a token unless
+    they opt out explicitly.
+    """
+    max_body_size = ROUTE_MAX_BODY_SIZES.get(f"{method} {path}", DEFAULT_MAX_BODY_SIZE)
+    path = path.lower()
+    segments = path.strip("/").split("/")
+    api = segments[:2] == ["api", "v1"]
+    area = segments[2] if api and len(segments) > 2 else None
+    section = segments[3] if area and len(segments) > 3 else None
+    reading = method in ("GET", "HEAD")
+
+    if area == "ai":
+        rate_limit = "ai"
+    elif area == "simulate":
+        rate_limit = "simulation"
+    elif area == "mocks" and section == "public":
+        rate_limit = "public_api"
+    elif api:
+        rate_limit = API_RATE_LIMIT
+    elif path in HEALTH_PATHS:
+        rate_limit = "health"
+    else:
+        rate_limit = None
+
+    if (
+        path in PUBLIC_PATHS
+        or area == "simulate"
+        or (area == "mocks" and section in ("public", "templates") and reading)
+    ):
+        auth = AUTH_PUBLIC
+    elif api:
+        auth = AUTH_REQUIRED
+    else:
+        auth = AUTH_OPTIONAL
+
+    return RoutePolicy(auth=auth, rate_limit=rate_limit, max_body_size=max_body_size)
+
+
+def _dependency_calls(dependant: Any) -> Iterator[Callable]:
+    for dependency in dependant.dependencies:
+        yield dependency.call
+        yield from _dependency_calls(dependency)
+
+
+def route_auth(route: Any) -> Optional[str]:
+    """
+    Authentication a route declares through its dependencies: required with
+    `get_current_user`, optional with `get_optional_user`, public with the
+    `public_route` marker. None when it declares none of them (or is not a
+    FastAPI route), so the path rules of `classify` apply.
+    """
+    dependant = getattr(route, "dependant", None)
+    if dependant is None:
+        return None
+
+    calls = set(_dependency_calls(dependant))
+    if get_current_user in calls:
+        return AUTH_REQUIRED
+    if get_optional_user in calls:
+        return AUTH_OPTIONAL
+    if public_route in calls:
+        return AUTH_PUBLIC
+    return None
+
+
+def route_policy(method: str, route: Any) -> RoutePolicy:
+    """Policy of one route: the path rules, with any declared authentication"""
+    policy = classify(method, route.path)
+    auth = route_auth(route)
+    return policy if auth is None else replace(policy, auth=auth)
+
+
+def iter_routes(routes: Iterable[Any]) -> Iterator[Any]:
+    """Every route with a path and methods, including those of included routers"""
+    for route in routes:
+        # FastAPI resolves included routers lazily
+        if hasattr(route, "effective_candidates"):
+            yield from iter_routes(route.effective_candidates())
+        elif getattr(route, "methods", None):
+            yield route
+
+
+def _segments(path: str) -> List[str]:
+    return [segment for segment in path.split("/") if segment]
+
+
+# A route's policy and its position in declaration order
+_Entry = Tuple[int, RoutePolicy]
+
+
+class _Node:
+    """Prefix tree node for one path segment"""
+
+    __slots__ = ("children", "param", "catch_all", "policies")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.param: Optional["_Node"] = None
+        # Policies of a trailing {name:path} parameter, which matches the rest
+        self.catch_all: Optional[Dict[str, _Entry]] = None
+        self.policies: Dict[str, _Entry] = {}
+
+
+class RoutePolicyTable:
+    """
+    Policies of the app's routes, compiled once from the router.
+
+    Paths without parameters are found with one dict lookup; the others walk
+    a prefix tree of path segments. Like the router, the first declared route
+    that matches the path and method wins, so for example a literal route
+    declared after `/mocks/{mock_id}` is shadowed by it. Requests no route
+    matches (404s) fall back to `classify` on the raw path.
+    """
+
+    def __init__(self):
+        self.static: Dict[Tuple[str, str], RoutePolicy] = {}
+        self.root = _Node()
+        self.compiled = False
+
+    def compile(self, routes: Iterable[Any]) -> None:
+        static: Dict[Tuple[str, str], _Entry] = {}
+        root = _Node()
+
+        for index, route in enumerate(iter_routes(routes)):
+            segments = _segments(route.path)
+            for method in route.methods:
+                entry = (index, route_policy(method, route))
+                if "{" not in route.path:
+                    static.setdefault((method, "/" + "/".join(segments)), entry)
+                else:
+                    self._insert(root, segments, method, entry)
+
+        # A parameter route declared before a literal one shadows it
+        for (method, path), entry in static.items():
+            match = self._match(root, _segments(path), 0, method)
+            if match is not None and match[0] < entry[0]:
+                static[(method, path)] = match
+
+        self.static = {key: policy for key, (_, policy) in static.items()}
+        self.root, self.compiled = root, True
+
+    @staticmethod
+    def _insert(node: _Node, segments: List[str], method: str, entry: _Entry) -> None:
+        for segment in segments:
+            if segment.startswith("{") and segment.endswith(":path}"):
+                if node.catch_all is None:
+                    node.catch_all = {}
+                node.catch_all.setdefault(method, entry)
+                return
+            if segment.startswith("{"):
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _Node())
+        node.policies.setdefault(method, entry)
+
+    def lookup(self, method: str, path: str) -> RoutePolicy:
+        segments = _segments(path)
+        policy = self.static.get((method, "/" + "/".join(segments)))
+        if policy is None:
+            match = self._match(self.root, segments, 0, method)
+            policy = match[1] if match is not None else None
+        return policy or classify(method, path)
+
+    def _match(
+        self, node: _Node, segments: List[str], index: int, method: str
+    ) -> Optional[_Entry]:
+        """The earliest declared route matching the rest of the path"""
+        if index == len(segments):
+            return node.policies.get(method)
+
+        candidates = []
+        child = node.children.get(segments[index])
+        if child is not None:
+            candidates.append(self._match(child, segments, index + 1, method))
+        if node.param is not None:
+            candidates.append(self._match(node.param, segments, index + 1, method))
+        if node.catch_all is not None:
+            candidates.append(node.catch_all.get(method))
+        return min(
+            (entry for entry in candidates if entry is not None),
+            key=lambda entry: entry[0],
+            default=None,
+        )
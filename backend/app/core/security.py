@@ -5,7 +5,7 @@ Authentication and security utilities
 import jwt
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, Request, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.config import settings
 
@@ -100,12 +100,15 @@ def create_access_token(
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
+    request: Request = None,
 ) -> Dict[str, Any]:
     """
     Get current authenticated user from JWT token
 
     Args:
         credentials: HTTP authorization credentials
+        request: Current request; reuses the payload the authentication stage
+            already verified for the same token
 
     Returns:
         User data from token payload including the raw token
@@ -115,7 +118,11 @@ async def get_current_user(
     """
     try:
         token = credentials.credentials
-        payload = verify_supabase_token(token)
+        state = request.scope.get("state", {}) if request is not None else {}
+        if state.get("token") == token:
+            payload = state["token_payload"]
+        else:
+            payload = verify_supabase_token(token)
         return {
             "id": payload.get("sub"),
             "email": payload.get("email"),
@@ -129,6 +136,7 @@ async def get_current_user(
 
 async def get_optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    request: Request = None,
 ) -> Optional[Dict[str, Any]]:
     """
     Get current user if authenticated, otherwise return None
@@ -143,11 +151,21 @@ async def get_optional_user(
         return None
 
     try:
-        return await get_current_user(credentials)
+        return await get_current_user(credentials, request)
     except AuthError:
         return None
 
 
+def public_route() -> None:
+    """
+    Marker dependency for routes callable without authentication.
+
+    Routes under /api require a token unless they declare
+    `dependencies=[Depends(public_route)]`, which the request pipeline reads
+    when compiling route policies.
+    """
+
+
 def require_admin(
     current_user: Dict[str, Any] = Depends(get_current_user),
 ) -> Dict[str, Any]:
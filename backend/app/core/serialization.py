@@ -0,0 +1,78 @@
+"""
+Fast JSON encoding for API responses
+"""
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+
+def _default(value: Any) -> Any:
+    """Encode the types neither encoder handles natively"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    # Only reached by the json fallback, orjson encodes these itself
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content as compact UTF-8 JSON.
+
+    Uses orjson when installed and the standard library otherwise; Pydantic
+    models are serialized by pydantic-core straight to bytes. Content orjson
+    rejects (integers beyond 64 bits, which mock bodies may contain) is
+    encoded by the standard library instead.
+    """
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode("utf-8")
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                content, default=_default, option=orjson.OPT_NON_STR_KEYS
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            pass
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with `dumps`.
+
+    Use it for responses built by hand (simulated mock bodies, exception
+    handlers, middleware) and as `response_class` for routes without a
+    response_model. Routes with a response_model already get FastAPI's
+    pydantic-core serialization, which is faster than dumping the model to a
+    dict and encoding that, so they keep the default response class.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
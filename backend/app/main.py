@@ -8,24 +8,35 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
 from app.core.config import settings
+from app.core.serialization import FastJSONResponse
 from app.core.database import init_database, close_database
 from app.api.v1.api import router as api_v1_router
-from app.middleware.rate_limit_middleware import (
-    RateLimitMiddleware,
-    SecurityHeadersMiddleware,
-)
+from app.middleware.pipeline import RequestPipeline
+from app.middleware.rate_limit_middleware import RateLimitStage, SecurityHeadersStage
 from app.middleware.security_middleware import (
-    AuthenticationMiddleware,
-    SecurityValidationMiddleware,
+    AuthenticationStage,
+    SecurityValidationStage,
+)
+from app.core.rate_limiting import (
+    rate_limiter,
+    RATE_LIMITS,
+    reload_rate_limit_plans,
+    sweep_rate_limits,
 )
-from app.core.rate_limiting import rate_limiter, RATE_LIMITS
 from app.services.monitoring import cleanup_monitoring_data
+from app.services.access_log import flush_access_logs, maintain_access_stats
+from app.core.plan_cache import watch_plan_changes
+from app.core.replica_router import WRITE_WATERMARK_HEADER, monitor_replica_health
+from app.services.health_monitor import (
+    get_health_monitor,
+    health_monitor,
+    register_default_probes,
+)
 
 
 # Rate limiter (legacy - for health check)
@@ -34,11 +45,34 @@ limiter = Limiter(key_func=get_remote_address)
 # Background task for monitoring cleanup
 cleanup_task = None
 
+# Background task for flushing buffered mock access events
+access_log_task = None
+
+# Background task rolling up access events and managing their partitions
+access_stats_task = None
+
+# Background task for read replica health checks
+replica_health_task = None
+
+# Background task for dependency health probes
+health_probe_task = None
+
+# Background task evicting expired in-memory rate limit keys and leases
+rate_limit_sweep_task = None
+
+# Background task reloading per-plan rate limits
+rate_limit_plans_task = None
+
+# Background task invalidating cached plans changed in the database
+plan_changes_task = None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
-    global cleanup_task
+    global cleanup_task, access_log_task, access_stats_task
+    global replica_health_task, health_probe_task
+    global rate_limit_sweep_task, rate_limit_plans_task, plan_changes_task
 
     # Startup
     print("🚀 Starting MockBox Backend...")
@@ -50,13 +84,49 @@ async def lifespan(app: FastAPI):
 
         rl.__init__(settings.redis_url)
         print(f"✅ Rate limiting initialized with Redis: {settings.redis_url}")
+
+        from app.core.plan_cache import plan_cache
+
+        plan_cache.__init__(settings.redis_url)
+        print("✅ Plan cache initialized with Redis")
     else:
         print("⚠️  Rate limiting using memory cache (Redis not configured)")
 
+    # Evict expired in-memory rate limit keys and worker leases
+    rate_limit_sweep_task = asyncio.create_task(sweep_rate_limits())
+
+    # Load per-plan rate limits now and whenever user_plans changes
+    rate_limit_plans_task = asyncio.create_task(reload_rate_limit_plans())
+
+    # Drop cached plans as soon as they change in the database
+    if settings.plan_cache_watch_interval_seconds > 0:
+        plan_changes_task = asyncio.create_task(watch_plan_changes())
+
     # Start background monitoring cleanup task
     cleanup_task = asyncio.create_task(cleanup_monitoring_data())
     print("✅ Monitoring cleanup task started")
 
+    # Start background access log flusher
+    access_log_task = asyncio.create_task(flush_access_logs())
+    print("✅ Access log flush task started")
+
+    # Maintain access stats rollups and event partitions (unless pg_cron does)
+    if settings.access_stats_rollup_interval_seconds > 0:
+        access_stats_task = asyncio.create_task(maintain_access_stats())
+        print("✅ Access stats maintenance task started")
+
+    # Start background dependency probes (health endpoints serve cached results)
+    register_default_probes()
+    health_probe_task = asyncio.create_task(health_monitor.run())
+    print(f"✅ Health probes started: {', '.join(health_monitor.probes)}")
+
+    # Health check read replicas (reads fail over to the primary when unhealthy)
+    if settings.supabase_read_replica_urls:
+        replica_health_task = asyncio.create_task(monitor_replica_health())
+        print(
+            f"✅ Read replica routing enabled ({len(settings.supabase_read_replica_urls)} replicas)"
+        )
+
     print("✅ Backend startup complete")
 
     yield
@@ -64,13 +134,23 @@ async def lifespan(app: FastAPI):
     # Shutdown
     print("🔄 Shutting down MockBox Backend...")
 
-    # Cancel background task
-    if cleanup_task:
-        cleanup_task.cancel()
-        try:
-            await cleanup_task
-        except asyncio.CancelledError:
-            pass
+    # Cancel background tasks (the access log flusher flushes once more on cancel)
+    for task in (
+        cleanup_task,
+        access_log_task,
+        access_stats_task,
+        replica_health_task,
+        health_probe_task,
+        rate_limit_sweep_task,
+        rate_limit_plans_task,
+        plan_changes_task,
+    ):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
 
     await close_database()
     print("✅ Backend shutdown complete")
@@ -90,25 +170,33 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
-# Add security validation middleware (only if enabled)
+# Request pipeline: one pure ASGI middleware running the enabled stages in
+# order (cheap validation first, then authentication, then rate limiting,
+# which needs the user). It also adds timing headers and checks query budgets,
+# and classifies each request by the route policy compiled from app.routes.
+stages = []
+
+# Add security headers (only if enabled)
+if settings.enable_security_headers:
+    stages.append(SecurityHeadersStage())
+    print("✅ Security headers enabled")
+
+# Add security validation (only if enabled)
 if settings.enable_security_validation:
-    app.add_middleware(SecurityValidationMiddleware)
-    print("✅ Security validation middleware enabled")
+    stages.append(SecurityValidationStage())
+    print("✅ Security validation enabled")
 
-# Add authentication middleware (only if enabled)
+# Add authentication (only if enabled)
 if settings.enable_authentication_middleware:
-    app.add_middleware(AuthenticationMiddleware)
-    print("✅ Authentication middleware enabled")
+    stages.append(AuthenticationStage())
+    print("✅ Authentication enabled")
 
-# Add advanced rate limiting middleware (only if enabled)
+# Add advanced rate limiting (only if enabled)
 if settings.enable_rate_limiting:
-    app.add_middleware(RateLimitMiddleware)
-    print("✅ Advanced rate limiting middleware enabled")
+    stages.append(RateLimitStage())
+    print("✅ Advanced rate limiting enabled")
 
-# Add security headers middleware (only if enabled)
-if settings.enable_security_headers:
-    app.add_middleware(SecurityHeadersMiddleware)
-    print("✅ Security headers middleware enabled")
+app.add_middleware(RequestPipeline, stages=stages, routes=app.routes)
 
 # Add CORS middleware
 app.add_middleware(
@@ -117,6 +205,8 @@ app.add_middleware(
     allow_credentials=settings.cors_allow_credentials,
     allow_methods=settings.cors_allow_methods,
     allow_headers=settings.cors_allow_headers,
+    # Clients without cookies send it back for read-your-writes
+    expose_headers=[WRITE_WATERMARK_HEADER],
 )
 
 app.add_middleware(
@@ -125,22 +215,11 @@ app.add_middleware(
 )
 
 
-# Custom middleware for request timing and logging
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Add request processing time to response headers"""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
-
-
 # Exception handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Custom HTTP exception handler"""
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=exc.status_code,
         content={
             "success": False,
@@ -159,7 +238,7 @@ async def general_exception_handler(request: Request, exc: Exception):
     else:
         error_detail = "Internal server error"
 
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content={
             "success": False,
@@ -171,13 +250,12 @@ async def general_exception_handler(request: Request, exc: Exception):
 
 
 # Health check endpoint
-@app.get("/health")
+@app.get("/health", response_class=FastJSONResponse)
 @limiter.limit("10/minute")
 async def health_check(request: Request):
-    """Health check endpoint"""
-    from app.core.database import db_manager
-
-    db_healthy = await db_manager.health_check()
+    """Health check endpoint (served from the latest background probe results)"""
+    monitor = await get_health_monitor()
+    db_healthy = monitor.is_healthy("supabase")
 
     return {
         "status": "healthy" if db_healthy else "unhealthy",
@@ -185,11 +263,12 @@ async def health_check(request: Request):
         "timestamp": time.time(),
         "database": db_healthy,
         "environment": settings.environment,
+        "dependencies": monitor.summary(),
     }
 
 
 # Root endpoint
-@app.get("/")
+@app.get("/", response_class=FastJSONResponse)
 async def root():
     """Root endpoint"""
     return {
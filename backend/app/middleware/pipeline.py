@@ -0,0 +1,205 @@
+"""
+Pure ASGI request pipeline for MockBox
+"""
+
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from starlette.datastructures import URL, Headers, MutableHeaders
+from starlette.requests import Request, cookie_parser
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.query_budget import check_query_budget, route_key
+from app.core.query_instrumentation import RequestQueryStats, current_request_queries
+from app.core.replica_router import (
+    WRITE_WATERMARK_COOKIE,
+    WRITE_WATERMARK_HEADER,
+    WriteWatermark,
+    current_write_watermark,
+    get_replica_router,
+)
+from app.core.route_policy import RoutePolicy, RoutePolicyTable, classify
+
+
+class RequestContext:
+    """
+    Per-request values computed once and shared by every stage.
+
+    User fields are written to the ASGI scope state, so endpoints still read
+    them as `request.state.user_id` and friends.
+    """
+
+    __slots__ = (
+        "scope",
+        "path",
+        "path_lower",
+        "method",
+        "headers",
+        "client_ip",
+        "state",
+        "start_time",
+        "query_stats",
+        "write_watermark",
+        "rate_limit",
+        "policy",
+        "_url",
+    )
+
+    def __init__(self, scope: Scope, policy: Optional[RoutePolicy] = None):
+        self.scope = scope
+        self.path: str = scope["path"]
+        self.path_lower = self.path.lower()
+        self.method: str = scope["method"]
+        self.headers = Headers(scope=scope)
+        client = scope.get("client")
+        self.client_ip: str = client[0] if client else "unknown"
+        self.state: Dict[str, Any] = scope.setdefault("state", {})
+        self.start_time = time.perf_counter()
+        self.query_stats = RequestQueryStats()
+        # Time of the client's last write (read-your-writes on replicas)
+        self.write_watermark = WriteWatermark.parse(
+            self.headers.get(WRITE_WATERMARK_HEADER)
+            or cookie_parser(self.headers.get("cookie", "")).get(WRITE_WATERMARK_COOKIE)
+        )
+        # Set by the rate limit stage: (endpoint_type, limit info)
+        self.rate_limit: Optional[tuple] = None
+        # Authentication, rate limit class and body limit of the route
+        self.policy = policy or classify(self.method, self.path)
+        self._url: Optional[URL] = None
+
+    @property
+    def url(self) -> URL:
+        if self._url is None:
+            self._url = URL(scope=self.scope)
+        return self._url
+
+    @property
+    def user_id(self) -> Optional[str]:
+        return self.state.get("user_id")
+
+    @property
+    def user_agent(self) -> str:
+        return self.headers.get("user-agent", "unknown")
+
+    def set_user(self, token: str, payload: Dict[str, Any]) -> None:
+        """Record the verified token so routes do not decode it again"""
+        self.state["user_id"] = payload.get("sub")
+        self.state["user_email"] = payload.get("email")
+        self.state["user_role"] = payload.get("role", "user")
+        self.state["token"] = token
+        self.state["token_payload"] = payload
+
+    def request(self) -> Request:
+        """Starlette view of the request, for helpers that expect one"""
+        return Request(self.scope)
+
+
+class Stage:
+    """
+    One step of the pipeline.
+
+    `on_request` runs in pipeline order before the app and may answer the
+    request itself by returning a response. `on_response` edits the headers
+    of whatever response is sent, in reverse order, for every stage whose
+    `on_request` ran.
+    """
+
+    async def on_request(self, ctx: RequestContext) -> Optional[Response]:
+        return None
+
+    def on_response(
+        self, ctx: RequestContext, status: int, headers: MutableHeaders
+    ) -> None:
+        pass
+
+
+class RequestPipeline:
+    """
+    Pure ASGI middleware running the request stages in one layer.
+
+    Unlike a stack of BaseHTTPMiddleware, this adds no tasks or body streams
+    per request, so streaming responses pass straight through. It also owns
+    request timing and database query accounting (X-Process-Time,
+    Server-Timing and route query budgets), carries the client's write
+    watermark for replica routing, and looks up the route policy the stages
+    act on once per request.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        stages: Sequence[Stage] = (),
+        routes: Optional[Sequence] = None,
+    ):
+        self.app = app
+        self.stages: List[Stage] = list(stages)
+        # `routes` is the app's live route list; Starlette builds middleware
+        # at startup, after every router is included. Without it the table
+        # is compiled from the app on the first request.
+        self.policies = RoutePolicyTable()
+        if routes is not None:
+            self.policies.compile(routes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if not self.policies.compiled and "app" in scope:
+            self.policies.compile(scope["app"].routes)
+
+        ctx = RequestContext(
+            scope, self.policies.lookup(scope["method"], scope["path"])
+        )
+        token = current_request_queries.set(ctx.query_stats)
+        watermark_token = current_write_watermark.set(ctx.write_watermark)
+        try:
+            for index, stage in enumerate(self.stages):
+                response = await stage.on_request(ctx)
+                if response is not None:
+                    ran = self.stages[: index + 1]
+                    await response(
+                        scope, receive, self._send_with_headers(ctx, ran, send)
+                    )
+                    return
+
+            await self.app(
+                scope, receive, self._send_with_headers(ctx, self.stages, send)
+            )
+        finally:
+            current_write_watermark.reset(watermark_token)
+            current_request_queries.reset(token)
+
+    def _send_with_headers(
+        self, ctx: RequestContext, stages: Sequence[Stage], send: Send
+    ) -> Callable[[Message], Awaitable[None]]:
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for stage in reversed(stages):
+                    stage.on_response(ctx, message["status"], headers)
+
+                headers["X-Process-Time"] = str(time.perf_counter() - ctx.start_time)
+                headers["Server-Timing"] = ctx.query_stats.server_timing()
+                if ctx.write_watermark.updated:
+                    self._set_write_watermark(ctx.write_watermark, headers)
+                if "route" in ctx.scope:
+                    check_query_budget(route_key(ctx.scope), ctx.query_stats)
+            await send(message)
+
+        return send_wrapper
+
+    @staticmethod
+    def _set_write_watermark(
+        watermark: WriteWatermark, headers: MutableHeaders
+    ) -> None:
+        """Hand the write time to the client so every worker sees it"""
+        value = watermark.header_value()
+        max_age = math.ceil(get_replica_router().sticky_window_seconds)
+        headers[WRITE_WATERMARK_HEADER] = value
+        headers.append(
+            "set-cookie",
+            f"{WRITE_WATERMARK_COOKIE}={value}; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax",
+        )
@@ -2,10 +2,20 @@
 Rate limiting middleware for MockBox
 """
 
-from fastapi import Request, Response
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from app.core.rate_limiting import rate_limiter, RATE_LIMITS
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+
+from app.core.route_policy import API_RATE_LIMIT
+from app.core.serialization import FastJSONResponse
+from app.core.rate_limiting import (
+    rate_limiter,
+    rate_limit_policy,
+    RATE_LIMITS,
+    SLIDING_WINDOW,
+)
+from app.middleware.pipeline import RequestContext, Stage
 from app.services.monitoring import RateLimitMonitor
 import time
 import logging
@@ -13,39 +23,45 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Advanced rate limiting middleware with intelligent endpoint detection"""
+class RateLimitStage(Stage):
+    """Advanced rate limiting stage with intelligent endpoint detection"""
 
-    def __init__(self, app):
-        super().__init__(app)
+    def __init__(self):
         self.monitor = RateLimitMonitor()
 
-    async def dispatch(self, request: Request, call_next):
+    async def on_request(self, ctx: RequestContext) -> Optional[Response]:
         """Process request with rate limiting"""
-        endpoint_type, config = self._get_endpoint_config(request)
+        endpoint_type, config = self._get_endpoint_config(ctx)
 
         if not config:
             # No rate limiting for this endpoint
-            return await call_next(request)
+            return None
 
-        # Generate rate limit key
-        key = await rate_limiter.get_rate_limit_key(request, endpoint_type)
+        # Apply the user's plan limits
+        user_id = ctx.user_id
+        if user_id and endpoint_type in RATE_LIMITS:
+            config = await rate_limit_policy.limits_for(endpoint_type, user_id)
 
-        # Check rate limit
-        allowed = await rate_limiter.check_rate_limit(
-            key, config["limit"], config["window"]
+        # Generate rate limit key
+        key = rate_limiter.rate_limit_key(endpoint_type, user_id, ctx.client_ip)
+
+        # Check and record the request; one Redis round trip also yields
+        # the header values
+        limit_info = await rate_limiter.hit(
+            key,
+            config["limit"],
+            config["window"],
+            algorithm=config.get("algorithm", SLIDING_WINDOW),
+            burst=config.get("burst"),
+            lease_size=config.get("lease_size"),
         )
+        ctx.rate_limit = (endpoint_type, limit_info)
 
-        if not allowed:
+        if not limit_info["allowed"]:
             # Rate limit exceeded
-            await self._log_rate_limit_violation(request, endpoint_type, key)
-
-            # Get rate limit info for headers
-            limit_info = await rate_limiter.get_rate_limit_info(
-                key, config["limit"], config["window"]
-            )
+            await self._log_rate_limit_violation(ctx, endpoint_type, key)
 
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=429,
                 content={
                     "error": "RATE_LIMIT_EXCEEDED",
@@ -63,88 +79,61 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 },
             )
 
-        # Process request
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
+        return None
 
+    def on_response(
+        self, ctx: RequestContext, status: int, headers: MutableHeaders
+    ) -> None:
         # Add rate limiting headers to successful responses
-        if response.status_code < 400:
-            limit_info = await rate_limiter.get_rate_limit_info(
-                key, config["limit"], config["window"]
-            )
-
-            response.headers["X-RateLimit-Limit"] = str(limit_info["limit"])
-            response.headers["X-RateLimit-Remaining"] = str(limit_info["remaining"])
-            response.headers["X-RateLimit-Reset"] = str(limit_info["reset"])
-            response.headers["X-RateLimit-Type"] = endpoint_type
-
-        # Add performance headers
-        response.headers["X-Process-Time"] = str(process_time)
-
-        return response
-
-    def _get_endpoint_config(self, request: Request) -> tuple:
+        if ctx.rate_limit and status < 400:
+            endpoint_type, limit_info = ctx.rate_limit
+            headers["X-RateLimit-Limit"] = str(limit_info["limit"])
+            headers["X-RateLimit-Remaining"] = str(limit_info["remaining"])
+            headers["X-RateLimit-Reset"] = str(limit_info["reset"])
+            headers["X-RateLimit-Type"] = endpoint_type
+
+    def _get_endpoint_config(self, ctx: RequestContext) -> tuple:
         """Determine endpoint type and rate limiting configuration"""
-        path = request.url.path.lower()
-        method = request.method.upper()
-
-        # AI endpoints - highest priority and strictest limits
-        if any(keyword in path for keyword in ["/ai/", "/generate"]):
-            return "ai", RATE_LIMITS["ai"]
-
-        # Simulation endpoints - moderate limits for public use
-        elif "/simulate/" in path:
-            return "simulation", RATE_LIMITS["simulation"]
-
-        # Public API endpoints - moderate limits
-        elif "/mocks/public" in path:
-            return "public_api", RATE_LIMITS["public_api"]
+        endpoint_type = ctx.policy.rate_limit
 
-        # Protected API endpoints - check authentication
-        elif path.startswith("/api/v1/"):
-            # Check if user is authenticated (set by auth middleware)
-            user_id = getattr(request.state, "user_id", None)
-            if user_id:
-                return "authenticated", RATE_LIMITS["authenticated"]
-            else:
-                return "anonymous", RATE_LIMITS["anonymous"]
+        # No rate limiting for this endpoint
+        if endpoint_type is None:
+            return None, None
 
-        # Health and root endpoints - minimal rate limiting
-        elif path in ["/health", "/", "/docs", "/redoc"]:
-            return "public_api", {"limit": 300, "window": 60}  # 5 requests per second
+        # Other API endpoints - limits depend on authentication (set by the
+        # authentication stage)
+        if endpoint_type == API_RATE_LIMIT:
+            endpoint_type = "authenticated" if ctx.user_id else "anonymous"
 
-        # No rate limiting for other endpoints
-        return None, None
+        return endpoint_type, RATE_LIMITS[endpoint_type]
 
     async def _log_rate_limit_violation(
-        self, request: Request, endpoint_type: str, key: str
+        self, ctx: RequestContext, endpoint_type: str, key: str
     ):
         """Log rate limit violations for monitoring"""
         try:
-            user_id = getattr(request.state, "user_id", None)
-            ip_address = request.client.host if request.client else "unknown"
+            user_id = ctx.user_id
 
             await self.monitor.log_rate_limit_violation(
-                endpoint=request.url.path,
+                endpoint=ctx.path,
                 user_id=user_id,
-                ip_address=ip_address,
+                ip_address=ctx.client_ip,
                 violation_type=endpoint_type,
                 metadata={
-                    "method": request.method,
-                    "user_agent": request.headers.get("user-agent", "unknown"),
+                    "method": ctx.method,
+                    "user_agent": ctx.user_agent,
                     "key": key,
                     "timestamp": time.time(),
                 },
             )
 
             logger.warning(
-                f"Rate limit exceeded: {endpoint_type} on {request.url.path}",
+                f"Rate limit exceeded: {endpoint_type} on {ctx.path}",
                 extra={
                     "user_id": user_id,
-                    "ip_address": ip_address,
-                    "endpoint": request.url.path,
-                    "method": request.method,
+                    "ip_address": ctx.client_ip,
+                    "endpoint": ctx.path,
+                    "method": ctx.method,
                     "rate_limit_key": key,
                 },
             )
@@ -153,25 +142,24 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             logger.error(f"Failed to log rate limit violation: {e}")
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersStage(Stage):
     """Add security headers to all responses"""
 
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-
+    HEADERS = {
+        "X-Content-Type-Options": "nosniff",
+        "X-Frame-Options": "DENY",
+        "X-XSS-Protection": "1; mode=block",
+        "Referrer-Policy": "strict-origin-when-cross-origin",
+        "Permissions-Policy": "camera=(), microphone=(), geolocation=()",
+    }
+
+    def on_response(
+        self, ctx: RequestContext, status: int, headers: MutableHeaders
+    ) -> None:
         # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = (
-            "camera=(), microphone=(), geolocation=()"
-        )
+        for name, value in self.HEADERS.items():
+            headers[name] = value
 
         # Add HSTS for HTTPS
-        if request.url.scheme == "https":
-            response.headers["Strict-Transport-Security"] = (
-                "max-age=31536000; includeSubDomains"
-            )
-
-        return response
+        if ctx.scope.get("scheme") == "https":
+            headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
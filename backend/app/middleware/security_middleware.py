@@ -2,59 +2,54 @@
 Enhanced security middleware that integrates with authentication
 """
 
-from fastapi import Request, Response
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Optional
+
+from starlette.responses import Response
+
+from app.core.serialization import FastJSONResponse
+from app.core.route_policy import AUTH_PUBLIC, AUTH_REQUIRED
 from app.core.security import verify_supabase_token, AuthError
+from app.middleware.pipeline import RequestContext, Stage
 from app.services.monitoring import security_monitor
-import time
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class AuthenticationMiddleware(BaseHTTPMiddleware):
-    """Enhanced authentication middleware with rate limiting integration"""
+class AuthenticationStage(Stage):
+    """Enhanced authentication stage with rate limiting integration"""
 
-    def __init__(self, app):
-        super().__init__(app)
-
-    async def dispatch(self, request: Request, call_next):
+    async def on_request(self, ctx: RequestContext) -> Optional[Response]:
         """Process authentication and set user context for rate limiting"""
 
         # Skip authentication for public endpoints
-        if self._is_public_endpoint(request):
-            return await call_next(request)
+        if ctx.policy.auth == AUTH_PUBLIC:
+            return None
 
-        # Try to extract and verify JWT token
-        user_context = await self._extract_user_context(request)
+        # Try to extract and verify JWT token (once per request, routes reuse it)
+        user_context = await self._extract_user_context(ctx)
 
         if user_context:
-            # Set user context for rate limiting
-            request.state.user_id = user_context.get("user_id")
-            request.state.user_email = user_context.get("email")
-            request.state.user_role = user_context.get("role", "user")
+            ctx.set_user(*user_context)
 
             # Log successful authentication
-            logger.debug(
-                f"Authenticated user: {user_context.get('user_id')} for {request.url.path}"
-            )
+            logger.debug(f"Authenticated user: {ctx.user_id} for {ctx.path}")
         else:
             # For protected endpoints, require authentication
-            if self._requires_authentication(request):
+            if ctx.policy.auth == AUTH_REQUIRED:
                 await security_monitor.log_security_event(
                     event_type="unauthorized_access_attempt",
                     severity="medium",
-                    description=f"Unauthorized access attempt to {request.url.path}",
-                    ip_address=request.client.host if request.client else "unknown",
+                    description=f"Unauthorized access attempt to {ctx.path}",
+                    ip_address=ctx.client_ip,
                     metadata={
-                        "endpoint": request.url.path,
-                        "method": request.method,
-                        "user_agent": request.headers.get("user-agent", "unknown"),
+                        "endpoint": ctx.path,
+                        "method": ctx.method,
+                        "user_agent": ctx.user_agent,
                     },
                 )
 
-                return JSONResponse(
+                return FastJSONResponse(
                     status_code=401,
                     content={
                         "error": "AUTHENTICATION_REQUIRED",
@@ -63,16 +58,13 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
                     },
                 )
 
-        # Process request
-        response = await call_next(request)
-
-        return response
+        return None
 
-    async def _extract_user_context(self, request: Request) -> dict:
-        """Extract user context from JWT token"""
+    async def _extract_user_context(self, ctx: RequestContext) -> Optional[tuple]:
+        """Extract (token, payload) from the JWT in the Authorization header"""
         try:
             # Get Authorization header
-            auth_header = request.headers.get("authorization")
+            auth_header = ctx.headers.get("authorization")
             if not auth_header or not auth_header.startswith("Bearer "):
                 return None
 
@@ -80,8 +72,7 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
             token = auth_header.split(" ")[1]
 
             # Verify token
-            user_context = verify_supabase_token(token)
-            return user_context
+            return token, verify_supabase_token(token)
 
         except AuthError as e:
             logger.warning(f"Authentication failed: {e}")
@@ -91,10 +82,10 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
                 event_type="invalid_token",
                 severity="medium",
                 description=f"Invalid token provided: {str(e)}",
-                ip_address=request.client.host if request.client else "unknown",
+                ip_address=ctx.client_ip,
                 metadata={
-                    "endpoint": request.url.path,
-                    "method": request.method,
+                    "endpoint": ctx.path,
+                    "method": ctx.method,
                     "error": str(e),
                 },
             )
@@ -104,55 +95,11 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
             logger.error(f"Authentication error: {e}")
             return None
 
-    def _is_public_endpoint(self, request: Request) -> bool:
-        """Check if endpoint is public (no authentication required)"""
-        path = request.url.path.lower()
-
-        # Public endpoints that never require authentication
-        public_paths = [
-            "/",
-            "/health",
-            "/docs",
-            "/redoc",
-            "/openapi.json",
-            "/favicon.ico",
-        ]
-
-        if path in public_paths:
-            return True
-
-        # Simulation endpoints are public
-        if "/simulate/" in path:
-            return True
-
-        # Public mocks endpoint
-        if "/mocks/public" in path and request.method == "GET":
-            return True
-
-        # Print for debug: always outputs
-        if path.startswith("/api/v1/mocks/templates") and request.method == "GET":
-            print(f"[DEBUG] Public endpoint allowed: {path}")
-            return True
-
-        return False
-
-    def _requires_authentication(self, request: Request) -> bool:
-        """Check if endpoint requires authentication"""
-        path = request.url.path.lower()
-
-        # All API endpoints require authentication except public ones
-        if path.startswith("/api/v1/"):
-            return not self._is_public_endpoint(request)
-
-        return False
-
 
-class SecurityValidationMiddleware(BaseHTTPMiddleware):
+class SecurityValidationStage(Stage):
     """Additional security validations and threat detection"""
 
-    def __init__(self, app):
-        super().__init__(app)
-        self.max_request_size = 10 * 1024 * 1024  # 10MB
+    def __init__(self):
         self.suspicious_patterns = [
             "union select",
             "drop table",
@@ -166,21 +113,21 @@ class SecurityValidationMiddleware(BaseHTTPMiddleware):
             "onerror=",
         ]
 
-    async def dispatch(self, request: Request, call_next):
+    async def on_request(self, ctx: RequestContext) -> Optional[Response]:
         """Validate request for security threats"""
 
-        # Check request size
-        content_length = request.headers.get("content-length")
-        if content_length and int(content_length) > self.max_request_size:
+        # Check request size against the route's limit
+        content_length = ctx.headers.get("content-length")
+        if content_length and int(content_length) > ctx.policy.max_body_size:
             await security_monitor.log_security_event(
                 event_type="large_request",
                 severity="medium",
                 description=f"Request size {content_length} exceeds limit",
-                ip_address=request.client.host if request.client else "unknown",
-                metadata={"endpoint": request.url.path, "size": content_length},
+                ip_address=ctx.client_ip,
+                metadata={"endpoint": ctx.path, "size": content_length},
             )
 
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=413,
                 content={
                     "error": "REQUEST_TOO_LARGE",
@@ -190,10 +137,10 @@ class SecurityValidationMiddleware(BaseHTTPMiddleware):
 
         # Check for suspicious patterns in URL
         suspicious_found = []
-        path_and_query = str(request.url)
+        path_and_query = str(ctx.url).lower()
 
         for pattern in self.suspicious_patterns:
-            if pattern in path_and_query.lower():
+            if pattern in path_and_query:
                 suspicious_found.append(pattern)
 
         if suspicious_found:
@@ -201,15 +148,15 @@ class SecurityValidationMiddleware(BaseHTTPMiddleware):
                 event_type="suspicious_request",
                 severity="high",
                 description=f"Suspicious patterns detected: {', '.join(suspicious_found)}",
-                ip_address=request.client.host if request.client else "unknown",
+                ip_address=ctx.client_ip,
                 metadata={
-                    "endpoint": request.url.path,
+                    "endpoint": ctx.path,
                     "patterns": suspicious_found,
-                    "full_url": str(request.url),
+                    "full_url": str(ctx.url),
                 },
             )
 
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=400,
                 content={
                     "error": "SUSPICIOUS_REQUEST",
@@ -218,7 +165,7 @@ class SecurityValidationMiddleware(BaseHTTPMiddleware):
             )
 
         # Check User-Agent for suspicious patterns
-        user_agent = request.headers.get("user-agent", "").lower()
+        user_agent = ctx.headers.get("user-agent", "").lower()
         if not user_agent or any(
             bot in user_agent for bot in ["bot", "crawler", "spider", "scraper"]
         ):
@@ -227,9 +174,8 @@ class SecurityValidationMiddleware(BaseHTTPMiddleware):
                 event_type="suspicious_user_agent",
                 severity="low",
                 description=f"Suspicious or missing user agent: {user_agent}",
-                ip_address=request.client.host if request.client else "unknown",
-                metadata={"endpoint": request.url.path, "user_agent": user_agent},
+                ip_address=ctx.client_ip,
+                metadata={"endpoint": ctx.path, "user_agent": user_agent},
             )
 
-        response = await call_next(request)
-        return response
+        return None
@@ -3,7 +3,7 @@ Pydantic models for the application
 """
 
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, get_args
 from uuid import UUID
 from pydantic import BaseModel, Field, field_validator
 from enum import Enum
@@ -29,6 +29,42 @@ class MockStatus(str, Enum):
     DRAFT = "draft"
 
 
+def _to_uuid(value: Any) -> Any:
+    return UUID(value) if isinstance(value, str) else value
+
+
+def _to_datetime(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+# Per-model {field: converter} used by BaseEntity.from_row
+_ROW_CONVERTERS: Dict[type, Dict[str, Callable[[Any], Any]]] = {}
+
+
+def _row_converters(model: type) -> Dict[str, Callable[[Any], Any]]:
+    converters = _ROW_CONVERTERS.get(model)
+    if converters is None:
+        converters = {}
+        for name, field in model.model_fields.items():
+            types = {field.annotation, *get_args(field.annotation)}
+            if UUID in types:
+                converters[name] = _to_uuid
+            elif datetime in types:
+                converters[name] = _to_datetime
+            elif field.default_factory is not None:
+                # NULL collections read back as their empty default
+                converters[name] = lambda value, factory=field.default_factory: (
+                    factory() if value is None else value
+                )
+        _ROW_CONVERTERS[model] = converters
+    return converters
+
+
 class BaseEntity(BaseModel):
     """Base entity with common fields"""
 
@@ -40,6 +76,25 @@ class BaseEntity(BaseModel):
         from_attributes = True
         use_enum_values = True
 
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]):
+        """
+        Build from a database row without running validation.
+
+        Rows were validated when they were written, so only the UUID and
+        timestamp strings PostgREST returns are converted; unknown columns are
+        dropped and missing ones get their defaults. Use the regular
+        constructor for anything that did not come from the database.
+        """
+        converters = _row_converters(cls)
+        values = {}
+        for name in cls.model_fields:
+            if name in row:
+                value = row[name]
+                converter = converters.get(name)
+                values[name] = converter(value) if converter else value
+        return cls.model_construct(**values)
+
 
 class User(BaseEntity):
     """User model"""
@@ -68,10 +123,18 @@ class Mock(BaseEntity):
     is_public: bool = False
     tags: List[str] = Field(default_factory=list)
 
+    # Large bodies live in the blob store; `response` is empty until loaded
+    response_blob_hash: Optional[str] = None
+    response_size: Optional[int] = None
+
     # Analytics
     access_count: int = 0
     last_accessed: Optional[datetime] = None
 
+    # Search metadata (only populated for `search` results)
+    search_rank: Optional[float] = None
+    search_highlight: Optional[str] = None
+
     @field_validator("endpoint")
     @classmethod
     def validate_endpoint(cls, v):
@@ -104,17 +167,34 @@ class MockStats(BaseEntity):
 
     mock_id: UUID
     user_id: UUID
-    access_logs: List[Dict[str, Any]] = Field(default_factory=list)
-    daily_stats: Dict[str, int] = Field(default_factory=dict)
-    monthly_stats: Dict[str, int] = Field(default_factory=dict)
 
-    # Performance metrics
+    # Performance metrics (maintained by rollup_mock_access_events)
     avg_response_time: float = 0.0
     total_requests: int = 0
     error_count: int = 0
     last_error: Optional[str] = None
 
 
+class MockStatsBucket(BaseModel):
+    """Per-mock rollup of access events for one minute, hour or day bucket"""
+
+    mock_id: UUID
+    user_id: UUID
+    bucket: datetime
+    request_count: int = 0
+    error_count: int = 0
+    total_response_time_ms: float = 0.0
+    max_response_time_ms: float = 0.0
+
+    @property
+    def avg_response_time_ms(self) -> float:
+        return (
+            self.total_response_time_ms / self.request_count
+            if self.request_count
+            else 0.0
+        )
+
+
 class MockTemplate(BaseEntity):
     """Mock template model"""
 
@@ -127,6 +207,10 @@ class MockTemplate(BaseEntity):
     created_by: Optional[UUID] = None
     tags: List[str] = Field(default_factory=list)
 
+    # Search metadata (only populated for `search` results)
+    search_rank: Optional[float] = None
+    search_highlight: Optional[str] = None
+
     @field_validator("tags")
     @classmethod
     def validate_tags(cls, v):
@@ -19,6 +19,15 @@ class ExportFormat(str, Enum):
     INSOMNIA = "insomnia"
 
 
+class ImportFormat(str, Enum):
+    """Import format enum"""
+
+    JSON = "json"
+    OPENAPI = "openapi"
+    POSTMAN = "postman"
+    HAR = "har"
+
+
 class BaseResponse(BaseModel):
     """Base response schema"""
 
@@ -149,6 +158,8 @@ class MockResponse(BaseModel):
     endpoint: str
     method: HTTPMethod
     response: Dict[str, Any]
+    response_blob_hash: Optional[str] = None
+    response_size: Optional[int] = None
     headers: Dict[str, str]
     status_code: int
     delay_ms: int
@@ -159,10 +170,23 @@ class MockResponse(BaseModel):
     last_accessed: Optional[datetime]
     created_at: datetime
     updated_at: Optional[datetime]
+    search_rank: Optional[float] = None
+    search_highlight: Optional[str] = None
 
     class Config:
         from_attributes = True
 
+    @classmethod
+    def from_mock(cls, mock: Any) -> "MockResponse":
+        """
+        Response for an already validated Mock without a dict round trip or
+        re-validation (FastAPI passes model instances through unchanged).
+        """
+        values = {name: getattr(mock, name, None) for name in cls.model_fields}
+        values["method"] = HTTPMethod(values["method"])
+        values["status"] = MockStatus(values["status"])
+        return cls.model_construct(**values)
+
 
 class MockListResponse(PaginatedResponse):
     """Mock list response schema"""
@@ -170,6 +194,107 @@ class MockListResponse(PaginatedResponse):
     data: List[MockResponse] = []
 
 
+class MockChangesResponse(BaseResponse):
+    """Mock change feed response schema"""
+
+    changed: List[MockResponse] = []
+    deleted: List[UUID] = []
+    cursor: int = Field(..., description="Pass as `since` to fetch the next changes")
+    has_more: bool = False
+
+
+# Bulk Schemas
+class BulkConflictStrategy(str, Enum):
+    """How bulk create handles mocks whose endpoint and method already exist"""
+
+    SKIP = "skip"
+    OVERWRITE = "overwrite"
+    FAIL = "fail"
+
+
+class BulkItemStatus(str, Enum):
+    """Per-item outcome of a bulk operation"""
+
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    SKIPPED = "skipped"
+    CONFLICT = "conflict"
+    NOT_FOUND = "not_found"
+    FAILED = "failed"
+
+
+class MockBulkCreate(BaseModel):
+    """Bulk create mocks request schema"""
+
+    mocks: List[MockCreate] = Field(..., min_length=1, max_length=1000)
+    on_conflict: BulkConflictStrategy = BulkConflictStrategy.SKIP
+
+
+class MockBulkUpdateItem(MockUpdate):
+    """Single item of a bulk update request"""
+
+    id: UUID
+
+
+class MockBulkUpdate(BaseModel):
+    """Bulk update mocks request schema"""
+
+    mocks: List[MockBulkUpdateItem] = Field(..., min_length=1, max_length=1000)
+
+
+class MockBulkDelete(BaseModel):
+    """Bulk delete mocks request schema"""
+
+    ids: List[UUID] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkItemResult(BaseModel):
+    """Result for a single item of a bulk operation"""
+
+    index: int
+    status: BulkItemStatus
+    id: Optional[UUID] = None
+    endpoint: Optional[str] = None
+    method: Optional[HTTPMethod] = None
+    error: Optional[str] = None
+
+
+class BulkOperationResponse(BaseResponse):
+    """Bulk operation response schema"""
+
+    results: List[BulkItemResult] = []
+    succeeded: int = 0
+    failed: int = 0
+
+    @classmethod
+    def create(cls, results: List[BulkItemResult], message: Optional[str] = None):
+        """Create bulk response with success/failure counts"""
+        failed = sum(
+            1
+            for result in results
+            if result.status
+            in (
+                BulkItemStatus.CONFLICT,
+                BulkItemStatus.NOT_FOUND,
+                BulkItemStatus.FAILED,
+            )
+        )
+        return cls(
+            success=failed == 0,
+            message=message,
+            results=results,
+            succeeded=len(results) - failed,
+            failed=failed,
+        )
+
+
+class ImportResponse(BulkOperationResponse):
+    """Import response schema"""
+
+    format: Optional[ImportFormat] = None
+
+
 class MockSimulateResponse(BaseModel):
     """Mock simulation response schema"""
 
@@ -213,6 +338,8 @@ class TemplateResponse(BaseModel):
     tags: List[str]
     created_at: datetime
     updated_at: Optional[datetime]
+    search_rank: Optional[float] = None
+    search_highlight: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -253,10 +380,15 @@ class AnalyticsResponse(BaseModel):
 class ExportRequest(BaseModel):
     """Export request schema"""
 
-    mock_ids: List[UUID]
+    mock_ids: Optional[List[UUID]] = Field(
+        None,
+        max_length=1000,
+        description="Mocks to export (all of the user's mocks if omitted)",
+    )
     format: ExportFormat
     include_stats: bool = False
     include_headers: bool = True
+    gzip: bool = Field(False, description="Compress the export as a .gz file")
 
 
 class ExportResponse(BaseModel):
@@ -277,3 +409,4 @@ class HealthResponse(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     database: bool = True
     uptime_seconds: float
+    dependencies: Dict[str, Any] = {}
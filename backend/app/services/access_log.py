@@ -0,0 +1,162 @@
+"""
+Access log service - buffered writes of mock access events
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from uuid import UUID
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Access stats maintenance functions (migrations/014_mock_access_events.sql)
+# and the seconds between runs; None runs every rollup interval
+ACCESS_STATS_JOBS = {
+    "create_mock_access_event_partitions": 3600,
+    "rollup_mock_access_events": None,
+    "apply_mock_stats_retention": 24 * 3600,
+}
+
+
+class AccessLogBuffer:
+    """
+    In-process buffer for mock access events.
+
+    Simulation requests only append to this buffer; a background task flushes it
+    to the partitioned `mock_access_events` table with multi-row inserts, so
+    logging adds no database round trip to the request path. Rollups and summary
+    counters are maintained in the database by `rollup_mock_access_events()`
+    (see migrations/014_mock_access_events.sql), run by `maintain_access_stats`.
+    """
+
+    def __init__(self, max_events: int = 10000, batch_size: int = 500):
+        self.events: Deque[Dict[str, Any]] = deque()
+        self.max_events = max_events
+        self.batch_size = batch_size
+        self.dropped_events = 0
+
+    def record(
+        self,
+        mock_id: UUID,
+        user_id: UUID,
+        ip_address: Optional[str],
+        user_agent: Optional[str],
+        response_time_ms: float,
+        status_code: int,
+        occurred_at: Optional[datetime] = None,
+    ) -> None:
+        """Queue an access event for the next flush"""
+        if len(self.events) >= self.max_events:
+            # Shed the oldest event rather than grow without bound
+            self.events.popleft()
+            self.dropped_events += 1
+
+        self.events.append(
+            {
+                "mock_id": str(mock_id),
+                "user_id": str(user_id),
+                "occurred_at": (occurred_at or datetime.utcnow()).isoformat(),
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "response_time_ms": response_time_ms,
+                "status_code": status_code,
+            }
+        )
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Remove and return up to one batch of queued events"""
+        batch = []
+        while self.events and len(batch) < self.batch_size:
+            batch.append(self.events.popleft())
+        return batch
+
+    async def flush(self) -> int:
+        """Write all queued events to the database, returns number written"""
+        from app.core.database import db_manager
+
+        written = 0
+        while self.events:
+            batch = self.drain()
+            try:
+                await asyncio.to_thread(
+                    lambda: db_manager.admin_client.table("mock_access_events")
+                    .insert(batch)
+                    .execute()
+                )
+                written += len(batch)
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} access events: {e}")
+                # Put the batch back so it is retried on the next flush
+                self.events.extendleft(reversed(batch))
+                break
+
+        if self.dropped_events:
+            logger.warning(
+                f"Access log buffer full, dropped {self.dropped_events} events"
+            )
+            self.dropped_events = 0
+
+        return written
+
+
+# Global access log buffer
+access_log_buffer = AccessLogBuffer()
+
+
+# Background flush task
+async def flush_access_logs(interval_seconds: float = 2.0):
+    """Background task to periodically flush buffered access events"""
+    try:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await access_log_buffer.flush()
+            except Exception as e:
+                logger.error(f"Access log flush error: {e}")
+    except asyncio.CancelledError:
+        # Final flush on shutdown
+        await access_log_buffer.flush()
+        raise
+
+
+async def run_access_stats_job(function: str) -> Any:
+    """Run one access stats maintenance function, returns its result"""
+    from app.core.database import db_manager
+
+    result = await asyncio.to_thread(
+        lambda: db_manager.admin_client.rpc(function, {}).execute()
+    )
+    return result.data
+
+
+# Background maintenance task
+async def maintain_access_stats(interval_seconds: Optional[float] = None):
+    """
+    Background task rolling up access events into the stats tables, creating
+    event partitions ahead of time and applying retention.
+
+    Every worker runs it; the database functions are safe to run concurrently
+    (the rollup serialises on its watermark row). Failed jobs are retried on
+    the next interval.
+    """
+    interval_seconds = interval_seconds or settings.access_stats_rollup_interval_seconds
+    last_run: Dict[str, float] = {}
+
+    while True:
+        now = time.monotonic()
+        for function, every in ACCESS_STATS_JOBS.items():
+            if every and function in last_run and now - last_run[function] < every:
+                continue
+            try:
+                result = await run_access_stats_job(function)
+                last_run[function] = now
+                logger.debug(f"Access stats job {function}: {result}")
+            except Exception as e:
+                logger.error(f"Access stats job {function} failed: {e}")
+
+        await asyncio.sleep(interval_seconds)
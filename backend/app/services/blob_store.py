@@ -0,0 +1,238 @@
+"""
+Content-addressed blob storage for large mock response bodies
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def encode_response_body(response: Any) -> bytes:
+    """Canonical JSON encoding of a response body (stable across key order)"""
+    return json.dumps(response, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def blob_digest(data: bytes) -> str:
+    """SHA-256 hex digest used as the blob key"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobNotFoundError(Exception):
+    """Raised when a blob does not exist in the store"""
+
+
+class BlobStore(ABC):
+    """
+    Content-addressed blob store keyed by SHA-256.
+
+    Identical bodies are stored once regardless of how many mocks or users
+    reference them; writing an existing blob is a no-op.
+    """
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its digest"""
+        digest = blob_digest(data)
+        self._put(digest, data)
+        return digest
+
+    @abstractmethod
+    def _put(self, digest: str, data: bytes) -> None:
+        """Store data under digest if not already present"""
+
+    @abstractmethod
+    def get(self, digest: str) -> bytes:
+        """Return the blob contents"""
+
+    def stream(self, digest: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Yield the blob contents in chunks"""
+        data = self.get(digest)
+        for start in range(0, len(data), chunk_size):
+            yield data[start : start + chunk_size]
+
+    @staticmethod
+    def _blob_path(digest: str) -> str:
+        """Shard blobs by digest prefix to keep directories small"""
+        return f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Filesystem backend for tests and single-node deployments.
+
+    Blobs only exist on the host that wrote them: deployments with more than
+    one node need a shared backend (BLOB_STORAGE_BACKEND=supabase).
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / self._blob_path(digest)
+
+    def _put(self, digest: str, data: bytes) -> None:
+        path = self._path(digest)
+        if path.exists():
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so readers never see partial blobs
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def get(self, digest: str) -> bytes:
+        path = self._path(digest)
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise BlobNotFoundError(digest)
+
+    def stream(self, digest: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        try:
+            f = open(self._path(digest), "rb")
+        except FileNotFoundError:
+            raise BlobNotFoundError(digest)
+
+        with f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+
+class SupabaseBlobStore(BlobStore):
+    """Supabase Storage backend"""
+
+    def __init__(self, client, bucket: str):
+        self.client = client
+        self.bucket = bucket
+
+    def _put(self, digest: str, data: bytes) -> None:
+        try:
+            self.client.storage.from_(self.bucket).upload(
+                self._blob_path(digest),
+                data,
+                {"content-type": "application/json", "upsert": "false"},
+            )
+        except Exception as e:
+            # Same digest means same content: an existing object is success
+            message = str(e).lower()
+            if (
+                "duplicate" in message
+                or "already exists" in message
+                or "409" in message
+            ):
+                return
+            raise
+
+    def get(self, digest: str) -> bytes:
+        try:
+            return self.client.storage.from_(self.bucket).download(
+                self._blob_path(digest)
+            )
+        except Exception as e:
+            if "not found" in str(e).lower() or "404" in str(e):
+                raise BlobNotFoundError(digest)
+            raise
+
+
+class BlobCache:
+    """
+    LRU cache of blob contents by digest, bounded by total size.
+
+    Blobs are immutable (the digest is the content), so entries never go
+    stale and need no invalidation.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def get(self, digest: str) -> Optional[bytes]:
+        data = self.entries.get(digest)
+        if data is not None:
+            self.entries.move_to_end(digest)
+        return data
+
+    def put(self, digest: str, data: bytes) -> None:
+        if len(data) > self.max_bytes or digest in self.entries:
+            return
+
+        self.entries[digest] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+
+
+# Global cache of recently used blobs (shared by all requests of a worker)
+blob_cache = BlobCache(settings.blob_cache_max_bytes)
+
+
+@lru_cache()
+def get_blob_store() -> BlobStore:
+    """Get the configured blob store instance"""
+    if settings.blob_storage_backend == "supabase":
+        from app.core.database import db_manager
+
+        return SupabaseBlobStore(db_manager.admin_client, settings.blob_storage_bucket)
+
+    logger.warning(
+        "Using the local blob store: response bodies are only available on this "
+        "host. Set BLOB_STORAGE_BACKEND=supabase when running more than one node."
+    )
+    return LocalBlobStore(settings.blob_storage_path)
+
+
+async def externalize_response(response: Any) -> Tuple[Any, Any, Any]:
+    """
+    Move a response body to the blob store if it exceeds the inline threshold.
+
+    Returns (inline_response, blob_hash, size). Small bodies are returned
+    unchanged with no hash. The upload runs in a worker thread, so it does
+    not block the event loop.
+    """
+    data = encode_response_body(response)
+    if len(data) <= settings.blob_inline_threshold_bytes:
+        return response, None, None
+
+    digest = await asyncio.to_thread(get_blob_store().put, data)
+    blob_cache.put(digest, data)
+    logger.debug(f"Stored {len(data)} byte response body as blob {digest}")
+    return {}, digest, len(data)
+
+
+async def fetch_blob(digest: str) -> bytes:
+    """Blob contents from the cache, or from the store without blocking the loop"""
+    data = blob_cache.get(digest)
+    if data is None:
+        data = await asyncio.to_thread(get_blob_store().get, digest)
+        blob_cache.put(digest, data)
+    return data
+
+
+async def load_response(digest: str) -> Any:
+    """Load and decode a response body from the blob store"""
+    return json.loads(await fetch_blob(digest))
@@ -0,0 +1,384 @@
+"""
+Streaming export of mocks to JSON, Postman, OpenAPI and Insomnia
+"""
+
+import json
+import logging
+import re
+import zlib
+from datetime import datetime
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.models.models import Mock
+from app.schemas.schemas import ExportFormat
+from app.services.blob_store import fetch_blob
+
+logger = logging.getLogger(__name__)
+
+# Mocks fetched per keyset page while exporting
+EXPORT_PAGE_SIZE = 500
+
+# Bytes buffered before a chunk is sent to the client
+EXPORT_FLUSH_BYTES = 64 * 1024
+
+POSTMAN_SCHEMA = "https://schema.getpostman.com/json/collection/v2.1.0/collection.json"
+
+_PATH_TEMPLATE = re.compile(r"\{([^{}/]+)\}")
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+class ExportAborted(Exception):
+    """Raised when an export fails after its response has started"""
+
+
+async def response_json(mock: Mock) -> str:
+    """
+    JSON text of the mock's response body.
+
+    Blob-backed bodies are stored as canonical JSON, so their bytes are used
+    as-is instead of being decoded and re-encoded.
+    """
+    if mock.response_blob_hash and not mock.response:
+        return (await fetch_blob(mock.response_blob_hash)).decode("utf-8")
+    return _dumps(mock.response)
+
+
+def _content_type(mock: Mock) -> str:
+    for name, value in mock.headers.items():
+        if name.lower() == "content-type":
+            return value.split(";", 1)[0].strip()
+    return "application/json"
+
+
+def _reason(status_code: int) -> str:
+    try:
+        return HTTPStatus(status_code).phrase
+    except ValueError:
+        return "Response"
+
+
+class ExportWriter:
+    """
+    Writes one export document incrementally: `header()`, then `item()` per
+    mock in (endpoint, method) order, then `footer()`. Only the current mock
+    is held in memory; `body` is the JSON text of its response (see
+    `response_json`).
+    """
+
+    media_type = "application/json"
+    extension = "json"
+
+    def __init__(self, include_headers: bool = True, include_stats: bool = False):
+        self.include_headers = include_headers
+        self.include_stats = include_stats
+        self.count = 0
+
+    def header(self) -> str:
+        raise NotImplementedError
+
+    def item(self, mock: Mock, body: str) -> str:
+        raise NotImplementedError
+
+    def footer(self) -> str:
+        raise NotImplementedError
+
+    def _separator(self) -> str:
+        self.count += 1
+        return "," if self.count > 1 else ""
+
+
+class JsonExportWriter(ExportWriter):
+    """MockBox's own format, re-importable with POST /mocks/import"""
+
+    extension = "mockbox.json"
+
+    def header(self) -> str:
+        return (
+            f'{{"format":"json","exported_at":{_dumps(datetime.utcnow().isoformat())},'
+            f'"mocks":['
+        )
+
+    def item(self, mock: Mock, body: str) -> str:
+        fields = {
+            "id": str(mock.id),
+            "name": mock.name,
+            "description": mock.description,
+            "endpoint": mock.endpoint,
+            "method": mock.method,
+            "status_code": mock.status_code,
+            "delay_ms": mock.delay_ms,
+            "status": mock.status,
+            "is_public": mock.is_public,
+            "tags": mock.tags,
+        }
+        if self.include_headers:
+            fields["headers"] = mock.headers
+        if self.include_stats:
+            fields["access_count"] = mock.access_count
+            fields["last_accessed"] = mock.last_accessed
+        # Splice the body in as raw JSON text
+        return f'{self._separator()}{_dumps(fields)[:-1]},"response":{body}}}'
+
+    def footer(self) -> str:
+        return f'],"exported_count":{self.count}}}'
+
+
+class PostmanExportWriter(ExportWriter):
+    """Postman collection v2.1 with one saved example response per mock"""
+
+    extension = "postman_collection.json"
+
+    def header(self) -> str:
+        info = {
+            "name": "MockBox export",
+            "description": f"Exported from MockBox on {datetime.utcnow().isoformat()}",
+            "schema": POSTMAN_SCHEMA,
+        }
+        return f'{{"info":{_dumps(info)},"item":['
+
+    def item(self, mock: Mock, body: str) -> str:
+        path = [segment for segment in mock.endpoint.split("/") if segment]
+        request = {
+            "method": mock.method,
+            "header": [],
+            "url": {
+                "raw": "{{baseUrl}}" + mock.endpoint,
+                "host": ["{{baseUrl}}"],
+                "path": path,
+            },
+        }
+        if mock.description:
+            request["description"] = mock.description
+        example = {
+            "name": mock.name,
+            "originalRequest": request,
+            "status": _reason(mock.status_code),
+            "code": mock.status_code,
+            "_postman_previewlanguage": "json",
+            "header": (
+                [{"key": name, "value": value} for name, value in mock.headers.items()]
+                if self.include_headers
+                else []
+            ),
+            "body": body,
+        }
+        entry = {"name": mock.name, "request": request, "response": [example]}
+        return f"{self._separator()}{_dumps(entry)}"
+
+    def footer(self) -> str:
+        variables = [
+            {"key": "baseUrl", "value": "http://localhost:8000/api/v1/simulate"}
+        ]
+        return f'],"variable":{_dumps(variables)}}}'
+
+
+class OpenAPIExportWriter(ExportWriter):
+    """
+    OpenAPI 3.0 document with each mock as an operation and its body as the
+    response example. Mocks arrive sorted by endpoint, so the operations of a
+    path are consecutive and each path item is written once.
+    """
+
+    extension = "openapi.json"
+
+    def __init__(self, include_headers: bool = True, include_stats: bool = False):
+        super().__init__(include_headers, include_stats)
+        self._current_path: Optional[str] = None
+
+    def header(self) -> str:
+        info = {
+            "title": "MockBox export",
+            "version": datetime.utcnow().strftime("%Y.%m.%d"),
+        }
+        return f'{{"openapi":"3.0.3","info":{_dumps(info)},"paths":{{'
+
+    def item(self, mock: Mock, body: str) -> str:
+        chunk = ""
+        if mock.endpoint != self._current_path:
+            chunk = "}" if self._current_path is not None else ""
+            chunk += f"{self._separator()}{_dumps(mock.endpoint)}:{{"
+            self._current_path = mock.endpoint
+            first_operation = True
+        else:
+            first_operation = False
+
+        response: Dict[str, Any] = {"description": _reason(mock.status_code)}
+        if self.include_headers:
+            headers = {
+                name: {"schema": {"type": "string"}, "example": value}
+                for name, value in mock.headers.items()
+                if name.lower() != "content-type"
+            }
+            if headers:
+                response["headers"] = headers
+        operation: Dict[str, Any] = {"summary": mock.name}
+        if mock.description:
+            operation["description"] = mock.description
+        if mock.tags:
+            operation["tags"] = mock.tags
+        parameters = [
+            {"name": name, "in": "path", "required": True, "schema": {"type": "string"}}
+            for name in _PATH_TEMPLATE.findall(mock.endpoint)
+        ]
+        if parameters:
+            operation["parameters"] = parameters
+        if self.include_stats:
+            operation["x-mockbox-stats"] = {
+                "access_count": mock.access_count,
+                "last_accessed": mock.last_accessed,
+            }
+
+        # Splice the body in as the example without re-encoding it
+        media = f'{{{_dumps(_content_type(mock))}:{{"example":{body}}}}}'
+        response_text = f'{_dumps(response)[:-1]},"content":{media}}}'
+        operation_text = f'{_dumps(operation)[:-1]},"responses":{{"{mock.status_code}":{response_text}}}}}'
+
+        comma = "" if first_operation else ","
+        return f"{chunk}{comma}{_dumps(mock.method.lower())}:{operation_text}"
+
+    def footer(self) -> str:
+        return ("}" if self._current_path is not None else "") + "}}"
+
+
+class InsomniaExportWriter(ExportWriter):
+    """Insomnia v4 export with a mock server holding one route per mock"""
+
+    extension = "insomnia.json"
+    workspace_id = "wrk_mockbox"
+    mock_server_id = "mock_mockbox"
+
+    def header(self) -> str:
+        resources = [
+            {
+                "_id": self.workspace_id,
+                "_type": "workspace",
+                "parentId": None,
+                "name": "MockBox export",
+                "scope": "collection",
+            },
+            {
+                "_id": self.mock_server_id,
+                "_type": "mock",
+                "parentId": self.workspace_id,
+                "name": "MockBox",
+                "url": "",
+                "useInsomniaCloud": False,
+            },
+        ]
+        self.count = len(resources)
+        return (
+            f'{{"_type":"export","__export_format":4,'
+            f'"__export_date":{_dumps(datetime.utcnow().isoformat())},'
+            f'"__export_source":"mockbox","resources":{_dumps(resources)[:-1]}'
+        )
+
+    def item(self, mock: Mock, body: str) -> str:
+        route = {
+            "_id": f"mock-route_{mock.id.hex}",
+            "_type": "mock_route",
+            "parentId": self.mock_server_id,
+            "name": mock.endpoint,
+            "method": mock.method,
+            "body": body,
+            "mimeType": _content_type(mock),
+            "statusCode": mock.status_code,
+            "headers": (
+                [{"name": name, "value": value} for name, value in mock.headers.items()]
+                if self.include_headers
+                else []
+            ),
+        }
+        return f"{self._separator()}{_dumps(route)}"
+
+    def footer(self) -> str:
+        return "]}"
+
+
+EXPORT_WRITERS = {
+    ExportFormat.JSON: JsonExportWriter,
+    ExportFormat.POSTMAN: PostmanExportWriter,
+    ExportFormat.OPENAPI: OpenAPIExportWriter,
+    ExportFormat.INSOMNIA: InsomniaExportWriter,
+}
+
+
+def get_export_writer(
+    export_format: ExportFormat,
+    include_headers: bool = True,
+    include_stats: bool = False,
+) -> ExportWriter:
+    """Writer for the requested export format"""
+    return EXPORT_WRITERS[ExportFormat(export_format)](include_headers, include_stats)
+
+
+async def prefetch_first_page(
+    pages: AsyncIterator[List[Mock]],
+) -> AsyncIterator[List[Mock]]:
+    """
+    Fetch the first page now and return an iterator over all pages.
+
+    Await it before returning the streaming response, so a failing first
+    query is answered with a proper error status instead of a truncated 200.
+    """
+    try:
+        first: Optional[List[Mock]] = await pages.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def all_pages() -> AsyncIterator[List[Mock]]:
+        if first is None:
+            return
+        yield first
+        async for page in pages:
+            yield page
+
+    return all_pages()
+
+
+async def stream_export(
+    pages: AsyncIterator[List[Mock]], writer: ExportWriter, compress: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Encode pages of mocks with `writer`, yielding ~64KB chunks (gzip members
+    when `compress` is set), so memory stays flat regardless of export size.
+
+    A failure once the response has started raises ExportAborted without
+    writing the footer (or the gzip trailer), so the connection is dropped
+    and clients see an incomplete transfer rather than a valid-looking file.
+    """
+    compressor = (
+        zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    )
+    buffer: List[bytes] = []
+    buffered = 0
+
+    def encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    def take() -> bytes:
+        nonlocal buffer, buffered
+        chunk, buffer, buffered = b"".join(buffer), [], 0
+        return chunk
+
+    buffer.append(encode(writer.header()))
+    try:
+        async for page in pages:
+            for mock in page:
+                data = encode(writer.item(mock, await response_json(mock)))
+                buffer.append(data)
+                buffered += len(data)
+                if buffered >= EXPORT_FLUSH_BYTES:
+                    yield take()
+    except Exception as e:
+        logger.error(f"Export aborted mid-stream: {e}")
+        raise ExportAborted(str(e)) from e
+
+    buffer.append(encode(writer.footer()))
+    if compressor:
+        buffer.append(compressor.flush())
+    yield take()
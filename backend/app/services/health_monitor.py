@@ -0,0 +1,262 @@
+"""
+Background health probing of external dependencies
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ProbeFn = Callable[[], Awaitable[bool]]
+
+
+@dataclass
+class ProbeResult:
+    """Outcome of a single dependency check"""
+
+    healthy: bool
+    latency_ms: float
+    checked_at: float
+    error: Optional[str] = None
+
+
+@dataclass
+class Probe:
+    """A registered dependency check"""
+
+    check: ProbeFn
+    interval_seconds: float
+    required: bool
+    history: Deque[ProbeResult]
+    next_due: float = 0.0
+
+
+class HealthMonitor:
+    """
+    Checks each dependency on its own interval in the background and keeps a
+    short history, so health endpoints answer from memory instead of making a
+    live call per probe request. Results older than three intervals are
+    reported as stale and treated as unhealthy for readiness.
+    """
+
+    def __init__(
+        self, history_size: Optional[int] = None, timeout_seconds: float = 5.0
+    ):
+        self.history_size = history_size or settings.health_history_size
+        self.timeout_seconds = timeout_seconds
+        self.probes: Dict[str, Probe] = {}
+        # Initial check shared by concurrent `ensure_checked` callers
+        self._initial_check: Optional["asyncio.Future[Any]"] = None
+
+    def register(
+        self,
+        name: str,
+        check: ProbeFn,
+        interval_seconds: Optional[float] = None,
+        required: bool = True,
+    ) -> None:
+        """Register a dependency check (required ones gate readiness)"""
+        self.probes[name] = Probe(
+            check=check,
+            interval_seconds=interval_seconds or settings.health_check_interval_seconds,
+            required=required,
+            history=deque(maxlen=self.history_size),
+        )
+
+    async def run_probe(self, name: str) -> ProbeResult:
+        """Run one check now and record the result"""
+        probe = self.probes[name]
+        started = time.perf_counter()
+        error = None
+        try:
+            healthy = bool(await asyncio.wait_for(probe.check(), self.timeout_seconds))
+        except asyncio.TimeoutError:
+            healthy, error = False, f"timed out after {self.timeout_seconds}s"
+        except Exception as e:
+            healthy, error = False, str(e)
+
+        result = ProbeResult(
+            healthy=healthy,
+            latency_ms=round((time.perf_counter() - started) * 1000, 2),
+            checked_at=time.time(),
+            error=error,
+        )
+        probe.history.append(result)
+        probe.next_due = time.monotonic() + probe.interval_seconds
+
+        if not healthy:
+            logger.warning(f"Health probe {name} failed: {error or 'unhealthy'}")
+        return result
+
+    async def probe_all(self) -> None:
+        """Run every check concurrently"""
+        await asyncio.gather(*(self.run_probe(name) for name in self.probes))
+
+    async def ensure_checked(self) -> None:
+        """
+        Run the checks once if there are no results yet (e.g. right after
+        startup). Concurrent callers wait for the same run.
+        """
+        missing = [name for name, probe in self.probes.items() if not probe.history]
+        if not missing:
+            return
+
+        if self._initial_check is None or self._initial_check.done():
+            self._initial_check = asyncio.ensure_future(
+                asyncio.gather(*(self.run_probe(name) for name in missing))
+            )
+        # A cancelled caller must not cancel the check the others wait for
+        await asyncio.shield(self._initial_check)
+
+    def is_stale(self, name: str) -> bool:
+        probe = self.probes[name]
+        if not probe.history:
+            return True
+        return time.time() - probe.history[-1].checked_at > 3 * probe.interval_seconds
+
+    def is_healthy(self, name: str) -> bool:
+        probe = self.probes.get(name)
+        return bool(
+            probe
+            and probe.history
+            and probe.history[-1].healthy
+            and not self.is_stale(name)
+        )
+
+    def is_ready(self) -> bool:
+        """Whether every required dependency is healthy with a fresh result"""
+        return all(
+            self.is_healthy(name)
+            for name, probe in self.probes.items()
+            if probe.required
+        )
+
+    def status(self) -> Dict[str, Any]:
+        """Latest result, staleness and recent history for every dependency"""
+        now = time.time()
+        dependencies = {}
+        for name, probe in self.probes.items():
+            latest = probe.history[-1] if probe.history else None
+            dependencies[name] = {
+                "healthy": self.is_healthy(name),
+                "required": probe.required,
+                "stale": self.is_stale(name),
+                "age_seconds": round(now - latest.checked_at, 2) if latest else None,
+                "latest": asdict(latest) if latest else None,
+                "success_rate": (
+                    round(
+                        sum(result.healthy for result in probe.history)
+                        / len(probe.history),
+                        2,
+                    )
+                    if probe.history
+                    else None
+                ),
+                "history": [asdict(result) for result in probe.history],
+            }
+        return dependencies
+
+    def summary(self) -> Dict[str, Any]:
+        """Health, staleness and latency of every dependency, safe to serve publicly"""
+        return {
+            name: {
+                "healthy": dependency["healthy"],
+                "stale": dependency["stale"],
+                "age_seconds": dependency["age_seconds"],
+                "latency_ms": (dependency["latest"] or {}).get("latency_ms"),
+            }
+            for name, dependency in self.status().items()
+        }
+
+    async def run(self) -> None:
+        """Background loop running each check when it is due"""
+        while True:
+            now = time.monotonic()
+            due = [name for name, probe in self.probes.items() if probe.next_due <= now]
+            if due:
+                await asyncio.gather(*(self.run_probe(name) for name in due))
+
+            if not self.probes:
+                await asyncio.sleep(settings.health_check_interval_seconds)
+                continue
+            next_due = min(probe.next_due for probe in self.probes.values())
+            await asyncio.sleep(max(0.1, next_due - time.monotonic()))
+
+
+# Global health monitor
+health_monitor = HealthMonitor()
+
+
+async def _check_supabase() -> bool:
+    from app.core.database import db_manager
+
+    return await db_manager.health_check()
+
+
+async def _check_redis() -> bool:
+    from app.core.rate_limiting import rate_limiter
+
+    return bool(await rate_limiter.redis_client.ping())
+
+
+def _provider_check(url: str, headers: Dict[str, str]) -> ProbeFn:
+    """Check an AI provider with a free authenticated metadata call"""
+
+    async def check() -> bool:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            response = await client.get(url, headers=headers)
+            return response.status_code == 200
+
+    return check
+
+
+async def get_health_monitor() -> HealthMonitor:
+    """Health monitor with default probes and at least one result per probe"""
+    if not health_monitor.probes:
+        register_default_probes()
+    await health_monitor.ensure_checked()
+    return health_monitor
+
+
+def register_default_probes(monitor: HealthMonitor = health_monitor) -> None:
+    """Register the Supabase, Redis and AI provider checks"""
+    from app.core.rate_limiting import rate_limiter
+
+    monitor.register("supabase", _check_supabase, required=True)
+
+    if rate_limiter.redis_client:
+        # Rate limiting falls back to memory, so Redis does not gate readiness
+        monitor.register("redis", _check_redis, required=False)
+
+    if settings.openai_api_key:
+        monitor.register(
+            "openai",
+            _provider_check(
+                "https://api.openai.com/v1/models",
+                {"Authorization": f"Bearer {settings.openai_api_key}"},
+            ),
+            interval_seconds=settings.ai_health_check_interval_seconds,
+            required=False,
+        )
+
+    if settings.anthropic_api_key:
+        monitor.register(
+            "anthropic",
+            _provider_check(
+                "https://api.anthropic.com/v1/models",
+                {
+                    "x-api-key": settings.anthropic_api_key,
+                    "anthropic-version": "2023-06-01",
+                },
+            ),
+            interval_seconds=settings.ai_health_check_interval_seconds,
+            required=False,
+        )
@@ -0,0 +1,555 @@
+"""
+Streaming import of mocks from MockBox JSON exports, OpenAPI 3, Postman and
+HAR files
+"""
+
+import asyncio
+import base64
+import json
+import re
+from itertools import islice
+from typing import IO, Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import yaml
+from pydantic import ValidationError
+
+from app.models.models import HTTPMethod
+from app.schemas.schemas import (
+    BulkConflictStrategy,
+    BulkItemResult,
+    BulkItemStatus,
+    ImportFormat,
+    MockCreate,
+)
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    ijson = None
+
+# Mocks written per bulk insert while importing
+IMPORT_CHUNK_SIZE = 500
+
+# Bytes inspected to detect the file format
+SNIFF_BYTES = 64 * 1024
+
+# Nesting depth when generating an example from a JSON schema
+MAX_SCHEMA_DEPTH = 8
+
+# Response headers that describe the captured transfer rather than the API
+HAR_SKIPPED_HEADERS = {
+    "connection",
+    "content-encoding",
+    "content-length",
+    "date",
+    "keep-alive",
+    "set-cookie",
+    "transfer-encoding",
+}
+
+HTTP_METHODS = {method.value for method in HTTPMethod}
+
+# MockBox JSON exports start with their format marker
+MOCKBOX_HEADER = re.compile(r'\s*\{\s*"format"\s*:\s*"json"')
+
+# Operation keys of an OpenAPI path item (others are shared path-level fields)
+OPENAPI_OPERATIONS = {
+    "get",
+    "put",
+    "post",
+    "delete",
+    "options",
+    "head",
+    "patch",
+    "trace",
+}
+
+# A parsed mock, or the (name, error) of an entry that could not be converted
+ImportItem = Union[MockCreate, Tuple[str, str]]
+
+
+class ImportFormatError(ValueError):
+    """Raised when a file is not a supported import format"""
+
+
+class SourceDocument:
+    """
+    Reads parts of a JSON document by prefix (`paths`, `log.entries`).
+
+    With ijson installed the file is parsed incrementally and only the
+    requested values are built; otherwise it is loaded once with `json`
+    (or `yaml` for YAML OpenAPI specs, which cannot be streamed).
+    """
+
+    def __init__(self, file: IO[bytes]):
+        self.file = file
+        self._document: Optional[Any] = None
+
+        head = file.read(SNIFF_BYTES)
+        file.seek(0)
+        self.head = head.decode("utf-8", errors="ignore").lstrip("\ufeff")
+        self.is_json = self.head.lstrip().startswith(("{", "["))
+
+    @property
+    def streaming(self) -> bool:
+        return ijson is not None and self.is_json
+
+    def _load(self) -> Any:
+        if self._document is None:
+            self.file.seek(0)
+            try:
+                self._document = (
+                    json.load(self.file) if self.is_json else yaml.safe_load(self.file)
+                )
+            except (ValueError, yaml.YAMLError) as e:
+                raise ImportFormatError(f"Could not parse file: {e}")
+        return self._document
+
+    def _walk(self, prefix: str) -> Any:
+        value = self._load()
+        for key in prefix.split(".") if prefix else []:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        return value
+
+    def _stream(self, parse: Any, prefix: str) -> Iterator[Any]:
+        self.file.seek(0)
+        try:
+            yield from parse(self.file, prefix, use_float=True)
+        except ijson.JSONError as e:
+            raise ImportFormatError(f"Could not parse file: {e}")
+
+    def items(self, prefix: str) -> Iterator[Any]:
+        """Yield each element of the array at `prefix`"""
+        if self.streaming:
+            yield from self._stream(ijson.items, f"{prefix}.item")
+            return
+        yield from self._walk(prefix) or []
+
+    def kvitems(self, prefix: str) -> Iterator[Tuple[str, Any]]:
+        """Yield each (key, value) of the object at `prefix`"""
+        if self.streaming:
+            yield from self._stream(ijson.kvitems, prefix)
+            return
+        yield from (self._walk(prefix) or {}).items()
+
+    def value(self, prefix: str) -> Any:
+        """Build the whole value at `prefix` (None if missing)"""
+        if self.streaming:
+            return next(self._stream(ijson.items, prefix), None)
+        return self._walk(prefix)
+
+
+def detect_format(document: SourceDocument) -> ImportFormat:
+    """Guess the format from the start of the file"""
+    head = document.head
+    if MOCKBOX_HEADER.match(head):
+        return ImportFormat.JSON
+    if '"openapi"' in head or head.lstrip().startswith("openapi:"):
+        return ImportFormat.OPENAPI
+    if '"log"' in head and '"entries"' in head:
+        return ImportFormat.HAR
+    if "getpostman.com" in head or '"_postman_id"' in head:
+        return ImportFormat.POSTMAN
+    raise ImportFormatError(
+        "Could not detect the file format, pass format=json, openapi, postman or har"
+    )
+
+
+def _as_response_body(value: Any) -> Dict[str, Any]:
+    """Mock responses are JSON objects; wrap anything else"""
+    if isinstance(value, dict):
+        return value
+    if value is None:
+        return {}
+    return {"data": value}
+
+
+def _parse_body(text: Optional[str]) -> Dict[str, Any]:
+    if not text:
+        return {}
+    try:
+        return _as_response_body(json.loads(text))
+    except ValueError:
+        return {"data": text}
+
+
+def _build_mock(name: str, **fields: Any) -> ImportItem:
+    """Validate an imported mock, or describe why it cannot be imported"""
+    method = str(fields.get("method", "")).upper()
+    if method not in HTTP_METHODS:
+        return name, f"Unsupported HTTP method {method or '(none)'}"
+    fields["method"] = method
+
+    fields["name"] = (name or f"{method} {fields.get('endpoint', '')}")[:255]
+    if fields.get("description"):
+        fields["description"] = fields["description"][:1000]
+    try:
+        return MockCreate(**fields)
+    except ValidationError as e:
+        errors = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in e.errors()
+        )
+        return name, errors
+
+
+# MockBox JSON exports
+
+
+def parse_mockbox(document: SourceDocument) -> Iterator[ImportItem]:
+    """One mock per exported mock, keeping every field MockCreate accepts"""
+    for mock in document.items("mocks"):
+        yield _build_mock(
+            mock.get("name", ""),
+            endpoint=mock.get("endpoint", ""),
+            method=mock.get("method", ""),
+            description=mock.get("description"),
+            response=_as_response_body(mock.get("response")),
+            headers=mock.get("headers") or {},
+            status_code=mock.get("status_code") or 200,
+            delay_ms=mock.get("delay_ms") or 0,
+            is_public=bool(mock.get("is_public")),
+            tags=mock.get("tags") or [],
+        )
+
+
+# OpenAPI 3
+
+
+class _RefResolver:
+    """Resolves local `#/components/...` references"""
+
+    def __init__(self, components: Optional[Dict[str, Any]]):
+        self.components = components or {}
+
+    def resolve(self, value: Any, depth: int = 0) -> Any:
+        while isinstance(value, dict) and "$ref" in value and depth < MAX_SCHEMA_DEPTH:
+            ref = value["$ref"]
+            if not ref.startswith("#/components/"):
+                return {}
+            target: Any = self.components
+            for part in ref[len("#/components/") :].split("/"):
+                key = part.replace("~1", "/").replace("~0", "~")
+                target = target.get(key, {}) if isinstance(target, dict) else {}
+            value = target
+            depth += 1
+        return value
+
+    def example_from_schema(self, schema: Any, depth: int = 0) -> Any:
+        """Build a representative value from a JSON schema"""
+        schema = self.resolve(schema)
+        if not isinstance(schema, dict) or depth > MAX_SCHEMA_DEPTH:
+            return None
+        if "example" in schema:
+            return schema["example"]
+        if "default" in schema:
+            return schema["default"]
+        if schema.get("enum"):
+            return schema["enum"][0]
+        for combinator in ("allOf", "oneOf", "anyOf"):
+            if schema.get(combinator):
+                if combinator != "allOf":
+                    return self.example_from_schema(schema[combinator][0], depth + 1)
+                merged: Dict[str, Any] = {}
+                for part in schema["allOf"]:
+                    value = self.example_from_schema(part, depth + 1)
+                    if isinstance(value, dict):
+                        merged.update(value)
+                return merged
+
+        schema_type = schema.get("type")
+        if isinstance(schema_type, list):
+            schema_type = next((t for t in schema_type if t != "null"), None)
+        if schema_type == "object" or "properties" in schema:
+            return {
+                name: self.example_from_schema(prop, depth + 1)
+                for name, prop in (schema.get("properties") or {}).items()
+            }
+        if schema_type == "array":
+            item = self.example_from_schema(schema.get("items"), depth + 1)
+            return [item] if item is not None else []
+        if schema_type == "integer":
+            return 0
+        if schema_type == "number":
+            return 0.0
+        if schema_type == "boolean":
+            return True
+        if schema_type == "string":
+            return {
+                "date-time": "2024-01-01T00:00:00Z",
+                "date": "2024-01-01",
+                "email": "user@example.com",
+                "uuid": "00000000-0000-0000-0000-000000000000",
+                "uri": "https://example.com",
+            }.get(schema.get("format"), "string")
+        return None
+
+
+def _openapi_response(
+    resolver: _RefResolver, responses: Dict[str, Any]
+) -> Tuple[int, Dict[str, Any], Dict[str, str]]:
+    """Status code, body and headers of an operation's success response"""
+    codes = sorted(str(code) for code in responses)
+    code = next((c for c in codes if c.startswith("2")), None) or (
+        "default" if "default" in responses else (codes[0] if codes else "200")
+    )
+    response = resolver.resolve(responses.get(code) or {})
+    try:
+        status_code = int(code)
+    except ValueError:
+        status_code = 200
+
+    headers: Dict[str, str] = {}
+    for name, header in (response.get("headers") or {}).items():
+        header = resolver.resolve(header)
+        example = header.get(
+            "example", resolver.example_from_schema(header.get("schema"))
+        )
+        if example is not None:
+            headers[name] = str(example)
+
+    content = response.get("content") or {}
+    media_type = next((m for m in content if "json" in m), next(iter(content), None))
+    body: Any = None
+    if media_type:
+        media = content[media_type] or {}
+        headers.setdefault("Content-Type", media_type)
+        if "example" in media:
+            body = media["example"]
+        elif media.get("examples"):
+            first = resolver.resolve(next(iter(media["examples"].values())))
+            body = first.get("value") if isinstance(first, dict) else None
+        else:
+            body = resolver.example_from_schema(media.get("schema"))
+
+    return status_code, _as_response_body(body), headers
+
+
+def parse_openapi(document: SourceDocument) -> Iterator[ImportItem]:
+    """One mock per operation, streamed path by path"""
+    # References may point anywhere in components, which can follow `paths`,
+    # so they are read in a first pass
+    resolver = _RefResolver(document.value("components"))
+
+    for path, path_item in document.kvitems("paths"):
+        path_item = resolver.resolve(path_item) or {}
+        for method, operation in path_item.items():
+            if method not in OPENAPI_OPERATIONS or not isinstance(operation, dict):
+                continue
+            status_code, body, headers = _openapi_response(
+                resolver, operation.get("responses") or {}
+            )
+            yield _build_mock(
+                operation.get("summary") or operation.get("operationId") or "",
+                endpoint=path,
+                method=method,
+                description=operation.get("description"),
+                response=body,
+                headers=headers,
+                status_code=status_code,
+                tags=operation.get("tags") or [],
+            )
+
+
+# Postman collections (v2.0 / v2.1)
+
+
+def _postman_endpoint(url: Any) -> str:
+    if isinstance(url, dict):
+        if url.get("path"):
+            path = url["path"]
+            return (
+                "/" + "/".join(path)
+                if isinstance(path, list)
+                else "/" + str(path).lstrip("/")
+            )
+        url = url.get("raw", "")
+    raw = str(url or "")
+    if raw.startswith("{{"):
+        # `{{baseUrl}}/users` -> `/users`
+        raw = raw.split("}}", 1)[1]
+    return urlsplit(raw).path if "://" in raw else raw.split("?", 1)[0] or "/"
+
+
+def _postman_items(items: List[Any], folder_tags: List[str]) -> Iterator[ImportItem]:
+    for item in items:
+        if "item" in item:
+            yield from _postman_items(
+                item["item"], folder_tags + [item.get("name", "")]
+            )
+            continue
+
+        request = item.get("request") or {}
+        if isinstance(request, str):
+            request = {"url": request, "method": "GET"}
+        examples = item.get("response") or []
+        example = examples[0] if examples else {}
+
+        headers = {
+            header["key"]: str(header.get("value", ""))
+            for header in example.get("header") or []
+            if isinstance(header, dict)
+            and header.get("key")
+            and not header.get("disabled")
+        }
+        yield _build_mock(
+            item.get("name", ""),
+            endpoint=_postman_endpoint(request.get("url")),
+            method=request.get("method", "GET"),
+            description=(
+                request.get("description")
+                if isinstance(request.get("description"), str)
+                else None
+            ),
+            response=_parse_body(example.get("body")),
+            headers=headers,
+            status_code=example.get("code") or 200,
+            tags=[tag for tag in folder_tags if tag],
+        )
+
+
+def parse_postman(document: SourceDocument) -> Iterator[ImportItem]:
+    """One mock per request, using its first saved example as the response"""
+    for item in document.items("item"):
+        yield from _postman_items([item], [])
+
+
+# HAR captures
+
+
+def parse_har(document: SourceDocument) -> Iterator[ImportItem]:
+    """One mock per captured request/response pair"""
+    for entry in document.items("log.entries"):
+        request = entry.get("request") or {}
+        response = entry.get("response") or {}
+        content = response.get("content") or {}
+
+        text = content.get("text")
+        if text and content.get("encoding") == "base64":
+            try:
+                text = base64.b64decode(text).decode("utf-8")
+            except (ValueError, UnicodeDecodeError):
+                text = None
+
+        headers = {
+            header["name"]: str(header.get("value", ""))
+            for header in response.get("headers") or []
+            if header.get("name") and header["name"].lower() not in HAR_SKIPPED_HEADERS
+        }
+        url = urlsplit(request.get("url", ""))
+        yield _build_mock(
+            f"{request.get('method', '')} {url.path}",
+            endpoint=url.path or "/",
+            method=request.get("method", "GET"),
+            response=_parse_body(text),
+            headers=headers,
+            status_code=response.get("status") or 200,
+        )
+
+
+PARSERS = {
+    ImportFormat.JSON: parse_mockbox,
+    ImportFormat.OPENAPI: parse_openapi,
+    ImportFormat.POSTMAN: parse_postman,
+    ImportFormat.HAR: parse_har,
+}
+
+
+def parse_import(
+    file: IO[bytes], import_format: Optional[ImportFormat] = None
+) -> Tuple[ImportFormat, Iterator[ImportItem]]:
+    """Detect the format (unless given) and return a lazy iterator of mocks"""
+    document = SourceDocument(file)
+    import_format = (
+        ImportFormat(import_format) if import_format else detect_format(document)
+    )
+    return import_format, PARSERS[import_format](document)
+
+
+async def _read_batches(
+    items: Iterator[ImportItem], size: int
+) -> AsyncIterator[List[ImportItem]]:
+    """
+    Pull `size` entries at a time from a parser. Parsing reads the file and
+    builds the mocks, so it runs in a worker thread off the event loop.
+    """
+    while True:
+        batch = await asyncio.to_thread(list, islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+async def import_mocks(
+    service: Any,
+    user_id: Any,
+    items: Iterator[ImportItem],
+    on_conflict: BulkConflictStrategy = BulkConflictStrategy.SKIP,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> List[BulkItemResult]:
+    """
+    Write parsed mocks with `MockService.bulk_create_mocks`, one chunk at a
+    time. Entries are parsed `chunk_size` at a time in a worker thread, so
+    memory stays bounded by the chunk size and the event loop only awaits
+    the writes.
+
+    Results are indexed by position in the file. Entries that could not be
+    converted are reported as failed, and repeats of an endpoint and method
+    already seen in the file are skipped (the first one wins).
+    """
+    results: List[BulkItemResult] = []
+    chunk: List[MockCreate] = []
+    chunk_indexes: List[int] = []
+    seen = set()
+
+    async def flush() -> bool:
+        written = await service.bulk_create_mocks(user_id, chunk, on_conflict)
+        for index, result in zip(chunk_indexes, written):
+            results.append(result.model_copy(update={"index": index}))
+        chunk.clear()
+        chunk_indexes.clear()
+        # FAIL stops the import at the first chunk that did not fully succeed
+        return on_conflict != BulkConflictStrategy.FAIL or all(
+            result.status == BulkItemStatus.CREATED for result in written
+        )
+
+    offset = 0
+    async for batch in _read_batches(items, chunk_size):
+        for index, item in enumerate(batch, start=offset):
+            if not isinstance(item, MockCreate):
+                name, error = item
+                results.append(
+                    BulkItemResult(
+                        index=index,
+                        status=BulkItemStatus.FAILED,
+                        error=f"{name}: {error}",
+                    )
+                )
+                continue
+
+            key = (item.endpoint, item.method)
+            if key in seen:
+                results.append(
+                    BulkItemResult(
+                        index=index,
+                        status=BulkItemStatus.SKIPPED,
+                        endpoint=item.endpoint,
+                        method=item.method,
+                        error="Duplicate endpoint and method in file",
+                    )
+                )
+                continue
+            seen.add(key)
+
+            chunk.append(item)
+            chunk_indexes.append(index)
+            if len(chunk) >= chunk_size and not await flush():
+                return sorted(results, key=lambda result: result.index)
+        offset += len(batch)
+
+    if chunk:
+        await flush()
+    return sorted(results, key=lambda result: result.index)
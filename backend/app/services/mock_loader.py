@@ -0,0 +1,104 @@
+"""
+Request-scoped batching loader for mocks
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from app.models.models import Mock
+
+# batch_load(mock_ids, user_id) -> {mock_id: Mock} for the visible mocks
+BatchLoadFn = Callable[[List[UUID], Optional[UUID]], Awaitable[Dict[UUID, Mock]]]
+
+
+class MockLoader:
+    """
+    DataLoader-style loader for mocks by id.
+
+    Lookups requested during the same event-loop tick are deduplicated and
+    fetched with one `in_` query per visibility scope (the requesting user, or
+    public-only when there is none); results are memoized for the lifetime of
+    the loader, which is one MockService and therefore one request. Every load
+    returns its own copy of the memoized mock, so callers may modify it (e.g.
+    load a blob-backed body) without affecting other lookups.
+    """
+
+    def __init__(self, batch_load: BatchLoadFn):
+        self._batch_load = batch_load
+        self._cache: Dict[
+            Tuple[UUID, Optional[UUID]], "asyncio.Future[Optional[Mock]]"
+        ] = {}
+        # user_id scope -> {mock_id: pending future}
+        self._queue: Dict[
+            Optional[UUID], Dict[UUID, "asyncio.Future[Optional[Mock]]"]
+        ] = {}
+        self._dispatch_scheduled = False
+        # The event loop only keeps weak references to tasks
+        self._dispatch_task: Optional["asyncio.Task[None]"] = None
+
+    def load(
+        self, mock_id: UUID, user_id: Optional[UUID] = None
+    ) -> Awaitable[Optional[Mock]]:
+        """Return an awaitable for a copy of the mock (None if missing or not visible)"""
+        key = (mock_id, user_id)
+        future = self._cache.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._cache[key] = future
+            self._queue.setdefault(user_id, {})[mock_id] = future
+
+            if not self._dispatch_scheduled:
+                self._dispatch_scheduled = True
+                loop.call_soon(self._start_dispatch)
+
+        return self._copy(future)
+
+    async def load_many(
+        self, mock_ids: List[UUID], user_id: Optional[UUID] = None
+    ) -> List[Optional[Mock]]:
+        """Load several mocks, batched into as few queries as possible"""
+        return list(
+            await asyncio.gather(*(self.load(mock_id, user_id) for mock_id in mock_ids))
+        )
+
+    def prime(self, mock: Mock, user_id: Optional[UUID] = None) -> None:
+        """Memoize a mock that is already known (e.g. returned by a write)"""
+        self.clear(mock.id)
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(mock.model_copy())
+        self._cache[(mock.id, user_id)] = future
+
+    def clear(self, mock_id: UUID) -> None:
+        """Forget a mock in every scope (after it was modified or deleted)"""
+        for key in [key for key in self._cache if key[0] == mock_id]:
+            del self._cache[key]
+
+    @staticmethod
+    async def _copy(future: "asyncio.Future[Optional[Mock]]") -> Optional[Mock]:
+        mock = await future
+        return mock.model_copy() if mock is not None else None
+
+    def _start_dispatch(self) -> None:
+        self._dispatch_task = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        queue, self._queue = self._queue, {}
+        self._dispatch_scheduled = False
+
+        for user_id, pending in queue.items():
+            try:
+                mocks = await self._batch_load(list(pending), user_id)
+            except Exception as e:
+                for mock_id, future in pending.items():
+                    # Failures are not memoized, the next load retries
+                    if self._cache.get((mock_id, user_id)) is future:
+                        del self._cache[(mock_id, user_id)]
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for mock_id, future in pending.items():
+                if not future.done():
+                    future.set_result(mocks.get(mock_id))
@@ -5,14 +5,65 @@ Mock service - Business logic for mock management
 import asyncio
 import time
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any, Tuple
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from uuid import UUID, uuid4
 from fastapi import HTTPException, status
 from fastapi.responses import JSONResponse
 
 from app.core.database import DatabaseManager
+from app.services.access_log import access_log_buffer
+from app.services.blob_store import externalize_response, load_response
+from app.services.mock_loader import MockLoader
+from app.core.replica_router import get_replica_router
 from app.models.models import Mock, MockStats, HTTPMethod, MockStatus, MockTemplate
-from app.schemas.schemas import MockCreate, MockUpdate, PaginationParams
+from app.schemas.schemas import (
+    MockCreate,
+    MockUpdate,
+    MockBulkUpdateItem,
+    PaginationParams,
+    BulkConflictStrategy,
+    BulkItemResult,
+    BulkItemStatus,
+)
+
+# Rows written per multi-row insert/upsert/delete statement in bulk operations
+BULK_CHUNK_SIZE = 500
+
+# Maximum changes returned per change feed page
+MAX_CHANGES_PER_PAGE = 1000
+
+# Writable mock columns (excludes generated and analytics columns)
+MOCK_WRITABLE_COLUMNS = (
+    "id",
+    "user_id",
+    "name",
+    "description",
+    "endpoint",
+    "method",
+    "response",
+    "response_blob_hash",
+    "response_size",
+    "headers",
+    "status_code",
+    "delay_ms",
+    "status",
+    "is_public",
+    "tags",
+)
+
+# Columns returned with mocks but never written by the API
+MOCK_READ_ONLY_COLUMNS = (
+    "access_count",
+    "last_accessed",
+    "created_at",
+    "updated_at",
+)
+
+
+def _postgrest_quote(value: str) -> str:
+    """Quote a value for a PostgREST logical (`or`/`and`) filter"""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
 
 
 class MockService:
@@ -26,42 +77,44 @@ class MockService:
             self.client = db.get_client_with_auth(user_token)
         else:
             self.client = db.supabase.client
+        # Services are created per request, so the loader memoizes per request
+        self.loader = MockLoader(self._fetch_mocks_by_ids)
+
+    def _reader(self, user_id: Optional[UUID] = None):
+        """
+        Client for a read-only query: a read replica when the router allows it,
+        otherwise the primary (see app/core/replica_router.py).
+        """
+        return (
+            self.db.get_read_client(self.user_token, sticky_key=user_id) or self.client
+        )
+
+    @staticmethod
+    def _record_write(user_id: UUID) -> None:
+        """Keep the user's reads on the primary while replicas catch up"""
+        get_replica_router().record_write(user_id)
+
+    async def create_mock(
+        self,
+        user_id: UUID,
+        mock_data: MockCreate,
+        response_blob: Optional[Tuple[str, int]] = None,
+    ) -> Mock:
+        """
+        Create a new mock in a single round trip.
 
-    async def create_mock(self, user_id: UUID, mock_data: MockCreate) -> Mock:
-        """Create a new mock"""
-        try:
-            # Check for duplicate endpoint for user
-            existing = await self._get_mock_by_endpoint(
-                user_id, mock_data.endpoint, mock_data.method
-            )
-            if existing:
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail=f"Mock with endpoint '{mock_data.endpoint}' and method '{mock_data.method}' already exists",
-                )
+        Duplicates are detected by the UNIQUE(user_id, endpoint, method) constraint
+        and the mock_stats row is created by the on_mock_created_stats trigger in
+        the same transaction (migrations/013_create_mock_stats_on_insert.sql).
 
+        `response_blob` is an existing (hash, size) blob reference to use as the
+        body instead of `mock_data.response`.
+        """
+        try:
             # Create mock record
-            mock_id = uuid4()
-            now = datetime.utcnow()
-            mock_dict = {
-                "id": str(mock_id),
-                "user_id": str(user_id),
-                "name": mock_data.name,
-                "description": mock_data.description,
-                "endpoint": mock_data.endpoint,
-                "method": mock_data.method.value,
-                "response": mock_data.response,
-                "headers": mock_data.headers if mock_data.headers else {},
-                "status_code": mock_data.status_code,
-                "delay_ms": mock_data.delay_ms,
-                "status": MockStatus.ACTIVE.value,
-                "is_public": mock_data.is_public,
-                "tags": mock_data.tags,
-                "access_count": 0,
-                "last_accessed": None,
-                "created_at": now.isoformat(),
-                "updated_at": None,
-            }
+            mock_dict = await self._build_mock_row(
+                user_id, mock_data, response_blob=response_blob
+            )
             # Insert into database using authenticated client
             try:
                 # Insert the mock into the database
@@ -69,7 +122,12 @@ class MockService:
             except Exception as e:
                 # Handle database insertion errors
                 error_message = str(e)
-                if (
+                if self._is_unique_violation(error_message):
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=f"Mock with endpoint '{mock_data.endpoint}' and method '{mock_data.method}' already exists",
+                    )
+                elif (
                     "mocks_user_id_fkey" in error_message
                     or "violates foreign key constraint" in error_message
                 ):
@@ -89,10 +147,11 @@ class MockService:
                     detail="Failed to create mock",
                 )
 
-            # Create associated stats record
-            await self._create_mock_stats(mock_id, user_id)
-
-            return Mock(**result.data[0])
+            self._record_write(user_id)
+            mock = Mock.from_row(result.data[0])
+            if mock.response_blob_hash and not response_blob:
+                mock.response = mock_data.response
+            return await self._load_response(mock)
 
         except HTTPException:
             raise
@@ -103,11 +162,44 @@ class MockService:
             )
 
     async def get_mock(
-        self, mock_id: UUID, user_id: Optional[UUID] = None
+        self,
+        mock_id: UUID,
+        user_id: Optional[UUID] = None,
+        load_body: bool = True,
     ) -> Optional[Mock]:
-        """Get mock by ID"""
+        """
+        Get mock by ID (`load_body=False` leaves blob-backed bodies unloaded).
+
+        Lookups go through the request's MockLoader, so repeated and concurrent
+        calls are deduplicated and batched into one query.
+        """
         try:
-            query = self.client.table("mocks").select("*").eq("id", str(mock_id))
+            mock = await self.loader.load(mock_id, user_id)
+            if mock is None:
+                return None
+
+            return await self._load_response(mock) if load_body else mock
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error fetching mock: {str(e)}",
+            )
+
+    async def _fetch_mocks_by_ids(
+        self, mock_ids: List[UUID], user_id: Optional[UUID] = None
+    ) -> Dict[UUID, Mock]:
+        """Fetch the visible mocks among `mock_ids` (MockLoader batch function)"""
+        mocks: Dict[UUID, Mock] = {}
+
+        for chunk_start in range(0, len(mock_ids), BULK_CHUNK_SIZE):
+            chunk_ids = mock_ids[chunk_start : chunk_start + BULK_CHUNK_SIZE]
+            query = (
+                self._reader(user_id)
+                .table("mocks")
+                .select("*")
+                .in_("id", [str(mock_id) for mock_id in chunk_ids])
+            )
 
             # If user_id provided, ensure user owns mock or it's public
             if user_id:
@@ -117,17 +209,11 @@ class MockService:
                 query = query.eq("is_public", True)
 
             result = query.execute()
+            for row in result.data or []:
+                mock = Mock.from_row(row)
+                mocks[mock.id] = mock
 
-            if not result.data:
-                return None
-
-            return Mock(**result.data[0])
-
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error fetching mock: {str(e)}",
-            )
+        return mocks
 
     async def list_mocks(
         self,
@@ -137,24 +223,30 @@ class MockService:
         search: Optional[str] = None,
         tags: Optional[List[str]] = None,
     ) -> Tuple[List[Mock], int]:
-        """List user's mocks with filtering and pagination"""
+        """
+        List user's mocks with filtering and pagination.
+
+        Blob-backed response bodies are not loaded for listings; those mocks carry
+        `response_blob_hash` and `response_size` with an empty `response`.
+        """
+        if search:
+            return await self._search_mocks(
+                pagination,
+                search,
+                user_id=user_id,
+                status_filter=status_filter,
+                tags=tags,
+            )
+
         try:
             # Build query
-            query = self.client.table("mocks").select("*", count="exact")
+            query = self._reader(user_id).table("mocks").select("*", count="exact")
             query = query.eq("user_id", str(user_id))
 
             # Apply filters
             if status_filter:
                 query = query.eq("status", status_filter.value)
 
-            if search:
-                search_term = f"%{search}%"
-                query = query.or_(
-                    f"name.ilike.{search_term},"
-                    f"description.ilike.{search_term},"
-                    f"endpoint.ilike.{search_term}"
-                )
-
             if tags:
                 # Filter by tags (PostgreSQL array contains)
                 for tag in tags:
@@ -168,7 +260,7 @@ class MockService:
 
             result = query.execute()
 
-            mocks = [Mock(**row) for row in result.data]
+            mocks = [Mock.from_row(row) for row in result.data]
             total = result.count if result.count is not None else 0
 
             return mocks, total
@@ -179,47 +271,164 @@ class MockService:
                 detail=f"Error listing mocks: {str(e)}",
             )
 
+    async def list_mock_changes(
+        self, user_id: UUID, since: int = 0, limit: int = 500
+    ) -> Tuple[List[Mock], List[UUID], int, bool]:
+        """
+        Mocks created, updated or deleted after the `since` cursor, in one
+        round trip (see migrations/016_mock_changes.sql).
+
+        Returns (changed mocks, deleted mock ids, next cursor, has_more). Raises
+        410 when tombstones newer than the cursor were purged, in which case
+        the client has to resync from `since=0`.
+        """
+        limit = max(1, min(limit, MAX_CHANGES_PER_PAGE))
+        try:
+            result = (
+                self._reader(user_id)
+                .rpc(
+                    "mock_changes",
+                    {
+                        "p_user_id": str(user_id),
+                        "p_since": since,
+                        # One extra row tells whether another page follows
+                        "p_limit": limit + 1,
+                    },
+                )
+                .execute()
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error listing mock changes: {str(e)}",
+            )
+
+        rows = result.data or []
+        if rows and rows[0].get("resync_required"):
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Change cursor has expired, resync from since=0",
+            )
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        changed: List[Mock] = []
+        deleted: List[UUID] = []
+        for row in rows:
+            if row["deleted"]:
+                deleted.append(UUID(str(row["mock_id"])))
+            else:
+                changed.append(Mock.from_row(row["mock"]))
+
+        cursor = rows[-1]["change_seq"] if rows else since
+        return changed, deleted, cursor, has_more
+
+    async def iter_mocks(
+        self,
+        user_id: UUID,
+        mock_ids: Optional[List[UUID]] = None,
+        page_size: int = BULK_CHUNK_SIZE,
+    ) -> AsyncIterator[List[Mock]]:
+        """
+        Yield the user's mocks in (endpoint, method) order, one page at a time.
+
+        Pages are fetched with keyset queries on the unique (user_id, endpoint,
+        method) index, so each page costs the same however deep the export is.
+        An explicit `mock_ids` list is fetched in chunks and sorted in memory
+        (it is bounded by the request schema). Blob-backed bodies are not loaded.
+        """
+        columns = ",".join(MOCK_WRITABLE_COLUMNS + MOCK_READ_ONLY_COLUMNS)
+        reader = self._reader(user_id)
+
+        try:
+            if mock_ids:
+                mocks: List[Mock] = []
+                for chunk_start in range(0, len(mock_ids), BULK_CHUNK_SIZE):
+                    chunk_ids = mock_ids[chunk_start : chunk_start + BULK_CHUNK_SIZE]
+                    result = (
+                        reader.table("mocks")
+                        .select(columns)
+                        .eq("user_id", str(user_id))
+                        .in_("id", [str(mock_id) for mock_id in chunk_ids])
+                        .execute()
+                    )
+                    mocks.extend(Mock.from_row(row) for row in result.data or [])
+                mocks.sort(key=lambda mock: (mock.endpoint, mock.method))
+                for page_start in range(0, len(mocks), page_size):
+                    yield mocks[page_start : page_start + page_size]
+                return
+
+            last: Optional[Tuple[str, str]] = None
+            while True:
+                query = (
+                    reader.table("mocks").select(columns).eq("user_id", str(user_id))
+                )
+                if last is not None:
+                    endpoint, method = (_postgrest_quote(value) for value in last)
+                    query = query.or_(
+                        f"endpoint.gt.{endpoint},and(endpoint.eq.{endpoint},method.gt.{method})"
+                    )
+                result = (
+                    query.order("endpoint").order("method").limit(page_size).execute()
+                )
+
+                rows = result.data or []
+                if rows:
+                    yield [Mock.from_row(row) for row in rows]
+                if len(rows) < page_size:
+                    return
+                last = (rows[-1]["endpoint"], rows[-1]["method"])
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error reading mocks: {str(e)}",
+            )
+
     async def update_mock(
         self, mock_id: UUID, user_id: UUID, update_data: MockUpdate
     ) -> Mock:
-        """Update mock"""
-        try:
-            # Check mock exists and user owns it
-            existing_mock = await self.get_mock(mock_id, user_id)
-            if not existing_mock or existing_mock.user_id != user_id:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Mock not found or access denied",
-                )
+        """
+        Update mock in a single statement.
 
+        The UPDATE is filtered on both id and user_id, so it only matches mocks
+        the user owns; no returned row means not found or access denied.
+        """
+        try:
             # Prepare update data
-            update_dict = {}
-            for field, value in update_data.dict(exclude_unset=True).items():
-                if value is not None:
-                    if field == "method" and hasattr(value, "value"):
-                        update_dict[field] = value.value
-                    elif field == "status" and hasattr(value, "value"):
-                        update_dict[field] = value.value
-                    else:
-                        update_dict[field] = value
-
-            if update_dict:
-                update_dict["updated_at"] = datetime.utcnow().isoformat()
-            # Update in database
-            result = (
-                self.client.table("mocks")
-                .update(update_dict)
-                .eq("id", str(mock_id))
-                .execute()
-            )
+            update_dict = await self._build_update_dict(update_data)
+            update_dict["updated_at"] = datetime.utcnow().isoformat()
+
+            # Update in database (ownership enforced by the filter)
+            try:
+                result = (
+                    self.client.table("mocks")
+                    .update(update_dict)
+                    .eq("id", str(mock_id))
+                    .eq("user_id", str(user_id))
+                    .execute()
+                )
+            except Exception as e:
+                if self._is_unique_violation(str(e)):
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="Another mock with this endpoint and method already exists",
+                    )
+                raise
 
             if not result.data:
                 raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Failed to update mock",
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Mock not found or access denied",
                 )
 
-            return Mock(**result.data[0])
+            self._record_write(user_id)
+            mock = Mock.from_row(result.data[0])
+            if mock.response_blob_hash and update_data.response is not None:
+                mock.response = update_data.response
+            self.loader.prime(mock, user_id)
+            return await self._load_response(mock)
 
         except HTTPException:
             raise
@@ -230,26 +439,29 @@ class MockService:
             )
 
     async def delete_mock(self, mock_id: UUID, user_id: UUID) -> bool:
-        """Delete mock"""
+        """
+        Delete mock in a single statement.
+
+        The DELETE is filtered on both id and user_id; mock_stats rows are removed
+        by ON DELETE CASCADE.
+        """
         try:
-            # Check mock exists and user owns it
-            existing_mock = await self.get_mock(mock_id, user_id)
-            if not existing_mock or existing_mock.user_id != user_id:
+            result = (
+                self.client.table("mocks")
+                .delete()
+                .eq("id", str(mock_id))
+                .eq("user_id", str(user_id))
+                .execute()
+            )
+            if not result.data:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Mock not found or access denied",
                 )
-            # Delete mock stats first (foreign key constraint)
-            self.client.table("mock_stats").delete().eq(
-                "mock_id", str(mock_id)
-            ).execute()
-
-            # Delete mock
-            result = (
-                self.client.table("mocks").delete().eq("id", str(mock_id)).execute()
-            )
 
-            return len(result.data) > 0
+            self.loader.clear(mock_id)
+            self._record_write(user_id)
+            return True
 
         except HTTPException:
             raise
@@ -316,7 +528,8 @@ class MockService:
         """Get mock by endpoint and method (public access)"""
         try:
             result = (
-                self.client.table("mocks")
+                self._reader()
+                .table("mocks")
                 .select("*")
                 .eq("endpoint", endpoint)
                 .eq("method", method.value)
@@ -328,7 +541,10 @@ class MockService:
             if not result.data:
                 return None
 
-            return Mock(**result.data[0])
+            mock = Mock.from_row(result.data[0])
+            # Public and active: the simulation's get_mock(mock.id) reuses it
+            self.loader.prime(mock)
+            return await self._load_response(mock)
 
         except Exception as e:
             raise HTTPException(
@@ -336,51 +552,402 @@ class MockService:
                 detail=f"Error fetching mock by endpoint: {str(e)}",
             )
 
-    async def _get_mock_by_endpoint(
-        self, user_id: UUID, endpoint: str, method: HTTPMethod
-    ) -> Optional[Mock]:
-        """Get mock by endpoint and method for specific user"""
-        try:
-            result = (
-                self.client.table("mocks")
-                .select("*")
-                .eq("user_id", str(user_id))
-                .eq("endpoint", endpoint)
-                .eq("method", method.value)
-                .execute()
+    async def bulk_create_mocks(
+        self,
+        user_id: UUID,
+        mocks: List[MockCreate],
+        on_conflict: BulkConflictStrategy = BulkConflictStrategy.SKIP,
+    ) -> List[BulkItemResult]:
+        """
+        Create many mocks with chunked multi-row inserts.
+
+        Conflicts on (user_id, endpoint, method) are resolved per `on_conflict`:
+        SKIP leaves existing mocks untouched, OVERWRITE replaces their definition
+        and FAIL stops at the first chunk containing a conflict (each chunk is
+        written atomically, earlier chunks stay committed).
+        """
+        results: List[Optional[BulkItemResult]] = [None] * len(mocks)
+        valid: List[Tuple[int, MockCreate]] = []
+        seen = set()
+        now = datetime.utcnow()
+
+        # Validate the whole batch in one pass before writing anything
+        for index, mock_data in enumerate(mocks):
+            key = (mock_data.endpoint, mock_data.method.value)
+            if key in seen:
+                results[index] = BulkItemResult(
+                    index=index,
+                    status=BulkItemStatus.CONFLICT,
+                    endpoint=mock_data.endpoint,
+                    method=mock_data.method,
+                    error="Duplicate endpoint and method within request",
+                )
+                continue
+            seen.add(key)
+            valid.append((index, mock_data))
+
+        if on_conflict == BulkConflictStrategy.FAIL and len(valid) < len(mocks):
+            return self._fill_bulk_results(
+                results, mocks, "Not attempted: request contains conflicting mocks"
             )
 
-            if not result.data:
-                return None
+        # Large bodies are uploaded to the blob store concurrently
+        rows = await asyncio.gather(
+            *(self._build_mock_row(user_id, mock_data, now) for _, mock_data in valid)
+        )
+        pending: List[Tuple[int, Dict[str, Any]]] = []
+        for (index, _), row in zip(valid, rows):
+            if on_conflict == BulkConflictStrategy.OVERWRITE:
+                # Let existing rows keep their identity, status and analytics
+                for column in (
+                    "id",
+                    "status",
+                    "access_count",
+                    "last_accessed",
+                    "created_at",
+                    "updated_at",
+                ):
+                    row.pop(column)
+            pending.append((index, row))
 
-            return Mock(**result.data[0])
+        for chunk_start in range(0, len(pending), BULK_CHUNK_SIZE):
+            chunk = pending[chunk_start : chunk_start + BULK_CHUNK_SIZE]
+            rows = [row for _, row in chunk]
 
-        except Exception:
-            return None
+            try:
+                table = self.client.table("mocks")
+                if on_conflict == BulkConflictStrategy.SKIP:
+                    query = table.upsert(
+                        rows,
+                        on_conflict="user_id,endpoint,method",
+                        ignore_duplicates=True,
+                    )
+                elif on_conflict == BulkConflictStrategy.OVERWRITE:
+                    query = table.upsert(rows, on_conflict="user_id,endpoint,method")
+                else:
+                    query = table.insert(rows)
+                result = query.execute()
+            except Exception as e:
+                error_message = str(e)
+                item_status = (
+                    BulkItemStatus.CONFLICT
+                    if self._is_unique_violation(error_message)
+                    else BulkItemStatus.FAILED
+                )
+                for index, row in chunk:
+                    results[index] = BulkItemResult(
+                        index=index,
+                        status=item_status,
+                        endpoint=row["endpoint"],
+                        method=row["method"],
+                        error=error_message,
+                    )
+                if on_conflict == BulkConflictStrategy.FAIL:
+                    return self._fill_bulk_results(
+                        results, mocks, "Not attempted: an earlier chunk failed"
+                    )
+                continue
 
-    async def _create_mock_stats(self, mock_id: UUID, user_id: UUID):
-        """Create initial stats record for mock"""
-        try:
-            stats_dict = {
-                "id": str(uuid4()),
-                "mock_id": str(mock_id),
-                "user_id": str(user_id),
-                "access_logs": [],
-                "daily_stats": {},
-                "monthly_stats": {},
-                "avg_response_time": 0.0,
-                "total_requests": 0,
-                "error_count": 0,
-                "last_error": None,
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": None,
+            if result.data:
+                self._record_write(user_id)
+            written = {
+                (row["endpoint"], row["method"]): row for row in result.data or []
             }
+            for index, row in chunk:
+                saved = written.get((row["endpoint"], row["method"]))
+                if saved is None:
+                    # ignore_duplicates returns only the rows actually inserted
+                    results[index] = BulkItemResult(
+                        index=index,
+                        status=BulkItemStatus.SKIPPED,
+                        endpoint=row["endpoint"],
+                        method=row["method"],
+                        error="Mock with this endpoint and method already exists",
+                    )
+                else:
+                    # The updated_at trigger only fires for rows that already existed
+                    results[index] = BulkItemResult(
+                        index=index,
+                        status=(
+                            BulkItemStatus.UPDATED
+                            if saved.get("updated_at")
+                            else BulkItemStatus.CREATED
+                        ),
+                        id=saved["id"],
+                        endpoint=saved["endpoint"],
+                        method=saved["method"],
+                    )
 
-            self.client.table("mock_stats").insert(stats_dict).execute()
+        return results
+
+    async def bulk_update_mocks(
+        self, user_id: UUID, items: List[MockBulkUpdateItem]
+    ) -> List[BulkItemResult]:
+        """
+        Update many mocks with one conditional UPDATE per chunk.
+
+        The `bulk_update_mocks` database function (migrations/018) writes only
+        the fields set in each patch, to rows matching both the id and the user.
+        Mocks that no longer exist are reported as not found, never re-inserted.
+        """
+        results: List[Optional[BulkItemResult]] = [None] * len(items)
+        index_by_id: Dict[UUID, int] = {}
+
+        for index, item in enumerate(items):
+            if item.id in index_by_id:
+                results[index] = BulkItemResult(
+                    index=index,
+                    status=BulkItemStatus.CONFLICT,
+                    id=item.id,
+                    error="Duplicate id within request",
+                )
+                continue
+            index_by_id[item.id] = index
 
-        except Exception:
-            # Non-critical, log but don't fail
-            pass
+        mock_ids = list(index_by_id)
+
+        for chunk_start in range(0, len(mock_ids), BULK_CHUNK_SIZE):
+            chunk_ids = mock_ids[chunk_start : chunk_start + BULK_CHUNK_SIZE]
+            try:
+                updates = await asyncio.gather(
+                    *(
+                        self._build_update_dict(items[index_by_id[mock_id]])
+                        for mock_id in chunk_ids
+                    )
+                )
+                patches = [
+                    {"id": str(mock_id), **update}
+                    for mock_id, update in zip(chunk_ids, updates)
+                ]
+                result = self.client.rpc(
+                    "bulk_update_mocks", {"p_user_id": str(user_id), "p_items": patches}
+                ).execute()
+            except Exception as e:
+                error_message = str(e)
+                item_status = (
+                    BulkItemStatus.CONFLICT
+                    if self._is_unique_violation(error_message)
+                    else BulkItemStatus.FAILED
+                )
+                for mock_id in chunk_ids:
+                    index = index_by_id[mock_id]
+                    results[index] = BulkItemResult(
+                        index=index, status=item_status, id=mock_id, error=error_message
+                    )
+                continue
+
+            if result.data:
+                self._record_write(user_id)
+            updated = {UUID(row["id"]): row for row in result.data or []}
+            for mock_id in chunk_ids:
+                index = index_by_id[mock_id]
+                row = updated.get(mock_id)
+                if row is None:
+                    results[index] = BulkItemResult(
+                        index=index,
+                        status=BulkItemStatus.NOT_FOUND,
+                        id=mock_id,
+                        error="Mock not found or access denied",
+                    )
+                    continue
+
+                self.loader.clear(mock_id)
+                results[index] = BulkItemResult(
+                    index=index,
+                    status=BulkItemStatus.UPDATED,
+                    id=mock_id,
+                    endpoint=row["endpoint"],
+                    method=row["method"],
+                )
+
+        return results
+
+    async def bulk_delete_mocks(
+        self, user_id: UUID, mock_ids: List[UUID]
+    ) -> List[BulkItemResult]:
+        """Delete many mocks with one ownership-filtered statement per chunk"""
+        results: List[BulkItemResult] = []
+
+        for chunk_start in range(0, len(mock_ids), BULK_CHUNK_SIZE):
+            chunk_ids = mock_ids[chunk_start : chunk_start + BULK_CHUNK_SIZE]
+
+            try:
+                # mock_stats rows are removed by ON DELETE CASCADE
+                result = (
+                    self.client.table("mocks")
+                    .delete()
+                    .eq("user_id", str(user_id))
+                    .in_("id", [str(mock_id) for mock_id in chunk_ids])
+                    .execute()
+                )
+                deleted = {UUID(row["id"]) for row in result.data or []}
+                if deleted:
+                    self._record_write(user_id)
+                for mock_id in deleted:
+                    self.loader.clear(mock_id)
+                error_message = None
+            except Exception as e:
+                deleted = set()
+                error_message = str(e)
+
+            for offset, mock_id in enumerate(chunk_ids):
+                index = chunk_start + offset
+                if mock_id in deleted:
+                    results.append(
+                        BulkItemResult(
+                            index=index, status=BulkItemStatus.DELETED, id=mock_id
+                        )
+                    )
+                elif error_message:
+                    results.append(
+                        BulkItemResult(
+                            index=index,
+                            status=BulkItemStatus.FAILED,
+                            id=mock_id,
+                            error=error_message,
+                        )
+                    )
+                else:
+                    results.append(
+                        BulkItemResult(
+                            index=index,
+                            status=BulkItemStatus.NOT_FOUND,
+                            id=mock_id,
+                            error="Mock not found or access denied",
+                        )
+                    )
+
+        return results
+
+    async def duplicate_mock(self, mock_id: UUID, user_id: UUID) -> Mock:
+        """
+        Duplicate a mock the user can access, through the regular create path.
+
+        A blob-backed body is not copied: the duplicate references the same blob.
+        """
+        original_mock = await self.get_mock(mock_id, user_id, load_body=False)
+        if not original_mock:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Mock not found"
+            )
+
+        # Create duplicate with modified name and endpoint
+        duplicate_data = MockCreate(
+            name=f"{original_mock.name} (Copy)",
+            description=original_mock.description,
+            endpoint=f"{original_mock.endpoint}-copy",
+            method=original_mock.method,
+            response=original_mock.response,
+            headers=original_mock.headers,
+            status_code=original_mock.status_code,
+            delay_ms=original_mock.delay_ms,
+            is_public=original_mock.is_public,
+            tags=original_mock.tags,
+        )
+
+        response_blob = None
+        if original_mock.response_blob_hash:
+            response_blob = (
+                original_mock.response_blob_hash,
+                original_mock.response_size,
+            )
+
+        return await self.create_mock(
+            user_id, duplicate_data, response_blob=response_blob
+        )
+
+    @staticmethod
+    async def _build_mock_row(
+        user_id: UUID,
+        mock_data: MockCreate,
+        now: Optional[datetime] = None,
+        response_blob: Optional[Tuple[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """Build the `mocks` row for a new mock"""
+        now = now or datetime.utcnow()
+        if response_blob:
+            response, (blob_hash, blob_size) = {}, response_blob
+        else:
+            response, blob_hash, blob_size = await externalize_response(
+                mock_data.response
+            )
+        return {
+            "id": str(uuid4()),
+            "user_id": str(user_id),
+            "name": mock_data.name,
+            "description": mock_data.description,
+            "endpoint": mock_data.endpoint,
+            "method": mock_data.method.value,
+            "response": response,
+            "response_blob_hash": blob_hash,
+            "response_size": blob_size,
+            "headers": mock_data.headers if mock_data.headers else {},
+            "status_code": mock_data.status_code,
+            "delay_ms": mock_data.delay_ms,
+            "status": MockStatus.ACTIVE.value,
+            "is_public": mock_data.is_public,
+            "tags": mock_data.tags,
+            "access_count": 0,
+            "last_accessed": None,
+            "created_at": now.isoformat(),
+            "updated_at": None,
+        }
+
+    @staticmethod
+    async def _build_update_dict(update_data: MockUpdate) -> Dict[str, Any]:
+        """Build the column changes for a mock update (unset and None fields are skipped)"""
+        update_dict = {}
+        for field, value in update_data.dict(
+            exclude_unset=True, exclude={"id"}
+        ).items():
+            if value is not None:
+                if field == "method" and hasattr(value, "value"):
+                    update_dict[field] = value.value
+                elif field == "status" and hasattr(value, "value"):
+                    update_dict[field] = value.value
+                else:
+                    update_dict[field] = value
+
+        if "response" in update_dict:
+            (
+                update_dict["response"],
+                update_dict["response_blob_hash"],
+                update_dict["response_size"],
+            ) = await externalize_response(update_dict["response"])
+        return update_dict
+
+    @staticmethod
+    async def _load_response(mock: Mock) -> Mock:
+        """Copy of the mock with its blob-backed response body loaded"""
+        if mock.response_blob_hash and not mock.response:
+            return mock.model_copy(
+                update={"response": await load_response(mock.response_blob_hash)}
+            )
+        return mock
+
+    @staticmethod
+    def _fill_bulk_results(
+        results: List[Optional[BulkItemResult]],
+        mocks: List[MockCreate],
+        error: str,
+    ) -> List[BulkItemResult]:
+        """Mark every item without a result as failed"""
+        return [
+            result
+            or BulkItemResult(
+                index=index,
+                status=BulkItemStatus.FAILED,
+                endpoint=mocks[index].endpoint,
+                method=mocks[index].method,
+                error=error,
+            )
+            for index, result in enumerate(results)
+        ]
+
+    @staticmethod
+    def _is_unique_violation(error_message: str) -> bool:
+        """Check whether a PostgREST error is a unique constraint violation"""
+        return "23505" in error_message or "duplicate key" in error_message.lower()
 
     async def _log_mock_access(
         self,
@@ -390,25 +957,22 @@ class MockService:
         response_time: float,
         status_code: int,
     ):
-        """Log mock access for analytics"""
-        try:
-            now = datetime.utcnow()
-            # Update mock access count and last accessed
-            self.client.table("mocks").update(
-                {"access_count": "access_count + 1", "last_accessed": now.isoformat()}
-            ).eq("id", str(mock_id)).execute()
-
-            # Update stats
-            access_log = {
-                "timestamp": now.isoformat(),
-                "ip_address": request_data.get("ip", "unknown"),
-                "user_agent": request_data.get("user_agent"),
-                "response_time_ms": response_time,
-                "status_code": status_code,
-            }
+        """
+        Log mock access for analytics.
 
-            # This would typically be done via a background task or queue
-            # For now, we'll do a simple update
+        Events are buffered in-process and flushed in batches to the partitioned
+        mock_access_events table; access_count, last_accessed and the mock_stats
+        summary are maintained by the rollup job, not per hit.
+        """
+        try:
+            access_log_buffer.record(
+                mock_id=mock_id,
+                user_id=user_id,
+                ip_address=request_data.get("ip", "unknown"),
+                user_agent=request_data.get("user_agent"),
+                response_time_ms=response_time,
+                status_code=status_code,
+            )
 
         except Exception:
             # Non-critical, log but don't fail the request
@@ -418,21 +982,15 @@ class MockService:
         self, pagination: PaginationParams, search: Optional[str] = None
     ) -> Tuple[List[Mock], int]:
         """List public mocks (no authentication required)"""
+        if search:
+            return await self._search_mocks(pagination, search, public_only=True)
+
         try:
             # Build query for public mocks only
-            query = self.client.table("mocks").select("*", count="exact")
+            query = self._reader().table("mocks").select("*", count="exact")
             query = query.eq("is_public", True)
             query = query.eq("status", MockStatus.ACTIVE.value)
 
-            # Apply search filter if provided
-            if search:
-                search_term = f"%{search}%"
-                query = query.or_(
-                    f"name.ilike.{search_term},"
-                    f"description.ilike.{search_term},"
-                    f"endpoint.ilike.{search_term}"
-                )
-
             # Apply pagination and ordering
             query = query.order("created_at", desc=True)
             query = query.range(
@@ -441,7 +999,7 @@ class MockService:
 
             result = query.execute()
 
-            mocks = [Mock(**row) for row in result.data]
+            mocks = [Mock.from_row(row) for row in result.data]
             total = result.count if result.count is not None else 0
 
             return mocks, total
@@ -461,24 +1019,28 @@ class MockService:
         public_only: bool = True,
     ) -> Tuple[List[MockTemplate], int]:
         """List mock templates with filtering and pagination"""
+        if search:
+            return await self._search_mock_templates(
+                pagination,
+                search,
+                tags=tags,
+                category=category,
+                public_only=public_only,
+            )
+
         try:
-            query = self.client.table("mock_templates").select("*", count="exact")
+            query = self._reader().table("mock_templates").select("*", count="exact")
             if public_only:
                 query = query.eq("is_public", True)
             if category:
                 query = query.eq("category", category)
-            if search:
-                search_term = f"%{search}%"
-                query = query.or_(
-                    f"name.ilike.{search_term},description.ilike.{search_term},category.ilike.{search_term}"
-                )
             if tags:
                 for tag in tags:
                     query = query.contains("tags", [tag])
             query = query.order("created_at", desc=True)
             query = query.range(pagination.offset, pagination.offset + pagination.limit - 1)
             result = query.execute()
-            templates = [MockTemplate(**row) for row in result.data]
+            templates = [MockTemplate.from_row(row) for row in result.data]
             total = result.count if result.count is not None else 0
             return templates, total
         except Exception as e:
@@ -490,12 +1052,97 @@ class MockService:
     async def get_mock_template(self, template_id: UUID) -> Optional[MockTemplate]:
         """Get a mock template by ID"""
         try:
-            result = self.client.table("mock_templates").select("*").eq("id", str(template_id)).single().execute()
+            result = (
+                self._reader()
+                .table("mock_templates")
+                .select("*")
+                .eq("id", str(template_id))
+                .single()
+                .execute()
+            )
             if not result.data:
                 return None
-            return MockTemplate(**result.data)
+            return MockTemplate.from_row(result.data)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error fetching mock template: {str(e)}",
             )
+
+    async def _search_mocks(
+        self,
+        pagination: PaginationParams,
+        search: str,
+        user_id: Optional[UUID] = None,
+        status_filter: Optional[MockStatus] = None,
+        tags: Optional[List[str]] = None,
+        public_only: bool = False,
+    ) -> Tuple[List[Mock], int]:
+        """Ranked full-text search over mocks (see migrations/011_full_text_search.sql)"""
+        try:
+            result = (
+                self._reader(user_id)
+                .rpc(
+                    "search_mocks",
+                    {
+                        "p_search": search,
+                        "p_user_id": str(user_id) if user_id else None,
+                        "p_public_only": public_only,
+                        "p_status": status_filter.value if status_filter else None,
+                        "p_tags": tags or None,
+                        "p_limit": pagination.limit,
+                        "p_offset": pagination.offset,
+                    },
+                )
+                .execute()
+            )
+
+            rows = result.data or []
+            mocks = [Mock.from_row(row) for row in rows]
+            total = rows[0]["total_count"] if rows else 0
+
+            return mocks, total
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error searching mocks: {str(e)}",
+            )
+
+    async def _search_mock_templates(
+        self,
+        pagination: PaginationParams,
+        search: str,
+        tags: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        public_only: bool = True,
+    ) -> Tuple[List[MockTemplate], int]:
+        """Ranked full-text search over mock templates"""
+        try:
+            result = (
+                self._reader()
+                .rpc(
+                    "search_mock_templates",
+                    {
+                        "p_search": search,
+                        "p_public_only": public_only,
+                        "p_category": category,
+                        "p_tags": tags or None,
+                        "p_limit": pagination.limit,
+                        "p_offset": pagination.offset,
+                    },
+                )
+                .execute()
+            )
+
+            rows = result.data or []
+            templates = [MockTemplate.from_row(row) for row in rows]
+            total = rows[0]["total_count"] if rows else 0
+
+            return templates, total
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error searching mock templates: {str(e)}",
+            )
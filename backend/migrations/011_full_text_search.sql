@@ -0,0 +1,221 @@
+-- 011_full_text_search.sql
+-- Migration: Indexed full-text search for mocks and mock templates
+--
+-- Replaces the `ilike '%term%'` OR filters used by the `search` query param with
+-- generated tsvector columns backed by GIN indexes, plus trigram indexes for
+-- fuzzy fallback. Search is exposed through RPC functions that rank results,
+-- support prefix matching ("use" matches "users") and return highlighted snippets.
+
+-- 1. Extensions
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 2. Generated search vectors
+-- Endpoints are split on path separators so "/api/users/{id}" indexes "api", "users", "id".
+ALTER TABLE public.mocks
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', regexp_replace(coalesce(endpoint, ''), '[/_.:{}-]+', ' ', 'g')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED;
+
+ALTER TABLE public.mock_templates
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED;
+
+-- 3. Indexes
+CREATE INDEX IF NOT EXISTS idx_mocks_search_vector ON public.mocks USING GIN(search_vector);
+CREATE INDEX IF NOT EXISTS idx_mocks_name_trgm ON public.mocks USING GIN(name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_mocks_endpoint_trgm ON public.mocks USING GIN(endpoint gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_mock_templates_search_vector ON public.mock_templates USING GIN(search_vector);
+CREATE INDEX IF NOT EXISTS idx_mock_templates_name_trgm ON public.mock_templates USING GIN(name gin_trgm_ops);
+
+-- 4. Turn free-form user input into a prefix tsquery ("user api" -> 'user':* & 'api':*)
+-- Returns NULL when the input has no searchable characters.
+CREATE OR REPLACE FUNCTION public.mockbox_search_query(p_search text)
+RETURNS tsquery AS $$
+    SELECT CASE
+        WHEN count(*) = 0 THEN NULL
+        ELSE to_tsquery('simple', string_agg(quote_literal(term) || ':*', ' & '))
+    END
+    FROM regexp_split_to_table(
+        lower(regexp_replace(coalesce(p_search, ''), '[^[:alnum:]]+', ' ', 'g')),
+        '\s+'
+    ) AS term
+    WHERE term <> '';
+$$ LANGUAGE sql IMMUTABLE;
+
+-- 5. Ranked mock search
+-- SECURITY INVOKER (the default) so the caller's RLS policies still apply.
+-- Highlights are computed only for the returned page.
+CREATE OR REPLACE FUNCTION public.search_mocks(
+    p_search text,
+    p_user_id uuid DEFAULT NULL,
+    p_public_only boolean DEFAULT false,
+    p_status text DEFAULT NULL,
+    p_tags text[] DEFAULT NULL,
+    p_limit integer DEFAULT 20,
+    p_offset integer DEFAULT 0
+)
+RETURNS TABLE (
+    id uuid,
+    user_id uuid,
+    name text,
+    description text,
+    endpoint text,
+    method text,
+    response jsonb,
+    headers jsonb,
+    status_code integer,
+    delay_ms integer,
+    status text,
+    is_public boolean,
+    tags text[],
+    access_count integer,
+    last_accessed timestamptz,
+    created_at timestamptz,
+    updated_at timestamptz,
+    search_rank real,
+    search_highlight text,
+    total_count bigint
+) AS $$
+    WITH q AS (
+        SELECT public.mockbox_search_query(p_search) AS query
+    ),
+    matched AS (
+        SELECT
+            m.*,
+            CASE
+                WHEN q.query IS NOT NULL THEN ts_rank_cd(m.search_vector, q.query)
+                ELSE similarity(m.name, p_search)
+            END AS rank,
+            count(*) OVER () AS total
+        FROM public.mocks m, q
+        WHERE (p_user_id IS NULL OR m.user_id = p_user_id)
+          AND (NOT p_public_only OR (m.is_public AND m.status = 'active'))
+          AND (p_status IS NULL OR m.status = p_status)
+          AND (p_tags IS NULL OR m.tags @> p_tags)
+          AND (
+              (q.query IS NOT NULL AND m.search_vector @@ q.query)
+              OR (q.query IS NULL AND (m.name ILIKE '%' || p_search || '%' OR m.endpoint ILIKE '%' || p_search || '%'))
+          )
+        ORDER BY rank DESC, m.created_at DESC
+        LIMIT p_limit OFFSET p_offset
+    )
+    SELECT
+        matched.id,
+        matched.user_id,
+        matched.name,
+        matched.description,
+        matched.endpoint,
+        matched.method,
+        matched.response,
+        matched.headers,
+        matched.status_code,
+        matched.delay_ms,
+        matched.status,
+        matched.is_public,
+        matched.tags,
+        matched.access_count,
+        matched.last_accessed,
+        matched.created_at,
+        matched.updated_at,
+        matched.rank::real,
+        CASE
+            WHEN q.query IS NULL THEN NULL
+            ELSE ts_headline(
+                'simple',
+                concat_ws(' — ', matched.name, matched.endpoint, matched.description),
+                q.query,
+                'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5'
+            )
+        END,
+        matched.total
+    FROM matched, q
+    ORDER BY matched.rank DESC, matched.created_at DESC;
+$$ LANGUAGE sql STABLE;
+
+-- 6. Ranked template search
+CREATE OR REPLACE FUNCTION public.search_mock_templates(
+    p_search text,
+    p_public_only boolean DEFAULT true,
+    p_category text DEFAULT NULL,
+    p_tags text[] DEFAULT NULL,
+    p_limit integer DEFAULT 20,
+    p_offset integer DEFAULT 0
+)
+RETURNS TABLE (
+    id uuid,
+    name text,
+    description text,
+    category text,
+    template_data jsonb,
+    is_public boolean,
+    usage_count integer,
+    created_by uuid,
+    tags text[],
+    created_at timestamptz,
+    updated_at timestamptz,
+    search_rank real,
+    search_highlight text,
+    total_count bigint
+) AS $$
+    WITH q AS (
+        SELECT public.mockbox_search_query(p_search) AS query
+    ),
+    matched AS (
+        SELECT
+            t.*,
+            CASE
+                WHEN q.query IS NOT NULL THEN ts_rank_cd(t.search_vector, q.query)
+                ELSE similarity(t.name, p_search)
+            END AS rank,
+            count(*) OVER () AS total
+        FROM public.mock_templates t, q
+        WHERE (NOT p_public_only OR t.is_public)
+          AND (p_category IS NULL OR t.category = p_category)
+          AND (p_tags IS NULL OR t.tags @> p_tags)
+          AND (
+              (q.query IS NOT NULL AND t.search_vector @@ q.query)
+              OR (q.query IS NULL AND t.name ILIKE '%' || p_search || '%')
+          )
+        ORDER BY rank DESC, t.created_at DESC
+        LIMIT p_limit OFFSET p_offset
+    )
+    SELECT
+        matched.id,
+        matched.name,
+        matched.description,
+        matched.category,
+        matched.template_data,
+        matched.is_public,
+        matched.usage_count,
+        matched.created_by,
+        matched.tags,
+        matched.created_at,
+        matched.updated_at,
+        matched.rank::real,
+        CASE
+            WHEN q.query IS NULL THEN NULL
+            ELSE ts_headline(
+                'simple',
+                concat_ws(' — ', matched.name, matched.category, matched.description),
+                q.query,
+                'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5'
+            )
+        END,
+        matched.total
+    FROM matched, q
+    ORDER BY matched.rank DESC, matched.created_at DESC;
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION public.mockbox_search_query(text) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.search_mocks(text, uuid, boolean, text, text[], integer, integer) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.search_mock_templates(text, boolean, text, text[], integer, integer) TO anon, authenticated;
+
+-- End of migration
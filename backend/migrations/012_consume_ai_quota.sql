@@ -0,0 +1,169 @@
+-- 012_consume_ai_quota.sql
+-- Migration: Atomic AI quota check-and-increment in a single round trip
+--
+-- Previously the AI endpoints read the user's plan, read ai_usage_stats, then
+-- upserted `{"requests_today": 1}` (which overwrote the counter instead of
+-- incrementing it). consume_ai_quota() resolves the plan, checks the quota and
+-- increments the request/token counters in one conditional UPDATE, so
+-- concurrent generations can neither lose updates nor overshoot the quota.
+
+-- 1. One usage row per user
+-- Migration 003 indexed user_id without UNIQUE and the backend upserted usage
+-- without on_conflict, so existing databases can hold several rows per user.
+-- Merge them into the most recently updated row (counters summed) before
+-- creating the unique index that upsert/ON CONFLICT (user_id) requires.
+LOCK TABLE public.ai_usage_stats IN SHARE ROW EXCLUSIVE MODE;
+
+WITH ranked AS (
+    SELECT id, user_id,
+           row_number() OVER (PARTITION BY user_id ORDER BY updated_at DESC, id) AS rn
+    FROM public.ai_usage_stats
+),
+totals AS (
+    SELECT user_id,
+           sum(requests_today)::integer AS requests_today,
+           sum(requests_this_month)::integer AS requests_this_month,
+           sum(tokens_used_today)::integer AS tokens_used_today,
+           sum(tokens_used_this_month)::integer AS tokens_used_this_month,
+           max(last_request) AS last_request,
+           min(created_at) AS created_at
+    FROM public.ai_usage_stats
+    GROUP BY user_id
+    HAVING count(*) > 1
+)
+UPDATE public.ai_usage_stats s
+SET requests_today = t.requests_today,
+    requests_this_month = t.requests_this_month,
+    tokens_used_today = t.tokens_used_today,
+    tokens_used_this_month = t.tokens_used_this_month,
+    last_request = t.last_request,
+    created_at = t.created_at
+FROM ranked r
+JOIN totals t ON t.user_id = r.user_id
+WHERE s.id = r.id AND r.rn = 1;
+
+DELETE FROM public.ai_usage_stats s
+USING (
+    SELECT id,
+           row_number() OVER (PARTITION BY user_id ORDER BY updated_at DESC, id) AS rn
+    FROM public.ai_usage_stats
+) r
+WHERE s.id = r.id AND r.rn > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ai_usage_stats_user_id_unique
+    ON public.ai_usage_stats(user_id);
+
+-- 2. Check quota and increment counters
+-- p_enforce = false records usage without checking quotas (e.g. settling the
+-- tokens of a generation that was already admitted).
+-- Users without a profile or plan are held to the quotas of the 'free' plan
+-- row (plan_assigned = false); when no such row exists the call is refused
+-- with reason NO_PLAN.
+DROP FUNCTION IF EXISTS public.consume_ai_quota(uuid, integer, integer, boolean);
+
+CREATE OR REPLACE FUNCTION public.consume_ai_quota(
+    p_user_id uuid,
+    p_requests integer DEFAULT 1,
+    p_tokens integer DEFAULT 0,
+    p_enforce boolean DEFAULT true
+)
+RETURNS TABLE (
+    allowed boolean,
+    reason text,
+    plan_name text,
+    plan_assigned boolean,
+    daily_request_quota integer,
+    monthly_token_quota integer,
+    requests_today integer,
+    requests_this_month integer,
+    tokens_used_today integer,
+    tokens_used_this_month integer
+) AS $$
+DECLARE
+    v_plan_name text;
+    v_plan_assigned boolean := true;
+    v_daily_quota integer;
+    v_monthly_quota integer;
+    v_stats public.ai_usage_stats%ROWTYPE;
+BEGIN
+    -- Resolve plan
+    SELECT up.name, up.daily_request_quota, up.monthly_token_quota
+    INTO v_plan_name, v_daily_quota, v_monthly_quota
+    FROM public.profiles p
+    JOIN public.user_plans up ON up.id = p.plan_id
+    WHERE p.user_id = p_user_id;
+
+    IF NOT FOUND THEN
+        -- Legacy users without a profile get the free plan (seeded as 'free'
+        -- or 'Free' depending on the migration that created it)
+        v_plan_assigned := false;
+
+        SELECT up.name, up.daily_request_quota, up.monthly_token_quota
+        INTO v_plan_name, v_daily_quota, v_monthly_quota
+        FROM public.user_plans up
+        WHERE lower(up.name) = 'free'
+        ORDER BY up.created_at
+        LIMIT 1;
+
+        IF NOT FOUND THEN
+            RETURN QUERY SELECT
+                false, 'NO_PLAN'::text, NULL::text, false,
+                NULL::integer, NULL::integer, NULL::integer, NULL::integer,
+                NULL::integer, NULL::integer;
+            RETURN;
+        END IF;
+    END IF;
+
+    -- Legacy users may not have a usage row yet
+    INSERT INTO public.ai_usage_stats (user_id, rate_limit_remaining)
+    VALUES (p_user_id, v_daily_quota)
+    ON CONFLICT (user_id) DO NOTHING;
+
+    -- Conditional increment: the row lock taken by UPDATE serialises
+    -- concurrent callers, and the WHERE clause re-checks the quota under it.
+    UPDATE public.ai_usage_stats s
+    SET requests_today = s.requests_today + p_requests,
+        requests_this_month = s.requests_this_month + p_requests,
+        tokens_used_today = s.tokens_used_today + p_tokens,
+        tokens_used_this_month = s.tokens_used_this_month + p_tokens,
+        rate_limit_remaining = GREATEST(0, v_daily_quota - (s.requests_today + p_requests)),
+        last_request = CASE WHEN p_requests > 0 THEN now() ELSE s.last_request END
+    WHERE s.user_id = p_user_id
+      AND (
+          NOT p_enforce
+          OR (
+              s.requests_today + p_requests <= v_daily_quota
+              AND s.tokens_used_this_month < v_monthly_quota
+          )
+      )
+    RETURNING s.* INTO v_stats;
+
+    IF FOUND THEN
+        RETURN QUERY SELECT
+            true, NULL::text, v_plan_name, v_plan_assigned,
+            v_daily_quota, v_monthly_quota,
+            v_stats.requests_today, v_stats.requests_this_month,
+            v_stats.tokens_used_today, v_stats.tokens_used_this_month;
+        RETURN;
+    END IF;
+
+    -- Quota exceeded: report current totals without modifying them
+    SELECT * INTO v_stats FROM public.ai_usage_stats s WHERE s.user_id = p_user_id;
+
+    RETURN QUERY SELECT
+        false,
+        CASE
+            WHEN v_stats.requests_today + p_requests > v_daily_quota THEN 'DAILY_QUOTA_EXCEEDED'
+            ELSE 'MONTHLY_TOKEN_QUOTA_EXCEEDED'
+        END,
+        v_plan_name, v_plan_assigned, v_daily_quota, v_monthly_quota,
+        v_stats.requests_today, v_stats.requests_this_month,
+        v_stats.tokens_used_today, v_stats.tokens_used_this_month;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Only the backend (service role) may consume quota
+REVOKE ALL ON FUNCTION public.consume_ai_quota(uuid, integer, integer, boolean) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.consume_ai_quota(uuid, integer, integer, boolean) TO service_role;
+
+-- End of migration
@@ -0,0 +1,34 @@
+-- 013_create_mock_stats_on_insert.sql
+-- Migration: Create the mock_stats row in the same transaction as the mock
+--
+-- Mock creation used to be three round trips (duplicate check, insert into
+-- mocks, insert into mock_stats) and was not atomic. The backend now issues a
+-- single INSERT and relies on UNIQUE(user_id, endpoint, method) for conflict
+-- detection; this trigger creates the associated stats row in the same
+-- transaction, so a mock can never exist without its stats (and bulk inserts
+-- get stats rows for free).
+
+-- 1. Function to insert the stats row for a new mock
+CREATE OR REPLACE FUNCTION public.handle_new_mock_stats()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO public.mock_stats (mock_id, user_id)
+    VALUES (NEW.id, NEW.user_id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- 2. Trigger to call the function after insert on mocks
+DROP TRIGGER IF EXISTS on_mock_created_stats ON public.mocks;
+CREATE TRIGGER on_mock_created_stats
+AFTER INSERT ON public.mocks
+FOR EACH ROW EXECUTE FUNCTION public.handle_new_mock_stats();
+
+-- 3. Backfill stats rows for mocks created before this migration that lost theirs
+INSERT INTO public.mock_stats (mock_id, user_id)
+SELECT m.id, m.user_id
+FROM public.mocks m
+LEFT JOIN public.mock_stats ms ON ms.mock_id = m.id
+WHERE ms.mock_id IS NULL;
+
+-- End of migration
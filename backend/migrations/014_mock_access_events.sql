@@ -0,0 +1,257 @@
+-- 014_mock_access_events.sql
+-- Migration: Time-series access log storage replacing the JSONB columns in mock_stats
+--
+-- mock_stats.access_logs (JSONB array) and daily_stats/monthly_stats (JSONB maps)
+-- had to be rewritten in full on every hit. Access events now go to an
+-- append-only table partitioned by day, and per-mock rollups (minute, hour, day)
+-- are maintained by a batch aggregation job. Old event partitions are dropped
+-- wholesale, which is far cheaper than DELETE.
+--
+-- The maintenance functions (rollup, partition creation, retention) are run by
+-- the backend's `maintain_access_stats` task every
+-- ACCESS_STATS_ROLLUP_INTERVAL_SECONDS. Deployments that schedule them with
+-- pg_cron instead (section 9) set that to 0.
+
+-- 1. Append-only access events, partitioned by day
+CREATE TABLE IF NOT EXISTS public.mock_access_events (
+    mock_id uuid NOT NULL,
+    user_id uuid NOT NULL, -- mock owner
+    occurred_at timestamptz NOT NULL DEFAULT now(),
+    ip_address text,
+    user_agent text,
+    response_time_ms real NOT NULL DEFAULT 0,
+    status_code smallint NOT NULL,
+    is_error boolean GENERATED ALWAYS AS (status_code >= 400) STORED,
+    -- Inserting transaction: the rollup watermark, so events flushed late
+    -- (e.g. after flush retries) are still aggregated
+    inserted_xid xid8 NOT NULL DEFAULT pg_current_xact_id()
+) PARTITION BY RANGE (occurred_at);
+
+CREATE INDEX IF NOT EXISTS idx_mock_access_events_occurred_at
+    ON public.mock_access_events (occurred_at);
+CREATE INDEX IF NOT EXISTS idx_mock_access_events_mock_id_occurred_at
+    ON public.mock_access_events (mock_id, occurred_at);
+CREATE INDEX IF NOT EXISTS idx_mock_access_events_inserted_xid
+    ON public.mock_access_events (inserted_xid);
+
+-- Catch-all for events outside the pre-created range so inserts never fail
+CREATE TABLE IF NOT EXISTS public.mock_access_events_default
+    PARTITION OF public.mock_access_events DEFAULT;
+
+-- 2. Rollup tables (one row per mock per bucket)
+CREATE TABLE IF NOT EXISTS public.mock_stats_minute (
+    mock_id uuid NOT NULL REFERENCES public.mocks(id) ON DELETE CASCADE,
+    user_id uuid NOT NULL,
+    bucket timestamptz NOT NULL,
+    request_count integer NOT NULL DEFAULT 0,
+    error_count integer NOT NULL DEFAULT 0,
+    total_response_time_ms double precision NOT NULL DEFAULT 0,
+    max_response_time_ms real NOT NULL DEFAULT 0,
+    PRIMARY KEY (mock_id, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS public.mock_stats_hour (LIKE public.mock_stats_minute INCLUDING ALL);
+CREATE TABLE IF NOT EXISTS public.mock_stats_day (LIKE public.mock_stats_minute INCLUDING ALL);
+
+ALTER TABLE public.mock_stats_hour
+    ADD CONSTRAINT mock_stats_hour_mock_id_fkey
+    FOREIGN KEY (mock_id) REFERENCES public.mocks(id) ON DELETE CASCADE;
+ALTER TABLE public.mock_stats_day
+    ADD CONSTRAINT mock_stats_day_mock_id_fkey
+    FOREIGN KEY (mock_id) REFERENCES public.mocks(id) ON DELETE CASCADE;
+
+CREATE INDEX IF NOT EXISTS idx_mock_stats_minute_bucket ON public.mock_stats_minute (bucket);
+CREATE INDEX IF NOT EXISTS idx_mock_stats_hour_bucket ON public.mock_stats_hour (bucket);
+CREATE INDEX IF NOT EXISTS idx_mock_stats_minute_user_id ON public.mock_stats_minute (user_id);
+CREATE INDEX IF NOT EXISTS idx_mock_stats_hour_user_id ON public.mock_stats_hour (user_id);
+CREATE INDEX IF NOT EXISTS idx_mock_stats_day_user_id ON public.mock_stats_day (user_id);
+
+-- Aggregation watermark (single row): events inserted by transactions below
+-- this id have been rolled up
+CREATE TABLE IF NOT EXISTS public.mock_stats_rollup_state (
+    id boolean PRIMARY KEY DEFAULT true CHECK (id),
+    rolled_up_xid xid8 NOT NULL DEFAULT '0'
+);
+INSERT INTO public.mock_stats_rollup_state (id) VALUES (true) ON CONFLICT (id) DO NOTHING;
+
+-- 3. Drop the unbounded JSONB columns
+ALTER TABLE public.mock_stats
+    DROP COLUMN IF EXISTS access_logs,
+    DROP COLUMN IF EXISTS daily_stats,
+    DROP COLUMN IF EXISTS monthly_stats;
+
+-- 4. Partition management: create daily partitions ahead of time
+CREATE OR REPLACE FUNCTION public.create_mock_access_event_partitions(p_days_ahead integer DEFAULT 3)
+RETURNS void AS $$
+DECLARE
+    v_day date;
+    v_partition text;
+BEGIN
+    FOR v_day IN
+        SELECT generate_series(current_date, current_date + p_days_ahead, interval '1 day')::date
+    LOOP
+        v_partition := 'mock_access_events_' || to_char(v_day, 'YYYYMMDD');
+        IF to_regclass('public.' || v_partition) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS public.%I PARTITION OF public.mock_access_events FOR VALUES FROM (%L) TO (%L)',
+                v_partition, v_day, v_day + 1
+            );
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- 5. Retention: drop whole event partitions older than the retention window,
+--    and trim fine-grained rollups (day rollups are kept indefinitely)
+CREATE OR REPLACE FUNCTION public.apply_mock_stats_retention(
+    p_event_retention_days integer DEFAULT 7,
+    p_minute_retention_days integer DEFAULT 2,
+    p_hour_retention_days integer DEFAULT 90
+)
+RETURNS integer AS $$
+DECLARE
+    v_partition record;
+    v_dropped integer := 0;
+    v_cutoff date := current_date - p_event_retention_days;
+BEGIN
+    FOR v_partition IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'mock_access_events'
+          AND c.relname ~ '^mock_access_events_[0-9]{8}$'
+          AND to_date(substring(c.relname from '[0-9]{8}$'), 'YYYYMMDD') < v_cutoff
+    LOOP
+        EXECUTE format('DROP TABLE IF EXISTS public.%I', v_partition.relname);
+        v_dropped := v_dropped + 1;
+    END LOOP;
+
+    DELETE FROM public.mock_access_events_default WHERE occurred_at < v_cutoff;
+    DELETE FROM public.mock_stats_minute WHERE bucket < now() - make_interval(days => p_minute_retention_days);
+    DELETE FROM public.mock_stats_hour WHERE bucket < now() - make_interval(days => p_hour_retention_days);
+
+    RETURN v_dropped;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- 6. Batch aggregation: fold new events into the rollups and summary counters
+-- Events are selected by inserting transaction, not by occurred_at: every
+-- transaction older than the snapshot xmin has finished, so the events it
+-- committed are all visible now and none can appear later. Each event is
+-- therefore aggregated exactly once, however late it was flushed.
+CREATE OR REPLACE FUNCTION public.rollup_mock_access_events()
+RETURNS integer AS $$
+DECLARE
+    v_from xid8;
+    v_until xid8 := pg_snapshot_xmin(pg_current_snapshot());
+    v_events integer;
+BEGIN
+    SELECT rolled_up_xid INTO v_from
+    FROM public.mock_stats_rollup_state
+    WHERE id
+    FOR UPDATE;
+
+    IF v_until <= v_from THEN
+        RETURN 0;
+    END IF;
+
+    CREATE TEMP TABLE _mock_access_batch ON COMMIT DROP AS
+    SELECT e.*
+    FROM public.mock_access_events e
+    JOIN public.mocks m ON m.id = e.mock_id -- skip events for deleted mocks
+    WHERE e.inserted_xid >= v_from AND e.inserted_xid < v_until;
+
+    GET DIAGNOSTICS v_events = ROW_COUNT;
+
+    INSERT INTO public.mock_stats_minute AS r
+        (mock_id, user_id, bucket, request_count, error_count, total_response_time_ms, max_response_time_ms)
+    SELECT mock_id, user_id, date_trunc('minute', occurred_at), count(*),
+           count(*) FILTER (WHERE is_error), sum(response_time_ms), max(response_time_ms)
+    FROM _mock_access_batch
+    GROUP BY 1, 2, 3
+    ON CONFLICT (mock_id, bucket) DO UPDATE SET
+        request_count = r.request_count + EXCLUDED.request_count,
+        error_count = r.error_count + EXCLUDED.error_count,
+        total_response_time_ms = r.total_response_time_ms + EXCLUDED.total_response_time_ms,
+        max_response_time_ms = GREATEST(r.max_response_time_ms, EXCLUDED.max_response_time_ms);
+
+    INSERT INTO public.mock_stats_hour AS r
+        (mock_id, user_id, bucket, request_count, error_count, total_response_time_ms, max_response_time_ms)
+    SELECT mock_id, user_id, date_trunc('hour', occurred_at), count(*),
+           count(*) FILTER (WHERE is_error), sum(response_time_ms), max(response_time_ms)
+    FROM _mock_access_batch
+    GROUP BY 1, 2, 3
+    ON CONFLICT (mock_id, bucket) DO UPDATE SET
+        request_count = r.request_count + EXCLUDED.request_count,
+        error_count = r.error_count + EXCLUDED.error_count,
+        total_response_time_ms = r.total_response_time_ms + EXCLUDED.total_response_time_ms,
+        max_response_time_ms = GREATEST(r.max_response_time_ms, EXCLUDED.max_response_time_ms);
+
+    INSERT INTO public.mock_stats_day AS r
+        (mock_id, user_id, bucket, request_count, error_count, total_response_time_ms, max_response_time_ms)
+    SELECT mock_id, user_id, date_trunc('day', occurred_at), count(*),
+           count(*) FILTER (WHERE is_error), sum(response_time_ms), max(response_time_ms)
+    FROM _mock_access_batch
+    GROUP BY 1, 2, 3
+    ON CONFLICT (mock_id, bucket) DO UPDATE SET
+        request_count = r.request_count + EXCLUDED.request_count,
+        error_count = r.error_count + EXCLUDED.error_count,
+        total_response_time_ms = r.total_response_time_ms + EXCLUDED.total_response_time_ms,
+        max_response_time_ms = GREATEST(r.max_response_time_ms, EXCLUDED.max_response_time_ms);
+
+    -- Summary counters: one UPDATE per affected mock instead of one per hit
+    WITH batch AS (
+        SELECT mock_id, count(*) AS requests, count(*) FILTER (WHERE is_error) AS errors,
+               sum(response_time_ms) AS total_time, max(occurred_at) AS last_accessed
+        FROM _mock_access_batch
+        GROUP BY mock_id
+    ),
+    stats AS (
+        UPDATE public.mock_stats s
+        SET avg_response_time = (s.avg_response_time * s.total_requests + b.total_time)
+                                / NULLIF(s.total_requests + b.requests, 0),
+            total_requests = s.total_requests + b.requests,
+            error_count = s.error_count + b.errors
+        FROM batch b
+        WHERE s.mock_id = b.mock_id
+    )
+    UPDATE public.mocks m
+    SET access_count = m.access_count + b.requests,
+        last_accessed = GREATEST(m.last_accessed, b.last_accessed)
+    FROM batch b
+    WHERE m.id = b.mock_id;
+
+    UPDATE public.mock_stats_rollup_state SET rolled_up_xid = v_until WHERE id;
+
+    RETURN v_events;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- 7. Row Level Security
+ALTER TABLE public.mock_access_events ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.mock_stats_minute ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.mock_stats_hour ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.mock_stats_day ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.mock_stats_rollup_state ENABLE ROW LEVEL SECURITY;
+
+-- Events are written by the backend with the service role; owners can read them
+CREATE POLICY "Users can view own mock access events" ON public.mock_access_events
+    FOR SELECT USING (auth.uid() = user_id);
+CREATE POLICY "Users can view own minute stats" ON public.mock_stats_minute
+    FOR SELECT USING (auth.uid() = user_id);
+CREATE POLICY "Users can view own hour stats" ON public.mock_stats_hour
+    FOR SELECT USING (auth.uid() = user_id);
+CREATE POLICY "Users can view own day stats" ON public.mock_stats_day
+    FOR SELECT USING (auth.uid() = user_id);
+
+-- 8. Create today's partitions now
+SELECT public.create_mock_access_event_partitions(3);
+
+-- 9. Alternatively, schedule maintenance with pg_cron (requires the pg_cron
+--    extension; set ACCESS_STATS_ROLLUP_INTERVAL_SECONDS=0 on the backend)
+-- SELECT cron.schedule('rollup_mock_access_events', '* * * * *', $$SELECT public.rollup_mock_access_events();$$);
+-- SELECT cron.schedule('create_mock_access_event_partitions', '0 * * * *', $$SELECT public.create_mock_access_event_partitions(3);$$);
+-- SELECT cron.schedule('apply_mock_stats_retention', '30 0 * * *', $$SELECT public.apply_mock_stats_retention();$$);
+
+-- End of migration
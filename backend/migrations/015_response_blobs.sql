@@ -0,0 +1,142 @@
+-- 015_response_blobs.sql
+-- Migration: Store large mock response bodies in content-addressed blob storage
+--
+-- Mock response bodies can be up to max_response_size_mb and used to live in
+-- the `response` JSONB column, so every select('*') on mocks dragged them
+-- along. Bodies larger than BLOB_INLINE_THRESHOLD_BYTES are now written to a
+-- blob store (local filesystem or the Supabase Storage bucket below) keyed by
+-- the SHA-256 of their canonical JSON encoding; the row keeps only the hash
+-- and size, and identical bodies are stored once. See app/services/blob_store.py.
+
+-- 1. Blob reference columns (response is '{}' when the body is externalized)
+ALTER TABLE public.mocks
+    ADD COLUMN IF NOT EXISTS response_blob_hash text,
+    ADD COLUMN IF NOT EXISTS response_size integer;
+
+ALTER TABLE public.mocks
+    DROP CONSTRAINT IF EXISTS mocks_response_blob_hash_format;
+ALTER TABLE public.mocks
+    ADD CONSTRAINT mocks_response_blob_hash_format
+    CHECK (response_blob_hash IS NULL OR response_blob_hash ~ '^[0-9a-f]{64}$');
+
+-- 2. Index referenced hashes for garbage collection of orphaned blobs
+CREATE INDEX IF NOT EXISTS idx_mocks_response_blob_hash
+    ON public.mocks(response_blob_hash)
+    WHERE response_blob_hash IS NOT NULL;
+
+-- 3. Private storage bucket for the Supabase Storage backend
+--    (only the service role reads and writes blobs)
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('mock-bodies', 'mock-bodies', false)
+ON CONFLICT (id) DO NOTHING;
+
+-- 4. Blobs no longer referenced by any mock (for periodic cleanup jobs)
+CREATE OR REPLACE FUNCTION public.referenced_response_blobs()
+RETURNS TABLE (response_blob_hash text, reference_count bigint) AS $$
+    SELECT m.response_blob_hash, count(*)
+    FROM public.mocks m
+    WHERE m.response_blob_hash IS NOT NULL
+    GROUP BY m.response_blob_hash;
+$$ LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION public.referenced_response_blobs() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.referenced_response_blobs() TO service_role;
+
+-- 5. Return blob references from search results (the result type changes,
+--    so the function has to be dropped and recreated)
+DROP FUNCTION IF EXISTS public.search_mocks(text, uuid, boolean, text, text[], integer, integer);
+
+CREATE FUNCTION public.search_mocks(
+    p_search text,
+    p_user_id uuid DEFAULT NULL,
+    p_public_only boolean DEFAULT false,
+    p_status text DEFAULT NULL,
+    p_tags text[] DEFAULT NULL,
+    p_limit integer DEFAULT 20,
+    p_offset integer DEFAULT 0
+)
+RETURNS TABLE (
+    id uuid,
+    user_id uuid,
+    name text,
+    description text,
+    endpoint text,
+    method text,
+    response jsonb,
+    headers jsonb,
+    status_code integer,
+    delay_ms integer,
+    status text,
+    is_public boolean,
+    tags text[],
+    access_count integer,
+    last_accessed timestamptz,
+    created_at timestamptz,
+    updated_at timestamptz,
+    response_blob_hash text,
+    response_size integer,
+    search_rank real,
+    search_highlight text,
+    total_count bigint
+) AS $$
+    WITH q AS (
+        SELECT public.mockbox_search_query(p_search) AS query
+    ),
+    matched AS (
+        SELECT
+            m.*,
+            CASE
+                WHEN q.query IS NOT NULL THEN ts_rank_cd(m.search_vector, q.query)
+                ELSE similarity(m.name, p_search)
+            END AS rank,
+            count(*) OVER () AS total
+        FROM public.mocks m, q
+        WHERE (p_user_id IS NULL OR m.user_id = p_user_id)
+          AND (NOT p_public_only OR (m.is_public AND m.status = 'active'))
+          AND (p_status IS NULL OR m.status = p_status)
+          AND (p_tags IS NULL OR m.tags @> p_tags)
+          AND (
+              (q.query IS NOT NULL AND m.search_vector @@ q.query)
+              OR (q.query IS NULL AND (m.name ILIKE '%' || p_search || '%' OR m.endpoint ILIKE '%' || p_search || '%'))
+          )
+        ORDER BY rank DESC, m.created_at DESC
+        LIMIT p_limit OFFSET p_offset
+    )
+    SELECT
+        matched.id,
+        matched.user_id,
+        matched.name,
+        matched.description,
+        matched.endpoint,
+        matched.method,
+        matched.response,
+        matched.headers,
+        matched.status_code,
+        matched.delay_ms,
+        matched.status,
+        matched.is_public,
+        matched.tags,
+        matched.access_count,
+        matched.last_accessed,
+        matched.created_at,
+        matched.updated_at,
+        matched.response_blob_hash,
+        matched.response_size,
+        matched.rank::real,
+        CASE
+            WHEN q.query IS NULL THEN NULL
+            ELSE ts_headline(
+                'simple',
+                concat_ws(' — ', matched.name, matched.endpoint, matched.description),
+                q.query,
+                'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5'
+            )
+        END,
+        matched.total
+    FROM matched, q
+    ORDER BY matched.rank DESC, matched.created_at DESC;
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION public.search_mocks(text, uuid, boolean, text, text[], integer, integer) TO anon, authenticated;
+
+-- End of migration
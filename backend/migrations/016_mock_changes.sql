@@ -0,0 +1,200 @@
+-- 016_mock_changes.sql
+-- Migration: Change feed for incremental sync of a user's mocks
+--
+-- Clients used to refresh by re-downloading the whole paginated mock list.
+-- Every content change to a mock now stamps it with a value from a global
+-- sequence, and deletes leave a tombstone stamped from the same sequence, so
+-- `GET /api/v1/mocks/changes?since=<cursor>` can return only what changed
+-- after the cursor. See MockService.list_mock_changes.
+--
+-- updated_at is not usable as a cursor on its own: it is set by the client
+-- transaction's clock, so a transaction that commits later can carry an
+-- earlier timestamp and be skipped. Sequence values are taken under a
+-- per-user transaction lock, which makes them increase in commit order for
+-- each user.
+
+-- 1. Change sequence and per-mock stamp
+CREATE SEQUENCE IF NOT EXISTS public.mock_change_seq;
+
+ALTER TABLE public.mocks
+    ADD COLUMN IF NOT EXISTS change_seq bigint;
+
+UPDATE public.mocks
+SET change_seq = nextval('public.mock_change_seq')
+WHERE change_seq IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_mocks_user_change_seq
+    ON public.mocks(user_id, change_seq);
+
+-- 2. Tombstones for deleted mocks
+CREATE TABLE IF NOT EXISTS public.mock_tombstones (
+    mock_id uuid PRIMARY KEY,
+    user_id uuid NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    change_seq bigint NOT NULL,
+    deleted_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_mock_tombstones_user_change_seq
+    ON public.mock_tombstones(user_id, change_seq);
+
+ALTER TABLE public.mock_tombstones ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own mock tombstones" ON public.mock_tombstones;
+CREATE POLICY "Users can view own mock tombstones" ON public.mock_tombstones
+    FOR SELECT USING (auth.uid() = user_id);
+
+-- 3. Next change value for a user (serializes that user's writers until commit)
+CREATE OR REPLACE FUNCTION public.next_mock_change_seq(p_user_id uuid)
+RETURNS bigint AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('mock_changes:' || p_user_id::text));
+    RETURN nextval('public.mock_change_seq');
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- 4. Stamp inserts and content updates (analytics-only updates such as the
+--    access_count rollup do not count as changes)
+CREATE OR REPLACE FUNCTION public.stamp_mock_change()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR (
+        NEW.name, NEW.description, NEW.endpoint, NEW.method, NEW.response,
+        NEW.response_blob_hash, NEW.headers, NEW.status_code, NEW.delay_ms,
+        NEW.status, NEW.is_public, NEW.tags
+    ) IS DISTINCT FROM (
+        OLD.name, OLD.description, OLD.endpoint, OLD.method, OLD.response,
+        OLD.response_blob_hash, OLD.headers, OLD.status_code, OLD.delay_ms,
+        OLD.status, OLD.is_public, OLD.tags
+    ) THEN
+        NEW.change_seq := public.next_mock_change_seq(NEW.user_id);
+    ELSE
+        NEW.change_seq := OLD.change_seq;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS stamp_mock_change ON public.mocks;
+CREATE TRIGGER stamp_mock_change
+    BEFORE INSERT OR UPDATE ON public.mocks
+    FOR EACH ROW EXECUTE FUNCTION public.stamp_mock_change();
+
+-- 5. Record a tombstone for every deleted mock
+CREATE OR REPLACE FUNCTION public.record_mock_tombstone()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO public.mock_tombstones (mock_id, user_id, change_seq)
+    VALUES (OLD.id, OLD.user_id, public.next_mock_change_seq(OLD.user_id))
+    ON CONFLICT (mock_id) DO UPDATE
+        SET change_seq = EXCLUDED.change_seq, deleted_at = now();
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS record_mock_tombstone ON public.mocks;
+CREATE TRIGGER record_mock_tombstone
+    AFTER DELETE ON public.mocks
+    FOR EACH ROW EXECUTE FUNCTION public.record_mock_tombstone();
+
+-- 6. Per-user high-water mark of purged tombstones (see step 8)
+CREATE TABLE IF NOT EXISTS public.mock_tombstone_watermarks (
+    user_id uuid PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+    purged_through bigint NOT NULL
+);
+
+ALTER TABLE public.mock_tombstone_watermarks ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own tombstone watermark" ON public.mock_tombstone_watermarks;
+CREATE POLICY "Users can view own tombstone watermark" ON public.mock_tombstone_watermarks
+    FOR SELECT USING (auth.uid() = user_id);
+
+-- 7. Changes after a cursor, upserts and deletes merged in sequence order.
+--    A single statement reads both tables from the same snapshot, so the
+--    returned cursor never skips a change. `mock` is NULL for deletes. When
+--    tombstones newer than the cursor were purged, a single row with
+--    `resync_required` is returned instead.
+CREATE OR REPLACE FUNCTION public.mock_changes(
+    p_user_id uuid,
+    p_since bigint DEFAULT 0,
+    p_limit integer DEFAULT 500
+)
+RETURNS TABLE (
+    change_seq bigint,
+    mock_id uuid,
+    deleted boolean,
+    mock jsonb,
+    resync_required boolean
+) AS $$
+BEGIN
+    IF p_since > 0 AND EXISTS (
+        SELECT 1 FROM public.mock_tombstone_watermarks w
+        WHERE w.user_id = p_user_id AND w.purged_through > p_since
+    ) THEN
+        RETURN QUERY SELECT NULL::bigint, NULL::uuid, NULL::boolean, NULL::jsonb, true;
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT c.change_seq, c.mock_id, c.deleted, c.mock, false
+    FROM (
+        (
+            SELECT m.change_seq, m.id AS mock_id, false AS deleted,
+                   to_jsonb(m) - 'search_vector' - 'change_seq' AS mock
+            FROM public.mocks m
+            WHERE m.user_id = p_user_id AND m.change_seq > p_since
+            ORDER BY m.change_seq
+            LIMIT p_limit
+        )
+        UNION ALL
+        (
+            SELECT t.change_seq, t.mock_id, true AS deleted, NULL::jsonb AS mock
+            FROM public.mock_tombstones t
+            WHERE t.user_id = p_user_id AND t.change_seq > p_since
+            ORDER BY t.change_seq
+            LIMIT p_limit
+        )
+    ) c
+    ORDER BY c.change_seq
+    LIMIT p_limit;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+GRANT EXECUTE ON FUNCTION public.mock_changes(uuid, bigint, integer) TO authenticated;
+
+-- 8. Tombstone retention (records how far each user's tombstones were purged)
+CREATE OR REPLACE FUNCTION public.purge_mock_tombstones(p_retention interval DEFAULT interval '90 days')
+RETURNS integer AS $$
+DECLARE
+    purged integer;
+BEGIN
+    WITH deleted AS (
+        DELETE FROM public.mock_tombstones
+        WHERE deleted_at < now() - p_retention
+        RETURNING user_id, change_seq
+    ),
+    per_user AS (
+        SELECT user_id, max(change_seq) AS purged_through, count(*) AS n
+        FROM deleted
+        GROUP BY user_id
+    ),
+    marked AS (
+        INSERT INTO public.mock_tombstone_watermarks (user_id, purged_through)
+        SELECT user_id, purged_through FROM per_user
+        ON CONFLICT (user_id) DO UPDATE
+            SET purged_through = GREATEST(
+                public.mock_tombstone_watermarks.purged_through,
+                EXCLUDED.purged_through
+            )
+    )
+    SELECT coalesce(sum(n), 0) INTO purged FROM per_user;
+    RETURN purged;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION public.purge_mock_tombstones(interval) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.purge_mock_tombstones(interval) TO service_role;
+
+-- 9. Schedule tombstone purging with pg_cron (or Supabase scheduled triggers)
+-- SELECT cron.schedule('purge_mock_tombstones', '15 3 * * *', $$SELECT public.purge_mock_tombstones();$$);
+
+-- End of migration
@@ -0,0 +1,45 @@
+-- 017_plan_rate_limits.sql
+-- Migration: Per-plan API rate limits
+--
+-- RATE_LIMITS in app/core/rate_limiting.py holds the default limit for each
+-- endpoint class (ai, simulation, authenticated, ...). A plan can override any
+-- of them through user_plans.rate_limits, keyed by endpoint class:
+--
+--   {"authenticated": {"limit": 5000}, "ai": {"limit": 30, "window": 60}}
+--
+-- Overrides are merged over the defaults, so only the changed fields need to
+-- be set. The API reloads this column periodically
+-- (RATE_LIMIT_PLANS_RELOAD_SECONDS), so edits apply without a restart.
+
+-- 1. Overrides column
+ALTER TABLE public.user_plans
+    ADD COLUMN IF NOT EXISTS rate_limits jsonb NOT NULL DEFAULT '{}'::jsonb;
+
+ALTER TABLE public.user_plans
+    DROP CONSTRAINT IF EXISTS user_plans_rate_limits_object;
+
+ALTER TABLE public.user_plans
+    ADD CONSTRAINT user_plans_rate_limits_object
+    CHECK (jsonb_typeof(rate_limits) = 'object');
+
+COMMENT ON COLUMN public.user_plans.rate_limits IS
+    'Per endpoint class rate limit overrides, merged over RATE_LIMITS';
+
+-- 2. Higher throughput for paid plans (free keeps the defaults)
+UPDATE public.user_plans
+SET rate_limits = '{
+    "ai": {"limit": 30},
+    "simulation": {"limit": 1000},
+    "authenticated": {"limit": 5000}
+}'::jsonb
+WHERE lower(name) = 'pro' AND rate_limits = '{}'::jsonb;
+
+UPDATE public.user_plans
+SET rate_limits = '{
+    "ai": {"limit": 120},
+    "simulation": {"limit": 5000},
+    "authenticated": {"limit": 20000}
+}'::jsonb
+WHERE lower(name) = 'enterprise' AND rate_limits = '{}'::jsonb;
+
+-- End of migration
@@ -0,0 +1,57 @@
+-- 018_bulk_update_mocks.sql
+-- Migration: Conditional multi-row mock updates
+--
+-- Bulk updates used to read the user's rows, merge the changes in the backend
+-- and upsert whole rows on id. A mock deleted between the read and the write
+-- was re-inserted, and concurrent edits to columns the patch did not touch
+-- were overwritten with the values read earlier. bulk_update_mocks() applies
+-- every patch as one conditional UPDATE: only the keys present in a patch are
+-- written, only rows the user owns are matched, and missing rows are simply
+-- not returned.
+
+-- 1. Apply a batch of patches
+-- p_items is a JSON array of patches: {"id": ..., "<column>": <value>, ...}.
+-- Returns the rows that were updated; ids without a row were not found (or
+-- belong to another user). Runs with the caller's rights, so RLS still applies.
+CREATE OR REPLACE FUNCTION public.bulk_update_mocks(
+    p_user_id uuid,
+    p_items jsonb
+)
+RETURNS TABLE (id uuid, endpoint text, method text) AS $$
+    UPDATE public.mocks m
+    SET name = CASE WHEN i.item ? 'name'
+            THEN i.item->>'name' ELSE m.name END,
+        description = CASE WHEN i.item ? 'description'
+            THEN i.item->>'description' ELSE m.description END,
+        endpoint = CASE WHEN i.item ? 'endpoint'
+            THEN i.item->>'endpoint' ELSE m.endpoint END,
+        method = CASE WHEN i.item ? 'method'
+            THEN i.item->>'method' ELSE m.method END,
+        response = CASE WHEN i.item ? 'response'
+            THEN NULLIF(i.item->'response', 'null'::jsonb) ELSE m.response END,
+        response_blob_hash = CASE WHEN i.item ? 'response_blob_hash'
+            THEN i.item->>'response_blob_hash' ELSE m.response_blob_hash END,
+        response_size = CASE WHEN i.item ? 'response_size'
+            THEN (i.item->>'response_size')::integer ELSE m.response_size END,
+        headers = CASE WHEN i.item ? 'headers'
+            THEN i.item->'headers' ELSE m.headers END,
+        status_code = CASE WHEN i.item ? 'status_code'
+            THEN (i.item->>'status_code')::integer ELSE m.status_code END,
+        delay_ms = CASE WHEN i.item ? 'delay_ms'
+            THEN (i.item->>'delay_ms')::integer ELSE m.delay_ms END,
+        status = CASE WHEN i.item ? 'status'
+            THEN i.item->>'status' ELSE m.status END,
+        is_public = CASE WHEN i.item ? 'is_public'
+            THEN (i.item->>'is_public')::boolean ELSE m.is_public END,
+        tags = CASE WHEN i.item ? 'tags'
+            THEN ARRAY(SELECT jsonb_array_elements_text(i.item->'tags')) ELSE m.tags END,
+        updated_at = now()
+    FROM jsonb_array_elements(p_items) AS i(item)
+    WHERE m.id = (i.item->>'id')::uuid
+      AND m.user_id = p_user_id
+    RETURNING m.id, m.endpoint, m.method;
+$$ LANGUAGE sql SECURITY INVOKER SET search_path = public;
+
+GRANT EXECUTE ON FUNCTION public.bulk_update_mocks(uuid, jsonb) TO authenticated, service_role;
+
+-- End of migration
@@ -0,0 +1,92 @@
+-- 019_plan_changes.sql
+-- Migration: Plan change log for plan cache invalidation
+--
+-- The backend caches each user's plan and quotas (app/core/plan_cache.py).
+-- Plans are changed in the database (billing, admin tools, SQL), not through
+-- the API, so the backend could only pick a change up once the cache entry
+-- expired. Triggers now log every change to a user's plan (profiles.plan_id)
+-- and every edit of a plan definition (user_plans) to plan_changes; the
+-- backend's `watch_plan_changes` task polls plan_changes_since() and drops
+-- the affected cache entries within a few seconds.
+
+-- 1. Change log (user_id NULL: a plan definition changed, affects everyone)
+CREATE TABLE IF NOT EXISTS public.plan_changes (
+    id bigserial PRIMARY KEY,
+    user_id uuid,
+    changed_at timestamptz NOT NULL DEFAULT now(),
+    -- Inserting transaction: the polling cursor (see plan_changes_since)
+    inserted_xid xid8 NOT NULL DEFAULT pg_current_xact_id()
+);
+
+CREATE INDEX IF NOT EXISTS idx_plan_changes_inserted_xid
+    ON public.plan_changes (inserted_xid);
+CREATE INDEX IF NOT EXISTS idx_plan_changes_changed_at
+    ON public.plan_changes (changed_at);
+
+-- Only the backend (service role) reads the log
+ALTER TABLE public.plan_changes ENABLE ROW LEVEL SECURITY;
+
+-- 2. Log plan assignment changes
+CREATE OR REPLACE FUNCTION public.log_profile_plan_change()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO public.plan_changes (user_id) VALUES (OLD.user_id);
+    ELSIF TG_OP = 'INSERT' OR NEW.plan_id IS DISTINCT FROM OLD.plan_id THEN
+        INSERT INTO public.plan_changes (user_id) VALUES (NEW.user_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS log_profile_plan_change ON public.profiles;
+CREATE TRIGGER log_profile_plan_change
+    AFTER INSERT OR UPDATE OF plan_id OR DELETE ON public.profiles
+    FOR EACH ROW EXECUTE FUNCTION public.log_profile_plan_change();
+
+-- 3. Log plan definition changes (quotas, names)
+CREATE OR REPLACE FUNCTION public.log_plan_definition_change()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO public.plan_changes (user_id) VALUES (NULL);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS log_plan_definition_change ON public.user_plans;
+CREATE TRIGGER log_plan_definition_change
+    AFTER UPDATE OR DELETE ON public.user_plans
+    FOR EACH STATEMENT EXECUTE FUNCTION public.log_plan_definition_change();
+
+-- 4. Changes committed since a cursor
+-- Changes are selected by inserting transaction: every transaction older than
+-- the snapshot xmin has finished, so a change is returned exactly once no
+-- matter in which order the writers commit. Pass NULL to get a starting
+-- cursor without changes, then pass back the returned cursor.
+-- Each call also prunes entries older than a day: the backend polls every few
+-- seconds, so the log only needs to cover a restart or a lost poll.
+CREATE OR REPLACE FUNCTION public.plan_changes_since(p_cursor xid8 DEFAULT NULL)
+RETURNS jsonb AS $$
+    DELETE FROM public.plan_changes WHERE changed_at < now() - interval '1 day';
+
+    WITH horizon AS (
+        SELECT pg_snapshot_xmin(pg_current_snapshot()) AS xmin
+    )
+    SELECT jsonb_build_object(
+        'cursor', h.xmin::text,
+        'all_users', coalesce(bool_or(c.id IS NOT NULL AND c.user_id IS NULL), false),
+        'user_ids', coalesce(
+            jsonb_agg(DISTINCT c.user_id) FILTER (WHERE c.user_id IS NOT NULL),
+            '[]'::jsonb
+        )
+    )
+    FROM horizon h
+    LEFT JOIN public.plan_changes c
+        ON c.inserted_xid >= p_cursor AND c.inserted_xid < h.xmin
+    GROUP BY h.xmin;
+$$ LANGUAGE sql VOLATILE SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION public.plan_changes_since(xid8) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.plan_changes_since(xid8) TO service_role;
+
+-- End of migration
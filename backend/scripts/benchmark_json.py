@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON encoding of representative mock payloads
+
+Compares the encoders a response can go through: the standard library (what
+Starlette's JSONResponse uses), FastAPI's jsonable_encoder pass, orjson via
+app.core.serialization.dumps, and pydantic-core for response models.
+
+Usage: python scripts/benchmark_json.py [--mocks 100] [--items 500]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import datetime
+from uuid import uuid4
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.serialization import HAS_ORJSON, dumps
+from app.models.models import Mock
+from app.schemas.schemas import MockListResponse, MockResponse
+
+
+def mock_body(items: int) -> dict:
+    """A paginated list response like the ones users mock"""
+    return {
+        "data": [
+            {
+                "id": i,
+                "uuid": str(uuid4()),
+                "name": f"Item {i}",
+                "description": "Lorem ipsum dolor sit amet " * 4,
+                "price": i * 1.25,
+                "active": i % 2 == 0,
+                "tags": ["alpha", "beta", "gamma"],
+                "created_at": "2024-01-01T00:00:00Z",
+            }
+            for i in range(items)
+        ],
+        "meta": {"page": 1, "total": items},
+    }
+
+
+def mock_row(items: int) -> dict:
+    return {
+        "id": str(uuid4()),
+        "user_id": str(uuid4()),
+        "name": "Items",
+        "description": None,
+        "endpoint": "/items",
+        "method": "GET",
+        "response": mock_body(items),
+        "headers": {"Content-Type": "application/json"},
+        "status_code": 200,
+        "delay_ms": 0,
+        "status": "active",
+        "is_public": True,
+        "tags": ["items"],
+        "access_count": 0,
+        "last_accessed": None,
+        "created_at": datetime.utcnow().isoformat(),
+        "updated_at": None,
+    }
+
+
+def bench(label: str, fn, number: int) -> None:
+    best = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"  {label:<42} {best * 1000:9.3f} ms   ({len(fn()) / 1024:,.0f} KB)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--mocks", type=int, default=100, help="mocks in the list response"
+    )
+    parser.add_argument("--items", type=int, default=500, help="items per mock body")
+    parser.add_argument("--number", type=int, default=10, help="runs per measurement")
+    args = parser.parse_args()
+
+    print(f"orjson installed: {HAS_ORJSON}\n")
+
+    body = mock_body(args.items)
+    print(f"Simulated mock body ({args.items} items):")
+    bench(
+        "json.dumps (Starlette JSONResponse)",
+        lambda: json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode(),
+        args.number,
+    )
+    bench(
+        "jsonable_encoder + json.dumps",
+        lambda: json.dumps(jsonable_encoder(body), separators=(",", ":")).encode(),
+        args.number,
+    )
+    bench("serialization.dumps", lambda: dumps(body), args.number)
+
+    listing = MockListResponse.create(
+        data=[
+            MockResponse.from_mock(Mock.from_row(mock_row(args.items)))
+            for _ in range(args.mocks)
+        ],
+        total=args.mocks,
+        page=1,
+        limit=args.mocks,
+    )
+    adapter = TypeAdapter(MockListResponse)
+    print(f"\nMock list response ({args.mocks} mocks x {args.items} items):")
+    bench(
+        "jsonable_encoder + json.dumps",
+        lambda: json.dumps(jsonable_encoder(listing), separators=(",", ":")).encode(),
+        max(1, args.number // 5),
+    )
+    bench(
+        "model dump + serialization.dumps",
+        lambda: dumps(adapter.dump_python(listing)),
+        max(1, args.number // 5),
+    )
+    bench(
+        "pydantic-core dump_json (response_model)",
+        lambda: adapter.dump_json(listing),
+        max(1, args.number // 5),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request overhead of the app's middleware stack
+
+Wraps a trivial ASGI endpoint in the middleware configured on app.main.app
+(same classes, options and order) and drives requests through it directly,
+without a server or HTTP client. The overhead is the time per request minus
+the bare endpoint's. Rate limits are raised so every request is allowed.
+
+Usage: python scripts/benchmark_middleware.py [--requests 5000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt
+
+from app.core.rate_limiting import RATE_LIMITS
+from app.main import app
+
+TOKEN = jwt.encode(
+    {"sub": "123e4567-e89b-12d3-a456-426614174000", "role": "authenticated"},
+    "benchmark-secret-key-padded-to-32-bytes",
+    algorithm="HS256",
+)
+
+REQUESTS = {
+    "anonymous simulation": ("GET", "/api/v1/simulate/users", {}),
+    "authenticated API": ("GET", "/api/v1/mocks", {"authorization": f"Bearer {TOKEN}"}),
+}
+
+
+async def endpoint(scope, receive, send):
+    """The cheapest possible route: 200 with a tiny body"""
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain"), (b"content-length", b"2")],
+        }
+    )
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def build_stack(inner):
+    """Wrap `inner` in the app's user middleware, outermost first as configured"""
+    stack = inner
+    for middleware in reversed(app.user_middleware):
+        cls, args, kwargs = middleware
+        stack = cls(stack, *args, **kwargs)
+    return stack
+
+
+def make_scope(method: str, path: str, headers: dict) -> dict:
+    raw_headers = [
+        (b"host", b"localhost"),
+        (b"user-agent", b"benchmark/1.0"),
+        *[(name.encode(), value.encode()) for name, value in headers.items()],
+    ]
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+        "app": app,
+    }
+
+
+async def run(asgi_app, scope: dict, requests: int) -> float:
+    """Seconds per request"""
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await asgi_app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--requests", type=int, default=5000, help="requests per measurement"
+    )
+    args = parser.parse_args()
+
+    for config in RATE_LIMITS.values():
+        config["limit"] = 10**9
+
+    stack = build_stack(endpoint)
+    print("Middleware (outermost first):")
+    for middleware in app.user_middleware:
+        print(f"  {middleware.cls.__name__}")
+    print()
+
+    for label, (method, path, headers) in REQUESTS.items():
+        scope = make_scope(method, path, headers)
+        # Warm up caches and lazily created state
+        await run(stack, scope, 100)
+        bare = min([await run(endpoint, scope, args.requests) for _ in range(3)])
+        wrapped = min([await run(stack, scope, args.requests) for _ in range(3)])
+        print(
+            f"  {label:<24} {wrapped * 1e6:8.1f} us/request   "
+            f"middleware overhead {(wrapped - bare) * 1e6:8.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -31,3 +31,93 @@ def mock_user():
         "email": "test@example.com",
         "role": "authenticated",
     }
+
+
+class FakeQuery:
+    """Chainable stand-in for a PostgREST query builder"""
+
+    def __init__(self, client, table: str, operation: str = "select", payload=None):
+        self.client = client
+        self.table = table
+        self.operation = operation
+        self.payload = payload
+
+    def __getattr__(self, name):
+        # Filters, ordering and pagination just keep chaining
+        return lambda *args, **kwargs: self
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def insert(self, payload, **kwargs):
+        return FakeQuery(self.client, self.table, "insert", payload)
+
+    def upsert(self, payload, **kwargs):
+        return FakeQuery(self.client, self.table, "upsert", payload)
+
+    def update(self, payload, **kwargs):
+        return FakeQuery(self.client, self.table, "update", payload)
+
+    def delete(self, **kwargs):
+        return FakeQuery(self.client, self.table, "delete")
+
+    def execute(self):
+        from app.core.query_instrumentation import QueryRecord, record_query
+
+        record_query(QueryRecord(self.table, self.operation, (), 1, 0, 0, 0.0, 200))
+        self.client.calls.append((self.table, self.operation))
+
+        rows = self.client.rows.get(self.table, [])
+        if self.operation in ("insert", "upsert") and self.payload is not None:
+            payload = self.payload if isinstance(self.payload, list) else [self.payload]
+            rows = [{**(rows[0] if rows else {}), **row} for row in payload]
+        elif self.operation == "update" and rows:
+            rows = [{**rows[0], **self.payload}]
+
+        result = type("FakeResponse", (), {})()
+        result.data = rows
+        result.count = len(rows)
+        return result
+
+
+class FakeSupabaseClient:
+    """
+    In-memory Supabase client: every `.execute()` returns the rows configured for
+    the table and is recorded as one round trip for query budget checks.
+    """
+
+    def __init__(self, rows=None):
+        self.rows = rows or {}
+        self.calls = []
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params=None) -> FakeQuery:
+        return FakeQuery(self, name, "rpc")
+
+
+class FakeDatabaseManager:
+    """DatabaseManager stand-in backed by a single FakeSupabaseClient"""
+
+    def __init__(self, client: FakeSupabaseClient):
+        self.client = client
+        self.admin_client = client
+        self.supabase = type("FakeSupabase", (), {"client": client})()
+
+    def get_client_with_auth(self, user_token=None):
+        return self.client
+
+    def get_read_client(self, user_token=None, sticky_key=None, admin=False):
+        return None
+
+
+@pytest.fixture
+def fake_supabase() -> FakeSupabaseClient:
+    """Fake Supabase client installed as the app's database"""
+    from app.core.database import get_database
+
+    client = FakeSupabaseClient()
+    app.dependency_overrides[get_database] = lambda: FakeDatabaseManager(client)
+    yield client
+    app.dependency_overrides.pop(get_database, None)
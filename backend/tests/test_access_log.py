@@ -0,0 +1,108 @@
+"""
+Unit tests for the buffered access log
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch, MagicMock
+from uuid import uuid4
+
+from app.services.access_log import AccessLogBuffer, maintain_access_stats
+
+
+def _record(buffer, count):
+    for _ in range(count):
+        buffer.record(uuid4(), uuid4(), "127.0.0.1", "test", 1.0, 200)
+
+
+def test_buffer_is_bounded():
+    """Oldest events are shed once the buffer is full"""
+    buffer = AccessLogBuffer(max_events=3)
+    _record(buffer, 5)
+
+    assert len(buffer.events) == 3
+    assert buffer.dropped_events == 2
+
+
+def test_drain_returns_one_batch():
+    """drain() hands out at most batch_size events"""
+    buffer = AccessLogBuffer(batch_size=2)
+    _record(buffer, 5)
+
+    assert len(buffer.drain()) == 2
+    assert len(buffer.events) == 3
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_batches():
+    """flush() issues one multi-row insert per batch"""
+    buffer = AccessLogBuffer(batch_size=2)
+    _record(buffer, 5)
+
+    db = MagicMock()
+    with patch("app.core.database.db_manager", db):
+        written = await buffer.flush()
+
+    assert written == 5
+    assert db.admin_client.table.return_value.insert.call_count == 3
+    assert not buffer.events
+
+
+@pytest.mark.asyncio
+async def test_flush_failure_keeps_events():
+    """Events are kept for the next flush when the insert fails"""
+    buffer = AccessLogBuffer()
+    _record(buffer, 3)
+
+    db = MagicMock()
+    db.admin_client.table.return_value.insert.return_value.execute.side_effect = (
+        Exception("Database error")
+    )
+    with patch("app.core.database.db_manager", db):
+        written = await buffer.flush()
+
+    assert written == 0
+    assert len(buffer.events) == 3
+
+
+@pytest.mark.asyncio
+async def test_maintenance_runs_rollups_every_interval():
+    """Rollups run every interval, partition creation and retention less often"""
+    db = MagicMock()
+    with patch("app.core.database.db_manager", db):
+        task = asyncio.create_task(maintain_access_stats(interval_seconds=0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    calls = [call.args[0] for call in db.admin_client.rpc.call_args_list]
+    assert calls[:2] == [
+        "create_mock_access_event_partitions",
+        "rollup_mock_access_events",
+    ]
+    assert calls.count("rollup_mock_access_events") > 1
+    assert calls.count("create_mock_access_event_partitions") == 1
+    assert calls.count("apply_mock_stats_retention") == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_maintenance_job_is_retried():
+    """A failed job does not count as run and is retried on the next interval"""
+    db = MagicMock()
+    db.admin_client.rpc.return_value.execute.side_effect = [
+        Exception("Database error"),
+        MagicMock(),
+        MagicMock(),
+        MagicMock(),
+        MagicMock(),
+    ]
+    with patch("app.core.database.db_manager", db), patch(
+        "app.services.access_log.asyncio.sleep",
+        side_effect=[None, asyncio.CancelledError],
+    ):
+        with pytest.raises(asyncio.CancelledError):
+            await maintain_access_stats(interval_seconds=1)
+
+    calls = [call.args[0] for call in db.admin_client.rpc.call_args_list]
+    assert calls.count("create_mock_access_event_partitions") == 2
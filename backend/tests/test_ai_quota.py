@@ -0,0 +1,170 @@
+"""
+Tests for AI quota admission and usage accounting
+"""
+
+import pytest
+import jwt
+from unittest.mock import AsyncMock, patch
+from uuid import UUID
+
+from app.core import database
+from app.core.plan_cache import PlanCache
+from app.main import app
+from app.schemas.ai_schemas import AIProvider, MockGenerationResponse
+from app.services.ai_service import get_ai_service
+from tests.conftest import FakeDatabaseManager, FakeSupabaseClient
+
+USER_ID = "5b0f2a4e-8d1c-4c8e-9a57-0b7c3d2e1f60"
+TOKEN = jwt.encode(
+    {"sub": USER_ID, "role": "authenticated"}, "test-secret", algorithm="HS256"
+)
+HEADERS = {"Authorization": f"Bearer {TOKEN}"}
+REQUEST = {"method": "GET", "endpoint": "/api/users"}
+
+
+def quota_row(allowed=True, reason=None, plan_assigned=True, **counters):
+    return {
+        "allowed": allowed,
+        "reason": reason,
+        "plan_name": "pro" if plan_assigned else "free",
+        "plan_assigned": plan_assigned,
+        "daily_request_quota": 1000 if plan_assigned else 10,
+        "monthly_token_quota": 100000 if plan_assigned else 10000,
+        "requests_today": counters.get("requests_today", 1),
+        "requests_this_month": counters.get("requests_this_month", 1),
+        "tokens_used_today": counters.get("tokens_used_today", 0),
+        "tokens_used_this_month": counters.get("tokens_used_this_month", 0),
+    }
+
+
+class FakeAIService:
+    def __init__(self, tokens_used=None):
+        self.tokens_used = tokens_used
+        self.calls = 0
+
+    async def generate_mock_data(self, request, user_id):
+        self.calls += 1
+        return MockGenerationResponse(
+            response_data={"id": 1},
+            explanation="generated",
+            provider=AIProvider.OPENAI,
+            model="test",
+            generation_time=0.1,
+            tokens_used=self.tokens_used,
+        )
+
+
+@pytest.fixture
+def ai_service():
+    service = FakeAIService(tokens_used=150)
+    app.dependency_overrides[get_ai_service] = lambda: service
+    yield service
+    app.dependency_overrides.pop(get_ai_service, None)
+
+
+@pytest.fixture
+def plan_cache():
+    cache = PlanCache(ttl_seconds=60, negative_ttl_seconds=60)
+    with patch("app.core.plan_cache.plan_cache", cache):
+        yield cache
+
+
+@pytest.mark.asyncio
+async def test_consume_caches_assigned_plan(plan_cache):
+    client = FakeSupabaseClient({"consume_ai_quota": [quota_row()]})
+
+    with patch.object(database, "db_manager", FakeDatabaseManager(client)):
+        result = await database.consume_ai_quota_for_user(UUID(USER_ID))
+
+    assert result["allowed"] is True
+    assert client.calls == [("consume_ai_quota", "rpc")]
+    found, plan = await plan_cache._get(UUID(USER_ID))
+    assert found and plan["plan_name"] == "pro"
+
+
+@pytest.mark.asyncio
+async def test_consume_caches_free_fallback_as_miss(plan_cache):
+    """The free plan fallback is not cached as the user's plan"""
+    client = FakeSupabaseClient({"consume_ai_quota": [quota_row(plan_assigned=False)]})
+
+    with patch.object(database, "db_manager", FakeDatabaseManager(client)):
+        await database.consume_ai_quota_for_user(UUID(USER_ID))
+
+    assert await plan_cache._get(UUID(USER_ID)) == (True, None)
+
+
+@pytest.mark.asyncio
+async def test_consume_without_result_raises(plan_cache):
+    client = FakeSupabaseClient({"consume_ai_quota": []})
+
+    with patch.object(database, "db_manager", FakeDatabaseManager(client)):
+        with pytest.raises(Exception):
+            await database.consume_ai_quota_for_user(UUID(USER_ID))
+
+
+def test_generate_admits_and_settles_tokens(client, fake_supabase, ai_service):
+    consume = AsyncMock(side_effect=[quota_row(), quota_row(tokens_used_today=150)])
+
+    with patch.object(database, "consume_ai_quota_for_user", consume):
+        response = client.post("/api/v1/ai/generate", json=REQUEST, headers=HEADERS)
+
+    assert response.status_code == 201, response.text
+    assert ai_service.calls == 1
+    admit, settle = consume.await_args_list
+    assert admit.kwargs == {"requests": 1}
+    assert settle.kwargs == {"requests": 0, "tokens": 150, "enforce": False}
+
+
+def test_generate_quota_exhausted(client, fake_supabase, ai_service):
+    consume = AsyncMock(
+        return_value=quota_row(
+            allowed=False, reason="DAILY_QUOTA_EXCEEDED", requests_today=1000
+        )
+    )
+
+    with patch.object(database, "consume_ai_quota_for_user", consume):
+        response = client.post("/api/v1/ai/generate", json=REQUEST, headers=HEADERS)
+
+    assert response.status_code == 429
+    assert response.json()["message"]["error"] == "DAILY_QUOTA_EXCEEDED"
+    assert ai_service.calls == 0
+    consume.assert_awaited_once()
+
+
+def test_generate_monthly_tokens_exhausted(client, fake_supabase, ai_service):
+    consume = AsyncMock(
+        return_value=quota_row(allowed=False, reason="MONTHLY_TOKEN_QUOTA_EXCEEDED")
+    )
+
+    with patch.object(database, "consume_ai_quota_for_user", consume):
+        response = client.post("/api/v1/ai/generate", json=REQUEST, headers=HEADERS)
+
+    assert response.status_code == 429
+    assert response.json()["message"]["error"] == "MONTHLY_TOKEN_QUOTA_EXCEEDED"
+    assert ai_service.calls == 0
+
+
+def test_generate_without_plan_is_forbidden(client, fake_supabase, ai_service):
+    """No profile plan and no free plan row: 403, as before the quota function"""
+    consume = AsyncMock(
+        return_value={
+            **quota_row(allowed=False, plan_assigned=False),
+            "reason": "NO_PLAN",
+        }
+    )
+
+    with patch.object(database, "consume_ai_quota_for_user", consume):
+        response = client.post("/api/v1/ai/generate", json=REQUEST, headers=HEADERS)
+
+    assert response.status_code == 403
+    assert ai_service.calls == 0
+
+
+def test_settle_failure_does_not_fail_generation(client, fake_supabase, ai_service):
+    consume = AsyncMock(side_effect=[quota_row(), Exception("database unavailable")])
+
+    with patch.object(database, "consume_ai_quota_for_user", consume):
+        response = client.post("/api/v1/ai/generate", json=REQUEST, headers=HEADERS)
+
+    assert response.status_code == 201
+    assert consume.await_count == 2
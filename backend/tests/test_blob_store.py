@@ -0,0 +1,132 @@
+"""
+Unit tests for content-addressed response body storage
+"""
+
+import threading
+
+import pytest
+from unittest.mock import patch
+
+from app.services import blob_store
+from app.services.blob_store import (
+    BlobCache,
+    BlobNotFoundError,
+    LocalBlobStore,
+    blob_digest,
+    encode_response_body,
+)
+
+
+@pytest.fixture
+def local_store(tmp_path):
+    """Local blob store installed as the configured store, with an empty cache"""
+    store = LocalBlobStore(str(tmp_path))
+    blob_store.blob_cache.clear()
+    with patch.object(blob_store, "get_blob_store", return_value=store):
+        yield store
+    blob_store.blob_cache.clear()
+
+
+def test_put_is_content_addressed(local_store):
+    """Identical content is stored once under its SHA-256 digest"""
+    digest = local_store.put(b'{"a":1}')
+
+    assert digest == blob_digest(b'{"a":1}')
+    assert local_store.put(b'{"a":1}') == digest
+    assert local_store.get(digest) == b'{"a":1}'
+    assert len(list(local_store.root.rglob(digest))) == 1
+
+
+def test_stream_yields_chunks(local_store):
+    """stream() returns the blob in chunks"""
+    digest = local_store.put(b"x" * 10)
+
+    assert list(local_store.stream(digest, chunk_size=4)) == [b"xxxx", b"xxxx", b"xx"]
+
+
+def test_get_missing_blob(local_store):
+    """Missing blobs raise BlobNotFoundError"""
+    with pytest.raises(BlobNotFoundError):
+        local_store.get("0" * 64)
+
+
+def test_encoding_is_canonical():
+    """Key order does not change the encoded body"""
+    assert encode_response_body({"b": 1, "a": 2}) == encode_response_body(
+        {"a": 2, "b": 1}
+    )
+
+
+@pytest.mark.asyncio
+async def test_small_response_stays_inline(local_store):
+    """Bodies under the threshold are not externalized"""
+    with patch.object(blob_store.settings, "blob_inline_threshold_bytes", 1024):
+        response, digest, size = await blob_store.externalize_response(
+            {"message": "hi"}
+        )
+
+    assert response == {"message": "hi"}
+    assert digest is None and size is None
+
+
+@pytest.mark.asyncio
+async def test_large_response_round_trip(local_store):
+    """Bodies over the threshold are replaced by a hash and can be loaded back"""
+    body = {"items": list(range(100))}
+    with patch.object(blob_store.settings, "blob_inline_threshold_bytes", 16):
+        response, digest, size = await blob_store.externalize_response(body)
+
+    assert response == {}
+    assert size == len(encode_response_body(body))
+    assert await blob_store.load_response(digest) == body
+
+
+@pytest.mark.asyncio
+async def test_upload_runs_off_the_event_loop(local_store):
+    """Blob writes happen in a worker thread"""
+    threads = []
+    put = local_store.put
+
+    def recording_put(data):
+        threads.append(threading.get_ident())
+        return put(data)
+
+    with patch.object(
+        blob_store.settings, "blob_inline_threshold_bytes", 16
+    ), patch.object(local_store, "put", recording_put):
+        await blob_store.externalize_response({"items": list(range(100))})
+
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_get_empty_blob(local_store):
+    """Empty blobs read back as empty bytes"""
+    assert local_store.get(local_store.put(b"")) == b""
+
+
+@pytest.mark.asyncio
+async def test_fetch_is_cached(local_store):
+    """Blobs are read from the store once, then served from the cache"""
+    digest = local_store.put(b'{"a":1}')
+
+    with patch.object(local_store, "get", wraps=local_store.get) as get:
+        assert await blob_store.fetch_blob(digest) == b'{"a":1}'
+        assert await blob_store.fetch_blob(digest) == b'{"a":1}'
+
+    get.assert_called_once_with(digest)
+
+
+def test_cache_is_bounded_by_size():
+    """Least recently used blobs are evicted once the byte budget is exceeded"""
+    cache = BlobCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.get("a")
+    cache.put("c", b"1234")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234" and cache.get("c") == b"1234"
+    assert cache.size == 8
+
+    cache.put("huge", b"x" * 11)
+    assert cache.get("huge") is None
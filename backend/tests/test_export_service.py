@@ -0,0 +1,290 @@
+"""
+Tests for streaming mock export
+"""
+
+import gzip
+import json
+from datetime import datetime
+from unittest.mock import Mock, patch
+from uuid import UUID, uuid4
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.models.models import Mock as MockModel
+from app.schemas.schemas import ExportFormat
+from app.services import export_service
+from app.services.blob_store import LocalBlobStore, blob_cache, encode_response_body
+from app.services.export_service import (
+    ExportAborted,
+    get_export_writer,
+    prefetch_first_page,
+    stream_export,
+)
+from app.services.mock_service import MockService
+
+USER_ID = UUID("123e4567-e89b-12d3-a456-426614174000")
+
+
+def make_mock(endpoint: str, method: str = "GET", **overrides) -> MockModel:
+    fields = {
+        "id": uuid4(),
+        "user_id": USER_ID,
+        "name": f"{method} {endpoint}",
+        "endpoint": endpoint,
+        "method": method,
+        "response": {"ok": True, "endpoint": endpoint},
+        "headers": {"Content-Type": "application/json", "X-Mock": "1"},
+        "status_code": 200,
+        "tags": ["users"],
+        "created_at": datetime(2024, 1, 1),
+        **overrides,
+    }
+    return MockModel(**fields)
+
+
+async def pages_of(*pages):
+    for page in pages:
+        yield page
+
+
+async def export(export_format, pages, compress=False, **options) -> bytes:
+    writer = get_export_writer(export_format, **options)
+    chunks = [
+        chunk async for chunk in stream_export(pages_of(*pages), writer, compress)
+    ]
+    data = b"".join(chunks)
+    return gzip.decompress(data) if compress else data
+
+
+MOCKS = [
+    make_mock("/orders"),
+    make_mock("/users", "GET"),
+    make_mock("/users", "POST", status_code=201, response={"created": True}),
+    make_mock("/users/{id}", "DELETE", status_code=204, response={}),
+]
+
+
+class TestExportFormats:
+    """Each writer produces one valid document across page boundaries"""
+
+    @pytest.mark.asyncio
+    async def test_json(self):
+        document = json.loads(await export(ExportFormat.JSON, [MOCKS[:2], MOCKS[2:]]))
+
+        assert document["exported_count"] == 4
+        assert [mock["endpoint"] for mock in document["mocks"]] == [
+            "/orders",
+            "/users",
+            "/users",
+            "/users/{id}",
+        ]
+        assert document["mocks"][2]["response"] == {"created": True}
+        assert "access_count" not in document["mocks"][0]
+
+    @pytest.mark.asyncio
+    async def test_json_stats_and_no_headers(self):
+        document = json.loads(
+            await export(
+                ExportFormat.JSON, [MOCKS], include_headers=False, include_stats=True
+            )
+        )
+
+        assert "headers" not in document["mocks"][0]
+        assert document["mocks"][0]["access_count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_postman(self):
+        document = json.loads(await export(ExportFormat.POSTMAN, [MOCKS]))
+
+        assert document["info"]["schema"] == export_service.POSTMAN_SCHEMA
+        assert len(document["item"]) == 4
+        example = document["item"][2]["response"][0]
+        assert example["code"] == 201
+        assert json.loads(example["body"]) == {"created": True}
+        assert document["item"][3]["request"]["url"]["path"] == ["users", "{id}"]
+
+    @pytest.mark.asyncio
+    async def test_openapi_groups_operations_by_path(self):
+        document = json.loads(
+            await export(ExportFormat.OPENAPI, [MOCKS[:2], MOCKS[2:]])
+        )
+
+        assert document["openapi"] == "3.0.3"
+        assert list(document["paths"]) == ["/orders", "/users", "/users/{id}"]
+        assert set(document["paths"]["/users"]) == {"get", "post"}
+        created = document["paths"]["/users"]["post"]["responses"]["201"]
+        assert created["content"]["application/json"]["example"] == {"created": True}
+        assert created["headers"]["X-Mock"]["example"] == "1"
+        assert (
+            document["paths"]["/users/{id}"]["delete"]["parameters"][0]["name"] == "id"
+        )
+
+    @pytest.mark.asyncio
+    async def test_insomnia(self):
+        document = json.loads(await export(ExportFormat.INSOMNIA, [MOCKS]))
+
+        routes = [r for r in document["resources"] if r["_type"] == "mock_route"]
+        assert document["__export_format"] == 4
+        assert len(routes) == 4
+        assert routes[0]["parentId"] == "mock_mockbox"
+        assert json.loads(routes[2]["body"]) == {"created": True}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("export_format", list(ExportFormat))
+    async def test_empty_export_is_valid(self, export_format):
+        assert isinstance(json.loads(await export(export_format, [])), dict)
+
+    @pytest.mark.asyncio
+    async def test_gzip(self):
+        document = json.loads(await export(ExportFormat.JSON, [MOCKS], compress=True))
+        assert document["exported_count"] == 4
+
+
+class TestStreaming:
+    """Memory stays bounded by the flush size, not the export size"""
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_flushed_incrementally(self):
+        big = [
+            make_mock(f"/items/{i}", response={"data": "x" * 2000}) for i in range(200)
+        ]
+        writer = get_export_writer(ExportFormat.JSON)
+
+        chunks = [
+            chunk
+            async for chunk in stream_export(pages_of(big[:100], big[100:]), writer)
+        ]
+
+        assert len(chunks) > 1
+        assert (
+            max(len(chunk) for chunk in chunks)
+            < export_service.EXPORT_FLUSH_BYTES + 4096
+        )
+        assert json.loads(b"".join(chunks))["exported_count"] == 200
+
+    @pytest.mark.asyncio
+    async def test_blob_backed_body_is_spliced(self, tmp_path):
+        store = LocalBlobStore(tmp_path)
+        body = {"large": list(range(10))}
+        digest = store.put(encode_response_body(body))
+        mock = make_mock(
+            "/large", response={}, response_blob_hash=digest, response_size=10
+        )
+
+        blob_cache.clear()
+        with patch("app.services.blob_store.get_blob_store", return_value=store):
+            document = json.loads(await export(ExportFormat.JSON, [[mock]]))
+
+        assert document["mocks"][0]["response"] == body
+
+    @pytest.mark.asyncio
+    async def test_failure_mid_stream_aborts_without_footer(self):
+        async def failing_pages():
+            yield MOCKS
+            raise RuntimeError("database unavailable")
+
+        writer = get_export_writer(ExportFormat.JSON)
+        chunks = []
+        with pytest.raises(ExportAborted):
+            async for chunk in stream_export(failing_pages(), writer):
+                chunks.append(chunk)
+
+        assert b"exported_count" not in b"".join(chunks)
+
+
+class TestPrefetchFirstPage:
+    """The first page is read before the response starts"""
+
+    @pytest.mark.asyncio
+    async def test_pages_are_preserved(self):
+        fetched = []
+
+        async def pages():
+            for page in ([MOCKS[0]], [MOCKS[1]]):
+                fetched.append(page)
+                yield page
+
+        all_pages = await prefetch_first_page(pages())
+
+        assert len(fetched) == 1
+        assert [page async for page in all_pages] == [[MOCKS[0]], [MOCKS[1]]]
+
+    @pytest.mark.asyncio
+    async def test_empty_and_failing_first_page(self):
+        assert [page async for page in await prefetch_first_page(pages_of())] == []
+
+        async def failing():
+            raise RuntimeError("database unavailable")
+            yield
+
+        with pytest.raises(RuntimeError):
+            await prefetch_first_page(failing())
+
+
+class TestIterMocks:
+    """Keyset paging through a user's mocks"""
+
+    @pytest.mark.asyncio
+    async def test_keyset_pages(self):
+        rows = [
+            make_mock(endpoint, method).model_dump(mode="json")
+            for endpoint, method in [("/a", "GET"), ("/a", "POST"), ('/b"c', "GET")]
+        ]
+        db = Mock()
+        db.get_read_client = Mock(return_value=None)
+        service = MockService(db)
+        query = service.client.table.return_value.select.return_value.eq.return_value
+        query.or_.return_value = query
+        query.order.return_value = query
+        query.limit.return_value = query
+        query.execute.side_effect = [Mock(data=rows[:2]), Mock(data=rows[2:])]
+
+        pages = [page async for page in service.iter_mocks(USER_ID, page_size=2)]
+
+        assert [len(page) for page in pages] == [2, 1]
+        query.or_.assert_called_once_with(
+            'endpoint.gt."/a",and(endpoint.eq."/a",method.gt."POST")'
+        )
+        assert query.execute.call_count == 2
+
+
+def test_export_endpoint_streams_gzip(client, fake_supabase):
+    """POST /mocks/export returns a gzip attachment"""
+    token = jwt.encode(
+        {"sub": str(USER_ID), "role": "authenticated"}, "test-secret", algorithm="HS256"
+    )
+    fake_supabase.rows["mocks"] = [MOCKS[0].model_dump(mode="json")]
+
+    response = client.post(
+        "/api/v1/mocks/export",
+        json={"format": "openapi", "gzip": True},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/gzip"
+    assert "mockbox-export.openapi.json.gz" in response.headers["content-disposition"]
+    assert list(json.loads(gzip.decompress(response.content))["paths"]) == ["/orders"]
+
+
+def test_export_endpoint_read_failure_is_an_error(client, fake_supabase):
+    """Failing to read the first page answers 500 instead of a truncated file"""
+    token = jwt.encode(
+        {"sub": str(USER_ID), "role": "authenticated"}, "test-secret", algorithm="HS256"
+    )
+
+    async def failing_pages(*args, **kwargs):
+        raise HTTPException(status_code=500, detail="Error reading mocks: unavailable")
+        yield
+
+    with patch.object(MockService, "iter_mocks", failing_pages):
+        response = client.post(
+            "/api/v1/mocks/export",
+            json={"format": "json"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    assert response.status_code == 500
+    assert "attachment" not in response.headers.get("content-disposition", "")
@@ -0,0 +1,118 @@
+"""
+Unit tests for background dependency health probing
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services.health_monitor import HealthMonitor
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached_between_probes():
+    """Status is served from the last result without calling the check again"""
+    monitor = HealthMonitor(history_size=5)
+    check = AsyncMock(return_value=True)
+    monitor.register("supabase", check, interval_seconds=60)
+
+    await monitor.ensure_checked()
+    await monitor.ensure_checked()
+
+    assert check.await_count == 1
+    assert monitor.is_ready()
+    assert monitor.status()["supabase"]["latest"]["healthy"] is True
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_the_initial_check():
+    """Requests arriving before the first result do not each probe"""
+    release = asyncio.Event()
+    calls = 0
+
+    async def check():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return True
+
+    monitor = HealthMonitor()
+    monitor.register("openai", check)
+    waiters = [asyncio.create_task(monitor.ensure_checked()) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*waiters)
+
+    assert calls == 1
+    assert monitor.is_healthy("openai")
+
+
+@pytest.mark.asyncio
+async def test_failures_and_timeouts_are_recorded():
+    """Exceptions and timeouts count as unhealthy with an error message"""
+
+    async def slow():
+        await asyncio.sleep(1)
+        return True
+
+    monitor = HealthMonitor(timeout_seconds=0.01)
+    monitor.register("supabase", AsyncMock(side_effect=RuntimeError("down")))
+    monitor.register("redis", slow, required=False)
+
+    await monitor.probe_all()
+
+    status = monitor.status()
+    assert status["supabase"]["latest"]["error"] == "down"
+    assert "timed out" in status["redis"]["latest"]["error"]
+    assert not monitor.is_ready()
+
+
+@pytest.mark.asyncio
+async def test_summary_leaves_out_errors_and_history():
+    """The public summary has health and latency, not exception text"""
+    monitor = HealthMonitor()
+    monitor.register("supabase", AsyncMock(side_effect=RuntimeError("password=secret")))
+
+    await monitor.probe_all()
+
+    summary = monitor.summary()["supabase"]
+    assert set(summary) == {"healthy", "stale", "age_seconds", "latency_ms"}
+    assert summary["healthy"] is False
+    assert "secret" not in str(monitor.summary())
+
+
+@pytest.mark.asyncio
+async def test_optional_dependency_does_not_gate_readiness():
+    """Only required dependencies decide readiness"""
+    monitor = HealthMonitor()
+    monitor.register("supabase", AsyncMock(return_value=True))
+    monitor.register("openai", AsyncMock(return_value=False), required=False)
+
+    await monitor.probe_all()
+
+    assert monitor.is_ready()
+
+
+@pytest.mark.asyncio
+async def test_stale_result_is_not_ready():
+    """A result older than three intervals is reported stale"""
+    monitor = HealthMonitor()
+    monitor.register("supabase", AsyncMock(return_value=True), interval_seconds=1)
+
+    await monitor.probe_all()
+    monitor.probes["supabase"].history[-1].checked_at -= 10
+
+    assert monitor.status()["supabase"]["stale"] is True
+    assert not monitor.is_ready()
+
+
+@pytest.mark.asyncio
+async def test_history_is_bounded():
+    """Only the most recent results are kept"""
+    monitor = HealthMonitor(history_size=3)
+    monitor.register("supabase", AsyncMock(return_value=True))
+
+    for _ in range(5):
+        await monitor.run_probe("supabase")
+
+    assert len(monitor.status()["supabase"]["history"]) == 3
@@ -0,0 +1,387 @@
+"""
+Tests for streaming mock import
+"""
+
+import base64
+import io
+import json
+import threading
+from datetime import datetime
+from unittest.mock import AsyncMock
+from uuid import UUID, uuid4
+
+import jwt
+import pytest
+
+from app.models.models import Mock as MockModel
+from app.schemas.schemas import (
+    BulkConflictStrategy,
+    BulkItemResult,
+    BulkItemStatus,
+    ExportFormat,
+    ImportFormat,
+    MockCreate,
+)
+from app.services.export_service import get_export_writer, stream_export
+from app.services.import_service import ImportFormatError, import_mocks, parse_import
+
+USER_ID = UUID("123e4567-e89b-12d3-a456-426614174000")
+
+OPENAPI_SPEC = {
+    "openapi": "3.0.3",
+    "info": {"title": "Users", "version": "1"},
+    "paths": {
+        "/users": {
+            "get": {
+                "summary": "List users",
+                "tags": ["Users"],
+                "responses": {
+                    "200": {
+                        "description": "OK",
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "array",
+                                    "items": {"$ref": "#/components/schemas/User"},
+                                }
+                            }
+                        },
+                    }
+                },
+            },
+            "post": {
+                "operationId": "createUser",
+                "responses": {
+                    "201": {
+                        "description": "Created",
+                        "headers": {
+                            "Location": {
+                                "schema": {"type": "string"},
+                                "example": "/users/1",
+                            }
+                        },
+                        "content": {"application/json": {"example": {"id": 1}}},
+                    }
+                },
+            },
+            "trace": {"responses": {"200": {"description": "OK"}}},
+        },
+        "/users/{id}": {
+            "delete": {"responses": {"204": {"description": "Deleted"}}},
+        },
+    },
+    # Components after paths: resolved in a separate pass
+    "components": {
+        "schemas": {
+            "User": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "email": {"type": "string", "format": "email"},
+                    "active": {"type": "boolean", "default": False},
+                },
+            }
+        }
+    },
+}
+
+POSTMAN_COLLECTION = {
+    "info": {
+        "_postman_id": "abc",
+        "name": "Shop",
+        "schema": "https://schema.getpostman.com/json/collection/v2.1.0/collection.json",
+    },
+    "item": [
+        {
+            "name": "Orders",
+            "item": [
+                {
+                    "name": "Get order",
+                    "request": {
+                        "method": "GET",
+                        "url": {"raw": "{{baseUrl}}/orders/1", "path": ["orders", "1"]},
+                    },
+                    "response": [
+                        {
+                            "code": 200,
+                            "header": [{"key": "X-Total", "value": "1"}],
+                            "body": '{"id": 1}',
+                        }
+                    ],
+                }
+            ],
+        },
+        {
+            "name": "Health",
+            "request": {"method": "GET", "url": "{{baseUrl}}/health?full=1"},
+        },
+    ],
+}
+
+HAR_CAPTURE = {
+    "log": {
+        "version": "1.2",
+        "entries": [
+            {
+                "request": {
+                    "method": "GET",
+                    "url": "https://api.example.com/items?page=2",
+                },
+                "response": {
+                    "status": 200,
+                    "headers": [
+                        {"name": "Content-Type", "value": "application/json"},
+                        {"name": "Set-Cookie", "value": "session=1"},
+                    ],
+                    "content": {"text": '[{"id": 1}]', "mimeType": "application/json"},
+                },
+            },
+            {
+                "request": {"method": "GET", "url": "https://api.example.com/items"},
+                "response": {"status": 200, "content": {"text": "{}"}},
+            },
+            {
+                "request": {"method": "POST", "url": "https://api.example.com/items"},
+                "response": {
+                    "status": 201,
+                    "content": {
+                        "text": base64.b64encode(b'{"created": true}').decode(),
+                        "encoding": "base64",
+                    },
+                },
+            },
+        ],
+    }
+}
+
+
+def as_file(document) -> io.BytesIO:
+    return io.BytesIO(json.dumps(document).encode())
+
+
+def parsed(document, import_format=None):
+    detected, items = parse_import(as_file(document), import_format)
+    return detected, list(items)
+
+
+class TestParsers:
+    """Each format is converted into mocks or per-entry errors"""
+
+    def test_openapi(self):
+        detected, items = parsed(OPENAPI_SPEC)
+
+        assert detected == ImportFormat.OPENAPI
+        mocks = [item for item in items if isinstance(item, MockCreate)]
+        errors = [item for item in items if not isinstance(item, MockCreate)]
+
+        listing, created, deleted = mocks
+        assert listing.name == "List users"
+        assert listing.tags == ["users"]
+        assert listing.response == {
+            "data": [{"id": 0, "email": "user@example.com", "active": False}]
+        }
+        assert created.name == "createUser"
+        assert created.status_code == 201
+        assert created.response == {"id": 1}
+        assert created.headers == {
+            "Location": "/users/1",
+            "Content-Type": "application/json",
+        }
+        assert deleted.endpoint == "/users/{id}"
+        assert deleted.status_code == 204
+        assert "TRACE" in errors[0][1]
+
+    def test_openapi_yaml(self):
+        spec = (
+            "openapi: 3.0.0\n"
+            "info: {title: T, version: '1'}\n"
+            "paths:\n"
+            "  /ping:\n"
+            "    get:\n"
+            "      responses:\n"
+            "        '200':\n"
+            "          description: OK\n"
+            "          content:\n"
+            "            application/json:\n"
+            "              example: {pong: true}\n"
+        )
+        detected, items = parse_import(io.BytesIO(spec.encode()))
+
+        assert detected == ImportFormat.OPENAPI
+        assert [item.response for item in items] == [{"pong": True}]
+
+    def test_postman(self):
+        detected, items = parsed(POSTMAN_COLLECTION)
+
+        assert detected == ImportFormat.POSTMAN
+        order, health = items
+        assert order.endpoint == "/orders/1"
+        assert order.tags == ["orders"]
+        assert order.response == {"id": 1}
+        assert order.headers == {"X-Total": "1"}
+        assert health.endpoint == "/health"
+        assert health.response == {}
+
+    def test_har(self):
+        detected, items = parsed(HAR_CAPTURE)
+
+        assert detected == ImportFormat.HAR
+        listing, _, created = items
+        assert listing.endpoint == "/items"
+        assert listing.response == {"data": [{"id": 1}]}
+        assert listing.headers == {"Content-Type": "application/json"}
+        assert created.status_code == 201
+        assert created.response == {"created": True}
+
+    @pytest.mark.asyncio
+    async def test_mockbox_export_round_trips(self):
+        exported = [
+            MockModel(
+                id=uuid4(),
+                user_id=USER_ID,
+                name="Create user",
+                description="Slow create",
+                endpoint="/users",
+                method="POST",
+                response={"data": [{"id": 1}]},
+                headers={"Location": "/users/1"},
+                status_code=201,
+                delay_ms=250,
+                is_public=True,
+                tags=["users"],
+                created_at=datetime(2024, 1, 1),
+            )
+        ]
+
+        async def pages():
+            yield exported
+
+        writer = get_export_writer(ExportFormat.JSON)
+        data = b"".join([chunk async for chunk in stream_export(pages(), writer)])
+        detected, items = parse_import(io.BytesIO(data))
+
+        assert detected == ImportFormat.JSON
+        fields = set(MockCreate.model_fields)
+        assert [item.model_dump() for item in items] == [
+            exported[0].model_dump(include=fields)
+        ]
+
+    def test_unknown_format(self):
+        with pytest.raises(ImportFormatError):
+            parse_import(as_file({"hello": "world"}))
+
+    def test_invalid_json(self):
+        _, items = parse_import(io.BytesIO(b'{"openapi": "3.0.0", "paths": {'))
+        with pytest.raises(ImportFormatError):
+            list(items)
+
+
+def bulk_result(index, mock, status=BulkItemStatus.CREATED):
+    return BulkItemResult(
+        index=index,
+        status=status,
+        id=uuid4(),
+        endpoint=mock.endpoint,
+        method=mock.method,
+    )
+
+
+class TestImportMocks:
+    """Chunked writes with per-entry results"""
+
+    @pytest.mark.asyncio
+    async def test_chunks_and_reports_by_file_position(self):
+        service = AsyncMock()
+        service.bulk_create_mocks.side_effect = lambda user_id, mocks, on_conflict: [
+            bulk_result(index, mock) for index, mock in enumerate(mocks)
+        ]
+        _, items = parse_import(as_file(HAR_CAPTURE))
+
+        results = await import_mocks(service, USER_ID, items, chunk_size=1)
+
+        assert service.bulk_create_mocks.await_count == 2
+        assert [(r.index, r.status) for r in results] == [
+            (0, BulkItemStatus.CREATED),
+            (1, BulkItemStatus.SKIPPED),
+            (2, BulkItemStatus.CREATED),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_parsing_runs_off_the_event_loop(self):
+        service = AsyncMock()
+        service.bulk_create_mocks.side_effect = lambda user_id, mocks, on_conflict: [
+            bulk_result(index, mock) for index, mock in enumerate(mocks)
+        ]
+        _, parsed_items = parse_import(as_file(HAR_CAPTURE))
+        parsed_in = []
+
+        def items():
+            for item in parsed_items:
+                parsed_in.append(threading.get_ident())
+                yield item
+
+        await import_mocks(service, USER_ID, items())
+
+        assert parsed_in and threading.get_ident() not in parsed_in
+
+    @pytest.mark.asyncio
+    async def test_conversion_errors_are_reported(self):
+        service = AsyncMock()
+        service.bulk_create_mocks.side_effect = lambda user_id, mocks, on_conflict: [
+            bulk_result(index, mock) for index, mock in enumerate(mocks)
+        ]
+        _, items = parse_import(as_file(OPENAPI_SPEC))
+
+        results = await import_mocks(service, USER_ID, items)
+
+        assert [r.status for r in results].count(BulkItemStatus.FAILED) == 1
+        assert service.bulk_create_mocks.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_fail_strategy_stops_after_conflicting_chunk(self):
+        service = AsyncMock()
+        service.bulk_create_mocks.side_effect = lambda user_id, mocks, on_conflict: [
+            bulk_result(index, mock, BulkItemStatus.CONFLICT)
+            for index, mock in enumerate(mocks)
+        ]
+        _, items = parse_import(as_file(HAR_CAPTURE))
+
+        results = await import_mocks(
+            service, USER_ID, items, BulkConflictStrategy.FAIL, chunk_size=1
+        )
+
+        assert service.bulk_create_mocks.await_count == 1
+        assert [r.index for r in results] == [0]
+
+
+def test_import_endpoint(client, fake_supabase):
+    """POST /mocks/import detects the format and reports each entry"""
+    token = jwt.encode(
+        {"sub": str(USER_ID), "role": "authenticated"}, "test-secret", algorithm="HS256"
+    )
+
+    response = client.post(
+        "/api/v1/mocks/import",
+        files={"file": ("capture.har", json.dumps(HAR_CAPTURE), "application/json")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["format"] == "har"
+    assert len(body["results"]) == 3
+    assert any(op in ("insert", "upsert") for _, op in fake_supabase.calls)
+
+
+def test_import_endpoint_rejects_unknown_files(client, fake_supabase):
+    token = jwt.encode(
+        {"sub": str(USER_ID), "role": "authenticated"}, "test-secret", algorithm="HS256"
+    )
+
+    response = client.post(
+        "/api/v1/mocks/import",
+        files={"file": ("notes.json", "{}", "application/json")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 400
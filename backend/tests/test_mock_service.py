@@ -2,6 +2,7 @@
 Unit tests for MockService
 """
 
+import asyncio
 import pytest
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from uuid import UUID, uuid4
@@ -10,7 +11,14 @@ from fastapi import HTTPException, status
 
 from app.services.mock_service import MockService
 from app.models.models import Mock as MockModel, HTTPMethod, MockStatus
-from app.schemas.schemas import MockCreate, MockUpdate, PaginationParams
+from app.schemas.schemas import (
+    MockCreate,
+    MockUpdate,
+    MockBulkUpdateItem,
+    PaginationParams,
+    BulkConflictStrategy,
+    BulkItemStatus,
+)
 
 
 # Global fixtures
@@ -20,6 +28,8 @@ def mock_db():
     db = Mock()
     db.supabase.client = Mock()
     db.get_client_with_auth = Mock(return_value=Mock())
+    # No read replicas: reads use the primary client
+    db.get_read_client = Mock(return_value=None)
     return db
 
 
@@ -123,10 +133,6 @@ class TestCreateMock:
         self, mock_service, sample_user_id, sample_mock_create, sample_mock_data
     ):
         """Test successful mock creation"""
-        # Mock dependencies
-        mock_service._get_mock_by_endpoint = AsyncMock(return_value=None)
-        mock_service._create_mock_stats = AsyncMock()
-
         # Mock database response
         mock_result = Mock()
         mock_result.data = [sample_mock_data]
@@ -142,18 +148,20 @@ class TestCreateMock:
         assert result.name == sample_mock_create.name
         assert result.endpoint == sample_mock_create.endpoint
 
-        # Verify database call
-        mock_service.client.table.assert_called_with("mocks")
-        mock_service._create_mock_stats.assert_called_once()
+        # Verify single round trip (stats row is created by a DB trigger)
+        mock_service.client.table.assert_called_once_with("mocks")
+        mock_service.client.table.return_value.select.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_create_mock_duplicate_endpoint(
         self, mock_service, sample_user_id, sample_mock_create, sample_mock_data
     ):
         """Test creating mock with duplicate endpoint"""
-        # Mock existing mock
-        existing_mock = MockModel(**sample_mock_data)
-        mock_service._get_mock_by_endpoint = AsyncMock(return_value=existing_mock)
+        # Mock unique constraint violation from the insert
+        mock_service.client.table.return_value.insert.return_value.execute.side_effect = Exception(
+            "{'code': '23505', 'message': 'duplicate key value violates unique constraint "
+            '"mocks_user_id_endpoint_method_key"\'}'
+        )
 
         # Execute and assert
         with pytest.raises(HTTPException) as exc_info:
@@ -167,9 +175,6 @@ class TestCreateMock:
         self, mock_service, sample_user_id, sample_mock_create
     ):
         """Test create mock with foreign key constraint error"""
-        # Mock dependencies
-        mock_service._get_mock_by_endpoint = AsyncMock(return_value=None)
-
         # Mock database error
         mock_service.client.table.return_value.insert.return_value.execute.side_effect = Exception(
             "mocks_user_id_fkey violates foreign key constraint"
@@ -187,9 +192,6 @@ class TestCreateMock:
         self, mock_service, sample_user_id, sample_mock_create
     ):
         """Test create mock with general database error"""
-        # Mock dependencies
-        mock_service._get_mock_by_endpoint = AsyncMock(return_value=None)
-
         # Mock database error
         mock_service.client.table.return_value.insert.return_value.execute.side_effect = Exception(
             "Database error"
@@ -207,9 +209,6 @@ class TestCreateMock:
         self, mock_service, sample_user_id, sample_mock_create
     ):
         """Test create mock when no data is returned"""
-        # Mock dependencies
-        mock_service._get_mock_by_endpoint = AsyncMock(return_value=None)
-
         # Mock database response with no data
         mock_result = Mock()
         mock_result.data = []
@@ -236,7 +235,7 @@ class TestGetMock:
         # Mock database response
         mock_result = Mock()
         mock_result.data = [sample_mock_data]
-        mock_service.client.table.return_value.select.return_value.eq.return_value.or_.return_value.execute.return_value = (
+        mock_service.client.table.return_value.select.return_value.in_.return_value.or_.return_value.execute.return_value = (
             mock_result
         )
 
@@ -259,7 +258,7 @@ class TestGetMock:
         # Mock database response
         mock_result = Mock()
         mock_result.data = [sample_mock_data]
-        mock_service.client.table.return_value.select.return_value.eq.return_value.eq.return_value.execute.return_value = (
+        mock_service.client.table.return_value.select.return_value.in_.return_value.eq.return_value.execute.return_value = (
             mock_result
         )
 
@@ -276,7 +275,7 @@ class TestGetMock:
         # Mock database response with no data
         mock_result = Mock()
         mock_result.data = []
-        mock_service.client.table.return_value.select.return_value.eq.return_value.eq.return_value.execute.return_value = (
+        mock_service.client.table.return_value.select.return_value.in_.return_value.eq.return_value.execute.return_value = (
             mock_result
         )
 
@@ -301,6 +300,61 @@ class TestGetMock:
         assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
         assert "Error fetching mock" in exc_info.value.detail
 
+    @pytest.mark.asyncio
+    async def test_get_mock_batches_and_memoizes(
+        self, mock_service, sample_mock_id, sample_user_id, sample_mock_data
+    ):
+        """Test concurrent and repeated lookups share one in_ query"""
+        other_id = uuid4()
+        mock_result = Mock()
+        mock_result.data = [sample_mock_data, {**sample_mock_data, "id": str(other_id)}]
+        query = mock_service.client.table.return_value.select.return_value
+        query.in_.return_value.or_.return_value.execute.return_value = mock_result
+
+        first, second, missing = await asyncio.gather(
+            mock_service.get_mock(sample_mock_id, sample_user_id),
+            mock_service.get_mock(other_id, sample_user_id),
+            mock_service.get_mock(uuid4(), sample_user_id),
+        )
+        again = await mock_service.get_mock(sample_mock_id, sample_user_id)
+
+        assert first.id == sample_mock_id
+        assert second.id == other_id
+        assert missing is None
+        assert again == first and again is not first
+        query.in_.assert_called_once()
+        assert len(query.in_.call_args[0][1]) == 3
+
+    @pytest.mark.asyncio
+    async def test_get_mock_body_loads_do_not_leak(
+        self, mock_service, sample_mock_id, sample_user_id, sample_mock_data
+    ):
+        """Test a loaded blob body does not show up in later unloaded reads"""
+        mock_result = Mock()
+        mock_result.data = [
+            {
+                **sample_mock_data,
+                "response": {},
+                "response_blob_hash": "a" * 64,
+                "response_size": 9,
+            }
+        ]
+        query = mock_service.client.table.return_value.select.return_value
+        query.in_.return_value.or_.return_value.execute.return_value = mock_result
+
+        with patch(
+            "app.services.mock_service.load_response",
+            AsyncMock(return_value={"ok": True}),
+        ):
+            loaded = await mock_service.get_mock(sample_mock_id, sample_user_id)
+            unloaded = await mock_service.get_mock(
+                sample_mock_id, sample_user_id, load_body=False
+            )
+
+        assert loaded.response == {"ok": True}
+        assert unloaded.response == {}
+        query.in_.assert_called_once()
+
 
 class TestListMocks:
     """Test list_mocks method"""
@@ -348,33 +402,18 @@ class TestListMocks:
     async def test_list_mocks_with_filters(
         self, mock_service, sample_user_id, sample_mock_data
     ):
-        """Test mock listing with filters"""
+        """Test mock listing with filters goes through ranked search"""
         pagination = PaginationParams(page=1, limit=10)
 
-        # Mock database response
-        mock_result = Mock()
-        mock_result.data = [sample_mock_data]
-        mock_result.count = 1
+        # Mock RPC response (search rows carry rank, highlight and total)
+        search_row = sample_mock_data.copy()
+        search_row["search_rank"] = 0.5
+        search_row["search_highlight"] = "<mark>Test</mark> Mock"
+        search_row["total_count"] = 1
 
-        # Setup complex method chain mock
-        table_mock = Mock()
-        select_mock = Mock()
-        eq_mock = Mock()
-        eq2_mock = Mock()
-        or_mock = Mock()
-        contains_mock = Mock()
-        order_mock = Mock()
-        range_mock = Mock()
-
-        mock_service.client.table.return_value = table_mock
-        table_mock.select.return_value = select_mock
-        select_mock.eq.return_value = eq_mock
-        eq_mock.eq.return_value = eq2_mock
-        eq2_mock.or_.return_value = or_mock
-        or_mock.contains.return_value = contains_mock
-        contains_mock.order.return_value = order_mock
-        order_mock.range.return_value = range_mock
-        range_mock.execute.return_value = mock_result
+        mock_result = Mock()
+        mock_result.data = [search_row]
+        mock_service.client.rpc.return_value.execute.return_value = mock_result
 
         # Execute with filters
         mocks, total = await mock_service.list_mocks(
@@ -388,6 +427,18 @@ class TestListMocks:
         # Assertions
         assert len(mocks) == 1
         assert total == 1
+        assert mocks[0].search_highlight == "<mark>Test</mark> Mock"
+
+        # Verify RPC call
+        mock_service.client.table.assert_not_called()
+        name, params = mock_service.client.rpc.call_args[0]
+        assert name == "search_mocks"
+        assert params["p_search"] == "test"
+        assert params["p_user_id"] == str(sample_user_id)
+        assert params["p_status"] == "active"
+        assert params["p_tags"] == ["api"]
+        assert params["p_limit"] == 10
+        assert params["p_offset"] == 0
 
     @pytest.mark.asyncio
     async def test_list_mocks_database_error(self, mock_service, sample_user_id):
@@ -405,6 +456,97 @@ class TestListMocks:
         assert "Error listing mocks" in exc_info.value.detail
 
 
+class TestListMockChanges:
+    """Test list_mock_changes method"""
+
+    @pytest.mark.asyncio
+    async def test_changes_split_upserts_and_deletes(
+        self, mock_service, sample_user_id, sample_mock_data
+    ):
+        """Changed mocks and tombstones come back from one RPC in cursor order"""
+        deleted_id = uuid4()
+        mock_result = Mock()
+        mock_result.data = [
+            {
+                "change_seq": 11,
+                "mock_id": str(sample_mock_data["id"]),
+                "deleted": False,
+                "mock": sample_mock_data,
+                "resync_required": False,
+            },
+            {
+                "change_seq": 12,
+                "mock_id": str(deleted_id),
+                "deleted": True,
+                "mock": None,
+                "resync_required": False,
+            },
+        ]
+        mock_service.client.rpc.return_value.execute.return_value = mock_result
+
+        changed, deleted, cursor, has_more = await mock_service.list_mock_changes(
+            sample_user_id, since=10, limit=5
+        )
+
+        assert [str(mock.id) for mock in changed] == [sample_mock_data["id"]]
+        assert deleted == [deleted_id]
+        assert cursor == 12
+        assert has_more is False
+        mock_service.client.rpc.assert_called_once_with(
+            "mock_changes",
+            {"p_user_id": str(sample_user_id), "p_since": 10, "p_limit": 6},
+        )
+
+    @pytest.mark.asyncio
+    async def test_changes_page_and_empty_cursor(self, mock_service, sample_user_id):
+        """An extra row means another page; no changes keeps the cursor"""
+        rows = [
+            {
+                "change_seq": seq,
+                "mock_id": str(uuid4()),
+                "deleted": True,
+                "mock": None,
+                "resync_required": False,
+            }
+            for seq in (3, 4, 5)
+        ]
+        mock_service.client.rpc.return_value.execute.return_value = Mock(data=rows)
+
+        _, deleted, cursor, has_more = await mock_service.list_mock_changes(
+            sample_user_id, since=2, limit=2
+        )
+        assert len(deleted) == 2
+        assert cursor == 4
+        assert has_more is True
+
+        mock_service.client.rpc.return_value.execute.return_value = Mock(data=[])
+        _, _, cursor, has_more = await mock_service.list_mock_changes(
+            sample_user_id, since=4
+        )
+        assert cursor == 4
+        assert has_more is False
+
+    @pytest.mark.asyncio
+    async def test_expired_cursor_requires_resync(self, mock_service, sample_user_id):
+        """Cursors older than purged tombstones get 410 Gone"""
+        mock_service.client.rpc.return_value.execute.return_value = Mock(
+            data=[
+                {
+                    "change_seq": None,
+                    "mock_id": None,
+                    "deleted": None,
+                    "mock": None,
+                    "resync_required": True,
+                }
+            ]
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            await mock_service.list_mock_changes(sample_user_id, since=1)
+
+        assert exc_info.value.status_code == status.HTTP_410_GONE
+
+
 class TestUpdateMock:
     """Test update_mock method"""
 
@@ -413,10 +555,6 @@ class TestUpdateMock:
         self, mock_service, sample_mock_id, sample_user_id, sample_mock_data
     ):
         """Test successful mock update"""
-        # Mock existing mock
-        existing_mock = MockModel(**sample_mock_data)
-        mock_service.get_mock = AsyncMock(return_value=existing_mock)
-
         # Mock update data
         update_data = MockUpdate(name="Updated Mock", status_code=201)
 
@@ -427,9 +565,8 @@ class TestUpdateMock:
 
         mock_result = Mock()
         mock_result.data = [updated_data]
-        mock_service.client.table.return_value.update.return_value.eq.return_value.execute.return_value = (
-            mock_result
-        )
+        update_query = mock_service.client.table.return_value.update.return_value
+        update_query.eq.return_value.eq.return_value.execute.return_value = mock_result
 
         # Execute
         result = await mock_service.update_mock(
@@ -441,16 +578,23 @@ class TestUpdateMock:
         assert result.name == "Updated Mock"
         assert result.status_code == 201
 
-        # Verify database call
-        mock_service.client.table.assert_called_with("mocks")
+        # Verify a single statement filtered on id and owner
+        mock_service.client.table.assert_called_once_with("mocks")
+        update_query.eq.assert_called_once_with("id", str(sample_mock_id))
+        update_query.eq.return_value.eq.assert_called_once_with(
+            "user_id", str(sample_user_id)
+        )
 
     @pytest.mark.asyncio
     async def test_update_mock_not_found(
         self, mock_service, sample_mock_id, sample_user_id
     ):
-        """Test updating non-existent mock"""
-        # Mock no existing mock
-        mock_service.get_mock = AsyncMock(return_value=None)
+        """Test updating a non-existent or foreign mock matches no row"""
+        mock_result = Mock()
+        mock_result.data = []
+        mock_service.client.table.return_value.update.return_value.eq.return_value.eq.return_value.execute.return_value = (
+            mock_result
+        )
 
         update_data = MockUpdate(name="Updated Mock")
 
@@ -462,24 +606,204 @@ class TestUpdateMock:
         assert "Mock not found or access denied" in exc_info.value.detail
 
     @pytest.mark.asyncio
-    async def test_update_mock_wrong_user(
-        self, mock_service, sample_mock_id, sample_user_id, sample_mock_data
+    async def test_update_mock_duplicate_endpoint(
+        self, mock_service, sample_mock_id, sample_user_id
     ):
-        """Test updating mock owned by different user"""
-        # Mock existing mock with different user_id
-        wrong_user_data = sample_mock_data.copy()
-        wrong_user_data["user_id"] = str(uuid4())
-        existing_mock = MockModel(**wrong_user_data)
-        mock_service.get_mock = AsyncMock(return_value=existing_mock)
+        """Test moving a mock onto an existing endpoint and method"""
+        mock_service.client.table.return_value.update.return_value.eq.return_value.eq.return_value.execute.side_effect = Exception(
+            "duplicate key value violates unique constraint"
+        )
 
-        update_data = MockUpdate(name="Updated Mock")
+        update_data = MockUpdate(endpoint="/api/taken")
 
-        # Execute and assert
         with pytest.raises(HTTPException) as exc_info:
             await mock_service.update_mock(sample_mock_id, sample_user_id, update_data)
 
+        assert exc_info.value.status_code == status.HTTP_409_CONFLICT
+
+
+class TestDuplicateMock:
+    """Test duplicate_mock method"""
+
+    @pytest.mark.asyncio
+    async def test_duplicate_mock_success(
+        self, mock_service, sample_mock_id, sample_user_id, sample_mock_data
+    ):
+        """Test duplicating a mock goes through create_mock"""
+        original = MockModel(**sample_mock_data)
+        mock_service.get_mock = AsyncMock(return_value=original)
+        mock_service.create_mock = AsyncMock(return_value=original)
+
+        await mock_service.duplicate_mock(sample_mock_id, sample_user_id)
+
+        user_id, duplicate_data = mock_service.create_mock.call_args[0]
+        assert user_id == sample_user_id
+        assert duplicate_data.name == "Test Mock (Copy)"
+        assert duplicate_data.endpoint == "/api/test-copy"
+        assert duplicate_data.response == original.response
+
+    @pytest.mark.asyncio
+    async def test_duplicate_mock_reuses_response_blob(
+        self, mock_service, sample_mock_id, sample_user_id, sample_mock_data
+    ):
+        """Test a blob-backed body is referenced, not copied"""
+        original = MockModel(
+            **{
+                **sample_mock_data,
+                "response": {},
+                "response_blob_hash": "a" * 64,
+                "response_size": 123,
+            }
+        )
+        mock_service.get_mock = AsyncMock(return_value=original)
+        mock_service.create_mock = AsyncMock(return_value=original)
+
+        await mock_service.duplicate_mock(sample_mock_id, sample_user_id)
+
+        mock_service.get_mock.assert_called_once_with(
+            sample_mock_id, sample_user_id, load_body=False
+        )
+        assert mock_service.create_mock.call_args[1]["response_blob"] == ("a" * 64, 123)
+
+    @pytest.mark.asyncio
+    async def test_duplicate_mock_not_found(
+        self, mock_service, sample_mock_id, sample_user_id
+    ):
+        """Test duplicating a non-existent mock"""
+        mock_service.get_mock = AsyncMock(return_value=None)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await mock_service.duplicate_mock(sample_mock_id, sample_user_id)
+
         assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
-        assert "Mock not found or access denied" in exc_info.value.detail
+
+
+class TestBulkOperations:
+    """Test bulk create, update and delete methods"""
+
+    @pytest.mark.asyncio
+    async def test_bulk_create_skip_existing(
+        self, mock_service, sample_user_id, sample_mock_create, sample_mock_data
+    ):
+        """Test bulk create reports rows ignored by the upsert as skipped"""
+        second = sample_mock_create.model_copy(update={"endpoint": "/api/other"})
+
+        mock_result = Mock()
+        mock_result.data = [sample_mock_data]  # only /api/test was inserted
+        mock_service.client.table.return_value.upsert.return_value.execute.return_value = (
+            mock_result
+        )
+
+        results = await mock_service.bulk_create_mocks(
+            sample_user_id, [sample_mock_create, second], BulkConflictStrategy.SKIP
+        )
+
+        assert [r.status for r in results] == [
+            BulkItemStatus.CREATED,
+            BulkItemStatus.SKIPPED,
+        ]
+        assert results[0].id == UUID(sample_mock_data["id"])
+
+        # One multi-row statement for the whole batch
+        upsert = mock_service.client.table.return_value.upsert
+        upsert.assert_called_once()
+        rows = upsert.call_args[0][0]
+        assert len(rows) == 2
+        assert upsert.call_args[1]["ignore_duplicates"] is True
+
+    @pytest.mark.asyncio
+    async def test_bulk_create_fail_on_duplicate_in_request(
+        self, mock_service, sample_user_id, sample_mock_create
+    ):
+        """Test fail strategy rejects the batch before writing"""
+        results = await mock_service.bulk_create_mocks(
+            sample_user_id,
+            [sample_mock_create, sample_mock_create],
+            BulkConflictStrategy.FAIL,
+        )
+
+        assert [r.status for r in results] == [
+            BulkItemStatus.FAILED,
+            BulkItemStatus.CONFLICT,
+        ]
+        mock_service.client.table.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_bulk_update(
+        self, mock_service, sample_user_id, sample_mock_id, sample_mock_data
+    ):
+        """Test bulk update sends only the patched fields and reports missing mocks"""
+        missing_id = uuid4()
+        items = [
+            MockBulkUpdateItem(id=sample_mock_id, name="Renamed"),
+            MockBulkUpdateItem(id=missing_id, name="Missing"),
+        ]
+
+        updated = Mock()
+        updated.data = [
+            {
+                "id": sample_mock_data["id"],
+                "endpoint": sample_mock_data["endpoint"],
+                "method": sample_mock_data["method"],
+            }
+        ]
+        mock_service.client.rpc.return_value.execute.return_value = updated
+
+        results = await mock_service.bulk_update_mocks(sample_user_id, items)
+
+        assert [r.status for r in results] == [
+            BulkItemStatus.UPDATED,
+            BulkItemStatus.NOT_FOUND,
+        ]
+        assert results[0].endpoint == "/api/test"
+
+        # One conditional UPDATE, no read and no upsert that could re-insert rows
+        name, params = mock_service.client.rpc.call_args[0]
+        assert name == "bulk_update_mocks"
+        assert params["p_user_id"] == str(sample_user_id)
+        assert params["p_items"] == [
+            {"id": str(sample_mock_id), "name": "Renamed"},
+            {"id": str(missing_id), "name": "Missing"},
+        ]
+        mock_service.client.table.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_bulk_update_conflict(
+        self, mock_service, sample_user_id, sample_mock_id
+    ):
+        """Test a unique violation marks the chunk as conflicting"""
+        mock_service.client.rpc.return_value.execute.side_effect = Exception(
+            'duplicate key value violates unique constraint "mocks_user_id_endpoint_method_key"'
+        )
+
+        results = await mock_service.bulk_update_mocks(
+            sample_user_id, [MockBulkUpdateItem(id=sample_mock_id, endpoint="/taken")]
+        )
+
+        assert results[0].status == BulkItemStatus.CONFLICT
+
+    @pytest.mark.asyncio
+    async def test_bulk_delete(
+        self, mock_service, sample_user_id, sample_mock_id, sample_mock_data
+    ):
+        """Test bulk delete in a single ownership-filtered statement"""
+        missing_id = uuid4()
+
+        mock_result = Mock()
+        mock_result.data = [sample_mock_data]
+        mock_service.client.table.return_value.delete.return_value.eq.return_value.in_.return_value.execute.return_value = (
+            mock_result
+        )
+
+        results = await mock_service.bulk_delete_mocks(
+            sample_user_id, [sample_mock_id, missing_id]
+        )
+
+        assert [r.status for r in results] == [
+            BulkItemStatus.DELETED,
+            BulkItemStatus.NOT_FOUND,
+        ]
+        mock_service.client.table.assert_called_once_with("mocks")
 
 
 class TestDeleteMock:
@@ -490,20 +814,10 @@ class TestDeleteMock:
         self, mock_service, sample_mock_id, sample_user_id, sample_mock_data
     ):
         """Test successful mock deletion"""
-        # Mock existing mock
-        existing_mock = MockModel(**sample_mock_data)
-        mock_service.get_mock = AsyncMock(return_value=existing_mock)
-
-        # Mock database responses
-        stats_result = Mock()
-        stats_result.data = []
         mock_result = Mock()
         mock_result.data = [sample_mock_data]
-
-        mock_service.client.table.return_value.delete.return_value.eq.return_value.execute.side_effect = [
-            stats_result,  # First call for stats deletion
-            mock_result,  # Second call for mock deletion
-        ]
+        delete_query = mock_service.client.table.return_value.delete.return_value
+        delete_query.eq.return_value.eq.return_value.execute.return_value = mock_result
 
         # Execute
         result = await mock_service.delete_mock(sample_mock_id, sample_user_id)
@@ -511,16 +825,22 @@ class TestDeleteMock:
         # Assertions
         assert result is True
 
-        # Verify database calls (2 delete operations)
-        assert mock_service.client.table.call_count == 2
+        # Verify a single delete (mock_stats is removed by cascade)
+        mock_service.client.table.assert_called_once_with("mocks")
+        delete_query.eq.return_value.eq.assert_called_once_with(
+            "user_id", str(sample_user_id)
+        )
 
     @pytest.mark.asyncio
     async def test_delete_mock_not_found(
         self, mock_service, sample_mock_id, sample_user_id
     ):
-        """Test deleting non-existent mock"""
-        # Mock no existing mock
-        mock_service.get_mock = AsyncMock(return_value=None)
+        """Test deleting a non-existent or foreign mock matches no row"""
+        mock_result = Mock()
+        mock_result.data = []
+        mock_service.client.table.return_value.delete.return_value.eq.return_value.eq.return_value.execute.return_value = (
+            mock_result
+        )
 
         # Execute and assert
         with pytest.raises(HTTPException) as exc_info:
@@ -529,6 +849,24 @@ class TestDeleteMock:
         assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
         assert "Mock not found or access denied" in exc_info.value.detail
 
+    @pytest.mark.asyncio
+    async def test_delete_records_write_only_when_deleted(
+        self, mock_service, sample_mock_id, sample_user_id, sample_mock_data
+    ):
+        """Test a 404 delete does not pin the user's reads to the primary"""
+        execute = (
+            mock_service.client.table.return_value.delete.return_value.eq.return_value.eq.return_value.execute
+        )
+        execute.side_effect = [Mock(data=[]), Mock(data=[sample_mock_data])]
+
+        with patch.object(MockService, "_record_write") as record_write:
+            with pytest.raises(HTTPException):
+                await mock_service.delete_mock(sample_mock_id, sample_user_id)
+            record_write.assert_not_called()
+
+            await mock_service.delete_mock(sample_mock_id, sample_user_id)
+            record_write.assert_called_once_with(sample_user_id)
+
 
 class TestSimulateMock:
     """Test simulate_mock method"""
@@ -684,87 +1022,25 @@ class TestGetMockByEndpoint:
 class TestPrivateMethods:
     """Test private helper methods"""
 
-    @pytest.mark.asyncio
-    async def test_get_mock_by_endpoint_private(
-        self, mock_service, sample_user_id, sample_mock_data
-    ):
-        """Test private _get_mock_by_endpoint method"""
-        # Mock database response
-        mock_result = Mock()
-        mock_result.data = [sample_mock_data]
-
-        # Setup method chain mock
-        table_mock = Mock()
-        select_mock = Mock()
-        eq1_mock = Mock()
-        eq2_mock = Mock()
-        eq3_mock = Mock()
-
-        mock_service.client.table.return_value = table_mock
-        table_mock.select.return_value = select_mock
-        select_mock.eq.return_value = eq1_mock
-        eq1_mock.eq.return_value = eq2_mock
-        eq2_mock.eq.return_value = eq3_mock
-        eq3_mock.execute.return_value = mock_result
-
-        # Execute
-        result = await mock_service._get_mock_by_endpoint(
-            sample_user_id, "/api/test", HTTPMethod.GET
-        )
-
-        # Assertions
-        assert isinstance(result, MockModel)
-
-    @pytest.mark.asyncio
-    async def test_create_mock_stats(
-        self, mock_service, sample_mock_id, sample_user_id
-    ):
-        """Test _create_mock_stats method"""
-        # Mock database response
-        mock_result = Mock()
-        mock_result.data = [{"id": "stats_id"}]
-        mock_service.client.table.return_value.insert.return_value.execute.return_value = (
-            mock_result
-        )
-
-        # Execute (should not raise exception)
-        await mock_service._create_mock_stats(sample_mock_id, sample_user_id)
-
-        # Verify database call
-        mock_service.client.table.assert_called_with("mock_stats")
-
-    @pytest.mark.asyncio
-    async def test_create_mock_stats_exception(
-        self, mock_service, sample_mock_id, sample_user_id
-    ):
-        """Test _create_mock_stats method with exception"""
-        # Mock database error
-        mock_service.client.table.return_value.insert.side_effect = Exception(
-            "Database error"
-        )
-
-        # Execute (should not raise exception, just pass)
-        await mock_service._create_mock_stats(sample_mock_id, sample_user_id)
-
     @pytest.mark.asyncio
     async def test_log_mock_access(self, mock_service, sample_mock_id, sample_user_id):
-        """Test _log_mock_access method"""
-        # Mock database response
-        mock_result = Mock()
-        mock_result.data = [{"access_count": 1}]
-        mock_service.client.table.return_value.update.return_value.eq.return_value.execute.return_value = (
-            mock_result
-        )
-
+        """Test _log_mock_access buffers the event without a database call"""
         request_data = {"ip": "127.0.0.1", "user_agent": "test"}
 
-        # Execute (should not raise exception)
-        await mock_service._log_mock_access(
-            sample_mock_id, sample_user_id, request_data, 100.0, 200
+        with patch("app.services.mock_service.access_log_buffer") as buffer:
+            await mock_service._log_mock_access(
+                sample_mock_id, sample_user_id, request_data, 100.0, 200
+            )
+
+        buffer.record.assert_called_once_with(
+            mock_id=sample_mock_id,
+            user_id=sample_user_id,
+            ip_address="127.0.0.1",
+            user_agent="test",
+            response_time_ms=100.0,
+            status_code=200,
         )
-
-        # Verify database call
-        mock_service.client.table.assert_called_with("mocks")
+        mock_service.client.table.assert_not_called()
 
 
 class TestListPublicMocks:
@@ -813,28 +1089,15 @@ class TestListPublicMocks:
         """Test listing public mocks with search"""
         pagination = PaginationParams(page=1, limit=10)
 
-        # Mock database response
-        mock_result = Mock()
-        mock_result.data = [sample_mock_data]
-        mock_result.count = 1
+        # Mock RPC response
+        search_row = sample_mock_data.copy()
+        search_row["search_rank"] = 0.5
+        search_row["search_highlight"] = "<mark>Test</mark> Mock"
+        search_row["total_count"] = 1
 
-        # Setup method chain mock
-        table_mock = Mock()
-        select_mock = Mock()
-        eq1_mock = Mock()
-        eq2_mock = Mock()
-        or_mock = Mock()
-        order_mock = Mock()
-        range_mock = Mock()
-
-        mock_service.client.table.return_value = table_mock
-        table_mock.select.return_value = select_mock
-        select_mock.eq.return_value = eq1_mock
-        eq1_mock.eq.return_value = eq2_mock
-        eq2_mock.or_.return_value = or_mock
-        or_mock.order.return_value = order_mock
-        order_mock.range.return_value = range_mock
-        range_mock.execute.return_value = mock_result
+        mock_result = Mock()
+        mock_result.data = [search_row]
+        mock_service.client.rpc.return_value.execute.return_value = mock_result
 
         # Execute
         mocks, total = await mock_service.list_public_mocks(pagination, search="test")
@@ -842,6 +1105,24 @@ class TestListPublicMocks:
         # Assertions
         assert len(mocks) == 1
         assert total == 1
+        name, params = mock_service.client.rpc.call_args[0]
+        assert name == "search_mocks"
+        assert params["p_public_only"] is True
+        assert params["p_user_id"] is None
+
+    @pytest.mark.asyncio
+    async def test_list_public_mocks_search_no_results(self, mock_service):
+        """Test search returning no rows reports zero total"""
+        pagination = PaginationParams(page=1, limit=10)
+
+        mock_result = Mock()
+        mock_result.data = []
+        mock_service.client.rpc.return_value.execute.return_value = mock_result
+
+        mocks, total = await mock_service.list_public_mocks(pagination, search="zzz")
+
+        assert mocks == []
+        assert total == 0
 
     @pytest.mark.asyncio
     async def test_list_public_mocks_database_error(self, mock_service):
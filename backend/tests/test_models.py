@@ -0,0 +1,95 @@
+"""
+Tests for trusted model construction from database rows
+"""
+
+import json
+import warnings
+from datetime import datetime, timezone
+from unittest.mock import patch
+from uuid import UUID
+
+from pydantic import TypeAdapter
+
+from app.models.models import Mock, MockTemplate
+from app.schemas.schemas import MockResponse
+
+ROW = {
+    "id": "987fcdeb-51d3-42a1-b456-123456789abc",
+    "user_id": "123e4567-e89b-12d3-a456-426614174000",
+    "name": "Users",
+    "description": None,
+    "endpoint": "/users",
+    "method": "GET",
+    "response": {"users": [{"id": i} for i in range(100)]},
+    "response_blob_hash": None,
+    "response_size": None,
+    "headers": None,
+    "status_code": 200,
+    "delay_ms": 0,
+    "status": "active",
+    "is_public": False,
+    "tags": ["users"],
+    "access_count": 3,
+    "last_accessed": None,
+    "created_at": "2024-01-01T10:00:00.12345+00:00",
+    "updated_at": "2024-01-02T10:00:00Z",
+    # Columns the model does not know about
+    "search_vector": "'users':1",
+    "change_seq": 42,
+}
+
+# The same row as the validating constructor accepts it
+VALID_ROW = {**ROW, "headers": {}}
+
+
+class TestFromRow:
+    def test_converts_row_types(self):
+        mock = Mock.from_row(ROW)
+
+        assert mock.id == UUID(ROW["id"])
+        assert mock.user_id == UUID(ROW["user_id"])
+        assert mock.created_at == datetime(
+            2024, 1, 1, 10, 0, 0, 123450, tzinfo=timezone.utc
+        )
+        assert mock.updated_at.tzinfo is not None
+        assert mock.last_accessed is None
+        assert mock.headers == {}
+        assert mock.method == "GET"
+        assert not hasattr(mock, "search_vector")
+
+    def test_matches_validated_model(self):
+        assert Mock.from_row(ROW).model_dump() == Mock(**VALID_ROW).model_dump()
+
+    def test_skips_validators(self):
+        with patch.object(json, "dumps", side_effect=AssertionError("validator ran")):
+            Mock.from_row(ROW)
+
+    def test_template(self):
+        template = MockTemplate.from_row(
+            {
+                "id": ROW["id"],
+                "name": "CRUD",
+                "category": "rest",
+                "created_by": None,
+                "created_at": ROW["created_at"],
+            }
+        )
+
+        assert template.id == UUID(ROW["id"])
+        assert template.created_by is None
+        assert template.tags == []
+
+
+class TestMockResponseFromMock:
+    def test_serializes_like_validated_response(self):
+        mock = Mock.from_row(ROW)
+        expected = MockResponse(**Mock(**VALID_ROW).model_dump()).model_dump_json()
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            assert MockResponse.from_mock(mock).model_dump_json() == expected
+
+    def test_passes_response_validation_unchanged(self):
+        response = MockResponse.from_mock(Mock.from_row(ROW))
+
+        assert TypeAdapter(MockResponse).validate_python(response) is response
@@ -0,0 +1,178 @@
+"""
+Tests for the pure ASGI request pipeline
+"""
+
+from unittest.mock import patch
+
+import jwt
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core import security
+from app.core.query_instrumentation import QueryRecord, record_query
+from app.core.replica_router import ReplicaRouter, get_replica_router
+from app.middleware import security_middleware
+from app.middleware.pipeline import RequestPipeline, Stage
+
+USER_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+class Recorder(Stage):
+    """Records the hooks it sees and optionally answers the request"""
+
+    def __init__(self, name, events, answer=None):
+        self.name = name
+        self.events = events
+        self.answer = answer
+
+    async def on_request(self, ctx):
+        self.events.append(f"{self.name}.request")
+        ctx.state[self.name] = True
+        if self.answer:
+            return PlainTextResponse(self.answer, status_code=418)
+        return None
+
+    def on_response(self, ctx, status, headers):
+        self.events.append(f"{self.name}.response")
+        headers[f"X-{self.name}"] = str(status)
+
+
+async def hello(request):
+    record_query(QueryRecord("mocks", "select", (), 1, 0, 0, 2.0, 200))
+    return PlainTextResponse(",".join(sorted(request.state._state)))
+
+
+async def write(request):
+    get_replica_router().record_write(USER_ID)
+    return PlainTextResponse("written")
+
+
+async def read(request):
+    return PlainTextResponse(str(get_replica_router().select_replica(USER_ID)))
+
+
+async def stream(request):
+    async def chunks():
+        for chunk in (b"a", b"b", b"c"):
+            yield chunk
+
+    return StreamingResponse(chunks())
+
+
+def make_client(stages):
+    app = Starlette(
+        routes=[
+            Route("/hello", hello),
+            Route("/stream", stream),
+            Route("/write", write),
+            Route("/read", read),
+        ]
+    )
+    app.add_middleware(RequestPipeline, stages=stages)
+    return TestClient(app)
+
+
+def test_stages_run_in_order_and_share_state():
+    events = []
+    client = make_client([Recorder("outer", events), Recorder("inner", events)])
+
+    response = client.get("/hello")
+
+    assert events == [
+        "outer.request",
+        "inner.request",
+        "inner.response",
+        "outer.response",
+    ]
+    assert response.text == "inner,outer"
+    assert response.headers["x-outer"] == response.headers["x-inner"] == "200"
+    assert float(response.headers["x-process-time"]) >= 0
+    assert response.headers["server-timing"] == 'db;dur=2.0;desc="1 queries"'
+
+
+def test_short_circuit_skips_later_stages():
+    events = []
+    client = make_client(
+        [
+            Recorder("outer", events),
+            Recorder("gate", events, answer="no"),
+            Recorder("inner", events),
+        ]
+    )
+
+    response = client.get("/hello")
+
+    assert response.status_code == 418
+    assert events == [
+        "outer.request",
+        "gate.request",
+        "gate.response",
+        "outer.response",
+    ]
+    assert "x-inner" not in response.headers
+    assert "x-process-time" in response.headers
+
+
+def test_streaming_passes_through():
+    client = make_client([Recorder("outer", [])])
+
+    with client.stream("GET", "/stream") as response:
+        chunks = list(response.iter_raw())
+
+    assert b"".join(chunks) == b"abc"
+    assert response.headers["x-outer"] == "200"
+
+
+def test_token_is_verified_once(client, fake_supabase):
+    """Routes reuse the payload the authentication stage verified"""
+    token = jwt.encode(
+        {"sub": USER_ID, "role": "authenticated"}, "test-secret", algorithm="HS256"
+    )
+
+    with patch.object(
+        security_middleware,
+        "verify_supabase_token",
+        wraps=security.verify_supabase_token,
+    ) as stage_verify, patch.object(
+        security, "verify_supabase_token", wraps=security.verify_supabase_token
+    ) as route_verify:
+        response = client.get(
+            "/api/v1/mocks/changes", headers={"Authorization": f"Bearer {token}"}
+        )
+
+    assert response.status_code == 200, response.text
+    assert stage_verify.call_count == 1
+    assert route_verify.call_count == 0
+
+
+def test_app_rejects_before_authenticating(client):
+    """Validation runs before authentication"""
+    response = client.post(
+        "/api/v1/mocks",
+        content=b"{}",
+        headers={"Content-Length": str(11 * 1024 * 1024)},
+    )
+
+    assert response.status_code == 413
+    assert response.headers["x-frame-options"] == "DENY"
+
+
+def test_write_watermark_round_trip():
+    """A write returns its time, which pins the client's next read to the primary"""
+    router = ReplicaRouter(replica_urls=["https://replica-1"], sticky_window_seconds=60)
+
+    with patch("app.core.replica_router.replica_router", router):
+        client = make_client([])
+        assert client.get("/read").text == "https://replica-1"
+
+        written = client.get("/write")
+        assert "X-Last-Write" in written.headers
+        assert "mockbox_last_write=" in written.headers["set-cookie"]
+
+        # Another worker: no local record of the write, only the cookie
+        router.recent_writes.clear()
+        assert client.get("/read").text == "None"
+        client.cookies.clear()
+        assert client.get("/read").text == "https://replica-1"
@@ -0,0 +1,152 @@
+"""
+Unit tests for the plan and quota cache
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+from app.core import plan_cache as plan_cache_module
+from app.core.plan_cache import DEFAULT_PLAN, PlanCache, watch_plan_changes
+
+PRO_PLAN = {
+    "plan_name": "Pro",
+    "daily_request_quota": 100,
+    "monthly_token_quota": 100000,
+}
+
+
+@pytest.mark.asyncio
+async def test_hit_skips_loader():
+    """A cached plan is returned without calling the loader again"""
+    cache = PlanCache(ttl_seconds=60)
+    loader = AsyncMock(return_value=PRO_PLAN)
+    user_id = uuid4()
+
+    assert await cache.get_or_load(user_id, loader) == PRO_PLAN
+    assert await cache.get_or_load(user_id, loader) == PRO_PLAN
+    loader.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_missing_profile_is_negatively_cached():
+    """A missing profile is cached as a miss and answered with Free defaults"""
+    cache = PlanCache(negative_ttl_seconds=60)
+    loader = AsyncMock(return_value=None)
+    user_id = uuid4()
+
+    assert await cache.get_or_load(user_id, loader) == DEFAULT_PLAN
+    assert await cache.get_or_load(user_id, loader) == DEFAULT_PLAN
+    loader.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_reloaded():
+    """Entries past their TTL are loaded again"""
+    cache = PlanCache(ttl_seconds=60)
+    loader = AsyncMock(return_value=PRO_PLAN)
+    user_id = uuid4()
+
+    await cache.get_or_load(user_id, loader)
+    expires_at, plan = cache.memory_cache[str(user_id)]
+    cache.memory_cache[str(user_id)] = (0, plan)
+    await cache.get_or_load(user_id, loader)
+
+    assert loader.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidate_forces_reload():
+    """Invalidating a user drops their cached plan"""
+    cache = PlanCache()
+    loader = AsyncMock(return_value=PRO_PLAN)
+    user_id = uuid4()
+
+    await cache.get_or_load(user_id, loader)
+    await cache.invalidate(user_id)
+    await cache.get_or_load(user_id, loader)
+
+    assert loader.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_lru_is_bounded():
+    """The least recently used entry is evicted past max_entries"""
+    cache = PlanCache(max_entries=2)
+    first, second, third = uuid4(), uuid4(), uuid4()
+
+    await cache.set(first, PRO_PLAN)
+    await cache.set(second, PRO_PLAN)
+    await cache._get(first)
+    await cache.set(third, PRO_PLAN)
+
+    assert set(cache.memory_cache) == {str(first), str(third)}
+
+
+@pytest.mark.asyncio
+async def test_loader_errors_are_not_cached():
+    """A failing lookup propagates and leaves the cache empty"""
+    cache = PlanCache()
+    user_id = uuid4()
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load(user_id, AsyncMock(side_effect=RuntimeError("db down")))
+
+    assert str(user_id) not in cache.memory_cache
+
+
+@pytest.mark.asyncio
+async def test_zero_ttl_disables_caching():
+    """A TTL of 0 is honoured rather than replaced by the default"""
+    cache = PlanCache(ttl_seconds=0, negative_ttl_seconds=0)
+    loader = AsyncMock(return_value=PRO_PLAN)
+    user_id = uuid4()
+
+    await cache.get_or_load(user_id, loader)
+    await cache.get_or_load(user_id, loader)
+
+    assert loader.await_count == 2
+    assert not cache.memory_cache
+
+
+@pytest.mark.asyncio
+async def test_apply_changes():
+    """Changed users are invalidated; a plan definition change drops everyone"""
+    cache = PlanCache()
+    changed, unchanged = uuid4(), uuid4()
+    await cache.set(changed, PRO_PLAN)
+    await cache.set(unchanged, PRO_PLAN)
+
+    await cache.apply_changes(
+        {"cursor": "2", "all_users": False, "user_ids": [str(changed)]}
+    )
+    assert set(cache.memory_cache) == {str(unchanged)}
+
+    await cache.apply_changes({"cursor": "3", "all_users": True, "user_ids": []})
+    assert not cache.memory_cache
+
+
+@pytest.mark.asyncio
+async def test_watch_applies_changes_after_the_first_cursor():
+    """The watcher starts from the current cursor and then applies each batch"""
+    user_id = str(uuid4())
+    fetch = AsyncMock(
+        side_effect=[
+            {"cursor": "10", "all_users": False, "user_ids": []},
+            {"cursor": "12", "all_users": False, "user_ids": [user_id]},
+        ]
+    )
+    cache = PlanCache()
+    await cache.set(user_id, PRO_PLAN)
+
+    with patch.object(plan_cache_module, "fetch_plan_changes", fetch), patch.object(
+        plan_cache_module, "plan_cache", cache
+    ), patch.object(
+        plan_cache_module.asyncio, "sleep", side_effect=[None, asyncio.CancelledError]
+    ):
+        with pytest.raises(asyncio.CancelledError):
+            await watch_plan_changes(interval_seconds=1)
+
+    assert [call.args[0] for call in fetch.await_args_list] == [None, "10"]
+    assert not cache.memory_cache
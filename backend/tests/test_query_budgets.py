@@ -0,0 +1,132 @@
+"""
+Database round-trip budgets enforced per route with a fake Supabase client
+"""
+
+import jwt
+import pytest
+from unittest.mock import patch
+from starlette.routing import Route
+
+from app.core.config import settings
+from app.core.query_budget import (
+    ROUTE_QUERY_BUDGETS,
+    QueryBudgetExceeded,
+    assert_query_budget,
+    route_key,
+)
+from app.core.query_instrumentation import QueryRecord, RequestQueryStats
+
+USER_ID = "123e4567-e89b-12d3-a456-426614174000"
+MOCK_ID = "987fcdeb-51d3-42a1-b456-123456789abc"
+TOKEN = jwt.encode(
+    {"sub": USER_ID, "role": "authenticated"}, "test-secret", algorithm="HS256"
+)
+HEADERS = {"Authorization": f"Bearer {TOKEN}"}
+
+MOCK_ROW = {
+    "id": MOCK_ID,
+    "user_id": USER_ID,
+    "name": "Users",
+    "description": None,
+    "endpoint": "/users",
+    "method": "GET",
+    "response": {"users": []},
+    "headers": {},
+    "status_code": 200,
+    "delay_ms": 0,
+    "status": "active",
+    "is_public": True,
+    "tags": [],
+    "access_count": 0,
+    "last_accessed": None,
+    "created_at": "2024-01-01T00:00:00",
+    "updated_at": None,
+}
+
+
+@pytest.fixture
+def enforce_budgets(fake_supabase):
+    """Fail requests that exceed their route budget"""
+    fake_supabase.rows["mocks"] = [MOCK_ROW]
+    fake_supabase.rows["mock_changes"] = [
+        {
+            "change_seq": 7,
+            "mock_id": MOCK_ID,
+            "deleted": False,
+            "mock": MOCK_ROW,
+            "resync_required": False,
+        }
+    ]
+    with patch.object(settings, "enforce_query_budgets", True):
+        yield fake_supabase
+
+
+@pytest.mark.parametrize(
+    "method,path,body",
+    [
+        ("GET", "/api/v1/mocks/", None),
+        ("GET", "/api/v1/mocks/changes", None),
+        (
+            "POST",
+            "/api/v1/mocks/",
+            {"name": "Users", "endpoint": "/users", "method": "GET"},
+        ),
+        ("GET", f"/api/v1/mocks/{MOCK_ID}", None),
+        ("PUT", f"/api/v1/mocks/{MOCK_ID}", {"name": "Renamed"}),
+        ("DELETE", f"/api/v1/mocks/{MOCK_ID}", None),
+        ("POST", f"/api/v1/mocks/{MOCK_ID}/toggle-status", None),
+        ("POST", f"/api/v1/mocks/{MOCK_ID}/duplicate", None),
+        ("GET", "/api/v1/simulate/users", None),
+    ],
+)
+def test_route_within_budget(client, enforce_budgets, method, path, body):
+    """Each route stays within its declared number of round trips"""
+    response = client.request(method, path, json=body, headers=HEADERS)
+
+    assert response.status_code < 400, response.text
+    key = f"{method} {path.replace(MOCK_ID, '{mock_id}').replace('simulate/users', 'simulate/{path}')}"
+    assert len(enforce_budgets.calls) <= ROUTE_QUERY_BUDGETS[key]
+
+
+def test_budget_violation_raises():
+    """Exceeding a budget fails in enforcing mode"""
+    stats = RequestQueryStats()
+    for _ in range(2):
+        stats.queries.append(QueryRecord("mocks", "select", (), 1, 0, 0, 1.0, 200))
+
+    with pytest.raises(QueryBudgetExceeded):
+        assert_query_budget("GET /api/v1/mocks/{mock_id}", stats)
+
+
+def test_route_key_uses_path_templates():
+    """The key is the matched route's template, not the request path"""
+    route = Route("/api/v1/mocks/{mock_id}", lambda request: None)
+    scope = {"method": "GET", "path": f"/api/v1/mocks/{MOCK_ID}", "route": route}
+    assert route_key(scope) == "GET /api/v1/mocks/{mock_id}"
+
+    # A parameter value that also appears as a literal segment
+    route = Route("/api/v1/mocks/{mock_id}/simulate", lambda request: None)
+    scope = {
+        "method": "POST",
+        "path": "/api/v1/mocks/simulate/simulate",
+        "route": route,
+    }
+    assert route_key(scope) == "POST /api/v1/mocks/{mock_id}/simulate"
+
+    route = Route("/api/v1/simulate/{path:path}", lambda request: None)
+    scope = {"method": "POST", "path": "/api/v1/simulate/a/b", "route": route}
+    assert route_key(scope) == "POST /api/v1/simulate/{path}"
+
+
+def test_route_key_of_included_router(client, fake_supabase):
+    """Routes of routers included with a prefix get the full template"""
+    keys = []
+
+    def capture(key, stats, enforce=None):
+        keys.append(key)
+        return True
+
+    with patch("app.middleware.pipeline.check_query_budget", capture):
+        client.get("/api/v1/mocks/templates/crud")
+
+    assert keys == ["GET /api/v1/mocks/templates/{template_id}"]
@@ -0,0 +1,72 @@
+"""
+Unit tests for Supabase/PostgREST query instrumentation
+"""
+
+import httpx
+
+from app.core.query_instrumentation import (
+    QueryMetrics,
+    QueryRecord,
+    RequestQueryStats,
+    current_request_queries,
+    describe_request,
+    instrument_client,
+    query_metrics,
+)
+
+
+def _transport(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        200, json=[{"id": 1}, {"id": 2}], headers={"content-range": "0-1/*"}
+    )
+
+
+def test_describe_request_drops_filter_values():
+    """Filter shape keeps columns and operators only"""
+    request = httpx.Request(
+        "GET",
+        "http://db/rest/v1/mocks?select=*&id=eq.42&or=(user_id.eq.1,is_public.eq.true)",
+    )
+
+    assert describe_request(request) == ("mocks", "select", ("id:eq", "or:group"))
+
+
+def test_describe_rpc_request():
+    """RPC calls are recorded under the function name"""
+    request = httpx.Request("POST", "http://db/rest/v1/rpc/search_mocks")
+
+    assert describe_request(request)[:2] == ("search_mocks", "rpc")
+
+
+def test_histogram_buckets():
+    """Observations land in the first bucket that fits"""
+    metrics = QueryMetrics()
+    metrics.observe(QueryRecord("mocks", "select", (), 1, 0, 10, 7.0, 200))
+    metrics.observe(QueryRecord("mocks", "select", (), 1, 0, 10, 700.0, 200))
+
+    snapshot = metrics.snapshot()["mocks.select"]
+    assert snapshot["count"] == 2
+    assert snapshot["buckets"]["10"] == 1
+    assert snapshot["buckets"]["1000"] == 1
+
+
+def test_instrumented_client_records_request_queries():
+    """Queries through an instrumented session are counted for the request"""
+
+    class FakeClient:
+        class postgrest:
+            session = httpx.Client(transport=httpx.MockTransport(_transport))
+
+    client = instrument_client(FakeClient())
+    query_metrics.reset()
+    stats = RequestQueryStats()
+    token = current_request_queries.set(stats)
+    try:
+        client.postgrest.session.get("http://db/rest/v1/mocks?id=eq.1")
+    finally:
+        current_request_queries.reset(token)
+
+    assert stats.count == 1
+    assert stats.queries[0].rows == 2
+    assert stats.server_timing().endswith('desc="1 queries"')
+    assert query_metrics.snapshot()["mocks.select"]["count"] == 1
@@ -0,0 +1,470 @@
+"""
+Tests for the rate limiter backends
+"""
+
+from unittest.mock import AsyncMock, patch
+from uuid import UUID
+
+import jwt
+import pytest
+
+from app.core.config import settings
+from app.core.database import db_manager
+from app.core.rate_limiting import (
+    GCRA,
+    RATE_LIMITS,
+    CustomRateLimiter,
+    MemoryRateLimitStore,
+    RateLimitPolicy,
+    gcra,
+    rate_limit_policy,
+    rate_limiter,
+)
+from tests.conftest import FakeSupabaseClient
+
+USER_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+PLANS = [
+    {"name": "free", "rate_limits": {}},
+    {
+        "name": "Pro",
+        "rate_limits": {
+            "authenticated": {"limit": 5000},
+            "ai": {"limit": 30, "window": 120},
+            "unknown_class": {"limit": 1},
+            "simulation": {"limit": "lots"},
+        },
+    },
+]
+
+
+class TestMemoryBackend:
+    @pytest.mark.asyncio
+    async def test_allows_up_to_limit(self):
+        limiter = CustomRateLimiter()
+
+        results = [await limiter.hit("k", 3, 60) for _ in range(4)]
+
+        assert [r["allowed"] for r in results] == [True, True, True, False]
+        assert [r["remaining"] for r in results] == [2, 1, 0, 0]
+        assert results[-1]["retry_after"] > 0
+        assert results[0]["retry_after"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rejected_requests_are_not_recorded(self):
+        limiter = CustomRateLimiter()
+
+        for _ in range(5):
+            await limiter.hit("k", 2, 60)
+
+        assert len(limiter.memory_cache["k"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_window_is_a_ring_buffer(self):
+        limiter = CustomRateLimiter()
+
+        with patch("app.core.rate_limiting.time.time", return_value=1000.0):
+            await limiter.hit("k", 3, 60)
+        with patch("app.core.rate_limiting.time.time", return_value=1030.0):
+            await limiter.hit("k", 3, 60)
+        with patch("app.core.rate_limiting.time.time", return_value=1070.0):
+            result = await limiter.hit("k", 3, 60)
+
+        assert list(limiter.memory_cache["k"]) == [1030.0, 1070.0]
+        assert limiter.memory_cache["k"].maxlen == 3
+        assert result["remaining"] == 1
+        assert result["reset"] == 1090
+
+    @pytest.mark.asyncio
+    async def test_key_count_is_bounded(self):
+        limiter = CustomRateLimiter(max_keys=100)
+
+        for ip in range(1000):
+            await limiter.hit(f"rate_limit:anonymous:ip:{ip}", 60, 60)
+
+        assert len(limiter.memory_cache) == 100
+        assert limiter.memory_cache.evictions == 900
+        assert "rate_limit:anonymous:ip:999" in limiter.memory_cache
+
+    @pytest.mark.asyncio
+    async def test_cleanup_drops_expired_keys(self):
+        limiter = CustomRateLimiter()
+        limiter.memory_cache.set("idle", 10.0, 10.0)
+        limiter.memory_cache.set("busy", 10.0**12, 10.0**12)
+
+        assert await limiter.cleanup_expired_keys() == 1
+        assert limiter.memory_cache.keys() == ["busy"]
+
+    @pytest.mark.asyncio
+    async def test_invalidate_pattern(self):
+        limiter = CustomRateLimiter()
+        await limiter.hit("rate_limit:ai:user:1", 10, 60)
+        await limiter.hit("rate_limit:ai:user:2", 10, 60, algorithm=GCRA)
+        await limiter.hit("rate_limit:simulation:user:1", 10, 60)
+
+        assert await limiter.invalidate_pattern("rate_limit:ai:*") == 2
+        assert limiter.memory_cache.keys() == ["rate_limit:simulation:user:1"]
+
+    @pytest.mark.asyncio
+    async def test_check_rate_limit(self):
+        limiter = CustomRateLimiter()
+
+        assert await limiter.check_rate_limit("k", 1, 60)
+        assert not await limiter.check_rate_limit("k", 1, 60)
+
+
+class TestMemoryRateLimitStore:
+    def test_expired_keys_read_as_missing(self):
+        store = MemoryRateLimitStore(max_keys=10)
+        store.set("k", "value", expires_at=100.0)
+
+        assert store.get("k", now=99.0) == "value"
+        assert store.get("k", now=100.0) is None
+        assert "k" not in store
+
+    def test_evicts_least_recently_used(self):
+        store = MemoryRateLimitStore(max_keys=2)
+        store.set("a", 1, 100.0)
+        store.set("b", 2, 100.0)
+        store.get("a", now=0.0)
+        store.set("c", 3, 100.0)
+
+        assert store.keys() == ["a", "c"]
+
+
+class TestGCRA:
+    """One timestamp per key, bursts of `burst`, then one request per interval"""
+
+    def test_step(self):
+        allowed, tat, remaining, reset, retry_after = gcra(None, 100.0, 1.0, 3)
+
+        assert (allowed, tat, remaining, reset, retry_after) == (
+            True,
+            101.0,
+            2,
+            101.0,
+            0.0,
+        )
+
+    def test_burst_then_reject(self):
+        tat = None
+        outcomes = []
+        for _ in range(4):
+            allowed, tat, remaining, _, retry_after = gcra(tat, 100.0, 1.0, 3)
+            outcomes.append((allowed, remaining, retry_after))
+
+        assert outcomes == [
+            (True, 2, 0.0),
+            (True, 1, 0.0),
+            (True, 0, 0.0),
+            (False, 0, 1.0),
+        ]
+        assert tat == 103.0
+
+    def test_refills_over_time(self):
+        tat = 103.0  # bucket of 3 emptied at t=100
+
+        assert gcra(tat, 100.5, 1.0, 3)[0] == 0
+        assert gcra(tat, 101.0, 1.0, 3)[:3] == (True, 104.0, 0)
+        assert gcra(tat, 200.0, 1.0, 3)[2] == 2
+
+    def test_takes_several_tokens(self):
+        assert gcra(None, 100.0, 1.0, 10, requested=4)[:3] == (4, 104.0, 6)
+        # Only what is available is granted
+        assert gcra(107.0, 100.0, 1.0, 10, requested=4)[:3] == (3, 110.0, 0)
+
+    @pytest.mark.asyncio
+    async def test_memory_backend_keeps_one_value_per_key(self):
+        limiter = CustomRateLimiter()
+
+        with patch("app.core.rate_limiting.time.time", return_value=1000.0):
+            results = [
+                await limiter.hit("k", 60, 60, algorithm=GCRA, burst=5)
+                for _ in range(6)
+            ]
+
+        assert [r["allowed"] for r in results] == [True] * 5 + [False]
+        assert results[-1]["retry_after"] == 1
+        assert limiter.memory_cache.keys() == ["k:gcra"]
+        assert limiter.memory_cache["k:gcra"] == 1005.0
+
+    @pytest.mark.asyncio
+    async def test_unknown_algorithm(self):
+        with pytest.raises(ValueError):
+            await CustomRateLimiter().hit("k", 1, 60, algorithm="leaky")
+
+
+class TestRedisBackend:
+    """The Redis path is one script call per request"""
+
+    def limiter(self, reply):
+        limiter = CustomRateLimiter()
+        limiter.redis_client = AsyncMock()
+        limiter.sliding_window_script = AsyncMock(return_value=reply)
+        return limiter
+
+    @pytest.mark.asyncio
+    async def test_single_script_call(self):
+        limiter = self.limiter([1, 4, "1700000060.25"])
+
+        result = await limiter.hit("rate_limit:ai:user:1", 10, 60)
+
+        limiter.sliding_window_script.assert_awaited_once()
+        kwargs = limiter.sliding_window_script.await_args.kwargs
+        assert kwargs["keys"] == ["rate_limit:ai:user:1"]
+        assert kwargs["args"][:2] == [10, 60]
+        assert result == {
+            "allowed": True,
+            "limit": 10,
+            "remaining": 6,
+            "reset": 1700000061,
+            "retry_after": 0,
+        }
+        assert not limiter.redis_client.method_calls
+
+    @pytest.mark.asyncio
+    async def test_members_are_unique(self):
+        limiter = self.limiter([1, 1, "1700000060"])
+
+        with patch("app.core.rate_limiting.time.time", return_value=1700000000.0):
+            await limiter.hit("k", 10, 60)
+            await limiter.hit("k", 10, 60)
+
+        first, second = (
+            call.kwargs["args"]
+            for call in limiter.sliding_window_script.await_args_list
+        )
+        assert first[2] == second[2]
+        assert first[3] != second[3]
+
+    @pytest.mark.asyncio
+    async def test_rejection_reports_retry_after(self):
+        limiter = self.limiter([0, 10, "1700000030.5"])
+
+        with patch("app.core.rate_limiting.time.time", return_value=1700000000.0):
+            result = await limiter.hit("k", 10, 60)
+
+        assert not result["allowed"]
+        assert result["remaining"] == 0
+        assert result["retry_after"] == 31
+
+    @pytest.mark.asyncio
+    async def test_gcra_script(self):
+        limiter = self.limiter(None)
+        limiter.gcra_script = AsyncMock(return_value=[0, 0, "1700000060", "0.4"])
+
+        result = await limiter.hit("k", 100, 60, algorithm=GCRA)
+
+        kwargs = limiter.gcra_script.await_args.kwargs
+        assert kwargs["keys"] == ["k:gcra"]
+        assert kwargs["args"][:2] == ["0.6", 100]
+        assert not result["allowed"]
+        assert result["retry_after"] == 1
+        limiter.sliding_window_script.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_errors_fail_open(self):
+        limiter = self.limiter(None)
+        limiter.sliding_window_script.side_effect = ConnectionError("down")
+
+        result = await limiter.hit("k", 10, 60)
+
+        assert result["allowed"]
+        assert result["remaining"] == 10
+
+
+def test_middleware_uses_one_limiter_call(client):
+    """Headers come from the same call that counts the request"""
+    with patch.object(rate_limiter, "hit", wraps=rate_limiter.hit) as hit:
+        response = client.get("/")
+
+    assert response.status_code == 200
+    assert hit.await_count == 1
+    assert "X-RateLimit-Remaining" in response.headers
+
+
+class TestLeases:
+    """GCRA limits on Redis spend tokens leased in batches"""
+
+    def limiter(self, *replies):
+        limiter = CustomRateLimiter()
+        limiter.redis_client = AsyncMock()
+        limiter.gcra_script = AsyncMock(side_effect=list(replies))
+        return limiter
+
+    @pytest.mark.asyncio
+    async def test_spends_lease_locally(self):
+        limiter = self.limiter([5, 95, "1700000003", "0"], [5, 90, "1700000006", "0"])
+
+        results = [
+            await limiter.hit("k", 100, 60, algorithm=GCRA, lease_size=5)
+            for _ in range(7)
+        ]
+
+        assert limiter.gcra_script.await_count == 2
+        assert limiter.gcra_script.await_args_list[0].kwargs["args"][3] == 5
+        assert all(r["allowed"] for r in results)
+        assert [r["remaining"] for r in results] == [99, 98, 97, 96, 95, 94, 93]
+
+    @pytest.mark.asyncio
+    async def test_rejection_is_cached_until_retry(self):
+        limiter = self.limiter([0, 0, "1700000060", "0.5"])
+
+        with patch("app.core.rate_limiting.time.time", return_value=1700000000.0):
+            first = await limiter.hit("k", 100, 60, algorithm=GCRA, lease_size=5)
+            second = await limiter.hit("k", 100, 60, algorithm=GCRA, lease_size=5)
+
+        assert not first["allowed"] and not second["allowed"]
+        assert second["retry_after"] == 1
+        assert limiter.gcra_script.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_lease_expires(self):
+        limiter = self.limiter([5, 95, "1700000003", "0"], [5, 91, "1700000004", "0"])
+
+        with patch("app.core.rate_limiting.time.time", return_value=1700000000.0):
+            await limiter.hit("k", 100, 60, algorithm=GCRA, lease_size=5)
+        with patch("app.core.rate_limiting.time.time", return_value=1700000010.0):
+            await limiter.hit("k", 100, 60, algorithm=GCRA, lease_size=5)
+
+        assert limiter.gcra_script.await_count == 2
+
+    def test_lease_is_capped_by_fraction_of_burst(self):
+        with patch.object(settings, "rate_limit_lease_size", 50), patch.object(
+            settings, "rate_limit_lease_max_fraction", 0.05
+        ):
+            assert CustomRateLimiter._lease_size(1000, None) == 50
+            assert CustomRateLimiter._lease_size(100, None) == 5
+            assert CustomRateLimiter._lease_size(100, 2) == 2
+            assert CustomRateLimiter._lease_size(10, None) == 0
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self):
+        limiter = self.limiter(
+            [1, 99, "1700000000.6", "0"], [1, 98, "1700000001.2", "0"]
+        )
+
+        await limiter.hit("k", 100, 60, algorithm=GCRA)
+        await limiter.hit("k", 100, 60, algorithm=GCRA)
+
+        assert limiter.gcra_script.await_count == 2
+        assert not len(limiter.leases)
+
+
+class TestRateLimitPolicy:
+    """Per-plan overrides merged over RATE_LIMITS"""
+
+    def test_defaults_come_from_settings(self):
+        assert RATE_LIMITS["ai"]["limit"] == settings.ai_rate_limit
+        assert (
+            RATE_LIMITS["authenticated"]["limit"] == settings.authenticated_rate_limit
+        )
+        assert RATE_LIMITS["simulation"]["limit"] == settings.simulation_rate_limit
+
+    def test_load_merges_and_skips_invalid_overrides(self):
+        policy = RateLimitPolicy(RATE_LIMITS)
+
+        policy.load(PLANS)
+
+        assert policy.plan_limits == {
+            "authenticated": {"pro": {**RATE_LIMITS["authenticated"], "limit": 5000}},
+            "ai": {"pro": {**RATE_LIMITS["ai"], "limit": 30, "window": 120}},
+        }
+
+    @pytest.mark.asyncio
+    async def test_plan_is_looked_up_once(self):
+        policy = RateLimitPolicy(RATE_LIMITS)
+        policy.load(PLANS)
+        lookup = AsyncMock(return_value={"plan_name": "Pro"})
+
+        with patch.object(db_manager, "get_user_plan_and_quota", lookup):
+            first = await policy.limits_for("authenticated", USER_ID)
+            second = await policy.limits_for("authenticated", USER_ID)
+
+        assert first["limit"] == second["limit"] == 5000
+        lookup.assert_awaited_once_with(UUID(USER_ID))
+
+    @pytest.mark.asyncio
+    async def test_forgotten_plan_is_looked_up_again(self):
+        policy = RateLimitPolicy(RATE_LIMITS)
+        policy.load(PLANS)
+        lookup = AsyncMock(side_effect=[{"plan_name": "Pro"}, {"plan_name": "free"}])
+
+        with patch.object(db_manager, "get_user_plan_and_quota", lookup):
+            assert (await policy.limits_for("authenticated", USER_ID))["limit"] == 5000
+            policy.forget_plans([USER_ID])
+            assert (
+                await policy.limits_for("authenticated", USER_ID)
+                is RATE_LIMITS["authenticated"]
+            )
+
+        assert lookup.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_no_lookup_without_overrides(self):
+        policy = RateLimitPolicy(RATE_LIMITS)
+        policy.load(PLANS)
+        lookup = AsyncMock()
+
+        with patch.object(db_manager, "get_user_plan_and_quota", lookup):
+            assert (
+                await policy.limits_for("simulation", USER_ID)
+                is RATE_LIMITS["simulation"]
+            )
+            assert (
+                await policy.limits_for("authenticated") is RATE_LIMITS["authenticated"]
+            )
+
+        lookup.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_other_plans_get_defaults(self):
+        policy = RateLimitPolicy(RATE_LIMITS)
+        policy.load(PLANS)
+
+        with patch.object(
+            db_manager,
+            "get_user_plan_and_quota",
+            AsyncMock(return_value={"plan_name": "Free"}),
+        ):
+            assert (
+                await policy.limits_for("authenticated", USER_ID)
+                is RATE_LIMITS["authenticated"]
+            )
+
+    @pytest.mark.asyncio
+    async def test_reload_reads_user_plans(self):
+        policy = RateLimitPolicy(RATE_LIMITS)
+        client = FakeSupabaseClient({"user_plans": PLANS})
+
+        with patch.object(db_manager, "admin_client", client):
+            await policy.reload()
+
+        assert client.calls == [("user_plans", "select")]
+        assert set(policy.plan_limits) == {"authenticated", "ai"}
+        assert policy.loaded_at is not None
+
+
+def test_middleware_applies_plan_limits(client, fake_supabase):
+    token = jwt.encode(
+        {"sub": USER_ID, "role": "authenticated"}, "test-secret", algorithm="HS256"
+    )
+    policy = RateLimitPolicy(RATE_LIMITS)
+    policy.load(PLANS)
+
+    with patch.object(
+        rate_limit_policy, "plan_limits", policy.plan_limits
+    ), patch.object(
+        rate_limit_policy, "user_plans", MemoryRateLimitStore(10)
+    ), patch.object(
+        db_manager,
+        "get_user_plan_and_quota",
+        AsyncMock(return_value={"plan_name": "pro"}),
+    ):
+        response = client.get(
+            "/api/v1/mocks/changes", headers={"Authorization": f"Bearer {token}"}
+        )
+
+    assert response.status_code == 200, response.text
+    assert response.headers["X-RateLimit-Type"] == "authenticated"
+    assert response.headers["X-RateLimit-Limit"] == "5000"
@@ -0,0 +1,112 @@
+"""
+Unit tests for read-replica routing
+"""
+
+import time
+from collections import OrderedDict
+from unittest.mock import MagicMock, patch
+
+from app.core import database
+from app.core.database import DatabaseManager
+from app.core.replica_router import (
+    ReplicaRouter,
+    WriteWatermark,
+    current_write_watermark,
+)
+
+REPLICAS = ["https://replica-1", "https://replica-2"]
+
+
+def test_no_replicas_uses_primary():
+    """Without replicas every read goes to the primary"""
+    router = ReplicaRouter(replica_urls=[])
+
+    assert router.select_replica("user") is None
+
+
+def test_round_robin_over_replicas():
+    """Reads alternate between healthy replicas"""
+    router = ReplicaRouter(replica_urls=REPLICAS)
+
+    assert [router.select_replica() for _ in range(4)] == REPLICAS * 2
+
+
+def test_unhealthy_replica_is_skipped():
+    """Unhealthy replicas are skipped and all-unhealthy fails over to primary"""
+    router = ReplicaRouter(replica_urls=REPLICAS)
+    router.mark_unhealthy(REPLICAS[0])
+
+    assert {router.select_replica() for _ in range(4)} == {REPLICAS[1]}
+
+    router.mark_unhealthy(REPLICAS[1])
+    assert router.select_replica() is None
+
+    router.mark_healthy(REPLICAS[0])
+    assert router.select_replica() == REPLICAS[0]
+
+
+def test_read_your_writes_stickiness():
+    """A user's reads stay on the primary within the window after a write"""
+    router = ReplicaRouter(replica_urls=REPLICAS, sticky_window_seconds=60)
+    router.record_write("writer")
+
+    assert router.select_replica("writer") is None
+    assert router.select_replica("reader") in REPLICAS
+
+
+def test_stickiness_expires():
+    """Stickiness ends once the window has passed"""
+    router = ReplicaRouter(replica_urls=REPLICAS, sticky_window_seconds=0)
+    router.record_write("writer")
+
+    assert router.select_replica("writer") in REPLICAS
+
+
+def test_write_watermark_pins_reads_in_any_worker():
+    """A write recorded in one router is seen by another through the watermark"""
+    writer_worker = ReplicaRouter(replica_urls=REPLICAS, sticky_window_seconds=60)
+    reader_worker = ReplicaRouter(replica_urls=REPLICAS, sticky_window_seconds=60)
+
+    watermark = WriteWatermark()
+    token = current_write_watermark.set(watermark)
+    try:
+        writer_worker.record_write("writer")
+    finally:
+        current_write_watermark.reset(token)
+    assert watermark.updated
+
+    token = current_write_watermark.set(WriteWatermark.parse(watermark.header_value()))
+    try:
+        assert reader_worker.select_replica("writer") is None
+    finally:
+        current_write_watermark.reset(token)
+    assert reader_worker.select_replica("writer") in REPLICAS
+
+
+def test_invalid_or_old_watermark_is_ignored():
+    router = ReplicaRouter(replica_urls=REPLICAS, sticky_window_seconds=60)
+
+    for value in ("garbage", str(time.time() - 120)):
+        token = current_write_watermark.set(WriteWatermark.parse(value))
+        try:
+            assert router.select_replica("reader") in REPLICAS
+        finally:
+            current_write_watermark.reset(token)
+
+
+def test_user_read_clients_are_reused():
+    """One client per replica and token, not one per read"""
+    manager = DatabaseManager.__new__(DatabaseManager)
+    manager.user_token = None
+    router = ReplicaRouter(replica_urls=REPLICAS[:1])
+
+    with patch.object(database, "_replica_user_clients", OrderedDict()), patch.object(
+        database, "create_client", MagicMock(side_effect=lambda *args: MagicMock())
+    ) as create_client, patch("app.core.replica_router.replica_router", router):
+        first = manager.get_read_client("token-a")
+        again = manager.get_read_client("token-a")
+        other = manager.get_read_client("token-b")
+
+    assert first is again
+    assert other is not first
+    assert create_client.call_count == 2
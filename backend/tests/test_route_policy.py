@@ -0,0 +1,194 @@
+"""
+Tests for route policies compiled from the app's routes
+"""
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.route_policy import (
+    API_RATE_LIMIT,
+    AUTH_OPTIONAL,
+    AUTH_PUBLIC,
+    AUTH_REQUIRED,
+    DEFAULT_MAX_BODY_SIZE,
+    RoutePolicyTable,
+    classify,
+)
+from app.core.security import get_current_user, get_optional_user, public_route
+from app.main import app
+from app.middleware.pipeline import RequestPipeline, Stage
+
+
+@pytest.fixture(scope="module")
+def table():
+    policies = RoutePolicyTable()
+    policies.compile(app.routes)
+    return policies
+
+
+@pytest.mark.parametrize(
+    "method, path, auth, rate_limit",
+    [
+        ("GET", "/", AUTH_PUBLIC, "health"),
+        ("GET", "/health", AUTH_PUBLIC, "health"),
+        ("GET", "/openapi.json", AUTH_PUBLIC, None),
+        ("GET", "/api/v1/mocks/", AUTH_REQUIRED, API_RATE_LIMIT),
+        ("GET", "/api/v1/mocks", AUTH_REQUIRED, API_RATE_LIMIT),
+        ("GET", "/api/v1/mocks/changes", AUTH_REQUIRED, API_RATE_LIMIT),
+        ("GET", "/api/v1/mocks/0b9f", AUTH_REQUIRED, API_RATE_LIMIT),
+        ("POST", "/api/v1/mocks/0b9f/simulate", AUTH_OPTIONAL, API_RATE_LIMIT),
+        ("POST", "/api/v1/mocks/public/test", AUTH_REQUIRED, "public_api"),
+        ("GET", "/api/v1/mocks/templates/crud", AUTH_PUBLIC, API_RATE_LIMIT),
+        ("GET", "/api/v1/simulate/users/42/orders", AUTH_PUBLIC, "simulation"),
+        ("POST", "/api/v1/ai/generate", AUTH_REQUIRED, "ai"),
+        ("GET", "/api/v1/ai/health", AUTH_REQUIRED, "ai"),
+        ("GET", "/api/v1/health/live", AUTH_REQUIRED, API_RATE_LIMIT),
+        ("GET", "/api/v1/unknown", AUTH_REQUIRED, API_RATE_LIMIT),
+        ("GET", "/docs/oauth2-redirect", AUTH_OPTIONAL, None),
+    ],
+)
+def test_app_routes(table, method, path, auth, rate_limit):
+    policy = table.lookup(method, path)
+
+    assert (policy.auth, policy.rate_limit) == (auth, rate_limit)
+
+
+def test_first_declared_route_wins(table):
+    """GET /mocks/{mock_id} is declared before GET /mocks/public and serves it"""
+    assert table.lookup("GET", "/api/v1/mocks/public").auth == AUTH_REQUIRED
+    assert table.lookup("DELETE", "/api/v1/mocks/public").auth == AUTH_REQUIRED
+
+    router = APIRouter()
+
+    @router.get("/items/{item_id}")
+    async def item(item_id: str, user=Depends(get_current_user)):
+        return item_id
+
+    @router.get("/items/latest", dependencies=[Depends(public_route)])
+    async def latest():
+        return {}
+
+    @router.get("/tags/latest")
+    async def latest_tag(user=Depends(get_optional_user)):
+        return {}
+
+    @router.get("/tags/{tag}")
+    async def tag(tag: str, user=Depends(get_current_user)):
+        return tag
+
+    custom = FastAPI()
+    custom.include_router(router, prefix="/api/v1")
+    policies = RoutePolicyTable()
+    policies.compile(custom.routes)
+
+    assert policies.lookup("GET", "/api/v1/items/latest").auth == AUTH_REQUIRED
+    assert policies.lookup("GET", "/api/v1/tags/latest").auth == AUTH_OPTIONAL
+    assert policies.lookup("GET", "/api/v1/tags/python").auth == AUTH_REQUIRED
+
+
+def test_auth_comes_from_dependencies_then_paths():
+    """Declared dependencies decide authentication, the path rules apply otherwise"""
+    router = APIRouter()
+
+    @router.get("/mocks/stats")
+    async def stats():
+        return {}
+
+    @router.get("/mocks/status", dependencies=[Depends(public_route)])
+    async def status():
+        return {}
+
+    @router.get("/simulate/admin")
+    async def admin(user=Depends(get_current_user)):
+        return {}
+
+    custom = FastAPI()
+    custom.include_router(router, prefix="/api/v1")
+    policies = RoutePolicyTable()
+    policies.compile(custom.routes)
+
+    # No auth dependency is not an opt-out: API routes still require a token
+    stats_policy = policies.lookup("GET", "/api/v1/mocks/stats")
+    assert (stats_policy.auth, stats_policy.rate_limit) == (
+        AUTH_REQUIRED,
+        API_RATE_LIMIT,
+    )
+    assert policies.lookup("GET", "/api/v1/mocks/status").auth == AUTH_PUBLIC
+    admin_policy = policies.lookup("GET", "/api/v1/simulate/admin")
+    assert (admin_policy.auth, admin_policy.rate_limit) == (AUTH_REQUIRED, "simulation")
+
+
+def test_routes_without_auth_dependency_reject_anonymous_requests(client):
+    assert client.post("/api/v1/mocks/public/test").status_code == 401
+    assert client.get("/api/v1/ai/health").status_code == 401
+
+
+def test_generate_outside_ai_routes_is_not_ai(table):
+    """Only the ai area is rate limited as AI, not any path containing /generate"""
+    assert (
+        table.lookup("GET", "/api/v1/simulate/generate-report").rate_limit
+        == "simulation"
+    )
+    assert classify("GET", "/api/v1/mocks/generate").rate_limit == API_RATE_LIMIT
+
+
+def test_body_size_overrides(table):
+    assert (
+        table.lookup("POST", "/api/v1/mocks/import").max_body_size
+        > DEFAULT_MAX_BODY_SIZE
+    )
+    assert table.lookup("POST", "/api/v1/mocks/").max_body_size == DEFAULT_MAX_BODY_SIZE
+
+
+def test_compiles_included_routers_and_catch_all():
+    router = APIRouter()
+
+    @router.get("/files/{path:path}")
+    async def files(path: str):
+        return path
+
+    @router.get("/files/{name}/meta")
+    async def meta(name: str):
+        return name
+
+    custom = FastAPI()
+    custom.include_router(router, prefix="/api/v1/simulate")
+    policies = RoutePolicyTable()
+    policies.compile(custom.routes)
+
+    assert (
+        policies.lookup("GET", "/api/v1/simulate/files/a/b/c").rate_limit
+        == "simulation"
+    )
+    assert policies.lookup("GET", "/api/v1/simulate/files/a/meta").auth == AUTH_PUBLIC
+    # Methods a route does not serve fall back to the path rules
+    assert policies.lookup("POST", "/api/v1/simulate/files/a").auth == AUTH_PUBLIC
+
+
+def test_pipeline_compiles_on_first_request():
+    seen = []
+
+    class Capture(Stage):
+        async def on_request(self, ctx):
+            seen.append(ctx.policy)
+
+    custom = FastAPI()
+
+    @custom.get("/api/v1/mocks/public")
+    async def public():
+        return {}
+
+    custom.add_middleware(RequestPipeline, stages=[Capture()])
+
+    response = TestClient(custom).get("/api/v1/mocks/public")
+
+    assert response.status_code == 200
+    assert seen[0].auth == AUTH_PUBLIC
+    assert seen[0].rate_limit == "public_api"
+
+
+def test_app_health_rate_limit_type(client):
+    response = client.get("/health")
+
+    assert response.headers["X-RateLimit-Type"] == "health"
@@ -0,0 +1,115 @@
+"""
+Tests for fast JSON response encoding
+"""
+
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from unittest.mock import patch
+from uuid import UUID
+
+import jwt
+import pytest
+
+from app.core import serialization
+from app.core.serialization import FastJSONResponse, dumps
+from app.schemas.schemas import BaseResponse
+
+
+class Color(str, Enum):
+    RED = "red"
+
+
+CONTENT = {
+    "id": UUID("987fcdeb-51d3-42a1-b456-123456789abc"),
+    "at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+    "color": Color.RED,
+    "price": Decimal("1.50"),
+    "count": Decimal("3"),
+    "tags": {"a"},
+    "text": "héllo",
+    "nested": [{"model": BaseResponse(message="ok", timestamp=datetime(2024, 1, 1))}],
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request):
+    """Run each test with orjson and with the standard library fallback"""
+    if request.param == "orjson":
+        if not serialization.HAS_ORJSON:
+            pytest.skip("orjson not installed")
+        yield
+    else:
+        with patch.object(serialization, "orjson", None):
+            yield
+
+
+def test_encodes_integers_beyond_64_bits(encoder):
+    content = {
+        "big": 2**64,
+        "negative": -(2**70),
+        "decimal": Decimal(2**65),
+        "small": 1,
+    }
+
+    assert json.loads(dumps(content)) == {
+        "big": 2**64,
+        "negative": -(2**70),
+        "decimal": 2**65,
+        "small": 1,
+    }
+
+
+def test_encodes_common_types(encoder):
+    decoded = json.loads(dumps(CONTENT))
+
+    assert decoded["id"] == "987fcdeb-51d3-42a1-b456-123456789abc"
+    assert decoded["at"].startswith("2024-01-01T00:00:00")
+    assert decoded["color"] == "red"
+    assert decoded["price"] == 1.5
+    assert decoded["count"] == 3
+    assert decoded["tags"] == ["a"]
+    assert decoded["text"] == "héllo"
+    assert decoded["nested"][0]["model"]["message"] == "ok"
+
+
+def test_compact_utf8(encoder):
+    assert dumps({"a": [1, 2], "b": "é"}) == '{"a":[1,2],"b":"é"}'.encode("utf-8")
+
+
+def test_unsupported_type(encoder):
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_models_use_pydantic_core():
+    model = BaseResponse(message="ok")
+
+    assert dumps(model) == model.model_dump_json().encode("utf-8")
+
+
+def test_response_renders_with_dumps():
+    response = FastJSONResponse(
+        {"id": CONTENT["id"]}, status_code=201, headers={"X-Mock": "1"}
+    )
+
+    assert response.body == b'{"id":"987fcdeb-51d3-42a1-b456-123456789abc"}'
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["x-mock"] == "1"
+
+
+def test_exception_handler_uses_fast_response(client, fake_supabase):
+    token = jwt.encode(
+        {"sub": "123e4567-e89b-12d3-a456-426614174000"},
+        "test-secret",
+        algorithm="HS256",
+    )
+
+    response = client.get(
+        "/api/v1/simulate/missing", headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 404
+    assert response.json()["error_code"] == "HTTP_404"